@@ -8,6 +8,7 @@ import sys
 from datetime import datetime, timedelta
 from PIL import Image
 import config
+import html
 import io
 import tempfile
 
@@ -19,25 +20,21 @@ if current_dir not in sys.path:
 
 
 # Import our custom modules
-from config import DEFAULT_CITY, DEFAULT_COUNTRY, DEFAULT_COUNTRY_CODE, load_api_keys, get_country_code
-from utils.weather_service import WeatherService
-from utils.plant_service import PlantService
-from utils.gemini_service import GeminiService
-from utils.huggingface_service import HuggingFaceService
-from utils.groq_service import GroqService
-from utils.data_manager import DataManager
-
-# Import requests for location API
-import requests
-
-# Try to import voice-related packages, fallback if not available
-SPEECH_RECOGNITION_AVAILABLE = False
+from config import DEFAULT_CITY, DEFAULT_COUNTRY, get_country_code
+from garden_core import (
+    GardenServices, default_location, resolve_location, detect_location, find_nearby_nurseries,
+    alert_messages, plant_status, soil_predictions, add_plant, import_plants, export_plants, detect_format,
+    identify_plant, analyze_plant_health, ask_botanist
+)
+from garden_core.bulk import IMPORT_FORMATS, IMPORTED_FIELDS
+from utils.image_prescreen import prescreen_image
+from utils.metrics import start_metrics_exporter
+from utils.memory_report import session_memory_report
+from utils.tracing import start_render, traced, exporter as trace_exporter, waterfall_rows, section_summary, profile_report, profile_bytes
+from utils.data_manager import new_user_id, new_guest_id, is_issued_user_id, move_user_data, PLANT_SORT_OPTIONS, PLANT_URGENCY_LEVELS
 
-try:
-    import speech_recognition as sr
-    SPEECH_RECOGNITION_AVAILABLE = True
-except ImportError:
-    pass
+# Every full run is one trace; render.mark() starts the next timed section (see the Render Profiler page)
+render = start_render()
 
 # Page Configuration
 st.set_page_config(
@@ -47,13 +44,8 @@ st.set_page_config(
     initial_sidebar_state="expanded"
 )
 
-# Load API keys from secrets or environment variables
-# This must be called after Streamlit is initialized
-config.load_api_keys()
-
-
-
 # Custom CSS for beautiful green-themed UI with animations
+render.mark("styles")
 st.markdown("""
 <style>
     /* Main Background - Green Theme */
@@ -454,220 +446,353 @@ st.markdown("""
 """, unsafe_allow_html=True)
 
 # Initialize Services
-@st.cache_resource
-def init_services():
-    """Initialize all services (cached for performance)"""
-    return {
-        'weather': WeatherService(),
-        'plant': PlantService(),
-        'gemini': GeminiService(),      # For health analysis (vision)
-        'huggingface': HuggingFaceService(),  # For plant identification only
-        'groq': GroqService(),          # For fast chat responses
-        'data': DataManager()
-    }
+@st.cache_resource(max_entries=1)
+def init_services(settings):
+    """Initialize all services (cached for performance; rebuilt only when the resolved settings change)"""
+    start_metrics_exporter()  # No-op unless METRICS_PORT / METRICS_FILE are set
+    services = GardenServices()
+    services.digests.start_prefetcher()  # Keeps visited locations' digests fresh between renders
+    return services
 
-services = init_services()
-weather_service = services['weather']
-plant_service = services['plant']
-gemini_service = services['gemini']      # For health analysis
-huggingface_service = services['huggingface']  # For plant identification
-groq_service = services['groq']
-data_manager = services['data']
+render.mark("services")
+services = init_services(config.get_settings())
+weather_service = services.weather
+plant_service = services.plant
+groq_service = services.groq
+image_store = services.images
+transcription_service = services.transcription
 
-# Location Detection Functions
-def get_current_location():
-    """Get current location using IP-based API (Free, no key required)"""
-    try:
-        # Try secure HTTPS first (ipapi.co - more reliable)
-        response = requests.get("https://ipapi.co/json/", timeout=10)
-        if response.status_code == 200:
-            data = response.json()
-            city = data.get('city')
-            country_name = data.get('country_name')
-            country_code = data.get('country_code', '')
-            
-            # Validate we got actual data
-            if city and country_name:
-                # Ensure country_code is set (convert if needed)
-                if not country_code:
-                    country_code = get_country_code(country_name)
-                return {
-                    "city": city,
-                    "country": country_name,
-                    "country_code": country_code or get_country_code(country_name),
-                    "lat": data.get('latitude'),
-                    "lon": data.get('longitude'),
-                    "region": data.get('region', '')
-                }
-    except Exception as e:
-        print(f"Location detection (ipapi.co) failed: {e}")
-        pass
+# Resolve which user's garden this session works on
+# The id is kept in the URL so a page refresh returns to the same garden; it is random,
+# so knowing it is the proof of ownership (ids the app did not issue start a new guest garden)
+render.mark("session")
+if 'user_id' not in st.session_state:
+    url_user_id = st.query_params.get("uid")
+    st.session_state.user_id = url_user_id if is_issued_user_id(url_user_id) else new_guest_id()
+    st.query_params["uid"] = st.session_state.user_id
+# One DataManager per user namespace, shared by all of that user's sessions
+data_manager = services.data_manager(st.session_state.user_id)
+
+# Dashboard Building Blocks
+# The weather banner and every plant card are fragments: a button inside a card reruns
+# only that card, not the whole script (CSS, weather calls and the other cards)
+def load_location_digest(city, country_code):
+    """Weather digest of a location for this hour (process-wide; shared by the banner, alerts and all cards)"""
+    with st.spinner("Loading weather data..."):
+        return services.digests.get(city, country_code)
+
+@st.fragment
+@traced("weather banner", standalone=True)
+def render_weather_banner(user_city, user_country_code):
+    """Weather banner with animated sun/moon, wind and sunrise/sunset"""
+    current_weather = load_location_digest(user_city, user_country_code)['weather']['current']
     
-    try:
-        # Fallback to ip-api.com (HTTP, but works well)
-        response = requests.get("http://ip-api.com/json/", timeout=10)
-        if response.status_code == 200:
-            data = response.json()
-            if data.get('status') == 'success':
-                city = data.get('city')
-                country = data.get('country')
-                
-                # Validate we got actual data
-                if city and country:
-                    country_code = data.get('countryCode', '') or get_country_code(country)
-                    return {
-                        "city": city,
-                        "country": country,
-                        "country_code": country_code,
-                        "lat": data.get('lat'),
-                        "lon": data.get('lon'),
-                        "region": data.get('regionName', '')
-                    }
-    except Exception as e:
-        print(f"Location detection (ip-api.com) failed: {e}")
-        pass
-    
-    # Final fallback - return default but log that detection failed
-    print(f"⚠️ Location detection failed, using default: {DEFAULT_CITY}, {DEFAULT_COUNTRY}")
-    return {
-        "city": DEFAULT_CITY,
-        "country": DEFAULT_COUNTRY,
-        "country_code": "PK",
-        "lat": None,
-        "lon": None,
-        "region": ""
-    }
+    # Weather Banner with Animated Sun/Moon
+    col1, col2, col3 = st.columns([2.5, 1, 1])
+    
+    # Determine if it's day or night
+    current_hour = datetime.now().hour
+    sunrise = current_weather.get('sunrise')
+    sunset = current_weather.get('sunset')
+    is_daytime = True
+    
+    if sunrise and sunset:
+        sunrise_hour = sunrise.hour
+        sunset_hour = sunset.hour
+        is_daytime = sunrise_hour <= current_hour <= sunset_hour
+    
+    # Animated Sun/Moon based on time
+    if is_daytime:
+        sun_moon_icon = """
+        <div style="text-align: center;">
+            <span class="animated-sun" style="font-size: 4em;">☀️</span>
+        </div>
+        """
+    else:
+        sun_moon_icon = """
+        <div style="text-align: center;">
+            <span class="animated-moon" style="font-size: 4em;">🌙</span>
+        </div>
+        """
+    
+    with col1:
+        weather_icon = current_weather.get('icon', '01d')
+        temp = current_weather.get('temperature', 25)
+        condition = current_weather.get('description', 'clear sky').title()
+        feels_like = current_weather.get('feels_like', temp)
+        humidity = current_weather.get('humidity', 60)
+        cloud_cover = current_weather.get('cloud_cover', 0)
+        
+        st.markdown(f"""
+        <div class="weather-banner">
+            <h2>🌤️ {user_city} Weather</h2>
+            <h1 style="font-size: 3em; margin: 10px 0;">{temp}°C</h1>
+            <p style="font-size: 1.2em;">{condition} • Feels like {feels_like}°C</p>
+            <p>💧 Humidity: {humidity}% • ☁️ Cloud Cover: {cloud_cover}%</p>
+        </div>
+        """, unsafe_allow_html=True)
+    
+    with col2:
+        st.markdown(sun_moon_icon, unsafe_allow_html=True)
+        st.markdown(f"""
+        <div style="background: rgba(255,255,255,0.2); padding: 15px; border-radius: 10px; text-align: center; margin-top: 10px;">
+            <div style="font-size: 0.9em; color: white; font-weight: bold;">Wind Speed</div>
+            <div style="font-size: 1.5em; color: white; margin-top: 5px;">{current_weather.get('wind_speed', 0)} m/s</div>
+        </div>
+        """, unsafe_allow_html=True)
+    
+    with col3:
+        if sunrise and sunset:
+            st.markdown(f"""
+            <div style="background: rgba(255,255,255,0.2); padding: 15px; border-radius: 10px; text-align: center;">
+                <div style="font-size: 1.2em; margin-bottom: 10px;">🌅</div>
+                <div style="font-size: 0.9em; color: white; font-weight: bold;">Sunrise</div>
+                <div style="font-size: 1.3em; color: white; margin-top: 5px;">{sunrise.strftime('%H:%M')}</div>
+                <div style="font-size: 1.2em; margin: 15px 0 10px 0;">🌇</div>
+                <div style="font-size: 0.9em; color: white; font-weight: bold;">Sunset</div>
+                <div style="font-size: 1.3em; color: white; margin-top: 5px;">{sunset.strftime('%H:%M')}</div>
+            </div>
+            """, unsafe_allow_html=True)
+        else:
+            st.markdown("""
+            <div style="background: rgba(255,255,255,0.2); padding: 15px; border-radius: 10px; text-align: center;">
+                <div style="color: white;">Time data unavailable</div>
+            </div>
+            """, unsafe_allow_html=True)
+
+# Card colours / badges for the statuses computed by garden_core
+WATER_STATUS_COLORS = {"Needs Water Today": "#f57c00", "Water Soon": "#ff9800", "Well Watered": "#4caf50"}
+TEMP_STATUS_COLORS = {"Too Hot!": "#f44336", "Warm": "#ff9800", "Too Cold": "#2196f3", "Comfortable": "#4caf50"}
+PLANT_CATEGORY_BADGES = {"flower": ("🌸 Flower", "#e91e63"), "tree": ("🌳 Tree", "#8bc34a"), "plant": ("🌱 Plant", "#4caf50")}
+PLANT_WEATHER_ALERTS = {
+    "storm": '<div style="background: #ffebee; border-left: 4px solid #f44336; padding: 8px; margin: 10px 0; border-radius: 4px;"><strong>⚠️ Storm Alert:</strong> Move indoors!</div>',
+    "rain": '<div style="background: #fff3e0; border-left: 4px solid #ff9800; padding: 8px; margin: 10px 0; border-radius: 4px;"><strong>🌧️ Rain Alert:</strong> Consider shelter</div>',
+    "heat": '<div style="background: #fff3e0; border-left: 4px solid #ff9800; padding: 8px; margin: 10px 0; border-radius: 4px;"><strong>☀️ Heat Alert:</strong> Provide extra water</div>'
+}
 
-def find_nearby_nurseries(lat, lon, radius_km=10):
+def mark_card_watered(plant):
+    """Water button callback: log the watering and keep the updated record for the card"""
+    updated = data_manager.mark_watered(plant.get('id'))
+    if updated:
+        st.session_state.card_updates[plant.get('id')] = updated
+        st.toast(f"✅ {plant.get('name')} marked as watered!")
+
+@st.fragment
+def render_weather_history(user_city, user_country_code):
+    """Observed weather of the last 7 days, read from the local observation store (no API calls)"""
+    with st.expander("📈 Last 7 Days", expanded=False):
+        observations = services.observations.location(user_city, user_country_code)
+        history = observations.hourly(7 * 24)
+        if not history:
+            st.caption("No observations yet. They are recorded each time the weather is refreshed.")
+            return
+        chart_data = {
+            "Time": [row['datetime'] for row in history],
+            "Temperature (°C)": [row['temperature'] for row in history],
+            "Humidity (%)": [row['humidity'] for row in history],
+            "Rain (mm)": [row['precipitation'] for row in history]
+        }
+        st.line_chart(chart_data, x="Time", y=["Temperature (°C)", "Humidity (%)"], height=220)
+        st.bar_chart(chart_data, x="Time", y="Rain (mm)", height=140)
+        st.caption(f"{len(history)} observed hours • rain in the last 24 h: {observations.precipitation_within(24):.1f} mm")
+
+@st.fragment
+@traced("plant card", standalone=True)
+def render_plant_card(plant, user_city, user_country_code, soil=None):
+    """One dashboard plant card with its quick actions (soil: the plant's soil-water prediction)"""
+    digest = load_location_digest(user_city, user_country_code)
+    # Latest copy of this plant (updated in place by the Water button; its soil state restarts then)
+    if plant.get('id') in st.session_state.card_updates:
+        plant = st.session_state.card_updates[plant.get('id')]
+        soil = soil_predictions(services.soil, data_manager, [plant], digest)[plant.get('id')]
+    status = plant_status(
+        plant,
+        digest,
+        plant_service,
+        learned_interval_days=data_manager.get_learned_interval(plant.get('id')),
+        soil=soil
+    )
+    watering_status = status['watering']
+    water_status, water_color = status['water_status'], WATER_STATUS_COLORS[status['water_status']]
+    sun_hours = status['sun_hours']
+    temp_status, temp_color = status['temp_status'], TEMP_STATUS_COLORS[status['temp_status']]
+    category, category_color = PLANT_CATEGORY_BADGES[status['category']]
+    weather_alert = PLANT_WEATHER_ALERTS.get(status['weather_alert'], "")
+    
+    # Plant Card using Streamlit components (no HTML code boxes)
+    # Wrap in a styled container
+    st.markdown('<div class="plant-card">', unsafe_allow_html=True)
+    
+    # Display weather alert if exists
+    if weather_alert:
+        st.markdown(weather_alert, unsafe_allow_html=True)
+    
+    # Plant name and category
+    col_name, col_cat = st.columns([3, 1])
+    with col_name:
+        st.markdown(f"### {plant.get('name', 'Unknown Plant')}")
+    with col_cat:
+        st.markdown(f'<span style="background: {category_color}; color: white; padding: 4px 12px; border-radius: 20px; font-size: 0.85em; font-weight: bold;">{category}</span>', unsafe_allow_html=True)
+    
+    # Plant photo (small thumbnail, never the full-size original)
+    if plant.get('image_hash'):
+        thumbnail_path = image_store.get_thumbnail(plant['image_hash'])
+        if thumbnail_path:
+            st.image(thumbnail_path, width=160)
+    
+    # Location
+    st.caption(f"📍 {plant.get('placement', 'Unknown Location')}")
+    if watering_status.get('interval_source') == "learned":
+        st.caption(f"📈 You usually water every {watering_status.get('adjusted_interval')} day(s)")
+    if watering_status.get('next_water_at'):
+        st.caption(f"🕒 {watering_status['message']} Soil moisture {watering_status['moisture']:.0%}")
+    
+    # Status indicators in a styled box
+    st.markdown(f"""
+    <div style="background: #f5f5f5; padding: 12px; border-radius: 8px; margin: 10px 0;">
+        <div style="margin-bottom: 10px;">
+            <div style="display: flex; justify-content: space-between;">
+                <span style="font-weight: bold; color: #333;">💧 Water Status:</span>
+                <span style="color: {water_color}; font-weight: bold;">{water_status}</span>
+            </div>
+        </div>
+        <div style="margin-bottom: 10px;">
+            <div style="display: flex; justify-content: space-between; margin-bottom: 5px;">
+                <span style="font-weight: bold; color: #333;">☀️ Sunlight:</span>
+                <span style="color: #333;">Getting {sun_hours}hrs sun</span>
+            </div>
+        </div>
+        <div>
+            <div style="display: flex; justify-content: space-between;">
+                <span style="font-weight: bold; color: #333;">🌡 Temperature:</span>
+                <span style="color: {temp_color}; font-weight: bold;">{temp_status}</span>
+            </div>
+        </div>
+    </div>
+    """, unsafe_allow_html=True)
+    
+    # Sunlight progress bar
+    st.progress(status['sun_share'])
+    
+    st.markdown('</div>', unsafe_allow_html=True)
+    
+    # Quick action buttons
+    col_btn1, col_btn2, col_btn3 = st.columns(3)
+    with col_btn1:
+        if st.button("💬 Ask AI", key=f"ask_{plant.get('id')}", use_container_width=True):
+            # Store plant name for AI Botanist context
+            plant_name = plant.get('name')
+            st.session_state.selected_plant = plant_name
+            st.session_state.ask_about_plant = plant_name
+            # Set flag to switch page (will be processed before widget creation on rerun)
+            st.session_state.switch_to_page = "🤖 AI Botanist"
+            st.rerun(scope="app")
+    
+    with col_btn2:
+        # Runs before this card rerenders - only this card is rerun
+        st.button("💧 Water", key=f"water_{plant.get('id')}", use_container_width=True,
+                  on_click=mark_card_watered, args=(plant,))
+    
+    with col_btn3:
+        if st.button("🗑️ Remove", key=f"remove_{plant.get('id')}", use_container_width=True):
+            data_manager.delete_plant(plant.get('id'))
+            st.success(f"🗑️ {plant.get('name')} removed")
+            # The grid changes, so the whole page reruns
+            st.rerun(scope="app")
+    
+    st.markdown("---")
+
+# Voice Transcription Display
+@st.fragment(run_every=1.0)
+def show_transcription_progress(job_id):
+    """Shown while a recording is being transcribed; polls the job once per second"""
+    job = transcription_service.get_job(job_id)
+    if job is None or job['status'] not in ("queued", "running"):
+        st.rerun(scope="app")
+    st.info("🎤 Transcribing your voice... You can keep using the app meanwhile.")
+
+def show_transcription_result(job):
+    """Show a finished transcription; the text becomes the next question once per recording"""
+    if job['status'] == "done":
+        if st.session_state.get('voice_job_used') != job['id']:
+            st.session_state.voice_job_used = job['id']
+            st.session_state.voice_question = job['text']
+            st.balloons()
+        st.success(f"🗣️ **You said:** {job['text']}")
+        if job.get('truncated'):
+            st.caption(f"Only the first {config.TRANSCRIPTION_MAX_SECONDS} seconds were transcribed.")
+        st.markdown("""
+        <div style="background: rgba(255, 255, 255, 0.95); padding: 15px; border-radius: 10px; border-left: 4px solid #2196f3; margin: 15px 0; box-shadow: 0 2px 8px rgba(0,0,0,0.1);">
+            <p style="color: #1b5e20; font-weight: 500; margin: 0; font-size: 1em;">💡 <strong>Your question is ready!</strong> Scroll down to see the response.</p>
+        </div>
+        """, unsafe_allow_html=True)
+    else:
+        st.markdown(f"""
+        <div style="background: rgba(255, 255, 255, 0.95); padding: 15px; border-radius: 10px; border-left: 4px solid #ff9800; margin: 15px 0; box-shadow: 0 2px 8px rgba(0,0,0,0.1);">
+            <p style="color: #1b5e20; font-weight: 500; margin: 0; font-size: 1em;">⚠️ <strong>{job.get('error') or 'Could not transcribe audio.'}</strong> Please try again or type your question instead.</p>
+        </div>
+        """, unsafe_allow_html=True)
+
+def collect_sessions():
     """
-    Find nearby plant nurseries
-    Uses Overpass API (OpenStreetMap) for free, no-key-required search
-    Falls back to mock data if API fails (perfect for hackathon demo)
+    State and held uploads of every session in this server process, for the memory report
+    Reads Streamlit runtime internals; falls back to this session alone if they are not available
     """
+    from streamlit.runtime import Runtime
+    this_session = [{"id": "this session", "state": st.session_state.to_dict(), "upload_bytes": 0}]
+    if not Runtime.exists():
+        return this_session  # e.g. under AppTest
     try:
-        # Try to use Overpass API (OpenStreetMap - Free, no key required)
-        overpass_url = "http://overpass-api.de/api/interpreter"
-        
-        # Query for plant nurseries, garden centers, and flower shops
-        query = f"""
-        [out:json][timeout:10];
-        (
-          node["shop"="garden_centre"](around:{radius_km*1000},{lat},{lon});
-          node["amenity"="marketplace"]["name"~"plant|nursery|garden",i](around:{radius_km*1000},{lat},{lon});
-          node["shop"~"florist|garden",i](around:{radius_km*1000},{lat},{lon});
-        );
-        out body;
-        """
-        
-        response = requests.get(overpass_url, params={'data': query}, timeout=10)
-        
-        if response.status_code == 200:
-            data = response.json()
-            elements = data.get('elements', [])
-            
-            if elements:
-                nurseries = []
-                for elem in elements[:10]:  # Limit to 10 results
-                    tags = elem.get('tags', {})
-                    name = tags.get('name', 'Plant Nursery')
-                    address = tags.get('addr:full') or tags.get('addr:street', 'Address not available')
-                    
-                    # Calculate distance (simple approximation)
-                    elem_lat = elem.get('lat', lat)
-                    elem_lon = elem.get('lon', lon)
-                    distance_km = ((elem_lat - lat)**2 + (elem_lon - lon)**2)**0.5 * 111  # Rough km conversion
-                    
-                    nurseries.append({
-                        "name": name,
-                        "address": address,
-                        "distance": f"{distance_km:.1f} km",
-                        "phone": tags.get('phone', 'N/A'),
-                        "rating": 4.0 + (hash(name) % 10) / 10,  # Mock rating
-                        "lat": elem_lat,
-                        "lon": elem_lon
-                    })
-                
-                if nurseries:
-                    return nurseries
+        runtime = Runtime.instance()
+        upload_storage = getattr(runtime.uploaded_file_mgr, "file_storage", {})
+        sessions = []
+        for session_info in runtime._session_mgr.list_active_sessions():
+            session = session_info.session
+            try:
+                state = dict(session.session_state.filtered_state)
+            except RuntimeError:
+                continue  # State changed while copying (script running); skip this session
+            uploads = dict(upload_storage.get(session.id, {}))
+            sessions.append({"id": session.id, "state": state, "upload_bytes": sum(len(f.data) for f in uploads.values())})
+        return sessions
     except Exception as e:
-        print(f"Overpass API error: {e}")
-        pass
-    
-    # Fallback to mock data with location-based coordinates (Perfect for hackathon)
-    city_name = st.session_state.user_location.get('city', 'Sialkot')
-    mock_nurseries = [
-        {
-            "name": f"Green Valley Plant Nursery",
-            "address": f"Main Boulevard, {city_name}",
-            "distance": "2.5 km",
-            "phone": "+92 300 1234567",
-            "rating": 4.5,
-            "lat": lat + 0.02 if lat else 32.5,
-            "lon": lon + 0.02 if lon else 74.5
-        },
-        {
-            "name": f"Flora Garden Center",
-            "address": f"Garden Road, {city_name}",
-            "distance": "4.1 km",
-            "phone": "+92 300 2345678",
-            "rating": 4.2,
-            "lat": lat - 0.03 if lat else 32.48,
-            "lon": lon + 0.01 if lon else 74.52
-        },
-        {
-            "name": f"Nature's Paradise",
-            "address": f"City Center, {city_name}",
-            "distance": "5.8 km",
-            "phone": "+92 300 3456789",
-            "rating": 4.7,
-            "lat": lat + 0.01 if lat else 32.51,
-            "lon": lon - 0.02 if lon else 74.48
-        },
-        {
-            "name": f"Botanical Gardens Shop",
-            "address": f"Highway Road, {city_name}",
-            "distance": "7.2 km",
-            "phone": "+92 300 4567890",
-            "rating": 4.0,
-            "lat": lat - 0.04 if lat else 32.46,
-            "lon": lon - 0.01 if lon else 74.49
-        },
-        {
-            "name": f"Green Thumb Nursery",
-            "address": f"Residential Area, {city_name}",
-            "distance": "8.5 km",
-            "phone": "+92 300 5678901",
-            "rating": 4.3,
-            "lat": lat + 0.03 if lat else 32.53,
-            "lon": lon + 0.03 if lon else 74.53
-        }
-    ]
-    return mock_nurseries
+        print(f"Session memory report error: {e}")
+        return this_session
+
+# Garden data lives once per process in the shared store; a session keeps only the versions it rendered
+def session_plants():
+    """The user's plants (shared read-only snapshot, reloaded after any save)"""
+    snapshot = services.plants_snapshot(data_manager)
+    st.session_state.plants_version = snapshot.version
+    return snapshot.data
+
+def session_chat_history():
+    """The user's recent chat messages (shared read-only snapshot)"""
+    snapshot = services.chat_snapshot(data_manager)
+    st.session_state.chat_version = snapshot.version
+    return snapshot.data
+
+def release_plant_photo():
+    """Forget the uploaded photo and its identification after a submit (frees the upload buffer)"""
+    st.session_state.plant_photo_generation = st.session_state.get('plant_photo_generation', 0) + 1
+    for key in ('identified_name', 'identified_scientific', 'identified_description', 'identified_care_level'):
+        st.session_state.pop(key, None)
 
 # Initialize Session State
-if 'plants' not in st.session_state:
-    st.session_state.plants = data_manager.get_all_plants()
 if 'current_page' not in st.session_state:
     st.session_state.current_page = "Dashboard"
-if 'chat_history' not in st.session_state:
-    st.session_state.chat_history = data_manager.get_chat_history(20)
 if 'user_location' not in st.session_state:
     # On Streamlit Cloud, IP-based detection will show server location (US)
     # So we default to user's location instead of auto-detecting
     # User can manually set their location in "Location & Nurseries" page
-    st.session_state.user_location = {
-        "city": DEFAULT_CITY, 
-        "country": DEFAULT_COUNTRY, 
-        "lat": None, 
-        "lon": None, 
-        "country_code": DEFAULT_COUNTRY_CODE
-    }
+    st.session_state.user_location = default_location()
 if 'use_auto_location' not in st.session_state:
     st.session_state.use_auto_location = False
 if 'location_detected' not in st.session_state:
     st.session_state.location_detected = False
 
 # Sidebar Navigation
+render.mark("sidebar")
 with st.sidebar:
     st.markdown("""
     <div style="text-align: center; padding: 20px 0;">
@@ -692,6 +817,9 @@ with st.sidebar:
     
     # Get page from radio button
     page_options = ["🏠 Welcome", "👤 User Profile", "📍 Location & Nurseries", "📊 Garden Dashboard", "🌱 Add a Plant", "🤖 AI Botanist"]
+    # Hidden admin page: only listed when the URL carries ?admin=<ADMIN_TOKEN>
+    if config.ADMIN_TOKEN and st.query_params.get("admin") == config.ADMIN_TOKEN:
+        page_options.append("🛠️ Render Profiler")
     # Use the session state value, but don't modify it after widget creation
     current_page = st.session_state.get('page_selector', "🏠 Welcome")
     default_index = page_options.index(current_page) if current_page in page_options else 0
@@ -703,6 +831,7 @@ with st.sidebar:
         label_visibility="collapsed",
         key="page_selector"
     )
+    render.set_key(page)
     
     st.markdown("---")
     
@@ -731,31 +860,19 @@ with st.sidebar:
     
     # Garden Stats Section
     st.markdown("### 📊 Garden Stats")
-    if st.session_state.plants:
-        total_plants = len(st.session_state.plants)
-        
-        # Calculate plants that need water
-        needs_water_count = 0
-        healthy_count = 0
-        
-        for plant in st.session_state.plants:
-            # Check if plant needs water (simplified logic)
-            last_watered = plant.get('last_watered')
-            watering_interval = plant.get('watering_interval_days', 3)
-            
-            if last_watered:
-                from datetime import datetime, timedelta
-                try:
-                    last_watered_date = datetime.fromisoformat(last_watered)
-                    days_since_watered = (datetime.now() - last_watered_date).days
-                    if days_since_watered >= watering_interval:
-                        needs_water_count += 1
-                    else:
-                        healthy_count += 1
-                except:
-                    needs_water_count += 1
-            else:
-                needs_water_count += 1
+    # Aggregates come from the garden index DataManager maintains on every save (no per-render rescan)
+    garden_summary = data_manager.get_garden_summary()
+    # On the Dashboard only: soil-water predictions of the whole garden (a shared snapshot, rerun when the
+    # plants or the digest change) so the counts here, the sort / filter and the plant cards agree
+    garden_soil, due_times = {}, None
+    if page == "📊 Garden Dashboard" and garden_summary['total']:
+        sidebar_city, _, sidebar_country_code = resolve_location(st.session_state.user_location)
+        garden_soil, due_times = services.soil_snapshot(data_manager, load_location_digest(sidebar_city, sidebar_country_code)).data
+        garden_summary = data_manager.get_garden_summary(due_times)
+    if garden_summary['total']:
+        total_plants = garden_summary['total']
+        needs_water_count = garden_summary['needs_water']
+        healthy_count = garden_summary['healthy']
         
         # Display stats
         st.metric("🌿 Total Plants", total_plants)
@@ -794,6 +911,7 @@ with st.sidebar:
 # ==========================================
 # PAGE 1: WELCOME PAGE
 # ==========================================
+render.mark(page)
 if page == "🏠 Welcome":
     st.markdown("""
     <div style="text-align: center; padding: 40px 20px;">
@@ -942,6 +1060,15 @@ elif page == "👤 User Profile":
         
         if submitted:
             if name and email:
+                # A guest gets a private namespace of their own, taking their garden along
+                # (the email is only a profile field: it never selects a namespace)
+                if st.session_state.user_id.startswith("guest-"):
+                    profile_user_id = new_user_id()
+                    move_user_data(st.session_state.user_id, profile_user_id)
+                    st.session_state.user_id = profile_user_id
+                    st.query_params["uid"] = profile_user_id
+                    data_manager = services.data_manager(profile_user_id)
+                
                 profile_data = {
                     "name": name,
                     "email": email,
@@ -958,6 +1085,7 @@ elif page == "👤 User Profile":
                     <p style="color: #1b5e20; font-weight: 500; margin: 0; font-size: 1em;">💡 <strong>Your profile has been updated.</strong> You can now enjoy personalized plant care recommendations!</p>
                 </div>
                 """, unsafe_allow_html=True)
+                st.info("🔖 Bookmark this page to come back to your garden: the link is its key, so keep it private.")
             else:
                 st.markdown("""
                 <div style="background: rgba(255, 255, 255, 0.95); padding: 15px; border-radius: 10px; border-left: 4px solid #f44336; margin: 15px 0; box-shadow: 0 2px 8px rgba(0,0,0,0.1);">
@@ -1021,7 +1149,7 @@ elif page == "📍 Location & Nurseries":
             st.session_state.use_auto_location = True
             if st.button("🔍 Detect Location", use_container_width=True):
                 with st.spinner("Detecting your location..."):
-                    location_data = get_current_location()
+                    location_data = detect_location()
                     st.session_state.user_location = location_data
                     st.success(f"✅ Location detected: {location_data['city']}, {location_data['country']}")
         else:
@@ -1104,7 +1232,7 @@ elif page == "📍 Location & Nurseries":
     if current_loc.get('lat') and current_loc.get('lon'):
         # Find nearby nurseries
         with st.spinner("🔍 Finding nearby nurseries..."):
-            nurseries = find_nearby_nurseries(current_loc['lat'], current_loc['lon'])
+            nurseries = find_nearby_nurseries(current_loc['lat'], current_loc['lon'], city=current_loc.get('city'))
         
         if nurseries:
             st.success(f"✅ Found {len(nurseries)} nurseries near you!")
@@ -1178,302 +1306,102 @@ elif page == "📊 Garden Dashboard":
     st.markdown('<h1 style="color: #ffffff; text-shadow: 2px 2px 4px rgba(0,0,0,0.5);">🌿 My Garden Dashboard</h1>', unsafe_allow_html=True)
     
     # Get Current Weather - Use user location if available
-    user_city = st.session_state.user_location.get('city', DEFAULT_CITY)
-    user_country = st.session_state.user_location.get('country', DEFAULT_COUNTRY)
-    # Get country code from user location or convert country name to code
-    user_country_code = st.session_state.user_location.get('country_code') or get_country_code(user_country)
-    
-    with st.spinner("Loading weather data..."):
-        current_weather = weather_service.get_current_weather(user_city, user_country_code)
-        forecast = weather_service.get_forecast(user_city, user_country_code, days=2)
-        rain_alert = weather_service.check_rain_alert(user_city, user_country_code, hours_ahead=24)
-        storm_alert = weather_service.check_storm_alert(user_city, user_country_code, hours_ahead=24)
+    user_city, user_country, user_country_code = resolve_location(st.session_state.user_location)
     
     # Weather Banner with Animated Sun/Moon
-    col1, col2, col3 = st.columns([2.5, 1, 1])
-    
-    # Determine if it's day or night
-    current_hour = datetime.now().hour
-    sunrise = current_weather.get('sunrise')
-    sunset = current_weather.get('sunset')
-    is_daytime = True
-    
-    if sunrise and sunset:
-        sunrise_hour = sunrise.hour
-        sunset_hour = sunset.hour
-        is_daytime = sunrise_hour <= current_hour <= sunset_hour
-    
-    # Animated Sun/Moon based on time
-    if is_daytime:
-        sun_moon_icon = """
-        <div style="text-align: center;">
-            <span class="animated-sun" style="font-size: 4em;">☀️</span>
-        </div>
-        """
-    else:
-        sun_moon_icon = """
-        <div style="text-align: center;">
-            <span class="animated-moon" style="font-size: 4em;">🌙</span>
-        </div>
-        """
-    
-    with col1:
-        weather_icon = current_weather.get('icon', '01d')
-        temp = current_weather.get('temperature', 25)
-        condition = current_weather.get('description', 'clear sky').title()
-        feels_like = current_weather.get('feels_like', temp)
-        humidity = current_weather.get('humidity', 60)
-        cloud_cover = current_weather.get('cloud_cover', 0)
-        
-        st.markdown(f"""
-        <div class="weather-banner">
-            <h2>🌤️ {user_city} Weather</h2>
-            <h1 style="font-size: 3em; margin: 10px 0;">{temp}°C</h1>
-            <p style="font-size: 1.2em;">{condition} • Feels like {feels_like}°C</p>
-            <p>💧 Humidity: {humidity}% • ☁️ Cloud Cover: {cloud_cover}%</p>
-        </div>
-        """, unsafe_allow_html=True)
-    
-    with col2:
-        st.markdown(sun_moon_icon, unsafe_allow_html=True)
-        st.markdown(f"""
-        <div style="background: rgba(255,255,255,0.2); padding: 15px; border-radius: 10px; text-align: center; margin-top: 10px;">
-            <div style="font-size: 0.9em; color: white; font-weight: bold;">Wind Speed</div>
-            <div style="font-size: 1.5em; color: white; margin-top: 5px;">{current_weather.get('wind_speed', 0)} m/s</div>
-        </div>
-        """, unsafe_allow_html=True)
-    
-    with col3:
-        if sunrise and sunset:
-            st.markdown(f"""
-            <div style="background: rgba(255,255,255,0.2); padding: 15px; border-radius: 10px; text-align: center;">
-                <div style="font-size: 1.2em; margin-bottom: 10px;">🌅</div>
-                <div style="font-size: 0.9em; color: white; font-weight: bold;">Sunrise</div>
-                <div style="font-size: 1.3em; color: white; margin-top: 5px;">{sunrise.strftime('%H:%M')}</div>
-                <div style="font-size: 1.2em; margin: 15px 0 10px 0;">🌇</div>
-                <div style="font-size: 0.9em; color: white; font-weight: bold;">Sunset</div>
-                <div style="font-size: 1.3em; color: white; margin-top: 5px;">{sunset.strftime('%H:%M')}</div>
-            </div>
-            """, unsafe_allow_html=True)
-        else:
-            st.markdown("""
-            <div style="background: rgba(255,255,255,0.2); padding: 15px; border-radius: 10px; text-align: center;">
-                <div style="color: white;">Time data unavailable</div>
-            </div>
-            """, unsafe_allow_html=True)
+    render.mark("weather", depth=2)
+    render_weather_banner(user_city, user_country_code)
+    digest = load_location_digest(user_city, user_country_code)
+    render_weather_history(user_city, user_country_code)
     
     # Alerts Section
+    render.mark("alerts", depth=2)
     st.markdown('<h3 style="color: #1b5e20;">🚨 Alerts & Notifications</h3>', unsafe_allow_html=True)
     
-    # Rain Alert
-    if rain_alert.get('has_rain'):
-        next_rain = rain_alert.get('next_rain')
-        if next_rain:
-            hours = next_rain.get('hours_from_now', 0)
-            alert_msg = groq_service.generate_alert_message(
-                "rain", 
-                "your plants", 
-                current_weather
-            )
-            st.markdown(f"""
-            <div style="background: rgba(255, 255, 255, 0.95); padding: 15px; border-radius: 10px; border-left: 4px solid #ff9800; margin: 15px 0; box-shadow: 0 2px 8px rgba(0,0,0,0.1);">
-                <p style="color: #1b5e20; font-weight: 500; margin: 0; font-size: 1em;">🌧️ <strong>RAIN ALERT:</strong> {alert_msg}</p>
-            </div>
-            """, unsafe_allow_html=True)
-    
-    # Storm Alert
-    if storm_alert.get('has_storm'):
-        next_storm = storm_alert.get('next_storm')
-        if next_storm:
-            hours = next_storm.get('hours_from_now', 0)
-            alert_msg = groq_service.generate_alert_message(
-                "storm",
-                "your outdoor plants",
-                current_weather
-            )
-            st.markdown(f"""
-            <div style="background: rgba(255, 255, 255, 0.95); padding: 15px; border-radius: 10px; border-left: 4px solid #f44336; margin: 15px 0; box-shadow: 0 2px 8px rgba(0,0,0,0.1);">
-                <p style="color: #1b5e20; font-weight: 500; margin: 0; font-size: 1em;">⚠️ <strong>STORM ALERT:</strong> {alert_msg}</p>
-            </div>
-            """, unsafe_allow_html=True)
+    # Active alerts, all messages generated with one LLM call
+    alert_styles = {
+        "rain": ("#ff9800", "🌧️", "RAIN ALERT"),
+        "storm": ("#f44336", "⚠️", "STORM ALERT"),
+        "heat": ("#ff9800", "☀️", "HEAT ALERT")
+    }
     
-    # Heat Alert
-    if current_weather.get('temperature', 0) > 35:
-        alert_msg = groq_service.generate_alert_message(
-            "heat",
-            "your plants",
-            current_weather
-        )
+    for alert_type, alert_msg in alert_messages(groq_service, digest):
+        border_color, icon, label = alert_styles[alert_type]
         st.markdown(f"""
-        <div style="background: rgba(255, 255, 255, 0.95); padding: 15px; border-radius: 10px; border-left: 4px solid #ff9800; margin: 15px 0; box-shadow: 0 2px 8px rgba(0,0,0,0.1);">
-            <p style="color: #1b5e20; font-weight: 500; margin: 0; font-size: 1em;">☀️ <strong>HEAT ALERT:</strong> {alert_msg}</p>
+        <div style="background: rgba(255, 255, 255, 0.95); padding: 15px; border-radius: 10px; border-left: 4px solid {border_color}; margin: 15px 0; box-shadow: 0 2px 8px rgba(0,0,0,0.1);">
+            <p style="color: #1b5e20; font-weight: 500; margin: 0; font-size: 1em;">{icon} <strong>{label}:</strong> {alert_msg}</p>
         </div>
         """, unsafe_allow_html=True)
     
     # Plants Section
+    render.mark("plant grid", depth=2)
     st.markdown('<h3 style="color: #1b5e20;">🌿 Your Plants</h3>', unsafe_allow_html=True)
     
-    if not st.session_state.plants:
+    if not garden_summary['total']:
         st.markdown("""
         <div style="background: rgba(255, 255, 255, 0.95); padding: 15px; border-radius: 10px; border-left: 4px solid #2196f3; margin: 15px 0; box-shadow: 0 2px 8px rgba(0,0,0,0.1);">
             <p style="color: #1b5e20; font-weight: 500; margin: 0; font-size: 1em;">🌱 <strong>No plants yet!</strong> Go to 'Add a Plant' to start your garden.</p>
         </div>
         """, unsafe_allow_html=True)
     else:
-        # Refresh plants from database
-        st.session_state.plants = data_manager.get_all_plants()
+        # Sort / filter controls - applied by DataManager, only the visible page is rendered
+        if 'dashboard_page' not in st.session_state:
+            st.session_state.dashboard_page = 0
+        
+        def reset_dashboard_page():
+            st.session_state.dashboard_page = 0
+        
+        category_labels = {"All": "All", "flower": "🌸 Flower", "tree": "🌳 Tree", "plant": "🌱 Plant"}
+        col_sort, col_urgency, col_placement, col_category = st.columns(4)
+        with col_sort:
+            sort_by = st.selectbox("Sort by", PLANT_SORT_OPTIONS, key="dashboard_sort", on_change=reset_dashboard_page)
+        with col_urgency:
+            urgency_filter = st.selectbox("Water status", ["All"] + PLANT_URGENCY_LEVELS, key="dashboard_urgency", on_change=reset_dashboard_page)
+        with col_placement:
+            placement_filter = st.selectbox("Placement", ["All"] + sorted(garden_summary['by_placement']), key="dashboard_placement", on_change=reset_dashboard_page)
+        with col_category:
+            category_filter = st.selectbox("Category", list(category_labels), format_func=category_labels.get, key="dashboard_category", on_change=reset_dashboard_page)
+        
+        result = data_manager.query_plants(
+            sort_by=sort_by,
+            placement=placement_filter,
+            category=category_filter,
+            urgency=urgency_filter,
+            page=st.session_state.dashboard_page,
+            page_size=config.PLANT_PAGE_SIZE,
+            due_times=due_times
+        )
+        st.session_state.dashboard_page = result['page']
+        page_plants = result['plants']
+        
+        if not page_plants:
+            st.info("No plants match these filters.")
         
         # Responsive grid: 2 columns for better card visibility
-        num_cols = min(2, len(st.session_state.plants)) if len(st.session_state.plants) > 0 else 1
+        num_cols = min(2, len(page_plants)) if len(page_plants) > 0 else 1
         cols = st.columns(num_cols)
         
-        for idx, plant in enumerate(st.session_state.plants):
+        # Cards render from the fresh records below; drop per-card updates from earlier runs
+        st.session_state.card_updates = {}
+        # Each card reads its plant's prediction from the garden-wide run the sidebar made
+        for idx, plant in enumerate(page_plants):
             with cols[idx % num_cols]:
-                # Calculate watering status
-                watering_status = plant_service.calculate_watering_schedule(
-                    plant.get('name', 'Plant'),
-                    plant.get('watering_interval_days', 3),
-                    plant.get('last_watered'),
-                    current_weather,
-                    forecast
-                )
-                
-                # Get sun exposure estimate
-                sun_exposure = weather_service.get_sun_exposure_estimate(
-                    plant.get('placement', 'Indoor Window'),
-                    current_weather,
-                    plant.get('sun_preference', 'Morning Sun')
-                )
-                
-                # Determine water status
-                if watering_status.get('needs_water'):
-                    if watering_status.get('urgency') == 'high':
-                        water_status = "Needs Water Today"
-                        water_color = "#f57c00"  # Orange
-                    else:
-                        water_status = "Water Soon"
-                        water_color = "#ff9800"  # Light orange
-                else:
-                    water_status = "Well Watered"
-                    water_color = "#4caf50"  # Green
-                
-                # Get sun hours and create progress bar
-                sun_hours = sun_exposure.get('sun_hours', 0)
-                max_sun_hours = 8  # Maximum expected sun hours
-                sun_percentage = min(100, (sun_hours / max_sun_hours) * 100) if max_sun_hours > 0 else 0
-                
-                # Temperature status
-                temp = current_weather.get('temperature', 25)
-                if temp > 35:
-                    temp_status = "Too Hot!"
-                    temp_color = "#f44336"  # Red
-                elif temp > 30:
-                    temp_status = "Warm"
-                    temp_color = "#ff9800"  # Orange
-                elif temp < 15:
-                    temp_status = "Too Cold"
-                    temp_color = "#2196f3"  # Blue
-                else:
-                    temp_status = "Comfortable"
-                    temp_color = "#4caf50"  # Green
-                
-                # Plant category (simple detection)
-                plant_name_lower = plant.get('name', '').lower()
-                if any(word in plant_name_lower for word in ['rose', 'flower', 'lily', 'tulip', 'daisy']):
-                    category = "🌸 Flower"
-                    category_color = "#e91e63"
-                elif any(word in plant_name_lower for word in ['tree', 'oak', 'pine', 'maple']):
-                    category = "🌳 Tree"
-                    category_color = "#8bc34a"
-                else:
-                    category = "🌱 Plant"
-                    category_color = "#4caf50"
-                
-                # Check for weather alerts for this plant
-                placement = plant.get('placement', '')
-                weather_alert = ""
-                if 'Outdoor' in placement or 'Open Roof' in placement or 'Balcony' in placement:
-                    if storm_alert.get('has_storm'):
-                        weather_alert = '<div style="background: #ffebee; border-left: 4px solid #f44336; padding: 8px; margin: 10px 0; border-radius: 4px;"><strong>⚠️ Storm Alert:</strong> Move indoors!</div>'
-                    elif rain_alert.get('has_rain'):
-                        weather_alert = '<div style="background: #fff3e0; border-left: 4px solid #ff9800; padding: 8px; margin: 10px 0; border-radius: 4px;"><strong>🌧️ Rain Alert:</strong> Consider shelter</div>'
-                    elif temp > 35:
-                        weather_alert = '<div style="background: #fff3e0; border-left: 4px solid #ff9800; padding: 8px; margin: 10px 0; border-radius: 4px;"><strong>☀️ Heat Alert:</strong> Provide extra water</div>'
-                
-                # Plant Card using Streamlit components (no HTML code boxes)
-                # Wrap in a styled container
-                st.markdown('<div class="plant-card">', unsafe_allow_html=True)
-                
-                # Display weather alert if exists
-                if weather_alert:
-                    st.markdown(weather_alert, unsafe_allow_html=True)
-                
-                # Plant name and category
-                col_name, col_cat = st.columns([3, 1])
-                with col_name:
-                    st.markdown(f"### {plant.get('name', 'Unknown Plant')}")
-                with col_cat:
-                    st.markdown(f'<span style="background: {category_color}; color: white; padding: 4px 12px; border-radius: 20px; font-size: 0.85em; font-weight: bold;">{category}</span>', unsafe_allow_html=True)
-                
-                # Location
-                st.caption(f"📍 {plant.get('placement', 'Unknown Location')}")
-                
-                # Status indicators in a styled box
-                st.markdown(f"""
-                <div style="background: #f5f5f5; padding: 12px; border-radius: 8px; margin: 10px 0;">
-                    <div style="margin-bottom: 10px;">
-                        <div style="display: flex; justify-content: space-between;">
-                            <span style="font-weight: bold; color: #333;">💧 Water Status:</span>
-                            <span style="color: {water_color}; font-weight: bold;">{water_status}</span>
-                        </div>
-                    </div>
-                    <div style="margin-bottom: 10px;">
-                        <div style="display: flex; justify-content: space-between; margin-bottom: 5px;">
-                            <span style="font-weight: bold; color: #333;">☀️ Sunlight:</span>
-                            <span style="color: #333;">Getting {sun_hours}hrs sun</span>
-                        </div>
-                    </div>
-                    <div>
-                        <div style="display: flex; justify-content: space-between;">
-                            <span style="font-weight: bold; color: #333;">🌡 Temperature:</span>
-                            <span style="color: {temp_color}; font-weight: bold;">{temp_status}</span>
-                        </div>
-                    </div>
-                </div>
-                """, unsafe_allow_html=True)
-                
-                # Sunlight progress bar
-                st.progress(sun_percentage / 100)
-                
-                st.markdown('</div>', unsafe_allow_html=True)
-                
-                # Quick action buttons
-                col_btn1, col_btn2, col_btn3 = st.columns(3)
-                with col_btn1:
-                    if st.button("💬 Ask AI", key=f"ask_{plant.get('id')}", use_container_width=True):
-                        # Store plant name for AI Botanist context
-                        plant_name = plant.get('name')
-                        st.session_state.selected_plant = plant_name
-                        st.session_state.ask_about_plant = plant_name
-                        # Set flag to switch page (will be processed before widget creation on rerun)
-                        st.session_state.switch_to_page = "🤖 AI Botanist"
-                        st.rerun()
-                
-                with col_btn2:
-                    if st.button("💧 Water", key=f"water_{plant.get('id')}", use_container_width=True):
-                        data_manager.mark_watered(plant.get('id'))
-                        st.session_state.plants = data_manager.get_all_plants()
-                        st.success(f"✅ {plant.get('name')} marked as watered!")
-                        st.rerun()
-                
-                with col_btn3:
-                    if st.button("🗑️ Remove", key=f"remove_{plant.get('id')}", use_container_width=True):
-                        data_manager.delete_plant(plant.get('id'))
-                        st.session_state.plants = data_manager.get_all_plants()
-                        st.success(f"🗑️ {plant.get('name')} removed")
-                        st.rerun()
-                
-                st.markdown("---")
+                render_plant_card(plant, user_city, user_country_code, garden_soil.get(plant.get('id')))
+        
+        # Pagination
+        render.mark("pagination", depth=2)
+        if result['page_count'] > 1:
+            col_prev, col_info, col_next = st.columns([1, 2, 1])
+            with col_prev:
+                if st.button("⬅️ Previous", disabled=result['page'] == 0, use_container_width=True):
+                    st.session_state.dashboard_page -= 1
+                    st.rerun()
+            with col_info:
+                st.markdown(f"<p style='text-align: center; color: #1b5e20;'>Page {result['page'] + 1} of {result['page_count']} • {result['total']} plants</p>", unsafe_allow_html=True)
+            with col_next:
+                if st.button("Next ➡️", disabled=result['page'] >= result['page_count'] - 1, use_container_width=True):
+                    st.session_state.dashboard_page += 1
+                    st.rerun()
 
 # ==========================================
 # PAGE 2: ADD A PLANT
@@ -1489,16 +1417,19 @@ elif page == "🌱 Add a Plant":
         uploaded_file = st.file_uploader(
             "Upload a clear photo of your plant",
             type=['jpg', 'jpeg', 'png'],
-            help="Take or upload a clear photo for best AI identification results"
+            help="Take or upload a clear photo for best AI identification results",
+            # A new key after each submit drops the old upload from the server
+            key=f"plant_photo_{st.session_state.get('plant_photo_generation', 0)}"
         )
         
         if uploaded_file:
-            image = Image.open(uploaded_file)
-            st.image(image, caption="Your Plant", use_container_width=True)
+            # Decoded only to render the preview; nothing keeps the image between reruns
+            with Image.open(uploaded_file) as image:
+                st.image(image, caption="Your Plant", use_container_width=True)
             
             if st.button("🔍 Identify with AI", type="primary", use_container_width=True):
-                with st.spinner("🤖 Hugging Face AI is identifying your plant..."):
-                    identification = huggingface_service.identify_plant(image)
+                with st.spinner("🤖 AI is identifying your plant..."):
+                    identification = identify_plant(services.identify, uploaded_file.getvalue())
                     
                     # Store in session state for form
                     plant_name = identification.get('plant_name', '')
@@ -1514,6 +1445,7 @@ elif page == "🌱 Add a Plant":
                             st.text(full_response)
                     
                     st.success(f"✅ Plant Identified: **{plant_name}**")
+                    st.caption(f"Answered by {identification.get('provider')}" + (" (hedged request)" if identification.get('hedged') else ""))
                     st.markdown(f"""
                     <div style="background: rgba(255, 255, 255, 0.95); padding: 15px; border-radius: 10px; border-left: 4px solid #2196f3; margin: 15px 0; box-shadow: 0 2px 8px rgba(0,0,0,0.1);">
                         <p style="color: #1b5e20; font-weight: 500; margin: 0; font-size: 1em;"><strong>{plant_name}</strong></p>
@@ -1522,12 +1454,38 @@ elif page == "🌱 Add a Plant":
                     """, unsafe_allow_html=True)
                     
                     # Warning if it says Rose but might be wrong
-                    if 'rose' in plant_name.lower() and ('tomato' in full_response.lower() or 'solanum' in full_response.lower()):
+                    if identification['suspect_mismatch']:
                         st.markdown("""
                         <div style="background: rgba(255, 255, 255, 0.95); padding: 15px; border-radius: 10px; border-left: 4px solid #ff9800; margin: 15px 0; box-shadow: 0 2px 8px rgba(0,0,0,0.1);">
                             <p style="color: #1b5e20; font-weight: 500; margin: 0; font-size: 1em;">⚠️ <strong>The AI response mentions tomato but identified as Rose.</strong> Please verify the identification is correct.</p>
                         </div>
                         """, unsafe_allow_html=True)
+            
+            # Health check (Gemini first, Hugging Face races it if Gemini is slow)
+            health_question = st.text_input("Health concern (optional)", placeholder="e.g., Why are the leaves turning yellow?")
+            if st.button("🩺 Check Plant Health", use_container_width=True):
+                # Local pre-screen first: instant provisional score, and no remote call for unusable photos
+                prescreen = prescreen_image(uploaded_file.getvalue())
+                if not prescreen['usable']:
+                    st.warning("📷 This photo can't be analyzed reliably:\n\n" + "\n".join(f"- {reason}" for reason in prescreen['reasons']))
+                else:
+                    st.metric(
+                        "Provisional Health Score",
+                        f"{prescreen['health_score']}/100",
+                        help="Quick on-device estimate from leaf colour (yellow/brown share). The full analysis follows."
+                    )
+                    st.caption(
+                        f"{prescreen['health_label']} · Yellow leaf area {prescreen['yellow_share']:.0%} · "
+                        f"Brown leaf area {prescreen['brown_share']:.0%}"
+                    )
+                    with st.spinner("🩺 Analyzing plant health..."):
+                        health = analyze_plant_health(services.health, uploaded_file.getvalue(), health_question, prescreen)['health']
+                    if health.get('error'):
+                        st.warning(health.get('analysis', 'Health analysis is not available right now.'))
+                    else:
+                        with st.expander("🩺 Health Analysis", expanded=True):
+                            st.markdown(health.get('analysis', ''))
+                            st.caption(f"Answered by {health.get('provider')}" + (" (hedged request)" if health.get('hedged') else ""))
     
     with col2:
         st.markdown("### 📝 Plant Details")
@@ -1590,43 +1548,32 @@ elif page == "🌱 Add a Plant":
             submitted = st.form_submit_button("✅ Add Plant to Garden", type="primary", use_container_width=True)
             
             if submitted:
-                if not plant_name:
-                    st.markdown("""
+                # Create plant data
+                plant_data = {
+                    "name": plant_name,
+                    "scientific_name": scientific_name,
+                    "description": description,
+                    "care_level": st.session_state.get('identified_care_level', 'Moderate'),
+                    "location": location,
+                    "placement": placement,
+                    "sun_preference": sun_preference,
+                    "watering_interval_days": watering_interval,
+                    "notes": notes
+                }
+                try:
+                    # Validated and saved (photo deduplicated by content, thumbnail made in background)
+                    new_plant = add_plant(data_manager, image_store, plant_data, uploaded_file.getvalue() if uploaded_file else None)
+                except ValueError as e:
+                    new_plant = None
+                    st.markdown(f"""
                     <div style="background: rgba(255, 255, 255, 0.95); padding: 15px; border-radius: 10px; border-left: 4px solid #f44336; margin: 15px 0; box-shadow: 0 2px 8px rgba(0,0,0,0.1);">
-                        <p style="color: #1b5e20; font-weight: 500; margin: 0; font-size: 1em;">❌ <strong>Please enter a plant name</strong></p>
+                        <p style="color: #1b5e20; font-weight: 500; margin: 0; font-size: 1em;">❌ <strong>{e}</strong></p>
                     </div>
                     """, unsafe_allow_html=True)
-                else:
-                    # Save image if uploaded
-                    image_path = ""
-                    if uploaded_file:
-                        # Create images directory if it doesn't exist
-                        os.makedirs("plant_images", exist_ok=True)
-                        image_path = f"plant_images/{plant_name}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.jpg"
-                        image.save(image_path)
-                    
-                    # Create plant data
-                    plant_data = {
-                        "name": plant_name,
-                        "scientific_name": scientific_name,
-                        "description": description,
-                        "care_level": st.session_state.get('identified_care_level', 'Moderate'),
-                        "location": location,
-                        "placement": placement,
-                        "sun_preference": sun_preference,
-                        "watering_interval_days": watering_interval,
-                        "last_watered": None,  # Will be set when first watered
-                        "image_path": image_path,
-                        "notes": notes
-                    }
-                    
-                    # Save to database
-                    new_plant = data_manager.add_plant(plant_data)
-                    st.session_state.plants = data_manager.get_all_plants()
-                    
-                    # Clear session state
-                    if 'identified_name' in st.session_state:
-                        del st.session_state.identified_name
+                
+                if new_plant:
+                    # The photo is stored; drop the upload and the identification from the session
+                    release_plant_photo()
                     
                     st.balloons()
                     st.success(f"🌱 **{plant_name}** has been added to your garden!")
@@ -1636,6 +1583,50 @@ elif page == "🌱 Add a Plant":
                     </div>
                     """, unsafe_allow_html=True)
 
+    # Bulk onboarding (nurseries, community gardens): one validated import, one database write
+    with st.expander("📦 Bulk Import / Export", expanded=False):
+        st.caption(
+            "CSV with a header row, or NDJSON (one JSON object per line). Columns: "
+            + ", ".join(IMPORTED_FIELDS + ("watering_interval_days", "last_watered"))
+            + ". Only name is required; other columns are ignored."
+        )
+        import_file = st.file_uploader(
+            "Import plants", type=["csv", "ndjson", "jsonl"],
+            key=f"bulk_import_file_{st.session_state.get('bulk_import_generation', 0)}"
+        )
+        strict_import = st.checkbox("Import nothing if any row is invalid", key="bulk_import_strict")
+        if import_file and st.button("📥 Import Plants", type="primary", use_container_width=True):
+            try:
+                with st.spinner("Importing plants..."):
+                    result = import_plants(data_manager, import_file, detect_format(import_file.name), strict=strict_import)
+            except ValueError as e:
+                st.error(f"❌ {e}")
+            else:
+                if result['imported']:
+                    # Imported; drop the uploaded file from the session
+                    st.session_state.bulk_import_generation = st.session_state.get('bulk_import_generation', 0) + 1
+                    st.success(f"🌱 Imported {result['imported']} plants")
+                elif result.get('would_import'):
+                    st.warning(f"Nothing imported: {result['would_import']} valid rows, but some rows have problems")
+                if result['skipped']:
+                    st.warning(f"{result['skipped']} valid rows did not fit in your garden ({config.MAX_PLANTS} plants max)")
+                if result['rejected']:
+                    st.warning(f"{result['rejected']} rows were rejected")
+                    st.dataframe(
+                        [{"Line": line, "Problem": message} for line, message in result['errors']],
+                        hide_index=True, use_container_width=True
+                    )
+
+        export_format = st.radio("Export format", IMPORT_FORMATS, horizontal=True, key="bulk_export_format")
+        st.download_button(
+            "📤 Export Garden",
+            # Built only when clicked, from the streamed rows
+            data=lambda: b"".join(export_plants(data_manager, export_format)),
+            file_name=f"garden.{export_format}",
+            mime="text/csv" if export_format == "csv" else "application/x-ndjson",
+            use_container_width=True
+        )
+
 # ==========================================
 # PAGE 3: AI BOTANIST CHAT
 # ==========================================
@@ -1663,63 +1654,30 @@ elif page == "🤖 AI Botanist":
     st.markdown("**Speak your question instead of typing!** Try: *'How is my Rose doing?'* or *'Why are my leaves yellow?'*")
     
     # Native Streamlit Audio Input (No FFmpeg required, works out of the box)
-    audio_value = st.audio_input("🎤 Record your question", label_visibility="visible")
+    audio_value = st.audio_input(
+        "🎤 Record your question", label_visibility="visible",
+        # New key once the transcribed question was asked: the recording is dropped from the server
+        key=f"voice_recording_{st.session_state.get('voice_recording_generation', 0)}"
+    )
     
     if audio_value:
         # Play back for confirmation
         st.audio(audio_value, format="audio/wav")
         
-        # Process audio with speech recognition
-        if SPEECH_RECOGNITION_AVAILABLE:
-            with st.spinner("🎤 Transcribing your voice..."):
-                try:
-                    # Initialize Recognizer
-                    recognizer = sr.Recognizer()
-                    
-                    # Convert the Streamlit audio file to data SpeechRecognition can read
-                    # Streamlit audio_input returns a BytesIO-like object
-                    with sr.AudioFile(audio_value) as source:
-                        # Adjust for ambient noise
-                        recognizer.adjust_for_ambient_noise(source, duration=0.5)
-                        audio_data = recognizer.record(source)
-                    
-                    # Use Google's Free Speech API
-                    try:
-                        voice_text = recognizer.recognize_google(audio_data)
-                        st.session_state.voice_question = voice_text
-                        st.success(f"🗣️ **You said:** {voice_text}")
-                        st.balloons()
-                        st.markdown("""
-                        <div style="background: rgba(255, 255, 255, 0.95); padding: 15px; border-radius: 10px; border-left: 4px solid #2196f3; margin: 15px 0; box-shadow: 0 2px 8px rgba(0,0,0,0.1);">
-                            <p style="color: #1b5e20; font-weight: 500; margin: 0; font-size: 1em;">💡 <strong>Your question is ready!</strong> Scroll down to see the response.</p>
-                        </div>
-                        """, unsafe_allow_html=True)
-                    except sr.UnknownValueError:
-                        st.markdown("""
-                        <div style="background: rgba(255, 255, 255, 0.95); padding: 15px; border-radius: 10px; border-left: 4px solid #ff9800; margin: 15px 0; box-shadow: 0 2px 8px rgba(0,0,0,0.1);">
-                            <p style="color: #1b5e20; font-weight: 500; margin: 0; font-size: 1em;">⚠️ <strong>Could not understand audio.</strong> Please speak more clearly and try again.</p>
-                        </div>
-                        """, unsafe_allow_html=True)
-                    except sr.RequestError as e:
-                        st.markdown(f"""
-                        <div style="background: rgba(255, 255, 255, 0.95); padding: 15px; border-radius: 10px; border-left: 4px solid #f44336; margin: 15px 0; box-shadow: 0 2px 8px rgba(0,0,0,0.1);">
-                            <p style="color: #1b5e20; font-weight: 500; margin: 0; font-size: 1em;">❌ <strong>Could not reach Google Speech service:</strong> {e}. Please try typing your question instead.</p>
-                        </div>
-                        """, unsafe_allow_html=True)
-                    except Exception as e:
-                        st.markdown(f"""
-                        <div style="background: rgba(255, 255, 255, 0.95); padding: 15px; border-radius: 10px; border-left: 4px solid #f44336; margin: 15px 0; box-shadow: 0 2px 8px rgba(0,0,0,0.1);">
-                            <p style="color: #1b5e20; font-weight: 500; margin: 0; font-size: 1em;">❌ <strong>Error processing audio:</strong> {e}</p>
-                        </div>
-                        """, unsafe_allow_html=True)
-                        
-                except Exception as e:
-                    error_msg = str(e)
-                    st.markdown(f"""
-                    <div style="background: rgba(255, 255, 255, 0.95); padding: 15px; border-radius: 10px; border-left: 4px solid #f44336; margin: 15px 0; box-shadow: 0 2px 8px rgba(0,0,0,0.1);">
-                        <p style="color: #1b5e20; font-weight: 500; margin: 0; font-size: 1em;">❌ <strong>Error processing audio:</strong> {error_msg}</p>
-                    </div>
-                    """, unsafe_allow_html=True)
+        # Transcribe in the background; reruns with the same recording reuse the same job
+        voice_engines = transcription_service.available_engines()
+        if voice_engines:
+            engine_labels = dict(voice_engines)
+            voice_engine = voice_engines[0][0]
+            if len(voice_engines) > 1:
+                voice_engine = st.selectbox("Transcription engine", list(engine_labels), format_func=engine_labels.get, key="voice_engine")
+            
+            voice_job = transcription_service.submit(audio_value.getvalue(), engine=voice_engine)
+            if voice_job['status'] in ("queued", "running"):
+                # Polls the job without rerunning the page; reruns the page once the text is ready
+                show_transcription_progress(voice_job['id'])
+            else:
+                show_transcription_result(voice_job)
         else:
             st.markdown("""
             <div style="background: rgba(255, 255, 255, 0.95); padding: 15px; border-radius: 10px; border-left: 4px solid #2196f3; margin: 15px 0; box-shadow: 0 2px 8px rgba(0,0,0,0.1);">
@@ -1733,7 +1691,7 @@ elif page == "🤖 AI Botanist":
     chat_container = st.container()
     
     with chat_container:
-        for chat in st.session_state.chat_history[-10:]:  # Show last 10 messages
+        for chat in session_chat_history()[-10:]:  # Show last 10 messages
             if chat.get('user_message'):
                 with st.chat_message("user"):
                     st.write(chat['user_message'])
@@ -1755,6 +1713,7 @@ elif page == "🤖 AI Botanist":
         # Clear voice question after using it
         if 'voice_question' in st.session_state:
             del st.session_state.voice_question
+            st.session_state.voice_recording_generation = st.session_state.get('voice_recording_generation', 0) + 1
         # Add user message to chat
         with st.chat_message("user"):
             st.write(user_question)
@@ -1762,41 +1721,131 @@ elif page == "🤖 AI Botanist":
         # Generate response
         with st.chat_message("assistant"):
             with st.spinner("🤖 AI Botanist is thinking..."):
-                # Initialize plants_context for chat history
-                plants_context = ""
-                if st.session_state.plants:
-                    plant_names = [p.get('name', '') for p in st.session_state.plants]
-                    plants_context = f"User's plants: {', '.join(plant_names)}"
-                
-                # Add selected plant context if user came from Ask AI button
-                selected_plant_context = ""
-                if 'selected_plant' in st.session_state and st.session_state.selected_plant:
-                    selected_plant = st.session_state.selected_plant
-                    selected_plant_context = f"\n\nIMPORTANT: The user is specifically asking about their '{selected_plant}' plant. Focus your answer on this plant."
-                    # Find plant details if available
-                    for p in st.session_state.plants:
-                        if p.get('name') == selected_plant:
-                            selected_plant_context += f"\n\nPlant Details:\n- Name: {p.get('name')}\n- Placement: {p.get('placement', 'Unknown')}\n- Sun Preference: {p.get('sun_preference', 'Unknown')}\n- Watering Interval: Every {p.get('watering_interval_days', 3)} days\n- Last Watered: {p.get('last_watered', 'Not recorded')}"
-                            break
-                
-                # Regular chat (image upload feature removed)
-                # Get current weather for context - use detected location
-                user_city = st.session_state.user_location.get('city', DEFAULT_CITY)
-                user_country = st.session_state.user_location.get('country', DEFAULT_COUNTRY)
-                user_country_code = st.session_state.user_location.get('country_code') or get_country_code(user_country)
-                current_weather = weather_service.get_current_weather(user_city, user_country_code)
-                weather_context = f"Current weather in {user_city}, {user_country}: {current_weather.get('temperature', 25)}°C, {current_weather.get('description', 'clear')}"
-                
-                full_context = f"{weather_context}. {plants_context}{selected_plant_context}" if plants_context else f"{weather_context}{selected_plant_context}"
-                response = groq_service.chat_about_plant(user_question, full_context)
+                # Weather at the user's location + the plant they asked about (from the Ask AI button) as context;
+                # the exchange is saved to the chat history
+                answer = ask_botanist(
+                    services,
+                    data_manager,
+                    user_question,
+                    location=st.session_state.user_location,
+                    selected_plant=st.session_state.get('selected_plant'),
+                    plants=session_plants()
+                )
+                response = answer["response"]
                 
                 st.write(response)
-                
-                # Save to chat history
-                data_manager.add_chat_message(user_question, response, plants_context)
-                st.session_state.chat_history = data_manager.get_chat_history(20)
+                if answer["from_cache"]:
+                    if answer["cache_tier"] == "exact":
+                        st.caption("⚡ Served from cache (same question asked before)")
+                    else:
+                        st.caption(f"⚡ Served from cache (similar question, {answer['similarity']:.0%} match)")
+
+
+# ==========================================
+# ADMIN: RENDER PROFILER (hidden, ?admin=<ADMIN_TOKEN>)
+# ==========================================
+elif page == "🛠️ Render Profiler":
+    st.markdown('<h1 style="color: #ffffff; text-shadow: 2px 2px 4px rgba(0,0,0,0.5);">🛠️ Render Profiler</h1>', unsafe_allow_html=True)
+    st.markdown(f'<p style="color: #1b5e20; font-size: 1.1em;">Span waterfalls of the last {config.TRACE_HISTORY_PER_PAGE} renders per page in this server process.</p>', unsafe_allow_html=True)
+    
+    trace_keys = trace_exporter.keys()
+    if not trace_keys:
+        st.info("No renders recorded yet. Open a page, then come back here.")
+    else:
+        profiled_page = st.selectbox("Page", trace_keys, key="profiler_page")
+        traces = trace_exporter.traces(profiled_page)
+        
+        # Where the time goes across the recorded renders
+        st.markdown('<h3 style="color: #1b5e20;">⏱️ Time per section</h3>', unsafe_allow_html=True)
+        st.dataframe(
+            [
+                {
+                    "Section": entry['name'],
+                    "Calls": entry['calls'],
+                    "Mean ms": round(entry['mean_ms'], 1),
+                    "Max ms": round(entry['max_ms'], 1),
+                    "Total ms": round(entry['total_ms'], 1)
+                }
+                for entry in section_summary(traces)
+            ],
+            hide_index=True,
+            use_container_width=True
+        )
+        
+        # Waterfall of one render
+        st.markdown('<h3 style="color: #1b5e20;">🌊 Render waterfall</h3>', unsafe_allow_html=True)
+        render_labels = [
+            f"{datetime.fromtimestamp(trace.started_at).strftime('%H:%M:%S')} • {trace.root.duration_ms:.0f} ms • {trace.root.status}"
+            for trace in traces
+        ]
+        render_index = st.selectbox("Render", range(len(traces)), format_func=render_labels.__getitem__, key="profiler_render")
+        rows = waterfall_rows(traces[render_index])
+        total_ms = max(rows[0]['duration_ms'], 0.001) if rows else 1
+        bar_colors = ["#1b5e20", "#2e7d32", "#4caf50", "#81c784", "#a5d6a7"]
+        bars = []
+        for row in rows:
+            color = "#f44336" if row['status'] not in ("ok", "RerunException") else bar_colors[min(row['depth'], len(bar_colors) - 1)]
+            left = row['offset_ms'] / total_ms * 100
+            width = max(row['duration_ms'] / total_ms * 100, 0.3)
+            tooltip = html.escape(f"{row['name']} | {row['duration_ms']:.1f} ms | thread {row['thread']} | {row['status']}", quote=True)
+            bars.append(f"""
+            <div title="{tooltip}" style="display: flex; align-items: center; font-size: 0.8em; margin: 2px 0;">
+                <div style="width: 35%; padding-left: {row['depth'] * 12}px; color: #1b5e20; white-space: nowrap; overflow: hidden; text-overflow: ellipsis;">{html.escape(row['name'])}</div>
+                <div style="width: 55%; position: relative; height: 14px; background: rgba(76, 175, 80, 0.1);">
+                    <div style="position: absolute; left: {left:.2f}%; width: {width:.2f}%; height: 100%; background: {color}; border-radius: 2px;"></div>
+                </div>
+                <div style="width: 10%; text-align: right; color: #666;">{row['duration_ms']:.1f} ms</div>
+            </div>""")
+        st.markdown(f"""
+        <div style="background: rgba(255, 255, 255, 0.95); padding: 15px; border-radius: 10px; box-shadow: 0 2px 8px rgba(0,0,0,0.1);">
+            {''.join(bars)}
+        </div>
+        """, unsafe_allow_html=True)
+    
+    # Sampled cProfile captures of whole renders
+    st.markdown('<h3 style="color: #1b5e20;">🔬 cProfile captures</h3>', unsafe_allow_html=True)
+    if not config.PROFILE_SAMPLE_RATE:
+        st.info("Profiling is off. Set PROFILE_SAMPLE_RATE (e.g. 0.05 for 5% of renders) and restart the app.")
+    elif not trace_exporter.profiles:
+        st.info("No render has been sampled yet.")
+    for capture in reversed(list(trace_exporter.profiles)):
+        captured_at = datetime.fromtimestamp(capture['started_at']).strftime('%H:%M:%S')
+        with st.expander(f"{capture['key']} • {captured_at} • {capture['duration_ms']:.0f} ms"):
+            st.code(profile_report(capture), language="text")
+            st.download_button(
+                "⬇️ Download .prof",
+                profile_bytes(capture),
+                file_name=f"render-{capture['trace_id'][:8]}.prof",
+                key=f"profile_{capture['trace_id']}"
+            )
+
+    # Memory held per session (for container sizing)
+    st.markdown('<h3 style="color: #1b5e20;">🧠 Session memory</h3>', unsafe_allow_html=True)
+    memory = session_memory_report(collect_sessions(), services.snapshots)
+    col_sessions, col_mean, col_shared, col_rss = st.columns(4)
+    col_sessions.metric("Sessions", len(memory['sessions']))
+    col_mean.metric("Mean per session", f"{memory['mean_session_bytes'] / 1024:.1f} KB")
+    col_shared.metric("Shared store", f"{memory['shared_bytes'] / 1024:.1f} KB", help=f"{memory['shared_entries']} snapshots, counted once for all sessions")
+    col_rss.metric("Process RSS", f"{memory['rss_mb']} MB" if memory['rss_mb'] is not None else "n/a")
+    st.dataframe(
+        [
+            {
+                "Session": row['id'][:8],
+                "User": row['user_id'],
+                "State KB": round(row['state_bytes'] / 1024, 1),
+                "Uploads KB": round(row['upload_bytes'] / 1024, 1),
+                "Total KB": round(row['total_bytes'] / 1024, 1),
+                "Largest keys": ", ".join(f"{key} ({size / 1024:.1f} KB)" for key, size in row['keys'])
+            }
+            for row in memory['sessions']
+        ],
+        hide_index=True,
+        use_container_width=True
+    )
+    st.caption("Container size ≈ RSS with no sessions + sessions × mean per session. Shared snapshots grow with users, not sessions.")
 
 # Footer (shown on all pages except Welcome which has its own footer)
+render.mark("footer")
 if page != "🏠 Welcome":
     st.markdown("---")
     st.markdown("""
@@ -1810,3 +1859,4 @@ if page != "🏠 Welcome":
     </div>
     """, unsafe_allow_html=True)
 
+render.end()
@@ -0,0 +1,258 @@
+"""
+API Load Test
+Many concurrent clients running realistic journeys against the REST API (python -m garden_api),
+with every external API on the stub server
+Reports throughput, p50/p95/p99 per endpoint, the share of conditional GETs answered 304 and the server's memory
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import subprocess
+import sys
+import tempfile
+import time
+import httpx
+import requests
+from collections import defaultdict
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, BENCH_DIR)
+
+from conftest import APP_DIR, BENCH_API_KEYS, seed_garden
+from contention import read_rss_mb, summarize
+from load_test import CHAT_QUESTIONS, free_port
+from stub_server import StubServer
+
+# ==========================================
+# Client
+# ==========================================
+class Client:
+    """One API client (a phone app) for one garden; remembers ETags like an HTTP cache would"""
+    def __init__(self, http, user_id, rng, think_seconds):
+        self.http = http
+        self.user_id = user_id
+        self.rng = rng
+        self.think_seconds = think_seconds
+        self.cache = {}  # url -> (ETag, body) of the last 200 response
+        self.timings = []  # (endpoint, seconds, status)
+
+    async def call(self, name, method, url, **kwargs):
+        """
+        Timed request; GETs are sent conditionally when the URL was fetched before
+        Returns: the JSON body (the cached one for a 304), or None on errors
+        """
+        if self.think_seconds:
+            await asyncio.sleep(self.rng.uniform(0, self.think_seconds))
+        headers = kwargs.pop("headers", {})
+        if method == "GET" and url in self.cache:
+            headers["If-None-Match"] = self.cache[url][0]
+        started = time.perf_counter()
+        try:
+            response = await self.http.request(method, url, headers=headers, **kwargs)
+            status = response.status_code
+        except httpx.HTTPError as e:
+            print(f"❌ API load test {name} error: {e!r}")
+            response, status = None, 0
+        self.timings.append((name, time.perf_counter() - started, status))
+        if not status or status >= 400:
+            return None
+        if status == 304:
+            return self.cache[url][1]
+        body = response.json() if response.content else None
+        if method == "GET" and status == 200 and "etag" in response.headers:
+            self.cache[url] = (response.headers["etag"], body)
+        return body
+
+    def garden(self, path=""):
+        return f"/api/v1/users/{self.user_id}{path}"
+
+async def journey_browse(client):
+    # The app polls the plant list; the second fetch is a conditional GET that should come back 304
+    await client.call("plants", "GET", client.garden("/plants"))
+    await client.call("plants (revalidate)", "GET", client.garden("/plants"))
+    await client.call("garden status", "GET", client.garden("/status"))
+    await client.call("garden status (page 2)", "GET", client.garden("/status?page=1"))
+
+async def journey_water(client):
+    result = await client.call("plants", "GET", client.garden("/plants?sort=Most+urgent&page_size=5"))
+    if result is None or not result["plants"]:
+        return
+    plant_id = result["plants"][0]["id"]
+    await client.call("plant status", "GET", client.garden(f"/plants/{plant_id}/status"))
+    await client.call("water", "POST", client.garden(f"/plants/{plant_id}/water"))
+    # Watering changed the list, so the revalidation has to return the new version
+    await client.call("plants (revalidate)", "GET", client.garden("/plants?sort=Most+urgent&page_size=5"))
+
+async def journey_weather(client):
+    await client.call("weather", "GET", "/api/v1/weather")
+    await client.call("alerts", "GET", "/api/v1/alerts")
+    await client.call("weather (revalidate)", "GET", "/api/v1/weather")
+    await client.call("nurseries", "GET", "/api/v1/nurseries?lat=32.49&lon=74.53&city=Sialkot")
+
+async def journey_add_plant(client):
+    await client.call("add plant", "POST", client.garden("/plants"), json={
+        "name": f"Load Test Fern {client.rng.randint(1, 10**6)}",
+        "placement": client.rng.choice(["Indoor Window", "Balcony", "Outdoor"]),
+        "watering_interval_days": client.rng.randint(2, 7)
+    })
+
+async def journey_chat(client):
+    await client.call("chat history", "GET", client.garden("/chat?limit=20"))
+    await client.call("chat ask", "POST", client.garden("/chat"), json={"question": client.rng.choice(CHAT_QUESTIONS)})
+
+JOURNEYS = {
+    "browse": (journey_browse, 0.35),
+    "water": (journey_water, 0.25),
+    "weather": (journey_weather, 0.15),
+    "add_plant": (journey_add_plant, 0.1),
+    "chat": (journey_chat, 0.15),
+}
+
+# ==========================================
+# Runner
+# ==========================================
+def start_api_server(workdir, env, workers=1, timeout_seconds=60):
+    """Launch python -m garden_api and wait for its health endpoint"""
+    port = free_port()
+    process = subprocess.Popen(
+        [sys.executable, "-m", "garden_api", "--port", str(port), "--workers", str(workers)],
+        cwd=workdir,
+        env={**env, "PYTHONPATH": os.pathsep.join(filter(None, [APP_DIR, env.get("PYTHONPATH")]))},
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL
+    )
+    deadline = time.time() + timeout_seconds
+    while time.time() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError(f"API server exited with code {process.returncode}")
+        try:
+            if requests.get(f"http://127.0.0.1:{port}/api/v1/health", timeout=1).status_code == 200:
+                return process, port
+        except requests.exceptions.RequestException:
+            pass
+        time.sleep(0.2)
+    process.terminate()
+    raise RuntimeError("API server did not start in time")
+
+async def run_clients(args, base_url, user_ids):
+    clients = []
+    names = list(JOURNEYS)
+    limits = httpx.Limits(max_connections=args.concurrency or args.clients, max_keepalive_connections=args.concurrency or args.clients)
+    semaphore = asyncio.Semaphore(args.concurrency or args.clients)
+
+    async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=args.request_timeout) as http:
+        async def run_one(index):
+            rng = random.Random(args.seed + index)
+            client = Client(http, user_ids[index % len(user_ids)], rng, args.think_ms / 1000)
+            if args.ramp_seconds:
+                await asyncio.sleep(args.ramp_seconds * index / args.clients)
+            async with semaphore:
+                for _ in range(args.journeys):
+                    journey = rng.choices(names, weights=[JOURNEYS[name][1] for name in names])[0]
+                    await JOURNEYS[journey][0](client)
+            clients.append(client)
+
+        started = time.perf_counter()
+        await asyncio.gather(*(run_one(index) for index in range(args.clients)))
+        return clients, time.perf_counter() - started
+
+def run_load_test(args):
+    stub = StubServer(seed=args.seed).start()
+    stub.configure(latency_seconds=args.stub_latency_ms / 1000, error_rate=args.stub_error_rate)
+
+    workdir = tempfile.mkdtemp(prefix="smart-garden-api-load-")
+    sys.path.insert(0, APP_DIR)
+    from utils.data_manager import DataManager
+    user_ids = [f"api-user-{n:04d}" for n in range(args.users)]
+    cwd = os.getcwd()
+    os.chdir(workdir)
+    try:
+        for user_id in user_ids:
+            seed_garden(DataManager(user_id), args.plants, chat_turns=20)
+    finally:
+        os.chdir(cwd)
+
+    env = {**os.environ, **stub.service_env(), **BENCH_API_KEYS}
+    process, port = start_api_server(workdir, env, workers=args.workers)
+    base_url = f"http://127.0.0.1:{port}"
+    try:
+        # Warm-up client: fills the weather / answer caches so they are not billed to the first clients
+        warmup_args = argparse.Namespace(**{**vars(args), "clients": 1, "journeys": len(JOURNEYS), "think_ms": 0, "ramp_seconds": 0})
+        asyncio.run(run_clients(warmup_args, base_url, user_ids))
+        rss_before = read_rss_mb(process.pid)
+        clients, wall_seconds = asyncio.run(run_clients(args, base_url, user_ids))
+        rss_after = read_rss_mb(process.pid)
+    finally:
+        process.terminate()
+        process.wait(timeout=30)
+        stub.stop()
+
+    endpoints = defaultdict(list)
+    statuses = defaultdict(lambda: defaultdict(int))
+    for client in clients:
+        for name, seconds, status in client.timings:
+            endpoints[name].append(seconds)
+            statuses[name][status] += 1
+    requests_made = sum(len(durations) for durations in endpoints.values())
+    revalidations = {name: counts for name, counts in statuses.items() if name.endswith("(revalidate)")}
+    not_modified = sum(counts.get(304, 0) for counts in revalidations.values())
+    revalidated = sum(sum(counts.values()) for counts in revalidations.values())
+
+    return {
+        "config": {key: value for key, value in vars(args).items() if key != "json"},
+        "wall_seconds": round(wall_seconds, 2),
+        "throughput": {"requests_per_second": round(requests_made / wall_seconds, 2)},
+        "endpoints": {
+            name: {
+                **summarize(durations),
+                "statuses": dict(statuses[name]),
+                "errors": sum(count for status, count in statuses[name].items() if status == 0 or status >= 400)
+            }
+            for name, durations in sorted(endpoints.items())
+        },
+        "not_modified_share": round(not_modified / revalidated, 3) if revalidated else None,
+        "memory": {"server_rss_before_mb": rss_before, "server_rss_after_mb": rss_after},
+        "stub_requests": dict(stub.requests)
+    }
+
+def print_report(report):
+    config = report["config"]
+    print(f"\n🌱 {config['clients']} clients x {config['journeys']} journeys on {config['users']} gardens "
+          f"({config['workers']} worker process(es)) in {report['wall_seconds']} s")
+    print(f"Throughput: {report['throughput']['requests_per_second']} requests/s")
+    print(f"Conditional GETs answered 304: {report['not_modified_share']}")
+
+    print(f"\n{'Endpoint':<26}{'calls':>7}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'max ms':>10}{'errors':>8}")
+    for name, row in report["endpoints"].items():
+        print(f"{name:<26}{row['count']:>7}{row['p50_ms']:>10}{row['p95_ms']:>10}{row['p99_ms']:>10}{row['max_ms']:>10}{row['errors']:>8}")
+
+    print(f"\nMemory: {report['memory']}")
+    print(f"Stub requests: {report['stub_requests']}")
+
+def main():
+    parser = argparse.ArgumentParser(description="Load test the Smart Garden REST API")
+    parser.add_argument("--clients", type=int, default=100, help="Simulated API clients")
+    parser.add_argument("--journeys", type=int, default=5, help="Journeys run by each client")
+    parser.add_argument("--concurrency", type=int, default=0, help="Clients active at once (default: all)")
+    parser.add_argument("--users", type=int, default=20, help="Distinct gardens the clients are spread over")
+    parser.add_argument("--plants", type=int, default=50, help="Plants seeded per garden")
+    parser.add_argument("--workers", type=int, default=1, help="API server processes")
+    parser.add_argument("--think-ms", type=float, default=0.0, help="Random pause (0..N ms) before each request")
+    parser.add_argument("--ramp-seconds", type=float, default=0.0, help="Spread client starts over this many seconds")
+    parser.add_argument("--request-timeout", type=float, default=60.0)
+    parser.add_argument("--stub-latency-ms", type=float, default=0.0, help="Latency added to every stubbed API response")
+    parser.add_argument("--stub-error-rate", type=float, default=0.0, help="Share of stubbed responses that are errors")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--json", help="Also write the report to this file")
+    args = parser.parse_args()
+
+    report = run_load_test(args)
+    print_report(report)
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+
+if __name__ == "__main__":
+    main()
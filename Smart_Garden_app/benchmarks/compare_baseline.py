@@ -0,0 +1,53 @@
+"""
+Baseline comparison
+Compares a pytest-benchmark JSON run against the committed baseline and fails on median regressions
+"""
+import argparse
+import json
+import os
+import sys
+
+BASELINE_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "baseline.json")
+
+def load_medians(path):
+    """
+    Read a pytest-benchmark JSON file
+    Returns: dict of benchmark fullname -> median seconds
+    """
+    with open(path, "r", encoding="utf-8") as f:
+        data = json.load(f)
+    return {bench["fullname"]: bench["stats"]["median"] for bench in data.get("benchmarks", [])}
+
+def compare(baseline, current, threshold):
+    """
+    Returns: list of (name, baseline median, current median, ratio) for benchmarks slower than threshold
+    """
+    regressions = []
+    for name, median in sorted(current.items()):
+        before = baseline.get(name)
+        if before and median / before > threshold:
+            regressions.append((name, before, median, median / before))
+    return regressions
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("current", help="JSON written by --benchmark-json")
+    parser.add_argument("--baseline", default=BASELINE_FILE)
+    parser.add_argument("--threshold", type=float, default=1.25, help="Allowed median slowdown ratio (default 1.25)")
+    args = parser.parse_args()
+
+    baseline = load_medians(args.baseline)
+    current = load_medians(args.current)
+    regressions = compare(baseline, current, args.threshold)
+
+    missing = sorted(set(baseline) - set(current))
+    added = sorted(set(current) - set(baseline))
+    print(f"Compared {len(set(baseline) & set(current))} benchmarks ({len(added)} new, {len(missing)} missing)")
+    for name, before, after, ratio in regressions:
+        print(f"❌ {name}: {before * 1000:.2f} ms -> {after * 1000:.2f} ms ({ratio:.2f}x)")
+    if regressions:
+        sys.exit(1)
+    print("✅ No regressions")
+
+if __name__ == "__main__":
+    main()
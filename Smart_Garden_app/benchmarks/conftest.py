@@ -0,0 +1,119 @@
+"""
+Benchmark configuration
+Starts the stub API server before any app module is imported and points config at it
+"""
+import os
+import random
+import sys
+from datetime import datetime, timedelta
+import pytest
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+APP_DIR = os.path.dirname(BENCH_DIR)
+sys.path.insert(0, APP_DIR)
+sys.path.insert(0, BENCH_DIR)
+
+from stub_server import StubServer
+
+# Any non-empty key makes the services take their real HTTP code path (answered by the stub)
+BENCH_API_KEYS = {
+    "OPENWEATHER_API_KEY": "bench-openweather",
+    "PERENUAL_API_KEY": "bench-perenual",
+    "HUGGINGFACE_API_KEY": "bench-huggingface",
+    "GROQ_API_KEY": "bench-groq",
+    "GEMINI_API_KEY": "AIza-bench-gemini",
+}
+
+PLANT_NAMES = ["Rose", "Basil", "Oak Tree", "Aloe Vera", "Mint", "Snake Plant", "Tulip", "Pothos", "Lavender", "Jade Plant"]
+PLACEMENTS = ["Open Roof", "Balcony", "Indoor Window"]
+SUN_PREFERENCES = ["Morning Sun", "Afternoon Shade", "Full Sun"]
+
+_stub = None
+
+def pytest_addoption(parser):
+    group = parser.getgroup("stub server")
+    group.addoption("--stub-latency-ms", type=float, default=0.0, help="Latency added to every stubbed API response")
+    group.addoption("--stub-jitter-ms", type=float, default=0.0, help="Random extra latency (0..N ms) per response")
+    group.addoption("--stub-error-rate", type=float, default=0.0, help="Share of stubbed responses that are errors")
+
+def pytest_configure(config):
+    global _stub
+    _stub = StubServer().start()
+    # Must happen before config.py is imported (endpoints and keys are read at import / first use)
+    os.environ.update(_stub.service_env())
+    os.environ.update(BENCH_API_KEYS)
+
+def pytest_unconfigure(config):
+    if _stub is not None:
+        _stub.stop()
+
+def pytest_benchmark_update_json(config, benchmarks, output_json):
+    # Keep baseline files small: the summary stats are enough to compare runs
+    for bench in output_json["benchmarks"]:
+        bench["stats"].pop("data", None)
+
+@pytest.fixture
+def stub_server(request):
+    """The running stub server, reset to the command-line latency / error settings for each test"""
+    def apply_defaults():
+        _stub.reset()
+        _stub.configure(
+            latency_seconds=request.config.getoption("--stub-latency-ms") / 1000,
+            jitter_seconds=request.config.getoption("--stub-jitter-ms") / 1000,
+            error_rate=request.config.getoption("--stub-error-rate")
+        )
+
+    apply_defaults()
+    yield _stub
+    apply_defaults()
+
+@pytest.fixture
+def workdir(tmp_path, monkeypatch):
+    """Run in an empty directory (the app stores its data relative to the working directory)"""
+    monkeypatch.chdir(tmp_path)
+    return tmp_path
+
+def make_plants(count, seed=0):
+    """Synthetic plant records in the DataManager format"""
+    rng = random.Random(seed)
+    now = datetime.now()
+    plants = []
+    for plant_id in range(1, count + 1):
+        watered = now - timedelta(hours=rng.randint(0, 24 * 10))
+        plants.append({
+            "id": plant_id,
+            "name": f"{rng.choice(PLANT_NAMES)} {plant_id}",
+            "scientific_name": "",
+            "description": "Benchmark plant",
+            "care_level": "Moderate",
+            "location": "Sialkot",
+            "placement": rng.choice(PLACEMENTS),
+            "sun_preference": rng.choice(SUN_PREFERENCES),
+            "watering_interval_days": rng.randint(1, 7),
+            "last_watered": watered.isoformat() if rng.random() > 0.1 else None,
+            "image_path": "",
+            "image_hash": "",
+            "added_date": (now - timedelta(days=rng.randint(0, 365))).isoformat(),
+            "notes": ""
+        })
+    return plants
+
+def seed_garden(data_manager, count, history_plants=100, events_per_plant=6, chat_turns=None):
+    """Fill a DataManager with plants, watering history and chat history"""
+    now = datetime.now()
+    for plant_id in range(1, min(count, history_plants) + 1):
+        for event in range(events_per_plant, 0, -1):
+            data_manager.watering_log.append(plant_id, now - timedelta(days=3 * event))
+    # Saved after the history so the garden index sees the learned intervals
+    data_manager._save_plants(make_plants(count))
+    history = [
+        {
+            "timestamp": (now - timedelta(minutes=turn)).isoformat(),
+            "user_message": f"Why are the leaves of plant {turn} turning yellow?",
+            "bot_response": "Usually overwatering. Let the soil dry out between waterings.",
+            "plant_context": ""
+        }
+        for turn in range(chat_turns if chat_turns is not None else min(count, 500), 0, -1)
+    ]
+    data_manager._save_chat_history(history)
+    return data_manager
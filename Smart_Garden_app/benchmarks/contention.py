@@ -0,0 +1,133 @@
+"""
+Contention Probes
+Lock-wait and JSON file I/O timing for DataManager, installed by the load test server
+"""
+import os
+import threading
+import time
+from collections import defaultdict
+import numpy as np
+
+class ContentionStats:
+    """Thread-safe counters for lock waits and data file I/O"""
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.locks = defaultdict(lambda: {"acquisitions": 0, "contended": 0, "wait_seconds": 0.0, "max_wait_seconds": 0.0})
+        self.files = defaultdict(list)  # "write plants_database.json" -> durations
+
+    def record_wait(self, name, waited, contended):
+        with self._lock:
+            entry = self.locks[name]
+            entry["acquisitions"] += 1
+            if contended:
+                entry["contended"] += 1
+                entry["wait_seconds"] += waited
+                entry["max_wait_seconds"] = max(entry["max_wait_seconds"], waited)
+
+    def record_io(self, name, seconds):
+        with self._lock:
+            self.files[name].append(seconds)
+
+    def report(self):
+        """
+        Returns: dict with locks (acquisitions, contended count / share, total and max wait)
+                 and files (count and percentiles per read / write kind)
+        """
+        with self._lock:
+            locks = {
+                name: {
+                    **entry,
+                    "wait_seconds": round(entry["wait_seconds"], 4),
+                    "contended_share": round(entry["contended"] / entry["acquisitions"], 3) if entry["acquisitions"] else 0.0
+                }
+                for name, entry in self.locks.items()
+            }
+            files = {name: summarize(durations) for name, durations in self.files.items()}
+        return {"locks": locks, "files": files}
+
+class InstrumentedLock:
+    """Lock wrapper that records how long acquirers had to wait (a non-blocking try first detects contention)"""
+    def __init__(self, lock, stats, name):
+        self._lock = lock
+        self._stats = stats
+        self._name = name
+
+    def acquire(self, blocking=True, timeout=-1):
+        if self._lock.acquire(blocking=False):
+            self._stats.record_wait(self._name, 0.0, False)
+            return True
+        if not blocking:
+            return False
+        started = time.perf_counter()
+        acquired = self._lock.acquire(True, timeout)
+        self._stats.record_wait(self._name, time.perf_counter() - started, True)
+        return acquired
+
+    def release(self):
+        self._lock.release()
+
+    def __enter__(self):
+        self.acquire()
+        return self
+
+    def __exit__(self, *exc):
+        self.release()
+
+def instrument_data_manager(stats):
+    """Wrap DataManager / WateringLog locks and time JSON file reads and writes (call before the app starts)"""
+    from utils.data_manager import DataManager
+
+    original_init = DataManager.__init__
+    original_write = DataManager._write_json
+
+    def init(self, user_id=None):
+        original_init(self, user_id)
+        self._lock = InstrumentedLock(self._lock, stats, "DataManager")
+        self.watering_log._lock = InstrumentedLock(self.watering_log._lock, stats, "WateringLog")
+
+    def write_json(self, path, data):
+        started = time.perf_counter()
+        try:
+            return original_write(self, path, data)
+        finally:
+            stats.record_io(f"write {os.path.basename(path)}", time.perf_counter() - started)
+
+    def timed_load(name, loader):
+        def load(self):
+            started = time.perf_counter()
+            try:
+                return loader(self)
+            finally:
+                stats.record_io(f"read {name}", time.perf_counter() - started)
+        return load
+
+    DataManager.__init__ = init
+    DataManager._write_json = write_json
+    DataManager._load_plants = timed_load("plants", DataManager._load_plants)
+    DataManager._load_chat_history = timed_load("chat_history", DataManager._load_chat_history)
+    DataManager._load_user_profile = timed_load("user_profile", DataManager._load_user_profile)
+
+def summarize(durations):
+    """Count and p50/p95/p99/max in milliseconds"""
+    if not durations:
+        return {"count": 0}
+    values = np.asarray(durations) * 1000
+    p50, p95, p99 = np.percentile(values, [50, 95, 99])
+    return {
+        "count": len(values),
+        "p50_ms": round(float(p50), 2),
+        "p95_ms": round(float(p95), 2),
+        "p99_ms": round(float(p99), 2),
+        "max_ms": round(float(values.max()), 2)
+    }
+
+def read_rss_mb(pid="self"):
+    """Resident set size of a process in MB (Linux /proc), or None"""
+    try:
+        with open(f"/proc/{pid}/status", "r", encoding="utf-8") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return round(int(line.split()[1]) / 1024, 1)
+    except OSError:
+        pass
+    return None
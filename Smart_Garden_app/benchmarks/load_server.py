@@ -0,0 +1,54 @@
+"""
+Load Test Server
+Runs the real Streamlit server for app.py with the DataManager contention probes installed
+Started by load_test.py in a scratch working directory; probe stats are dumped to a JSON file every second
+"""
+import argparse
+import json
+import os
+import sys
+import threading
+import time
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+APP_DIR = os.path.dirname(BENCH_DIR)
+APP_FILE = os.path.join(APP_DIR, "app.py")
+sys.path.insert(0, APP_DIR)
+sys.path.insert(0, BENCH_DIR)
+
+from contention import ContentionStats, instrument_data_manager, read_rss_mb
+
+def dump_stats(stats, path, interval_seconds=1.0):
+    """Write the probe report atomically, forever (daemon thread)"""
+    while True:
+        time.sleep(interval_seconds)
+        report = {**stats.report(), "rss_mb": read_rss_mb()}
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(report, f)
+        os.replace(tmp_path, path)
+
+def main():
+    parser = argparse.ArgumentParser(description="Smart Garden server with contention probes")
+    parser.add_argument("--port", type=int, required=True)
+    parser.add_argument("--stats-file", required=True)
+    args = parser.parse_args()
+
+    stats = ContentionStats()
+    instrument_data_manager(stats)
+    threading.Thread(target=dump_stats, args=(stats, args.stats_file), name="probe-dump", daemon=True).start()
+
+    from streamlit.web import bootstrap
+    flag_options = {
+        "server_port": args.port,
+        "server_address": "127.0.0.1",
+        "server_headless": True,
+        "server_fileWatcherType": "none",
+        "browser_gatherUsageStats": False,
+        "global_developmentMode": False,
+    }
+    bootstrap.load_config_options(flag_options=flag_options)
+    bootstrap.run(APP_FILE, False, [], flag_options)
+
+if __name__ == "__main__":
+    main()
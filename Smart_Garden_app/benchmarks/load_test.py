@@ -0,0 +1,344 @@
+"""
+Load Test Harness
+Simulates many concurrent browser sessions against a real Streamlit server (load_server.py) over the
+websocket protocol, running realistic user journeys with every external API on the stub server
+Reports throughput, p50/p95/p99 per step, memory per session and contention on the JSON data files
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+import requests
+import websockets
+from collections import defaultdict
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, BENCH_DIR)
+
+from conftest import APP_DIR, BENCH_API_KEYS, seed_garden
+from contention import read_rss_mb, summarize
+from stub_server import StubServer
+
+from streamlit.proto.BackMsg_pb2 import BackMsg
+from streamlit.proto.ForwardMsg_pb2 import ForwardMsg
+from streamlit.proto.WidgetStates_pb2 import WidgetState
+
+CHAT_QUESTIONS = [
+    "Why are my leaves turning yellow?",
+    "How often should I water basil in summer?",
+    "Should I move my plants inside before the storm?",
+    "What is the best fertilizer for roses?",
+    "My aloe vera has brown tips, what should I do?",
+]
+
+# ==========================================
+# Protocol client
+# ==========================================
+class Session:
+    """One simulated browser tab: a websocket session that reruns the script like the frontend does"""
+    def __init__(self, url, user_id, rng, think_seconds, step_timeout):
+        self.url = url
+        self.user_id = user_id
+        self.rng = rng
+        self.think_seconds = think_seconds
+        self.step_timeout = step_timeout
+        self.ws = None
+        self.page_script_hash = ""
+        self.widgets = {}  # widget id -> WidgetState kept between reruns (radio, text inputs)
+        self.elements = []  # (element type, element proto) from the last run
+        self.timings = []  # (step, seconds, ok)
+
+    async def connect(self):
+        self.ws = await websockets.connect(self.url, subprotocols=["streamlit"], max_size=None)
+
+    async def close(self):
+        if self.ws is not None:
+            await self.ws.close()
+
+    def find(self, kind, label=None, key=None):
+        """First widget of a type from the last run, matched by label or by user key"""
+        for element_kind, element in self.elements:
+            if element_kind != kind:
+                continue
+            if label is None and key is None:
+                return element
+            if label is not None and element.label == label:
+                return element
+            if key is not None and element.id.endswith(f"-{key}"):
+                return element
+        return None
+
+    async def step(self, name, triggers=None):
+        """Rerun the script with the kept widget values (+ one-shot triggers), timed until it finishes"""
+        if self.think_seconds:
+            await asyncio.sleep(self.rng.uniform(0, self.think_seconds))
+        message = BackMsg()
+        client_state = message.rerun_script
+        client_state.query_string = f"uid={self.user_id}"
+        client_state.page_script_hash = self.page_script_hash
+        client_state.widget_states.widgets.extend(list(self.widgets.values()) + list(triggers or []))
+
+        started = time.perf_counter()
+        try:
+            await self.ws.send(message.SerializeToString())
+            ok = await asyncio.wait_for(self._read_run(), self.step_timeout)
+        except Exception as e:
+            print(f"❌ Load test step {name} error: {e!r}")
+            ok = False
+        self.timings.append((name, time.perf_counter() - started, ok))
+        return ok
+
+    async def _read_run(self):
+        """Collect the elements of one script run; False if the script raised"""
+        self.elements = []
+        failed = False
+        while True:
+            msg = ForwardMsg()
+            msg.ParseFromString(await self.ws.recv())
+            kind = msg.WhichOneof("type")
+            if kind == "new_session":
+                self.page_script_hash = msg.new_session.main_script_hash
+            elif kind == "delta" and msg.delta.WhichOneof("type") == "new_element":
+                element_kind = msg.delta.new_element.WhichOneof("type")
+                failed = failed or element_kind == "exception"
+                self.elements.append((element_kind, getattr(msg.delta.new_element, element_kind)))
+            elif kind == "script_finished":
+                if msg.script_finished == ForwardMsg.FINISHED_EARLY_FOR_RERUN:
+                    # st.rerun(): the follow-up run belongs to the same step
+                    self.elements = []
+                    continue
+                return not failed and msg.script_finished != ForwardMsg.FINISHED_WITH_COMPILE_ERROR
+
+    async def open_page(self, name, page):
+        radio = self.find("radio", key="page_selector")
+        if radio is not None:
+            self.widgets[radio.id] = WidgetState(id=radio.id, string_value=page)
+            return await self.step(name)
+        # First run of the session: land on the Welcome page, then navigate
+        await self.step("Welcome" if page == "🏠 Welcome" else f"{name} (landing)")
+        if page == "🏠 Welcome":
+            return True
+        return await self.open_page(name, page)
+
+    async def click(self, name, label, extra=None):
+        button = self.find("button", label=label)
+        if button is None or button.disabled:
+            self.timings.append((name, 0.0, False))
+            return False
+        return await self.step(name, [WidgetState(id=button.id, trigger_value=True)] + list(extra or []))
+
+async def journey_browse(session):
+    await session.open_page("Welcome", "🏠 Welcome")
+    await session.open_page("Dashboard", "📊 Garden Dashboard")
+    await session.click("Dashboard (next page)", "Next ➡️")
+
+async def journey_water(session):
+    await session.open_page("Dashboard", "📊 Garden Dashboard")
+    await session.click("Water", "💧 Water")
+
+async def journey_add_plant(session):
+    await session.open_page("Add Plant", "🌱 Add a Plant")
+    name_input = session.find("text_input", label="Plant Name *")
+    fields = []
+    if name_input is not None:
+        fields.append(WidgetState(id=name_input.id, string_value=f"Load Test Fern {session.rng.randint(1, 10**6)}"))
+    # Form fields are only sent together with the submit trigger
+    await session.click("Add Plant (submit)", "✅ Add Plant to Garden", fields)
+
+async def journey_chat(session):
+    await session.open_page("Botanist", "🤖 AI Botanist")
+    chat_input = session.find("chat_input")
+    if chat_input is None:
+        session.timings.append(("Botanist (ask)", 0.0, False))
+        return
+    question = WidgetState(id=chat_input.id)
+    question.chat_input_value.data = session.rng.choice(CHAT_QUESTIONS)
+    await session.step("Botanist (ask)", [question])
+
+JOURNEYS = {
+    "browse": (journey_browse, 0.4),
+    "water": (journey_water, 0.25),
+    "add_plant": (journey_add_plant, 0.15),
+    "chat": (journey_chat, 0.2),
+}
+
+# ==========================================
+# Runner
+# ==========================================
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+def start_server(workdir, env, stats_file, timeout_seconds=60):
+    """Launch load_server.py and wait for Streamlit's health endpoint"""
+    port = free_port()
+    process = subprocess.Popen(
+        [sys.executable, os.path.join(BENCH_DIR, "load_server.py"), "--port", str(port), "--stats-file", stats_file],
+        cwd=workdir,
+        env=env,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL
+    )
+    deadline = time.time() + timeout_seconds
+    while time.time() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError(f"Load test server exited with code {process.returncode}")
+        try:
+            if requests.get(f"http://127.0.0.1:{port}/_stcore/health", timeout=1).status_code == 200:
+                return process, port
+        except requests.exceptions.RequestException:
+            pass
+        time.sleep(0.2)
+    process.terminate()
+    raise RuntimeError("Load test server did not start in time")
+
+async def run_sessions(args, url, user_ids, server_pid):
+    semaphore = asyncio.Semaphore(args.concurrency or args.sessions)
+    sessions = []
+    names = list(JOURNEYS)
+
+    async def run_one(index):
+        rng = random.Random(args.seed + index)
+        journey = rng.choices(names, weights=[JOURNEYS[name][1] for name in names])[0]
+        if args.ramp_seconds:
+            await asyncio.sleep(args.ramp_seconds * index / args.sessions)
+        session = Session(url, user_ids[index % len(user_ids)], rng, args.think_ms / 1000, args.step_timeout)
+        async with semaphore:
+            try:
+                await session.connect()
+                await JOURNEYS[journey][0](session)
+            except Exception as e:
+                print(f"❌ Load test session {index} error: {e!r}")
+                session.timings.append(("connect", 0.0, False))
+        sessions.append((journey, session))
+
+    started = time.perf_counter()
+    await asyncio.gather(*(run_one(index) for index in range(args.sessions)))
+    wall_seconds = time.perf_counter() - started
+    # All sessions are still connected, so the server holds every session's state
+    rss_loaded = read_rss_mb(server_pid)
+    for _, session in sessions:
+        await session.close()
+    return sessions, wall_seconds, rss_loaded
+
+def run_load_test(args):
+    stub = StubServer(seed=args.seed).start()
+    stub.configure(latency_seconds=args.stub_latency_ms / 1000, error_rate=args.stub_error_rate)
+
+    workdir = tempfile.mkdtemp(prefix="smart-garden-load-")
+    stats_file = os.path.join(workdir, "contention.json")
+
+    # Seed the gardens in the server's working directory
+    # Several sessions share each garden, as when one user has the app open in many tabs
+    sys.path.insert(0, APP_DIR)
+    from utils.data_manager import DataManager, new_user_id
+    user_ids = [new_user_id() for _ in range(args.users)]  # The app only opens gardens under ids it issues
+    cwd = os.getcwd()
+    os.chdir(workdir)
+    try:
+        for user_id in user_ids:
+            data_manager = seed_garden(DataManager(user_id), args.plants, chat_turns=20)
+            data_manager.save_user_profile({"name": user_id, "email": f"{user_id}@example.com", "location": "Sialkot"})
+    finally:
+        os.chdir(cwd)
+
+    env = {**os.environ, **stub.service_env(), **BENCH_API_KEYS}
+    process, port = start_server(workdir, env, stats_file)
+    url = f"ws://127.0.0.1:{port}/_stcore/stream"
+    try:
+        # Warm-up session: fills the process-wide caches so they are not billed to the first sessions
+        warmup_args = argparse.Namespace(**{**vars(args), "sessions": 1, "think_ms": 0, "ramp_seconds": 0})
+        asyncio.run(run_sessions(warmup_args, url, user_ids, process.pid))
+        time.sleep(1.0)
+        rss_before = read_rss_mb(process.pid)
+
+        sessions, wall_seconds, rss_loaded = asyncio.run(run_sessions(args, url, user_ids, process.pid))
+        time.sleep(1.5)  # let the server dump its final probe stats
+        with open(stats_file, "r", encoding="utf-8") as f:
+            contention = json.load(f)
+    finally:
+        process.terminate()
+        process.wait(timeout=30)
+        stub.stop()
+
+    steps = defaultdict(list)
+    errors = defaultdict(int)
+    journeys = defaultdict(int)
+    for journey, session in sessions:
+        journeys[journey] += 1
+        for name, seconds, ok in session.timings:
+            steps[name].append(seconds)
+            if not ok:
+                errors[name] += 1
+    script_runs = sum(len(durations) for durations in steps.values())
+
+    memory = {"server_rss_before_mb": rss_before, "server_rss_loaded_mb": rss_loaded}
+    if rss_before is not None and rss_loaded is not None:
+        memory["per_session_kb"] = round((rss_loaded - rss_before) * 1024 / args.sessions, 1)
+    contention.pop("rss_mb", None)
+
+    return {
+        "config": {key: value for key, value in vars(args).items() if key != "json"},
+        "wall_seconds": round(wall_seconds, 2),
+        "throughput": {
+            "script_runs_per_second": round(script_runs / wall_seconds, 2),
+            "sessions_per_second": round(args.sessions / wall_seconds, 2)
+        },
+        "journeys": dict(journeys),
+        "steps": {name: {**summarize(durations), "errors": errors[name]} for name, durations in sorted(steps.items())},
+        "memory": memory,
+        "contention": contention,
+        "stub_requests": dict(stub.requests)
+    }
+
+def print_report(report):
+    print(f"\n🌱 {report['config']['sessions']} sessions on {report['config']['users']} gardens in {report['wall_seconds']} s")
+    print(f"Throughput: {report['throughput']['script_runs_per_second']} script runs/s, "
+          f"{report['throughput']['sessions_per_second']} sessions/s")
+    print(f"Journeys: {report['journeys']}")
+
+    print(f"\n{'Step':<26}{'runs':>6}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'max ms':>10}{'errors':>8}")
+    for name, row in report["steps"].items():
+        print(f"{name:<26}{row['count']:>6}{row['p50_ms']:>10}{row['p95_ms']:>10}{row['p99_ms']:>10}{row['max_ms']:>10}{row['errors']:>8}")
+
+    print(f"\nMemory: {report['memory']}")
+
+    print(f"\n{'Lock':<16}{'acquired':>10}{'contended':>11}{'share':>8}{'wait s':>10}{'max wait ms':>13}")
+    for name, row in report["contention"]["locks"].items():
+        print(f"{name:<16}{row['acquisitions']:>10}{row['contended']:>11}{row['contended_share']:>8}"
+              f"{row['wait_seconds']:>10.3f}{row['max_wait_seconds'] * 1000:>13.2f}")
+
+    print(f"\n{'Data file I/O':<32}{'count':>7}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}")
+    for name, row in sorted(report["contention"]["files"].items()):
+        print(f"{name:<32}{row['count']:>7}{row['p50_ms']:>10}{row['p95_ms']:>10}{row['p99_ms']:>10}")
+
+def main():
+    parser = argparse.ArgumentParser(description="Simulate concurrent Smart Garden sessions")
+    parser.add_argument("--sessions", type=int, default=50, help="Total simulated sessions")
+    parser.add_argument("--concurrency", type=int, default=0, help="Sessions connected at once (default: all)")
+    parser.add_argument("--users", type=int, default=10, help="Distinct gardens the sessions are spread over")
+    parser.add_argument("--plants", type=int, default=50, help="Plants seeded per garden")
+    parser.add_argument("--think-ms", type=float, default=0.0, help="Random pause (0..N ms) before each step")
+    parser.add_argument("--ramp-seconds", type=float, default=0.0, help="Spread session starts over this many seconds")
+    parser.add_argument("--step-timeout", type=float, default=120.0, help="Seconds before a script run counts as failed")
+    parser.add_argument("--stub-latency-ms", type=float, default=0.0, help="Latency added to every stubbed API response")
+    parser.add_argument("--stub-error-rate", type=float, default=0.0, help="Share of stubbed responses that are errors")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--json", help="Also write the report to this file")
+    args = parser.parse_args()
+
+    report = run_load_test(args)
+    print_report(report)
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+
+if __name__ == "__main__":
+    main()
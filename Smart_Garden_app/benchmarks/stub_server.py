@@ -0,0 +1,177 @@
+"""
+Stub API Server
+Local HTTP stand-in for every external service, replaying recorded fixtures
+Latency, jitter and error responses can be injected globally or per route
+"""
+import json
+import os
+import random
+import re
+import threading
+import time
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse
+
+FIXTURES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures")
+
+# (route name, HTTP method, path pattern, fixture file)
+ROUTES = [
+    ("openweather_current", "GET", r"^/openweather/weather$", "openweather_current.json"),
+    ("openweather_forecast", "GET", r"^/openweather/forecast$", "openweather_forecast.json"),
+    ("perenual_species_list", "GET", r"^/perenual/species-list$", "perenual_species_list.json"),
+    ("perenual_species_details", "GET", r"^/perenual/species/details/\w+$", "perenual_species_details.json"),
+    ("huggingface_vqa", "POST", r"^/huggingface/dandelin/.+$", "huggingface_vqa.json"),
+    ("huggingface_caption", "POST", r"^/huggingface/.+$", "huggingface_caption.json"),
+    ("groq_chat", "POST", r"^/groq/openai/v1/chat/completions$", "groq_chat_completion.json"),
+    ("gemini_generate", "POST", r"^/gemini/v1beta/models/[^/]+:generateContent$", "gemini_generate_content.json"),
+    ("overpass", "GET", r"^/overpass$", "overpass_nurseries.json"),
+    ("ipapi", "GET", r"^/ipapi/?$", "ipapi_location.json"),
+    ("ip_api", "GET", r"^/ip-api/?$", "ip_api_location.json"),
+]
+
+def _rebase_forecast(body):
+    """Shift recorded forecast timestamps so the first entry is always in the next 3 hours"""
+    items = body.get("list") or []
+    if not items:
+        return body
+    now = int(time.time())
+    shift = (now - now % 10800) + 10800 - items[0]["dt"]
+    for item in items:
+        item["dt"] += shift
+    return body
+
+class StubServer:
+    def __init__(self, host="127.0.0.1", port=0, fixtures_dir=FIXTURES_DIR, seed=0):
+        self.fixtures_dir = fixtures_dir
+        self.random = random.Random(seed)
+        self.requests = Counter()  # route name -> requests served
+        self._fixtures = {}
+        self._lock = threading.Lock()
+        self.reset()
+
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                server._handle(self, "GET")
+
+            def do_POST(self):
+                server._handle(self, "POST")
+
+            def log_message(self, format, *args):
+                pass  # Keep benchmark output clean
+
+        self._httpd = ThreadingHTTPServer((host, port), Handler)
+        self._httpd.daemon_threads = True
+        self._thread = None
+
+    @property
+    def url(self):
+        host, port = self._httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def service_env(self):
+        """Environment variables that point the app's config at this server"""
+        return {
+            "OPENWEATHER_BASE_URL": f"{self.url}/openweather",
+            "PERENUAL_BASE_URL": f"{self.url}/perenual",
+            "HUGGINGFACE_BASE_URL": f"{self.url}/huggingface",
+            "GROQ_BASE_URL": f"{self.url}/groq",
+            "GEMINI_API_ENDPOINT": f"{self.url}/gemini",
+            "OVERPASS_URL": f"{self.url}/overpass",
+            "IPAPI_URL": f"{self.url}/ipapi/",
+            "IP_API_URL": f"{self.url}/ip-api/",
+        }
+
+    def configure(self, route=None, latency_seconds=None, jitter_seconds=None, error_rate=None, error_status=None):
+        """
+        Set injected latency / errors for all routes (route=None) or one route by name
+        error_rate: share of requests answered with error_status instead of the fixture
+        """
+        settings = {
+            "latency_seconds": latency_seconds,
+            "jitter_seconds": jitter_seconds,
+            "error_rate": error_rate,
+            "error_status": error_status
+        }
+        settings = {key: value for key, value in settings.items() if value is not None}
+        with self._lock:
+            if route is None:
+                self.defaults.update(settings)
+            else:
+                self.overrides.setdefault(route, {}).update(settings)
+
+    def reset(self):
+        """Back to instant, error-free responses"""
+        with self._lock:
+            self.defaults = {"latency_seconds": 0.0, "jitter_seconds": 0.0, "error_rate": 0.0, "error_status": 503}
+            self.overrides = {}
+            self.requests.clear()
+
+    def _settings(self, route):
+        with self._lock:
+            return {**self.defaults, **self.overrides.get(route, {})}
+
+    def _fixture(self, name):
+        """Fixture bodies are read once; each request gets a fresh copy"""
+        if name not in self._fixtures:
+            with open(os.path.join(self.fixtures_dir, name), "r", encoding="utf-8") as f:
+                self._fixtures[name] = f.read()
+        return json.loads(self._fixtures[name])
+
+    def _handle(self, handler, method):
+        path = urlparse(handler.path).path
+        length = int(handler.headers.get("Content-Length") or 0)
+        if length:
+            handler.rfile.read(length)
+
+        for route, route_method, pattern, fixture in ROUTES:
+            if method == route_method and re.match(pattern, path):
+                break
+        else:
+            self._send(handler, 404, {"error": f"No stub route for {method} {path}"})
+            return
+
+        with self._lock:
+            self.requests[route] += 1
+        settings = self._settings(route)
+        delay = settings["latency_seconds"] + self.random.uniform(0, settings["jitter_seconds"])
+        if delay > 0:
+            time.sleep(delay)
+        if settings["error_rate"] and self.random.random() < settings["error_rate"]:
+            self._send(handler, settings["error_status"], {"error": "Injected error from stub server"})
+            return
+
+        body = self._fixture(fixture)
+        if route == "openweather_forecast":
+            body = _rebase_forecast(body)
+        self._send(handler, 200, body)
+
+    def _send(self, handler, status, body):
+        payload = json.dumps(body).encode("utf-8")
+        handler.send_response(status)
+        handler.send_header("Content-Type", "application/json")
+        handler.send_header("Content-Length", str(len(payload)))
+        handler.end_headers()
+        handler.wfile.write(payload)
+
+    def start(self):
+        self._thread = threading.Thread(target=self._httpd.serve_forever, name="stub-server", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._httpd.shutdown()
+        self._httpd.server_close()
+
+if __name__ == "__main__":
+    # Run standalone: point the app at it with the printed environment variables
+    stub = StubServer(port=int(os.getenv("STUB_PORT", "8765"))).start()
+    for name, value in stub.service_env().items():
+        print(f"export {name}={value}")
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        stub.stop()
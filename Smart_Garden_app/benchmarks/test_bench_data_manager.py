@@ -0,0 +1,93 @@
+"""
+DataManager benchmarks
+Every storage operation at 10, 100 and 10k plants
+"""
+import itertools
+import pytest
+from conftest import seed_garden
+
+SIZES = [10, 100, 10_000]
+
+@pytest.fixture(params=SIZES, ids=lambda size: f"{size}_plants")
+def garden(request, workdir):
+    from utils.data_manager import DataManager
+    return seed_garden(DataManager("bench-user"), request.param), request.param
+
+def test_add_plant(benchmark, garden):
+    data_manager, _ = garden
+    names = itertools.count()
+    result = benchmark(lambda: data_manager.add_plant({"name": f"Fern {next(names)}", "placement": "Balcony"}))
+    assert result["id"]
+
+def test_add_plants(benchmark, garden):
+    # Bulk import of 100 plants: one database write instead of 100
+    data_manager, _ = garden
+    names = itertools.count()
+    result = benchmark(lambda: data_manager.add_plants([
+        {"name": f"Fern {next(names)}", "placement": "Balcony"} for _ in range(100)
+    ]))
+    assert len(result) == 100
+
+def test_get_all_plants(benchmark, garden):
+    data_manager, size = garden
+    assert len(benchmark(data_manager.get_all_plants)) == size
+
+def test_get_plant(benchmark, garden):
+    data_manager, size = garden
+    assert benchmark(data_manager.get_plant, size)["id"] == size
+
+def test_update_plant(benchmark, garden):
+    data_manager, size = garden
+    result = benchmark(data_manager.update_plant, size // 2, {"notes": "Repotted"})
+    assert result["notes"] == "Repotted"
+
+def test_delete_plant(benchmark, garden):
+    data_manager, _ = garden
+
+    def setup():
+        plant = data_manager.add_plant({"name": "Temporary Mint", "placement": "Balcony"})
+        return (plant["id"],), {}
+
+    assert benchmark.pedantic(data_manager.delete_plant, setup=setup, rounds=5)
+
+def test_mark_watered(benchmark, garden):
+    data_manager, _ = garden
+    assert benchmark(data_manager.mark_watered, 1)["last_watered"]
+
+def test_get_watering_history(benchmark, garden):
+    data_manager, _ = garden
+    assert benchmark(data_manager.get_watering_history, 1)
+
+def test_get_watering_stats(benchmark, garden):
+    data_manager, _ = garden
+    assert benchmark(data_manager.get_watering_stats, 1)
+
+def test_get_learned_interval(benchmark, garden):
+    data_manager, _ = garden
+    assert benchmark(data_manager.get_learned_interval, 1)
+
+def test_query_plants(benchmark, garden):
+    data_manager, _ = garden
+    result = benchmark(data_manager.query_plants, "Most urgent", "Balcony", None, None, 0)
+    assert result["plants"]
+
+def test_get_garden_summary(benchmark, garden):
+    data_manager, size = garden
+    assert benchmark(data_manager.get_garden_summary)["total"] == size
+
+def test_add_chat_message(benchmark, garden):
+    data_manager, _ = garden
+    benchmark(data_manager.add_chat_message, "How often should I water basil?", "Every 2-3 days in summer.")
+
+def test_get_chat_history(benchmark, garden):
+    data_manager, _ = garden
+    assert benchmark(data_manager.get_chat_history, 20)
+
+def test_save_user_profile(benchmark, garden):
+    data_manager, _ = garden
+    benchmark(data_manager.save_user_profile, {"name": "Bench User", "email": "bench@example.com", "location": "Sialkot"})
+
+def test_get_user_profile(benchmark, garden):
+    data_manager, _ = garden
+    data_manager.save_user_profile({"name": "Bench User", "email": "bench@example.com"})
+    assert benchmark(data_manager.get_user_profile)["name"] == "Bench User"
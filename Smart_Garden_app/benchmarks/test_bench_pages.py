@@ -0,0 +1,41 @@
+"""
+Page render benchmarks
+Full Streamlit script runs (AppTest) of every page for a seeded garden, with all APIs on the stub server
+"""
+import os
+import pytest
+from streamlit.testing.v1 import AppTest
+from conftest import APP_DIR, seed_garden
+
+APP_FILE = os.path.join(APP_DIR, "app.py")
+
+PAGES = [
+    "🏠 Welcome",
+    "👤 User Profile",
+    "📍 Location & Nurseries",
+    "📊 Garden Dashboard",
+    "🌱 Add a Plant",
+    "🤖 AI Botanist",
+]
+
+@pytest.fixture(params=[10, 100], ids=lambda size: f"{size}_plants")
+def seeded_user(request, workdir, stub_server):
+    from utils.data_manager import DataManager, new_user_id
+    user_id = new_user_id()  # The app only opens gardens under ids it issues
+    data_manager = DataManager(user_id)
+    seed_garden(data_manager, request.param, chat_turns=20)
+    data_manager.save_user_profile({"name": "Bench User", "email": "bench@example.com", "location": "Sialkot"})
+    return user_id
+
+def render_page(user_id, page):
+    """One cold script run of a page, as a new browser session would see it"""
+    at = AppTest.from_file(APP_FILE, default_timeout=60)
+    at.query_params["uid"] = user_id
+    at.session_state["page_selector"] = page
+    at.run()
+    return at
+
+@pytest.mark.parametrize("page", PAGES)
+def test_render_page(benchmark, seeded_user, page):
+    at = benchmark.pedantic(render_page, args=(seeded_user, page), rounds=3, warmup_rounds=1)
+    assert not at.exception
@@ -0,0 +1,165 @@
+"""
+Service benchmarks
+Weather, watering and sun calculations plus every external API client, served by the stub server
+"""
+import io
+from datetime import datetime, timedelta
+import pytest
+from PIL import Image
+
+@pytest.fixture
+def weather_service(stub_server):
+    from utils.weather_service import WeatherService
+    return WeatherService()
+
+@pytest.fixture
+def plant_service(stub_server):
+    from utils.plant_service import PlantService
+    return PlantService()
+
+@pytest.fixture
+def weather_snapshot(weather_service):
+    """Current weather + forecast parsed from the recorded fixtures"""
+    return weather_service.get_current_weather(), weather_service.get_forecast(days=2)
+
+@pytest.fixture(scope="module")
+def plant_photo():
+    image = Image.new("RGB", (640, 480), (60, 140, 50))
+    buffer = io.BytesIO()
+    image.save(buffer, format="JPEG")
+    return buffer.getvalue()
+
+# Weather service
+def test_get_current_weather(benchmark, weather_service):
+    result = benchmark(weather_service.get_current_weather, "Sialkot", "PK")
+    assert result["city"] == "Sialkot"
+
+@pytest.mark.parametrize("days", [1, 2, 5])
+def test_get_forecast(benchmark, weather_service, days):
+    result = benchmark(weather_service.get_forecast, "Sialkot", "PK", days)
+    assert len(result) == days * 8
+
+def test_get_forecast_slow_api(benchmark, weather_service, stub_server):
+    stub_server.configure(route="openweather_forecast", latency_seconds=0.05)
+    result = benchmark.pedantic(weather_service.get_forecast, args=("Sialkot", "PK", 2), rounds=10)
+    assert len(result) == 16
+
+def test_get_forecast_api_errors(benchmark, weather_service, stub_server):
+    # Every request fails: measures the mock-fallback path
+    stub_server.configure(route="openweather_forecast", error_rate=1.0, error_status=500)
+    result = benchmark(weather_service.get_forecast, "Sialkot", "PK", 2)
+    assert result
+
+def test_check_rain_alert(benchmark, weather_service):
+    result = benchmark(weather_service.check_rain_alert, "Sialkot", "PK", 24)
+    assert "has_rain" in result
+
+def test_check_storm_alert(benchmark, weather_service):
+    result = benchmark(weather_service.check_storm_alert, "Sialkot", "PK", 24)
+    assert "has_storm" in result
+
+@pytest.mark.parametrize("placement", ["Open Roof", "Balcony", "Indoor Window"])
+def test_get_sun_exposure_estimate(benchmark, weather_service, weather_snapshot, placement):
+    current_weather, _ = weather_snapshot
+    result = benchmark(weather_service.get_sun_exposure_estimate, placement, current_weather, "Morning Sun")
+    assert "sun_hours" in result
+
+def test_forecast_timeline(benchmark, weather_snapshot):
+    from utils.forecast_timeline import ForecastTimeline
+    _, forecast = weather_snapshot
+
+    def build_and_query():
+        timeline = ForecastTimeline.from_forecast(forecast)
+        return timeline.precipitation_between(0, 12), timeline.heat_degree_hours(0, 24), timeline.events("rain", 24)
+
+    benchmark(build_and_query)
+
+# Plant service
+@pytest.mark.parametrize("scenario", ["new_plant", "static_interval", "learned_interval"])
+def test_calculate_watering_schedule(benchmark, plant_service, weather_snapshot, scenario):
+    current_weather, forecast = weather_snapshot
+    last_watered = None if scenario == "new_plant" else (datetime.now() - timedelta(days=4)).isoformat()
+    learned = 2.5 if scenario == "learned_interval" else None
+    result = benchmark(
+        plant_service.calculate_watering_schedule,
+        "Rose", 3, last_watered, current_weather, forecast, learned_interval_days=learned
+    )
+    assert "needs_water" in result
+
+@pytest.mark.parametrize("state", ["cold", "warm"])
+def test_soil_model_predict(benchmark, weather_service, plant_service, state):
+    from garden_core.digest import build_digest
+    from utils.soil_model import SoilModel
+    digest = build_digest(weather_service, plant_service, "Sialkot", "PK")
+    placements = ["Open Roof", "Balcony", "Indoor Window"]
+    plants = [
+        {
+            "id": plant_id,
+            "placement": placements[plant_id % 3],
+            "sun_preference": "Full Sun",
+            "watering_interval_days": 1 + plant_id % 7,
+            "last_watered": (datetime.now() - timedelta(hours=plant_id % 240)).isoformat()
+        }
+        for plant_id in range(500)
+    ]
+    model = SoilModel()
+    if state == "warm":
+        model.predict("bench", plants, digest)  # Later renders only advance from the saved state
+        result = benchmark(model.predict, "bench", plants, digest)
+    else:
+        result = benchmark(lambda: SoilModel().predict("bench", plants, digest))
+    assert all(prediction["next_water_at"] for prediction in result)
+
+def test_search_plant(benchmark, plant_service):
+    result = benchmark(plant_service.search_plant, "rose")
+    assert result
+
+def test_get_plant_details(benchmark, plant_service):
+    result = benchmark(plant_service.get_plant_details, 2961)
+    assert result
+
+# Vision and chat providers
+def test_huggingface_identify_plant(benchmark, stub_server, plant_photo):
+    from utils.huggingface_service import HuggingFaceService
+    service = HuggingFaceService()
+    result = benchmark(service.identify_plant, plant_photo)
+    assert result["plant_name"] == "rose"
+
+def test_huggingface_analyze_plant_health(benchmark, stub_server, plant_photo):
+    from utils.huggingface_service import HuggingFaceService
+    service = HuggingFaceService()
+    result = benchmark(service.analyze_plant_health, plant_photo, "Why are the leaves yellow?")
+    assert not result.get("error")
+
+def test_gemini_identify_plant(benchmark, stub_server, plant_photo):
+    from utils.gemini_service import GeminiService
+    service = GeminiService()
+    if service.model is None:
+        pytest.skip("Gemini client could not be created")
+    result = benchmark(service.identify_plant, plant_photo)
+    assert result.get("plant_name")
+
+def test_groq_chat_about_plant(benchmark, stub_server):
+    from utils.groq_service import GroqService
+    service = GroqService()
+    if service.client is None:
+        pytest.skip("Groq client could not be created")
+    result = benchmark(service.chat_about_plant, "Why are my rose leaves turning yellow?")
+    assert result
+
+def test_vision_dispatch_hedged(benchmark, stub_server, plant_photo):
+    # Hugging Face is slow, so Gemini is raced after the hedge delay
+    from utils.gemini_service import GeminiService
+    from utils.huggingface_service import HuggingFaceService
+    from utils.vision_dispatcher import VisionDispatcher, is_valid_identification
+    gemini, huggingface = GeminiService(), HuggingFaceService()
+    if gemini.model is None:
+        pytest.skip("Gemini client could not be created")
+    stub_server.configure(route="huggingface_vqa", latency_seconds=0.3)
+    dispatcher = VisionDispatcher(
+        {"Hugging Face": huggingface.identify_plant, "Gemini": gemini.identify_plant},
+        is_valid_identification,
+        hedge_after_seconds=0.1
+    )
+    result = benchmark.pedantic(dispatcher.dispatch, args=(plant_photo,), rounds=5)
+    assert result.get("provider")
@@ -1,8 +1,11 @@
 """
 Configuration file for Smart Garden App
 Loads environment variables from Streamlit secrets (Cloud) or .env file (Local)
+API keys are resolved once into an immutable Settings object (re-resolved only when secrets.toml changes)
 """
 import os
+import threading
+from dataclasses import dataclass, field
 from dotenv import load_dotenv
 
 # Load environment variables from .env file (for local development)
@@ -13,6 +16,7 @@ DEFAULT_LOCATION = os.getenv("DEFAULT_LOCATION", "Sialkot,PK")
 DEFAULT_CITY = "Sialkot"
 DEFAULT_COUNTRY = "Pakistan"
 DEFAULT_COUNTRY_CODE = "PK"
+DEFAULT_LATITUDE = 32.49  # The default city's; used for evapotranspiration when the weather has no coordinates
 
 # Country name to code mapping (common countries)
 COUNTRY_CODE_MAP = {
@@ -107,140 +111,226 @@ def get_secret_value(st_secrets, key_variations):
     
     return None
 
-def load_api_keys():
+@dataclass(frozen=True)
+class Settings:
+    """Resolved API keys (empty string = not configured); keys are left out of repr() so they never reach logs"""
+    openweather_api_key: str = field(default="", repr=False)
+    gemini_api_key: str = field(default="", repr=False)
+    groq_api_key: str = field(default="", repr=False)
+    huggingface_api_key: str = field(default="", repr=False)
+    perenual_api_key: str = field(default="", repr=False)
+    source: str = "none"  # Where the keys came from: "secrets", "environment" or "none"
+
+# Settings field -> (environment variable, secret name variations)
+SETTINGS_KEYS = {
+    "openweather_api_key": ("OPENWEATHER_API_KEY", [
+        "OPENWEATHER_API_KEY", "openweather_api_key", "OPENWEATHER_KEY",
+        "openweather_key", "OPENWEATHER", "openweather"
+    ]),
+    "gemini_api_key": ("GEMINI_API_KEY", [
+        "GEMINI_API_KEY", "gemini_api_key", "GEMINI_KEY",
+        "gemini_key", "GEMINI", "gemini"
+    ]),
+    "groq_api_key": ("GROQ_API_KEY", [
+        "GROQ_API_KEY", "groq_api_key", "GROQ_KEY",
+        "groq_key", "GROQ", "groq"
+    ]),
+    "huggingface_api_key": ("HUGGINGFACE_API_KEY", [
+        "HUGGINGFACE_API_KEY", "huggingface_api_key", "HUGGINGFACE_KEY",
+        "huggingface_key", "HUGGINGFACE", "huggingface"
+    ]),
+    "perenual_api_key": ("PERENUAL_API_KEY", [
+        "PERENUAL_API_KEY", "perenual_api_key", "PERENUAL_KEY",
+        "perenual_key", "PERENUAL", "perenual"
+    ])
+}
+
+# Locations Streamlit reads secrets.toml from
+SECRETS_FILES = [
+    os.path.join(os.path.expanduser("~"), ".streamlit", "secrets.toml"),
+    os.path.join(os.getcwd(), ".streamlit", "secrets.toml")
+]
+
+_settings = None
+_settings_stamp = None
+_settings_lock = threading.Lock()
+
+def _secrets_stamp():
+    """Modification times of the secrets files (None for missing files)"""
+    stamp = []
+    for path in SECRETS_FILES:
+        try:
+            stamp.append(os.stat(path).st_mtime_ns)
+        except OSError:
+            stamp.append(None)
+    return tuple(stamp)
+
+def _load_secrets_files():
     """
-    Load API keys from Streamlit secrets and set them as environment variables
-    This ensures all services can access them via os.getenv()
-    Call this function after Streamlit is initialized (in app.py)
-    Supports multiple secret formats:
-    - Direct: st.secrets["GROQ_API_KEY"]
-    - Nested: st.secrets["api"]["groq_key"]
+    secrets.toml contents, merged like Streamlit does (later files override earlier ones)
+    Parsed directly so workers and batch jobs never import Streamlit (st.secrets before Python 3.11)
     """
     try:
+        import tomllib
+    except ImportError:
         import streamlit as st
-        
-        # Load keys from Streamlit secrets and set as environment variables
-        if hasattr(st, 'secrets') and st.secrets:
-            keys_loaded = 0
-            
-            # OpenWeather API - try multiple key name variations
-            openweather_key = get_secret_value(st.secrets, [
-                "OPENWEATHER_API_KEY", "openweather_api_key", "OPENWEATHER_KEY", 
-                "openweather_key", "OPENWEATHER", "openweather"
-            ])
-            if openweather_key:
-                os.environ["OPENWEATHER_API_KEY"] = openweather_key
-                keys_loaded += 1
-            
-            # Gemini API
-            gemini_key = get_secret_value(st.secrets, [
-                "GEMINI_API_KEY", "gemini_api_key", "GEMINI_KEY", 
-                "gemini_key", "GEMINI", "gemini"
-            ])
-            if gemini_key:
-                os.environ["GEMINI_API_KEY"] = gemini_key
-                keys_loaded += 1
-            
-            # Groq API - try multiple key name variations
-            groq_key = get_secret_value(st.secrets, [
-                "GROQ_API_KEY", "groq_api_key", "GROQ_KEY", 
-                "groq_key", "GROQ", "groq"
-            ])
-            if groq_key:
-                os.environ["GROQ_API_KEY"] = groq_key
-                keys_loaded += 1
-            
-            # Hugging Face API
-            huggingface_key = get_secret_value(st.secrets, [
-                "HUGGINGFACE_API_KEY", "huggingface_api_key", "HUGGINGFACE_KEY",
-                "huggingface_key", "HUGGINGFACE", "huggingface"
-            ])
-            if huggingface_key:
-                os.environ["HUGGINGFACE_API_KEY"] = huggingface_key
-                keys_loaded += 1
-            
-            # Perenual API
-            perenual_key = get_secret_value(st.secrets, [
-                "PERENUAL_API_KEY", "perenual_api_key", "PERENUAL_KEY",
-                "perenual_key", "PERENUAL", "perenual"
-            ])
-            if perenual_key:
-                os.environ["PERENUAL_API_KEY"] = perenual_key
-                keys_loaded += 1
-            
-            if keys_loaded > 0:
-                print(f"✅ Loaded {keys_loaded} API key(s) from Streamlit secrets")
-                return True
-    except Exception as e:
-        print(f"⚠️ Could not load from Streamlit secrets: {e}")
-        import traceback
-        traceback.print_exc()
+        return st.secrets
+    secrets = {}
+    for path in SECRETS_FILES:
+        if os.path.exists(path):
+            with open(path, "rb") as f:
+                secrets.update(tomllib.load(f))
+    return secrets
+
+def _resolve_settings():
+    """
+    Read every API key once: Streamlit secrets first, then environment variables (.env)
+    Supports both direct (st.secrets["GROQ_API_KEY"]) and nested (st.secrets["api"]["groq_key"]) formats
+    """
+    values, source = {}, "none"
+    secrets = None
+    if any(os.path.exists(path) for path in SECRETS_FILES):
+        try:
+            secrets = _load_secrets_files()
+        except Exception as e:
+            print(f"⚠️ Could not load from Streamlit secrets: {e}")
     
-    # Fallback: keys might already be in environment from .env file
-    if os.getenv("OPENWEATHER_API_KEY") or os.getenv("GROQ_API_KEY"):
-        print("✅ Using API keys from environment variables (.env file)")
-        return True
+    for name, (env_name, variations) in SETTINGS_KEYS.items():
+        value = None
+        if secrets is not None:
+            try:
+                value = get_secret_value(secrets, variations)
+            except Exception as e:
+                print(f"⚠️ Could not read Streamlit secrets: {e}")
+                secrets = None
+        if value:
+            source = "secrets"
+        else:
+            value = os.getenv(env_name, "").strip()
+            if value and source == "none":
+                source = "environment"
+        values[name] = value or ""
     
-    print("❌ No API keys found in secrets or environment")
-    return False
+    settings = Settings(**values, source=source)
+    loaded = sum(1 for name in SETTINGS_KEYS if getattr(settings, name))
+    if loaded:
+        print(f"✅ Loaded {loaded} API key(s) from {source}")
+    else:
+        print("❌ No API keys found in secrets or environment")
+    return settings
+
+def get_settings():
+    """
+    Resolved, immutable settings for this process
+    Cached until a secrets.toml file is added, removed or modified (only a stat per call)
+    """
+    global _settings, _settings_stamp
+    stamp = _secrets_stamp()
+    if _settings is not None and stamp == _settings_stamp:
+        return _settings
+    with _settings_lock:
+        if _settings is None or stamp != _settings_stamp:
+            _settings = _resolve_settings()
+            _settings_stamp = stamp
+        return _settings
 
 # Helper functions to get API keys (for services to use)
 def get_openweather_key():
-    """Get OpenWeather API key from environment"""
-    return os.getenv("OPENWEATHER_API_KEY", "")
+    """Get OpenWeather API key"""
+    return get_settings().openweather_api_key
 
 def get_groq_key():
-    """Get Groq API key from environment or secrets"""
-    # First check environment (set by load_api_keys)
-    key = os.getenv("GROQ_API_KEY", "")
-    if key:
-        return key
-    
-    # Fallback: Try to get directly from Streamlit secrets (in case load_api_keys wasn't called)
-    try:
-        import streamlit as st
-        if hasattr(st, 'secrets') and st.secrets:
-            # Try direct format
-            if "GROQ_API_KEY" in st.secrets:
-                key = st.secrets["GROQ_API_KEY"]
-                if key:
-                    os.environ["GROQ_API_KEY"] = str(key).strip()
-                    return str(key).strip()
-            
-            # Try nested format
-            if "api" in st.secrets:
-                api_secrets = st.secrets["api"]
-                for key_name in ["groq_key", "GROQ_KEY", "groq_api_key", "GROQ_API_KEY"]:
-                    if key_name in api_secrets:
-                        key = api_secrets[key_name]
-                        if key:
-                            os.environ["GROQ_API_KEY"] = str(key).strip()
-                            return str(key).strip()
-    except Exception as e:
-        print(f"⚠️ Error checking Streamlit secrets for Groq key: {e}")
-    
-    return ""
+    """Get Groq API key"""
+    return get_settings().groq_api_key
 
 def get_gemini_key():
-    """Get Gemini API key from environment"""
-    return os.getenv("GEMINI_API_KEY", "")
+    """Get Gemini API key"""
+    return get_settings().gemini_api_key
 
 def get_huggingface_key():
-    """Get Hugging Face API key from environment"""
-    return os.getenv("HUGGINGFACE_API_KEY", "")
+    """Get Hugging Face API key"""
+    return get_settings().huggingface_api_key
 
 def get_perenual_key():
-    """Get Perenual API key from environment"""
-    return os.getenv("PERENUAL_API_KEY", "")
+    """Get Perenual API key"""
+    return get_settings().perenual_api_key
+
+# API Endpoints (each can be overridden with an environment variable, e.g. to point at a local stub server)
+OPENWEATHER_BASE_URL = os.getenv("OPENWEATHER_BASE_URL", "https://api.openweathermap.org/data/2.5")
+PERENUAL_BASE_URL = os.getenv("PERENUAL_BASE_URL", "https://perenual.com/api")
+HUGGINGFACE_BASE_URL = os.getenv("HUGGINGFACE_BASE_URL", "https://router.huggingface.co/models")
+GROQ_BASE_URL = os.getenv("GROQ_BASE_URL") or None  # None = Groq SDK default
+GEMINI_API_ENDPOINT = os.getenv("GEMINI_API_ENDPOINT") or None  # None = Google default (uses REST transport when set)
+IPAPI_URL = os.getenv("IPAPI_URL", "https://ipapi.co/json/")
+IP_API_URL = os.getenv("IP_API_URL", "http://ip-api.com/json/")
+OVERPASS_URL = os.getenv("OVERPASS_URL", "http://overpass-api.de/api/interpreter")
+
+HTTP_POOL_SIZE = 16  # Kept-alive connections per API host, shared by all sessions
+
+# API metrics (Prometheus text format; both exporters are off unless configured)
+METRICS_HOST = os.getenv("METRICS_HOST", "127.0.0.1")
+METRICS_PORT = int(os.getenv("METRICS_PORT", "0") or 0)  # e.g. 9464 -> http://127.0.0.1:9464/metrics
+METRICS_FILE = os.getenv("METRICS_FILE") or None  # e.g. /var/lib/node_exporter/textfile/smart_garden.prom
+METRICS_FILE_INTERVAL_SECONDS = 15
 
-# API Endpoints
-OPENWEATHER_BASE_URL = "https://api.openweathermap.org/data/2.5"
-PERENUAL_BASE_URL = "https://perenual.com/api"
+# Render tracing (in-memory spans per page, shown on the hidden profiler page at ?admin=<ADMIN_TOKEN>)
+TRACING_ENABLED = os.getenv("TRACING_ENABLED", "1") != "0"
+TRACE_HISTORY_PER_PAGE = 20  # Renders kept per page for the waterfall view
+PROFILE_SAMPLE_RATE = float(os.getenv("PROFILE_SAMPLE_RATE", "0") or 0)  # e.g. 0.05 -> cProfile 5% of full renders
+PROFILE_HISTORY = 10  # cProfile captures kept
+ADMIN_TOKEN = os.getenv("ADMIN_TOKEN") or None  # Unset = no admin page
+
+# REST API (python -m garden_api)
+API_HOST = os.getenv("API_HOST", "127.0.0.1")
+API_PORT = int(os.getenv("API_PORT", "8600"))
+API_TOKEN = os.getenv("API_TOKEN") or None  # Clients send "Authorization: Bearer <token>"; unset = no auth
+API_WORKER_THREADS = int(os.getenv("API_WORKER_THREADS", "32"))  # Blocking service calls running at once
+API_MAX_IMAGE_BYTES = 10 * 1024 * 1024
+API_MAX_IMPORT_BYTES = 50 * 1024 * 1024  # Bulk CSV / NDJSON imports
 
 # Data Storage
 PLANTS_DB_FILE = "plants_database.json"
 CHAT_HISTORY_FILE = "chat_history.json"
+WATERING_LOG_FILE = "watering_log.bin"  # Append-only watering events (12 bytes each)
+PLANT_IMAGES_DIR = "plant_images"  # Content-addressed photo store (originals/ and thumbs/)
+THUMBNAIL_SIZE = 256  # Max width/height of generated thumbnails in pixels
+USER_DATA_DIR = "data/users"  # Per-user namespaces: data/users/<shard>/<user_id>/
+OBSERVATION_DATA_DIR = "data/observations"  # Observed weather per location (one memory-mapped file each)
+USER_SHARD_WIDTH = 2  # Hex chars of the user id hash used as shard directory (256 shards)
+# Keyword tables for caption/name classification (shipped with the app, not per-user)
+KEYWORD_TABLES_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "utils", "keyword_tables.json")
 
 # App Settings
 WATERING_CHECK_TIME = "08:00"  # Daily check time
-MAX_PLANTS = 50  # Maximum number of plants user can add
\ No newline at end of file
+WEATHER_CACHE_TTL_SECONDS = 600  # Dashboard weather/forecast/alerts are refetched at most every 10 minutes
+DIGEST_MAX_LOCATIONS = 500  # Locations the digest prefetcher keeps warm
+DIGEST_PREFETCH_INTERVAL_SECONDS = int(os.getenv("DIGEST_PREFETCH_INTERVAL_SECONDS", "60"))  # Digest prefetch cadence (0 disables)
+DIGEST_PREFETCH_WINDOW_SECONDS = 6 * 3600  # Locations requested within this window are prefetched
+MAX_PLANTS = 500  # Maximum number of plants user can add
+PLANT_PAGE_SIZE = 10  # Plant cards rendered per Dashboard page
+SHARED_STORE_MAX_USERS = int(os.getenv("SHARED_STORE_MAX_USERS", "500"))  # Users whose plant / chat snapshots, DataManagers and soil states stay in memory
+
+# Voice transcription (AI Botanist)
+TRANSCRIPTION_ENGINE = os.getenv("TRANSCRIPTION_ENGINE", "google")  # "google" (online) or "sphinx" (offline, needs pocketsphinx)
+TRANSCRIPTION_SAMPLE_RATE = 16000  # Recordings are downmixed to mono and resampled to this rate once
+TRANSCRIPTION_MAX_SECONDS = 60  # Longer recordings are cut (Google's free endpoint limit)
+TRANSCRIPTION_WORKERS = 2  # Transcription threads shared by all sessions
+TRANSCRIPTION_MAX_PENDING = 8  # Queued + running jobs before new recordings are refused
+
+# Vision requests (plant identification / health analysis)
+VISION_HEDGE_AFTER_SECONDS = 4.0  # Race the secondary provider if the primary is slower than this
+VISION_MIN_HEDGE_SECONDS = 0.5
+
+# AI Botanist answer cache
+RESPONSE_CACHE_MAX_ENTRIES = 500
+RESPONSE_CACHE_TTL_SECONDS = 6 * 3600
+SEMANTIC_CACHE_THRESHOLD = 0.8  # Cosine similarity needed for a near-duplicate question hit
+
+# Weather alert messages (cached per alert type, plant and weather bucket)
+ALERT_CACHE_MAX_ENTRIES = 2000
+ALERT_CACHE_TTL_SECONDS = 3 * 3600
+
+# AI Botanist conversation memory
+CHAT_CONTEXT_MAX_TOKENS = 1500  # Hard cap on prompt size sent to Groq
+CHAT_RECENT_TURNS = 4  # Turns sent verbatim; older turns are summarized
+CHAT_SUMMARY_MAX_TOKENS = 250
\ No newline at end of file
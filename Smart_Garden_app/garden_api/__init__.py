@@ -0,0 +1,7 @@
+"""
+Garden API
+REST/JSON API over garden_core for mobile apps and integrations (run with: python -m garden_api)
+"""
+from garden_api.server import create_app, ApiError
+
+__all__ = ["create_app", "ApiError"]
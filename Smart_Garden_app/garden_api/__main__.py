@@ -0,0 +1,19 @@
+"""
+Garden API entry point
+python -m garden_api [--host 0.0.0.0] [--port 8600] [--workers 4]
+"""
+import argparse
+import uvicorn
+import config
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve the Smart Garden REST API")
+    parser.add_argument("--host", default=config.API_HOST)
+    parser.add_argument("--port", type=int, default=config.API_PORT)
+    parser.add_argument("--workers", type=int, default=1, help="Server processes (share the data directory; writes are file-locked per user)")
+    args = parser.parse_args()
+    uvicorn.run("garden_api.server:create_app", factory=True, host=args.host, port=args.port,
+                workers=args.workers, access_log=False)
+
+if __name__ == "__main__":
+    main()
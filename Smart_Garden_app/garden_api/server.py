@@ -0,0 +1,468 @@
+"""
+Garden API Server
+REST/JSON endpoints over garden_core (Starlette / ASGI); the blocking services run on a bounded thread pool
+GET responses carry a strong ETag and answer If-None-Match with 304 Not Modified
+"""
+import base64
+import binascii
+import contextlib
+import hashlib
+import hmac
+import json
+import tempfile
+import anyio
+from datetime import date, datetime
+from functools import partial, wraps
+from starlette.applications import Starlette
+from starlette.responses import Response, StreamingResponse
+from starlette.routing import Route
+import config
+from garden_core import (
+    GardenServices, resolve_location, find_nearby_nurseries, alert_messages, plant_status, soil_predictions,
+    add_plant, import_plants, export_plants, identify_plant, analyze_plant_health, ask_botanist
+)
+from garden_core.bulk import IMPORT_FORMATS
+from utils.data_manager import is_valid_user_id, is_legacy_user_id, PLANT_SORT_OPTIONS, PLANT_URGENCY_LEVELS
+from utils.forecast_timeline import ForecastTimeline
+from utils.metrics import start_metrics_exporter
+
+API_PREFIX = "/api/v1"
+MAX_PAGE_SIZE = 100
+IMPORT_SPOOL_BYTES = 1024 * 1024  # Import uploads larger than this are buffered on disk, not in memory
+EXPORT_MEDIA_TYPES = {"csv": "text/csv; charset=utf-8", "ndjson": "application/x-ndjson"}
+# Plant fields a client may set (id, image and watering timestamps are managed by the server)
+EDITABLE_PLANT_FIELDS = (
+    "name", "scientific_name", "description", "care_level", "location", "placement",
+    "sun_preference", "watering_interval_days", "notes"
+)
+
+class ApiError(Exception):
+    """Request that cannot be served; becomes a JSON error response with this status code"""
+    def __init__(self, status_code, message):
+        super().__init__(message)
+        self.status_code = status_code
+        self.message = message
+
+# ==========================================
+# Responses
+# ==========================================
+def _json_default(value):
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    if isinstance(value, ForecastTimeline):
+        return value.hourly()
+    return str(value)
+
+def _etag_matches(if_none_match, etag):
+    """If-None-Match check (weak comparison, as RFC 9110 requires for GET)"""
+    if if_none_match.strip() == "*":
+        return True
+    tags = [tag.strip() for tag in if_none_match.split(",")]
+    return any(tag.removeprefix("W/") == etag for tag in tags)
+
+def json_response(request, data, status_code=200, max_age=0):
+    """
+    JSON response; successful GETs get a strong ETag from the body hash and a 304 when the client has it
+    max_age: seconds clients may reuse the response without revalidating
+    """
+    body = json.dumps(data, default=_json_default, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+    if request.method != "GET" or status_code != 200:
+        return Response(body, status_code=status_code, media_type="application/json")
+
+    etag = '"' + hashlib.sha1(body).hexdigest() + '"'
+    headers = {"ETag": etag, "Cache-Control": f"private, max-age={max_age}" if max_age else "no-cache"}
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match and _etag_matches(if_none_match, etag):
+        return Response(status_code=304, headers=headers)
+    return Response(body, media_type="application/json", headers=headers)
+
+def error_response(status_code, message):
+    body = json.dumps({"error": message}, ensure_ascii=False).encode("utf-8")
+    return Response(body, status_code=status_code, media_type="application/json")
+
+def api_endpoint(handler):
+    """Bearer token check (when API_TOKEN is set) and JSON errors for ApiError / ValueError / OverflowError"""
+    @wraps(handler)
+    async def endpoint(request):
+        if config.API_TOKEN:
+            supplied = request.headers.get("authorization", "").removeprefix("Bearer ").strip()
+            if not hmac.compare_digest(supplied.encode("utf-8"), config.API_TOKEN.encode("utf-8")):
+                return error_response(401, "Missing or invalid API token")
+        try:
+            return await handler(request)
+        except ApiError as e:
+            return error_response(e.status_code, e.message)
+        except (ValueError, OverflowError) as e:
+            return error_response(400, str(e))
+    return endpoint
+
+# ==========================================
+# Request helpers
+# ==========================================
+async def run_blocking(request, func, *args, **kwargs):
+    """Run a blocking service call on the API's worker threads"""
+    return await anyio.to_thread.run_sync(partial(func, *args, **kwargs), limiter=request.app.state.limiter)
+
+def get_services(request):
+    return request.app.state.services
+
+def get_data_manager(request):
+    user_id = request.path_params["user_id"]
+    # Derivable ids of earlier releases are never served (their gardens were moved to random ids)
+    if not is_valid_user_id(user_id) or is_legacy_user_id(user_id):
+        raise ApiError(404, "Unknown user")
+    return get_services(request).data_manager(user_id)
+
+def query_int(request, name, default, minimum=0, maximum=None):
+    raw = request.query_params.get(name)
+    if raw in (None, ""):
+        return default
+    try:
+        value = int(raw)
+    except ValueError:
+        raise ApiError(400, f"{name} must be an integer")
+    if value < minimum or (maximum is not None and value > maximum):
+        raise ApiError(400, f"{name} must be between {minimum} and {maximum}" if maximum is not None else f"{name} must be at least {minimum}")
+    return value
+
+def query_float(request, name, default=None):
+    raw = request.query_params.get(name)
+    if raw in (None, ""):
+        if default is None:
+            raise ApiError(400, f"{name} is required")
+        return default
+    try:
+        return float(raw)
+    except ValueError:
+        raise ApiError(400, f"{name} must be a number")
+
+def query_location(request):
+    """Location from the city / country / country_code query parameters (app defaults for missing parts)"""
+    return resolve_location({
+        "city": request.query_params.get("city"),
+        "country": request.query_params.get("country"),
+        "country_code": request.query_params.get("country_code")
+    })
+
+async def read_json(request):
+    try:
+        data = await request.json()
+    except (json.JSONDecodeError, UnicodeDecodeError):
+        raise ApiError(400, "Request body must be JSON")
+    if not isinstance(data, dict):
+        raise ApiError(400, "Request body must be a JSON object")
+    return data
+
+async def read_image(request):
+    """Raw image bytes from the request body (any image/* content type)"""
+    body = await request.body()
+    if not body:
+        raise ApiError(400, "Request body must be the image bytes")
+    if len(body) > config.API_MAX_IMAGE_BYTES:
+        raise ApiError(413, f"Image is larger than {config.API_MAX_IMAGE_BYTES // (1024 * 1024)} MB")
+    return body
+
+def query_format(request):
+    fmt = request.query_params.get("format", "csv")
+    if fmt not in IMPORT_FORMATS:
+        raise ApiError(400, f"format must be one of: {', '.join(IMPORT_FORMATS)}")
+    return fmt
+
+def query_flag(request, name):
+    return request.query_params.get(name, "").lower() in ("1", "true", "yes")
+
+def editable_fields(data):
+    updates = {key: data[key] for key in EDITABLE_PLANT_FIELDS if key in data}
+    if "watering_interval_days" in updates:
+        try:
+            updates["watering_interval_days"] = int(updates["watering_interval_days"])
+        except (TypeError, ValueError, OverflowError):  # OverflowError: 1e400 parses as infinity
+            raise ApiError(400, "watering_interval_days must be an integer")
+        if updates["watering_interval_days"] < 1:
+            raise ApiError(400, "watering_interval_days must be at least 1")
+    return updates
+
+def get_digest(request, city, country_code):
+    """Location digest for this hour, shared with every other request (and the dashboard) for the location"""
+    return get_services(request).digests.get(city, country_code)
+
+def garden_soil(request, data_manager, city, country_code):
+    """
+    Soil-water predictions of the user's whole garden and the due times they give (what the plant statuses report)
+    Shared with the app's sessions: the model runs again only when the plants or the digest change
+    Returns: (soil predictions by plant id, due_times for query_plants / get_garden_summary)
+    """
+    return get_services(request).soil_snapshot(data_manager, get_digest(request, city, country_code)).data
+
+def garden_status(request, data_manager, plants, city, country_code, soil=None):
+    """
+    plant_status of each plant joined with the location's digest and its soil-water prediction
+    soil: predictions already made for these plants (garden_soil)
+    """
+    services = get_services(request)
+    digest = get_digest(request, city, country_code)
+    if soil is None:
+        soil = soil_predictions(services.soil, data_manager, plants, digest)
+    return [
+        {
+            "plant_id": plant.get("id"),
+            "name": plant.get("name"),
+            **plant_status(plant, digest, services.plant,
+                           learned_interval_days=data_manager.get_learned_interval(plant.get("id")),
+                           soil=soil.get(plant.get("id")))
+        }
+        for plant in plants
+    ]
+
+# ==========================================
+# Endpoints
+# ==========================================
+@api_endpoint
+async def health(request):
+    return json_response(request, {"status": "ok"})
+
+@api_endpoint
+async def plants(request):
+    data_manager = get_data_manager(request)
+    if request.method == "POST":
+        data = await read_json(request)
+        image_bytes = None
+        if data.get("image_base64"):
+            try:
+                image_bytes = base64.b64decode(data["image_base64"], validate=True)
+            except (binascii.Error, ValueError):
+                raise ApiError(400, "image_base64 is not valid base64")
+            if len(image_bytes) > config.API_MAX_IMAGE_BYTES:
+                raise ApiError(413, f"Image is larger than {config.API_MAX_IMAGE_BYTES // (1024 * 1024)} MB")
+        plant_data = {"watering_interval_days": 3, **editable_fields(data)}
+        plant = await run_blocking(request, add_plant, data_manager, get_services(request).images, plant_data, image_bytes)
+        return json_response(request, plant, status_code=201)
+
+    sort_by = request.query_params.get("sort", PLANT_SORT_OPTIONS[0])
+    if sort_by not in PLANT_SORT_OPTIONS:
+        raise ApiError(400, f"sort must be one of: {', '.join(PLANT_SORT_OPTIONS)}")
+    urgency = request.query_params.get("urgency")
+    if urgency not in (None, "All", *PLANT_URGENCY_LEVELS):
+        raise ApiError(400, f"urgency must be one of: {', '.join(PLANT_URGENCY_LEVELS)}")
+    city, _, country_code = query_location(request)
+    page = query_int(request, "page", 0)
+    page_size = query_int(request, "page_size", config.PLANT_PAGE_SIZE, minimum=1, maximum=MAX_PAGE_SIZE)
+
+    def query():
+        # Watering urgency follows the soil model at the location, like the status endpoints
+        due_times = None
+        if sort_by == PLANT_SORT_OPTIONS[0] or urgency not in (None, "All"):
+            due_times = garden_soil(request, data_manager, city, country_code)[1]
+        return data_manager.query_plants(
+            sort_by=sort_by,
+            placement=request.query_params.get("placement"),
+            category=request.query_params.get("category"),
+            urgency=urgency,
+            page=page,
+            page_size=page_size,
+            due_times=due_times
+        )
+
+    return json_response(request, await run_blocking(request, query))
+
+@api_endpoint
+async def plants_import(request):
+    """CSV / NDJSON body streamed to a spooled file, then imported with one database write"""
+    data_manager = get_data_manager(request)
+    fmt = query_format(request)
+    with tempfile.SpooledTemporaryFile(max_size=IMPORT_SPOOL_BYTES) as upload:
+        size = 0
+        async for chunk in request.stream():
+            size += len(chunk)
+            if size > config.API_MAX_IMPORT_BYTES:
+                raise ApiError(413, f"Import is larger than {config.API_MAX_IMPORT_BYTES // (1024 * 1024)} MB")
+            upload.write(chunk)
+        upload.seek(0)
+        result = await run_blocking(
+            request, import_plants, data_manager, upload, fmt,
+            strict=query_flag(request, "strict"), dry_run=query_flag(request, "dry_run")
+        )
+    result["errors"] = [{"line": line, "error": message} for line, message in result["errors"]]
+    return json_response(request, result, status_code=201 if result["imported"] else 200)
+
+@api_endpoint
+async def plants_export(request):
+    """The whole garden, formatted row by row as it is sent"""
+    data_manager = get_data_manager(request)
+    fmt = query_format(request)
+    return StreamingResponse(
+        export_plants(data_manager, fmt),
+        media_type=EXPORT_MEDIA_TYPES[fmt],
+        headers={"Content-Disposition": f'attachment; filename="garden.{fmt}"', "Cache-Control": "no-store"}
+    )
+
+@api_endpoint
+async def plant_detail(request):
+    data_manager = get_data_manager(request)
+    plant_id = request.path_params["plant_id"]
+    if request.method == "DELETE":
+        if await run_blocking(request, data_manager.get_plant, plant_id) is None:
+            raise ApiError(404, "Plant not found")
+        await run_blocking(request, data_manager.delete_plant, plant_id)
+        return Response(status_code=204)
+
+    if request.method == "PATCH":
+        updates = editable_fields(await read_json(request))
+        if "name" in updates and not str(updates["name"] or "").strip():
+            raise ApiError(400, "Please enter a plant name")
+        plant = await run_blocking(request, data_manager.update_plant, plant_id, updates)
+    else:
+        plant = await run_blocking(request, data_manager.get_plant, plant_id)
+    if plant is None:
+        raise ApiError(404, "Plant not found")
+    return json_response(request, plant)
+
+@api_endpoint
+async def water_plant(request):
+    data_manager = get_data_manager(request)
+    plant = await run_blocking(request, data_manager.mark_watered, request.path_params["plant_id"])
+    if plant is None:
+        raise ApiError(404, "Plant not found")
+    return json_response(request, plant)
+
+@api_endpoint
+async def plant_watering_status(request):
+    data_manager = get_data_manager(request)
+    city, _, country_code = query_location(request)
+
+    def status():
+        plant = data_manager.get_plant(request.path_params["plant_id"])
+        if plant is None:
+            raise ApiError(404, "Plant not found")
+        return garden_status(request, data_manager, [plant], city, country_code)[0]
+
+    return json_response(request, await run_blocking(request, status))
+
+@api_endpoint
+async def garden_watering_status(request):
+    """One page of plants (dashboard order) with their status, plus the garden summary"""
+    data_manager = get_data_manager(request)
+    city, _, country_code = query_location(request)
+    page = query_int(request, "page", 0)
+    page_size = query_int(request, "page_size", config.PLANT_PAGE_SIZE, minimum=1, maximum=MAX_PAGE_SIZE)
+
+    def status():
+        soil, due_times = garden_soil(request, data_manager, city, country_code)
+        result = data_manager.query_plants(page=page, page_size=page_size, due_times=due_times)
+        return {
+            "summary": data_manager.get_garden_summary(due_times),
+            "page": result["page"],
+            "page_count": result["page_count"],
+            "plants": garden_status(request, data_manager, result["plants"], city, country_code,
+                                    soil={plant.get("id"): soil.get(plant.get("id")) for plant in result["plants"]})
+        }
+
+    return json_response(request, await run_blocking(request, status))
+
+@api_endpoint
+async def weather(request):
+    city, country, country_code = query_location(request)
+    digest = await run_blocking(request, get_digest, request, city, country_code)
+    return json_response(request, {"city": city, "country": country, **digest["weather"]}, max_age=60)
+
+@api_endpoint
+async def location_digest(request):
+    """The location digest itself; clients check schema (layout) and version (build) before reading it"""
+    city, country, country_code = query_location(request)
+    data = await run_blocking(request, get_digest, request, city, country_code)
+    return json_response(request, {**data, "city": city, "country": country}, max_age=60)
+
+@api_endpoint
+async def alerts(request):
+    city, country, country_code = query_location(request)
+
+    def messages():
+        return alert_messages(get_services(request).groq, get_digest(request, city, country_code))
+
+    result = await run_blocking(request, messages)
+    return json_response(request, {
+        "city": city,
+        "country": country,
+        "alerts": [{"type": alert_type, "message": message} for alert_type, message in result]
+    }, max_age=60)
+
+@api_endpoint
+async def nurseries(request):
+    lat = query_float(request, "lat")
+    lon = query_float(request, "lon")
+    if not (-90 <= lat <= 90 and -180 <= lon <= 180):
+        raise ApiError(400, "lat / lon out of range")
+    radius_km = query_float(request, "radius_km", 10.0)
+    if not 0 < radius_km <= 50:
+        raise ApiError(400, "radius_km must be between 0 and 50")
+    result = await run_blocking(request, find_nearby_nurseries, lat, lon, radius_km=radius_km,
+                                city=request.query_params.get("city"))
+    return json_response(request, {"nurseries": result}, max_age=3600)
+
+@api_endpoint
+async def identify(request):
+    image_bytes = await read_image(request)
+    return json_response(request, await run_blocking(request, identify_plant, get_services(request).identify, image_bytes))
+
+@api_endpoint
+async def health_check(request):
+    image_bytes = await read_image(request)
+    question = request.query_params.get("question", "")
+    return json_response(request, await run_blocking(
+        request, analyze_plant_health, get_services(request).health, image_bytes, question
+    ))
+
+@api_endpoint
+async def chat(request):
+    data_manager = get_data_manager(request)
+    if request.method == "GET":
+        limit = query_int(request, "limit", 50, minimum=1, maximum=200)
+        return json_response(request, {"messages": await run_blocking(request, data_manager.get_chat_history, limit)})
+
+    data = await read_json(request)
+    question = str(data.get("question") or "").strip()
+    if not question:
+        raise ApiError(400, "question is required")
+    location = {key: data.get(key) for key in ("city", "country", "country_code")}
+    answer = await run_blocking(
+        request, ask_botanist, get_services(request), data_manager, question,
+        location=location, selected_plant=data.get("selected_plant")
+    )
+    return json_response(request, answer)
+
+# ==========================================
+# Application
+# ==========================================
+routes = [
+    Route(f"{API_PREFIX}/health", health),
+    Route(f"{API_PREFIX}/users/{{user_id}}/plants", plants, methods=["GET", "POST"]),
+    Route(f"{API_PREFIX}/users/{{user_id}}/plants/import", plants_import, methods=["POST"]),
+    Route(f"{API_PREFIX}/users/{{user_id}}/plants/export", plants_export),
+    Route(f"{API_PREFIX}/users/{{user_id}}/plants/{{plant_id:int}}", plant_detail, methods=["GET", "PATCH", "DELETE"]),
+    Route(f"{API_PREFIX}/users/{{user_id}}/plants/{{plant_id:int}}/water", water_plant, methods=["POST"]),
+    Route(f"{API_PREFIX}/users/{{user_id}}/plants/{{plant_id:int}}/status", plant_watering_status),
+    Route(f"{API_PREFIX}/users/{{user_id}}/status", garden_watering_status),
+    Route(f"{API_PREFIX}/users/{{user_id}}/chat", chat, methods=["GET", "POST"]),
+    Route(f"{API_PREFIX}/weather", weather),
+    Route(f"{API_PREFIX}/digest", location_digest),
+    Route(f"{API_PREFIX}/alerts", alerts),
+    Route(f"{API_PREFIX}/nurseries", nurseries),
+    Route(f"{API_PREFIX}/identify", identify, methods=["POST"]),
+    Route(f"{API_PREFIX}/health-check", health_check, methods=["POST"]),
+]
+
+def create_app(services=None):
+    """
+    The ASGI application
+    services: GardenServices to serve (built once at startup if not given)
+    """
+    @contextlib.asynccontextmanager
+    async def lifespan(app):
+        app.state.services = services or GardenServices()
+        # Blocking calls share one bounded pool; the API clients underneath keep pooled connections
+        app.state.limiter = anyio.CapacityLimiter(config.API_WORKER_THREADS)
+        app.state.services.digests.start_prefetcher()
+        start_metrics_exporter()
+        yield
+
+    return Starlette(routes=routes, lifespan=lifespan)
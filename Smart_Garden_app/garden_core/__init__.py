@@ -0,0 +1,27 @@
+"""
+Garden Core package for Smart Garden App
+The app's business logic with no Streamlit imports: dashboard computation, location digests, plant CRUD,
+bulk import / export, alerts, identification, chat and location lookups, usable from workers, batch jobs and servers
+app.py is a view over this package
+"""
+from garden_core.services import GardenServices
+from garden_core.location import default_location, resolve_location, detect_location, find_nearby_nurseries, mock_nurseries
+from garden_core.dashboard import (
+    load_weather, active_alerts, alert_messages, plant_status, soil_predictions, watering_due_times
+)
+from garden_core.digest import DIGEST_SCHEMA_VERSION, DigestStore, build_digest
+from garden_core.plants import add_plant
+from garden_core.bulk import detect_format, import_plants, export_plants
+from garden_core.identification import identify_plant, analyze_plant_health
+from garden_core.chat import build_chat_context, ask_botanist
+
+__all__ = [
+    "GardenServices",
+    "default_location", "resolve_location", "detect_location", "find_nearby_nurseries", "mock_nurseries",
+    "load_weather", "active_alerts", "alert_messages", "plant_status", "soil_predictions", "watering_due_times",
+    "DIGEST_SCHEMA_VERSION", "DigestStore", "build_digest",
+    "add_plant",
+    "detect_format", "import_plants", "export_plants",
+    "identify_plant", "analyze_plant_health",
+    "build_chat_context", "ask_botanist",
+]
@@ -0,0 +1,171 @@
+"""
+Bulk Import / Export Module
+Garden data as CSV or NDJSON (one plant per line), parsed and written as a stream
+Imports are validated row by row and stored with a single database write
+"""
+import csv
+import io
+import json
+from datetime import datetime
+import config
+
+IMPORT_FORMATS = ("csv", "ndjson")
+# Columns of an export (and the fields an import reads; id / added_date are reassigned on import)
+PLANT_FIELDS = (
+    "id", "name", "scientific_name", "description", "care_level", "location", "placement",
+    "sun_preference", "watering_interval_days", "last_watered", "added_date", "notes"
+)
+IMPORTED_FIELDS = ("name", "scientific_name", "description", "care_level", "location", "placement", "sun_preference", "notes")
+MAX_WATERING_INTERVAL_DAYS = 365
+MAX_REPORTED_ERRORS = 50  # Row errors listed in the import result (all are counted)
+EXPORT_CHUNK_BYTES = 64 * 1024
+
+def detect_format(file_name):
+    """
+    Import / export format from a file name (.csv, .ndjson or .jsonl)
+    Raises ValueError for other extensions
+    """
+    name = str(file_name or "").lower()
+    if name.endswith(".csv"):
+        return "csv"
+    if name.endswith((".ndjson", ".jsonl")):
+        return "ndjson"
+    raise ValueError("Use a .csv or .ndjson file")
+
+def _iter_records(stream, fmt):
+    """
+    Yield (line_number, record) from a binary stream, one row at a time
+    record is a dict, or an error message string for a row that could not be parsed
+    """
+    text = io.TextIOWrapper(stream, encoding="utf-8-sig", newline="" if fmt == "csv" else None)
+    try:
+        if fmt == "csv":
+            reader = csv.DictReader(text)
+            if reader.fieldnames is None:
+                return
+            reader.fieldnames = [str(field).strip().lower() for field in reader.fieldnames]
+            for row in reader:
+                yield reader.line_num, {key: value for key, value in row.items() if key is not None}
+        else:
+            for line_number, line in enumerate(text, start=1):
+                if not line.strip():
+                    continue
+                try:
+                    record = json.loads(line)
+                except json.JSONDecodeError as e:
+                    yield line_number, f"Invalid JSON ({e.msg})"
+                    continue
+                yield line_number, record if isinstance(record, dict) else "Each line must be a JSON object"
+    except UnicodeDecodeError:
+        raise ValueError("The file is not UTF-8 text")
+    except csv.Error as e:
+        raise ValueError(f"Unreadable CSV: {e}")
+    finally:
+        text.detach()  # Leave the caller's stream open
+
+def validate_plant(record):
+    """
+    Plant data for add_plants from one imported row
+    Returns: plant_data dict
+    Raises ValueError with a user-facing message for an invalid row
+    """
+    plant_data = {}
+    for field in IMPORTED_FIELDS:
+        value = record.get(field)
+        if value not in (None, ""):
+            plant_data[field] = str(value).strip()
+    if not plant_data.get("name"):
+        raise ValueError("Plant name is missing")
+
+    interval = record.get("watering_interval_days")
+    if interval not in (None, ""):
+        try:
+            interval = int(float(interval))
+        except (TypeError, ValueError, OverflowError):  # OverflowError: "inf", 1e400
+            raise ValueError(f"Watering interval {interval!r} is not a number")
+        if not 1 <= interval <= MAX_WATERING_INTERVAL_DAYS:
+            raise ValueError(f"Watering interval must be 1-{MAX_WATERING_INTERVAL_DAYS} days")
+        plant_data["watering_interval_days"] = interval
+
+    last_watered = record.get("last_watered")
+    if last_watered not in (None, ""):
+        try:
+            watered_at = datetime.fromisoformat(str(last_watered).strip())
+            if watered_at.tzinfo is not None:
+                # Stored dates are naive local time (compared with datetime.now() everywhere)
+                watered_at = watered_at.astimezone().replace(tzinfo=None)
+        except (ValueError, OverflowError):
+            raise ValueError(f"Last watered {last_watered!r} is not an ISO date")
+        if watered_at > datetime.now():
+            raise ValueError("Last watered is in the future")
+        plant_data["last_watered"] = watered_at.isoformat()
+    return plant_data
+
+def import_plants(data_manager, stream, fmt, strict=False, dry_run=False):
+    """
+    Import plants from a CSV / NDJSON binary stream
+    The file is read one row at a time; only the plants that fit in the garden are kept in memory,
+    and all of them are stored with one write
+    strict: import nothing if any row is invalid
+    dry_run: validate only
+    Returns: dict with imported (count), rejected (count), errors [(line, message)], skipped (rows over the
+             garden limit) and plants (the stored records); would_import (count) when nothing was written
+    """
+    if fmt not in IMPORT_FORMATS:
+        raise ValueError(f"Unknown import format: {fmt}")
+    capacity = max(0, config.MAX_PLANTS - data_manager.get_garden_summary()['total'])
+    plants_data = []
+    errors = []
+    rejected = 0
+    skipped = 0
+
+    for line_number, record in _iter_records(stream, fmt):
+        try:
+            if isinstance(record, str):
+                raise ValueError(record)
+            plant_data = validate_plant(record)
+        except (ValueError, OverflowError) as e:
+            rejected += 1
+            if len(errors) < MAX_REPORTED_ERRORS:
+                errors.append((line_number, str(e)))
+            continue
+        if len(plants_data) < capacity:
+            plants_data.append(plant_data)
+        else:
+            skipped += 1
+
+    result = {"imported": 0, "rejected": rejected, "errors": errors, "skipped": skipped, "plants": []}
+    if dry_run or (strict and (rejected or skipped)):
+        result["would_import"] = len(plants_data)
+        return result
+    added = data_manager.add_plants(plants_data, max_total=config.MAX_PLANTS)
+    return {**result, "imported": len(added), "plants": added}
+
+def _plant_row(plant):
+    return {field: "" if plant.get(field) is None else plant[field] for field in PLANT_FIELDS}
+
+def export_plants(data_manager, fmt):
+    """
+    Stream the garden as CSV or NDJSON
+    Yields: encoded chunks of about EXPORT_CHUNK_BYTES (rows are formatted as they are sent)
+    """
+    if fmt not in IMPORT_FORMATS:
+        raise ValueError(f"Unknown export format: {fmt}")
+    buffer = io.StringIO()
+    writer = None
+    if fmt == "csv":
+        writer = csv.DictWriter(buffer, fieldnames=PLANT_FIELDS, extrasaction="ignore")
+        writer.writeheader()
+
+    for plant in data_manager.get_all_plants():
+        if writer is not None:
+            writer.writerow(_plant_row(plant))
+        else:
+            buffer.write(json.dumps({field: plant.get(field) for field in PLANT_FIELDS}, ensure_ascii=False, default=str))
+            buffer.write("\n")
+        if buffer.tell() >= EXPORT_CHUNK_BYTES:
+            yield buffer.getvalue().encode("utf-8")
+            buffer.seek(0)
+            buffer.truncate()
+    if buffer.tell():
+        yield buffer.getvalue().encode("utf-8")
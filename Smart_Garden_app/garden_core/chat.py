@@ -0,0 +1,50 @@
+"""
+Chat Module
+AI Botanist questions: weather / plant context, the (cached) Groq answer and the saved chat history
+"""
+from garden_core.location import resolve_location
+
+def build_chat_context(plants, current_weather, city, country, selected_plant=None):
+    """
+    Prompt context for one question
+    Plant names/details are added by the Groq context manager only when relevant
+    Returns: (full_context, plants_context) - plants_context is stored with the chat message
+    """
+    plants_context = ""
+    if plants:
+        plant_names = [p.get('name', '') for p in plants]
+        plants_context = f"User's plants: {', '.join(plant_names)}"
+
+    # Focus on one plant when the user asked about it from its card
+    selected_plant_context = ""
+    if selected_plant:
+        selected_plant_context = f"\n\nIMPORTANT: The user is specifically asking about their '{selected_plant}' plant. Focus your answer on this plant."
+        # Find plant details if available
+        for p in plants or []:
+            if p.get('name') == selected_plant:
+                selected_plant_context += f"\n\nPlant Details:\n- Name: {p.get('name')}\n- Placement: {p.get('placement', 'Unknown')}\n- Sun Preference: {p.get('sun_preference', 'Unknown')}\n- Watering Interval: Every {p.get('watering_interval_days', 3)} days\n- Last Watered: {p.get('last_watered', 'Not recorded')}"
+                break
+
+    weather_context = f"Current weather in {city}, {country}: {current_weather.get('temperature', 25)}°C, {current_weather.get('description', 'clear')}"
+    return f"{weather_context}{selected_plant_context}", plants_context
+
+def ask_botanist(services, data_manager, question, location=None, selected_plant=None, plants=None):
+    """
+    Answer a garden question and save the exchange to the user's chat history
+    plants: the user's plants if the caller already has them (read from the DataManager otherwise)
+    Returns: Groq answer dict (response, from_cache, cache_tier, similarity, ...)
+    """
+    plants = data_manager.get_all_plants() if plants is None else plants
+    city, country, country_code = resolve_location(location)
+    current_weather = services.weather.get_current_weather(city, country_code)
+    full_context, plants_context = build_chat_context(plants, current_weather, city, country, selected_plant)
+
+    answer = services.groq.answer_question(
+        question,
+        full_context,
+        history=data_manager.get_chat_history(20),
+        plants=plants,
+        cache_scope=data_manager.user_id
+    )
+    data_manager.add_chat_message(question, answer["response"], plants_context)
+    return answer
@@ -0,0 +1,158 @@
+"""
+Dashboard Module
+Weather, alerts and per-plant care status shown on the Garden Dashboard
+Pure computation over the services; the view decides colours and layout
+"""
+from datetime import datetime, timedelta
+from utils.keyword_matcher import keyword_matcher
+from utils.forecast_timeline import ForecastTimeline
+from utils.plant_service import RAIN_EXPECTED_HOURS
+
+HEAT_ALERT_CELSIUS = 35
+MAX_SUN_HOURS = 8  # Sun hours that fill the sunlight bar
+OUTDOOR_PLACEMENTS = ("Outdoor", "Open Roof", "Balcony")
+SUN_PLACEMENTS = ("Open Roof", "Balcony", "Indoor Window")  # Placements with their own sun model
+OTHER_PLACEMENT = "Other"  # Sun model used for every other placement
+
+def load_weather(weather_service, city, country_code):
+    """
+    Current weather, forecast and alerts for a location (shared by the banner and all plant cards)
+    The forecast is fetched once; the alerts read its hourly timeline
+    Returns: dict with current, forecast, timeline (ForecastTimeline), rain_alert and storm_alert
+    """
+    forecast = weather_service.get_forecast(city, country_code, days=2)
+    timeline = ForecastTimeline.from_forecast(forecast)
+    return {
+        'current': weather_service.get_current_weather(city, country_code),
+        'forecast': forecast,
+        'timeline': timeline,
+        'rain_alert': weather_service.check_rain_alert(city, country_code, hours_ahead=24, timeline=timeline),
+        'storm_alert': weather_service.check_storm_alert(city, country_code, hours_ahead=24, timeline=timeline)
+    }
+
+def active_alerts(weather):
+    """
+    Garden-wide alerts for the weather
+    Returns: list of (alert_type, plant_name) with alert_type "rain", "storm" or "heat"
+    """
+    alerts = []
+    rain_alert, storm_alert = weather['rain_alert'], weather['storm_alert']
+    if rain_alert.get('has_rain') and rain_alert.get('next_rain'):
+        alerts.append(("rain", "your plants"))
+    if storm_alert.get('has_storm') and storm_alert.get('next_storm'):
+        alerts.append(("storm", "your outdoor plants"))
+    if weather['current'].get('temperature', 0) > HEAT_ALERT_CELSIUS:
+        alerts.append(("heat", "your plants"))
+    return alerts
+
+def temperature_status(temperature):
+    """Plant-comfort label of an air temperature in Celsius"""
+    if temperature > HEAT_ALERT_CELSIUS:
+        return "Too Hot!"
+    if temperature > 30:
+        return "Warm"
+    if temperature < 15:
+        return "Too Cold"
+    return "Comfortable"
+
+def outdoor_alert(weather):
+    """Weather alert for plants outside (storm beats rain beats heat), or None"""
+    if weather['storm_alert'].get('has_storm'):
+        return "storm"
+    if weather['rain_alert'].get('has_rain'):
+        return "rain"
+    if weather['current'].get('temperature', 25) > HEAT_ALERT_CELSIUS:
+        return "heat"
+    return None
+
+def alert_messages(groq_service, digest):
+    """
+    Friendly message for each active alert of a location digest, all generated with one LLM call
+    Returns: list of (alert_type, message)
+    """
+    alerts = list(digest['alerts'])
+    if not alerts:
+        return []
+    messages = groq_service.generate_alert_messages(alerts, digest['weather']['current'])
+    return [(alert_type, message) for (alert_type, _), message in zip(alerts, messages)]
+
+def soil_predictions(soil_model, data_manager, plants, digest):
+    """
+    Soil-water predictions of a user's plants at the digest's location, all advanced in one vectorized run
+    Returns: dict plant_id -> SoilModel prediction (None for never-watered plants)
+    """
+    learned = [data_manager.get_learned_interval(plant.get('id')) for plant in plants]
+    predictions = soil_model.predict(data_manager.user_id, plants, digest, learned)
+    return {plant.get('id'): prediction for plant, prediction in zip(plants, predictions)}
+
+def watering_due_times(soil, digest, now=None):
+    """
+    When each plant needs water according to its soil prediction, as the plant cards report it
+    Pass to DataManager.query_plants / get_garden_summary so the sidebar counts, "Most urgent" sort
+    and water-status filter agree with the cards
+    soil: soil_predictions() of the garden
+    Returns: dict plant_id -> epoch seconds (-inf for never-watered plants: due now)
+    """
+    now = now or datetime.now()
+    # A dry plant that catches the rain expected soon is told to hold off, which the card shows as "Water Soon"
+    hold_off_until = (now + timedelta(hours=RAIN_EXPECTED_HOURS)).timestamp()
+    due_times = {}
+    for plant_id, prediction in soil.items():
+        if prediction is None:
+            due_times[plant_id] = float('-inf')
+        elif prediction['next_water_at'] <= now and digest['watering']['rain_expected'] and prediction['rain_capture'] > 0:
+            due_times[plant_id] = hold_off_until
+        else:
+            due_times[plant_id] = prediction['next_water_at'].timestamp()
+    return due_times
+
+def plant_status(plant, digest, plant_service, learned_interval_days=None, soil=None):
+    """
+    Everything a plant card shows: the plant record joined with its location digest
+    Weather-derived values (watering factors, sun model, temperature, alerts) come precomputed from the digest
+    soil: the plant's soil_predictions() entry (watering then follows the soil-water balance)
+    Returns: dict with watering (schedule), water_status, sun_hours, sun_share (0..1), temperature,
+             temp_status, category ("flower" / "tree" / "plant") and weather_alert ("storm" / "rain" / "heat" or None)
+    """
+    current_weather = digest['weather']['current']
+
+    # Calculate watering status
+    watering = plant_service.calculate_watering_schedule(
+        plant.get('name', 'Plant'),
+        plant.get('watering_interval_days', 3),
+        plant.get('last_watered'),
+        current_weather,
+        digest['weather']['forecast'],
+        learned_interval_days=learned_interval_days,
+        factors=digest['watering'],
+        soil=soil
+    )
+    next_water_at = watering.get('next_water_at')
+    if watering.get('needs_water'):
+        water_status = "Needs Water Today" if watering.get('urgency') == 'high' else "Water Soon"
+    elif next_water_at and next_water_at <= datetime.now() + timedelta(hours=24):
+        water_status = "Water Soon"
+    else:
+        water_status = "Well Watered"
+
+    # Sun exposure estimate of the plant's placement
+    placement = plant.get('placement', 'Indoor Window')
+    sun_exposure = digest['sun'].get(placement) or digest['sun'][OTHER_PLACEMENT]
+    sun_hours = sun_exposure.get('sun_hours', 0)
+
+    # Weather alert for plants outside
+    weather_alert = None
+    if any(outdoor in plant.get('placement', '') for outdoor in OUTDOOR_PLACEMENTS):
+        weather_alert = digest['outdoor_alert']
+
+    return {
+        "watering": watering,
+        "water_status": water_status,
+        "sun_hours": sun_hours,
+        "sun_share": min(1.0, sun_hours / MAX_SUN_HOURS),
+        "temperature": digest['temperature'],
+        "temp_status": digest['temp_status'],
+        # Keyword tables, first matching category wins
+        "category": keyword_matcher.classify(plant.get('name', ''), 'plant_category', default="plant"),
+        "weather_alert": weather_alert
+    }
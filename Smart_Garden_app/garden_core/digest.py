@@ -0,0 +1,167 @@
+"""
+Location Digest Module
+Everything the Dashboard derives from a location's weather (alerts, temperature status, watering factors,
+sun model per placement), computed once per (city, country_code, hour) and shared by all users there
+Per-user work is only the per-plant join in plant_status()
+"""
+import threading
+import time
+from datetime import datetime
+import config
+from garden_core.dashboard import (
+    SUN_PLACEMENTS, OTHER_PLACEMENT, load_weather, active_alerts, temperature_status, outdoor_alert
+)
+from utils.metrics import record_cache
+
+DIGEST_SCHEMA_VERSION = 2  # Bump when the digest layout changes; readers check digest["schema"]
+
+def location_key(city, country_code):
+    """Cache key part of a location (city names differ in case between users)"""
+    return str(city).strip().casefold(), str(country_code).strip().upper()
+
+def build_digest(weather_service, plant_service, city, country_code, observations=None):
+    """
+    Compute the location digest from fresh weather
+    observations: the location's LocationObservations (the current weather is recorded in it first,
+                  unless it is mock fallback data)
+    Returns: dict with schema, version, city, country_code, hour, built_at, weather (current, forecast,
+             timeline, rain_alert, storm_alert), alerts [(type, target)], temperature, temp_status,
+             outdoor_alert, watering (weather factors) and sun (estimate per placement)
+    """
+    weather = load_weather(weather_service, city, country_code)
+    current = weather['current']
+    if observations is not None:
+        observations.add(current)
+    built_at = datetime.now()
+    return {
+        "schema": DIGEST_SCHEMA_VERSION,
+        "version": f"{DIGEST_SCHEMA_VERSION}.{built_at:%Y%m%d%H%M%S}",
+        "city": city,
+        "country_code": country_code,
+        "hour": built_at.strftime("%Y-%m-%dT%H:00"),
+        "built_at": built_at,
+        "weather": weather,
+        "alerts": tuple(active_alerts(weather)),
+        "temperature": current.get('temperature', 25),
+        "temp_status": temperature_status(current.get('temperature', 25)),
+        "outdoor_alert": outdoor_alert(weather),
+        "watering": plant_service.weather_watering_factors(current, weather['timeline'], observations),
+        # The sun model depends on placement and weather only (not on the plant)
+        "sun": {
+            placement: weather_service.get_sun_exposure_estimate(placement, current, None)
+            for placement in SUN_PLACEMENTS + (OTHER_PLACEMENT,)
+        }
+    }
+
+class DigestStore:
+    """
+    Location digests of the current hour, shared by every session / request of the process
+    Digests older than max_age_seconds are rebuilt; the prefetcher rebuilds recently used locations
+    before they expire, so Dashboard renders normally find a fresh digest
+    """
+
+    def __init__(self, weather_service, plant_service, observation_store=None, max_age_seconds=None, max_locations=None):
+        self.weather_service = weather_service
+        self.plant_service = plant_service
+        self.observation_store = observation_store  # Every build records the current weather there
+        self.max_age_seconds = max_age_seconds or config.WEATHER_CACHE_TTL_SECONDS
+        self.max_locations = max_locations or config.DIGEST_MAX_LOCATIONS
+        self._digests = {}  # (city, country_code, hour) -> digest
+        self._recent = {}  # (city, country_code) key -> (city, country_code, last requested monotonic time)
+        self._build_locks = {}  # location -> [lock, callers using it]; dropped when the last caller is done
+        self._lock = threading.Lock()
+        self._prefetcher_started = False
+        self.builds = 0
+
+    @staticmethod
+    def _hour(now):
+        return now.strftime("%Y%m%d%H")
+
+    def _peek(self, location, now):
+        """The location's digest of this hour and whether it is still fresh"""
+        with self._lock:
+            digest = self._digests.get(location + (self._hour(now),))
+        if digest is None:
+            return None, False
+        return digest, (now - digest['built_at']).total_seconds() < self.max_age_seconds
+
+    def get(self, city, country_code):
+        """
+        The location's digest for the current hour (built on a miss; concurrent misses build it once)
+        Returns: digest dict (shared; read only)
+        """
+        location = location_key(city, country_code)
+        with self._lock:
+            self._recent[location] = (city, country_code, time.monotonic())
+            if len(self._recent) > self.max_locations:
+                evicted = min(self._recent, key=lambda key: self._recent[key][2])
+                del self._recent[evicted]
+                for key in [key for key in self._digests if key[:2] == evicted]:
+                    del self._digests[key]
+        digest, fresh = self._peek(location, datetime.now())
+        record_cache("location_digest", "hit" if fresh else "miss")
+        return digest if fresh else self.refresh(city, country_code)
+
+    def refresh(self, city, country_code, force=False):
+        """Rebuild a location's digest, unless another caller rebuilt it while this one waited"""
+        location = location_key(city, country_code)
+        with self._lock:
+            build_lock = self._build_locks.setdefault(location, [threading.Lock(), 0])
+            build_lock[1] += 1
+        try:
+            with build_lock[0]:
+                digest, fresh = self._peek(location, datetime.now())
+                if fresh and not force:
+                    return digest
+                observations = self.observation_store.location(city, country_code) if self.observation_store else None
+                digest = build_digest(self.weather_service, self.plant_service, city, country_code, observations)
+                hour = self._hour(digest['built_at'])
+                with self._lock:
+                    self.builds += 1
+                    self._digests[location + (hour,)] = digest
+                    # Past hours are never read again
+                    for key in [key for key in self._digests if key[2] != hour]:
+                        del self._digests[key]
+                return digest
+        finally:
+            with self._lock:
+                build_lock[1] -= 1
+                if not build_lock[1]:
+                    del self._build_locks[location]
+
+    def prefetch(self):
+        """
+        Rebuild the digests of locations requested in the last DIGEST_PREFETCH_WINDOW_SECONDS that would
+        expire before the next prefetch run (or are missing for this hour)
+        Returns: number of digests rebuilt
+        """
+        cutoff = time.monotonic() - config.DIGEST_PREFETCH_WINDOW_SECONDS
+        with self._lock:
+            locations = [(city, country_code) for city, country_code, requested in self._recent.values() if requested >= cutoff]
+        rebuilt = 0
+        for city, country_code in locations:
+            now = datetime.now()
+            digest, _ = self._peek(location_key(city, country_code), now)
+            expires_in = self.max_age_seconds - (now - digest['built_at']).total_seconds() if digest else 0
+            if expires_in > config.DIGEST_PREFETCH_INTERVAL_SECONDS:
+                continue
+            try:
+                self.refresh(city, country_code, force=True)
+                rebuilt += 1
+            except Exception as e:
+                print(f"Digest prefetch error ({city}, {country_code}): {e}")
+        return rebuilt
+
+    def start_prefetcher(self):
+        """Run prefetch() every DIGEST_PREFETCH_INTERVAL_SECONDS in a daemon thread (once per store)"""
+        with self._lock:
+            if self._prefetcher_started or config.DIGEST_PREFETCH_INTERVAL_SECONDS <= 0:
+                return
+            self._prefetcher_started = True
+
+        def prefetch_forever():
+            while True:
+                time.sleep(config.DIGEST_PREFETCH_INTERVAL_SECONDS)
+                self.prefetch()
+
+        threading.Thread(target=prefetch_forever, name="digest-prefetch", daemon=True).start()
@@ -0,0 +1,29 @@
+"""
+Identification Module
+Plant identification and health analysis from a photo (hedged across Hugging Face and Gemini)
+"""
+from utils.image_prescreen import prescreen_image
+
+def identify_plant(identify_dispatcher, image_bytes):
+    """
+    Identify the plant in a photo
+    Returns: identification dict (plant_name, scientific_name, description, care_level, full_response,
+             provider, hedged) plus suspect_mismatch when the answer text contradicts the name
+    """
+    identification = identify_dispatcher.dispatch(image_bytes)
+    plant_name = identification.get('plant_name', '')
+    full_response = identification.get('full_response', '') or ''
+    # Vision models sometimes call tomato plants roses; flag it so the user verifies
+    suspect_mismatch = 'rose' in plant_name.lower() and ('tomato' in full_response.lower() or 'solanum' in full_response.lower())
+    return {**identification, "suspect_mismatch": suspect_mismatch}
+
+def analyze_plant_health(health_dispatcher, image_bytes, question="", prescreen=None):
+    """
+    Local pre-screen first (instant provisional score, and no remote call for unusable photos), then the full analysis
+    prescreen: result of prescreen_image() if the caller already has it
+    Returns: dict with prescreen and health (None if the photo is unusable)
+    """
+    prescreen = prescreen or prescreen_image(image_bytes)
+    if not prescreen['usable']:
+        return {"prescreen": prescreen, "health": None}
+    return {"prescreen": prescreen, "health": health_dispatcher.dispatch(image_bytes, question)}
@@ -0,0 +1,205 @@
+"""
+Location Module
+IP-based location detection, user location resolution and nearby nursery search (OpenStreetMap)
+"""
+import zlib
+import config
+from config import DEFAULT_CITY, DEFAULT_COUNTRY, DEFAULT_COUNTRY_CODE, get_country_code
+from utils.metrics import http_request, record_fallback
+from utils.tracing import traced
+
+def default_location():
+    """The app's default location (used until the user sets one)"""
+    return {
+        "city": DEFAULT_CITY,
+        "country": DEFAULT_COUNTRY,
+        "country_code": DEFAULT_COUNTRY_CODE,
+        "lat": None,
+        "lon": None
+    }
+
+def resolve_location(location):
+    """
+    City, country and ISO country code of a location dict (missing parts fall back to the defaults)
+    Returns: (city, country, country_code)
+    """
+    location = location or {}
+    city = location.get('city') or DEFAULT_CITY
+    country = location.get('country') or DEFAULT_COUNTRY
+    # Get country code from the location or convert country name to code
+    country_code = location.get('country_code') or get_country_code(country)
+    return city, country, country_code
+
+@traced("location.detect")
+def detect_location():
+    """
+    Get current location using IP-based API (Free, no key required)
+    On a server this is the server's location, not the user's
+    Returns: location dict (city, country, country_code, lat, lon, region)
+    """
+    try:
+        # Try secure HTTPS first (ipapi.co - more reliable)
+        response = http_request("ipapi", "location", "GET", config.IPAPI_URL, timeout=10)
+        if response.status_code != 200:
+            record_fallback("ipapi", "location", "http_status")
+        else:
+            data = response.json()
+            city = data.get('city')
+            country_name = data.get('country_name')
+            country_code = data.get('country_code', '')
+            
+            # Validate we got actual data
+            if city and country_name:
+                # Ensure country_code is set (convert if needed)
+                if not country_code:
+                    country_code = get_country_code(country_name)
+                return {
+                    "city": city,
+                    "country": country_name,
+                    "country_code": country_code or get_country_code(country_name),
+                    "lat": data.get('latitude'),
+                    "lon": data.get('longitude'),
+                    "region": data.get('region', '')
+                }
+    except Exception as e:
+        print(f"Location detection (ipapi.co) failed: {e}")
+        record_fallback("ipapi", "location", "exception")
+    
+    try:
+        # Fallback to ip-api.com (HTTP, but works well)
+        response = http_request("ip_api", "location", "GET", config.IP_API_URL, timeout=10)
+        if response.status_code == 200:
+            data = response.json()
+            if data.get('status') == 'success':
+                city = data.get('city')
+                country = data.get('country')
+                
+                # Validate we got actual data
+                if city and country:
+                    country_code = data.get('countryCode', '') or get_country_code(country)
+                    return {
+                        "city": city,
+                        "country": country,
+                        "country_code": country_code,
+                        "lat": data.get('lat'),
+                        "lon": data.get('lon'),
+                        "region": data.get('regionName', '')
+                    }
+    except Exception as e:
+        print(f"Location detection (ip-api.com) failed: {e}")
+        pass
+    
+    # Final fallback - return default but log that detection failed
+    record_fallback("location", "detect", "default_location")
+    print(f"⚠️ Location detection failed, using default: {DEFAULT_CITY}, {DEFAULT_COUNTRY}")
+    return {**default_location(), "region": ""}
+
+@traced("overpass.nurseries")
+def find_nearby_nurseries(lat, lon, radius_km=10, city=None):
+    """
+    Find nearby plant nurseries
+    Uses Overpass API (OpenStreetMap) for free, no-key-required search
+    Falls back to mock data around the coordinates if API fails (perfect for hackathon demo)
+    """
+    try:
+        # Try to use Overpass API (OpenStreetMap - Free, no key required)
+        overpass_url = config.OVERPASS_URL
+        
+        # Query for plant nurseries, garden centers, and flower shops
+        query = f"""
+        [out:json][timeout:10];
+        (
+          node["shop"="garden_centre"](around:{radius_km*1000},{lat},{lon});
+          node["amenity"="marketplace"]["name"~"plant|nursery|garden",i](around:{radius_km*1000},{lat},{lon});
+          node["shop"~"florist|garden",i](around:{radius_km*1000},{lat},{lon});
+        );
+        out body;
+        """
+        
+        response = http_request("overpass", "nurseries", "GET", overpass_url, params={'data': query}, timeout=10)
+        
+        if response.status_code == 200:
+            data = response.json()
+            elements = data.get('elements', [])
+            
+            if elements:
+                nurseries = []
+                for elem in elements[:10]:  # Limit to 10 results
+                    tags = elem.get('tags', {})
+                    name = tags.get('name', 'Plant Nursery')
+                    address = tags.get('addr:full') or tags.get('addr:street', 'Address not available')
+                    
+                    # Calculate distance (simple approximation)
+                    elem_lat = elem.get('lat', lat)
+                    elem_lon = elem.get('lon', lon)
+                    distance_km = ((elem_lat - lat)**2 + (elem_lon - lon)**2)**0.5 * 111  # Rough km conversion
+                    
+                    nurseries.append({
+                        "name": name,
+                        "address": address,
+                        "distance": f"{distance_km:.1f} km",
+                        "phone": tags.get('phone', 'N/A'),
+                        "rating": 4.0 + (zlib.crc32(name.encode('utf-8')) % 10) / 10,  # Mock rating (stable across processes)
+                        "lat": elem_lat,
+                        "lon": elem_lon
+                    })
+                
+                if nurseries:
+                    return nurseries
+    except Exception as e:
+        print(f"Overpass API error: {e}")
+        pass
+    
+    # Fallback to mock data with location-based coordinates (Perfect for hackathon)
+    record_fallback("overpass", "nurseries", "mock_data")
+    return mock_nurseries(lat, lon, city or DEFAULT_CITY)
+
+def mock_nurseries(lat, lon, city_name):
+    """Demo nurseries around the coordinates, named after the city"""
+    return [
+        {
+            "name": f"Green Valley Plant Nursery",
+            "address": f"Main Boulevard, {city_name}",
+            "distance": "2.5 km",
+            "phone": "+92 300 1234567",
+            "rating": 4.5,
+            "lat": lat + 0.02 if lat else 32.5,
+            "lon": lon + 0.02 if lon else 74.5
+        },
+        {
+            "name": f"Flora Garden Center",
+            "address": f"Garden Road, {city_name}",
+            "distance": "4.1 km",
+            "phone": "+92 300 2345678",
+            "rating": 4.2,
+            "lat": lat - 0.03 if lat else 32.48,
+            "lon": lon + 0.01 if lon else 74.52
+        },
+        {
+            "name": f"Nature's Paradise",
+            "address": f"City Center, {city_name}",
+            "distance": "5.8 km",
+            "phone": "+92 300 3456789",
+            "rating": 4.7,
+            "lat": lat + 0.01 if lat else 32.51,
+            "lon": lon - 0.02 if lon else 74.48
+        },
+        {
+            "name": f"Botanical Gardens Shop",
+            "address": f"Highway Road, {city_name}",
+            "distance": "7.2 km",
+            "phone": "+92 300 4567890",
+            "rating": 4.0,
+            "lat": lat - 0.04 if lat else 32.46,
+            "lon": lon - 0.01 if lon else 74.49
+        },
+        {
+            "name": f"Green Thumb Nursery",
+            "address": f"Residential Area, {city_name}",
+            "distance": "8.5 km",
+            "phone": "+92 300 5678901",
+            "rating": 4.3,
+            "lat": lat + 0.03 if lat else 32.53,
+            "lon": lon + 0.03 if lon else 74.53
+        }
+    ]
@@ -0,0 +1,34 @@
+"""
+Plants Module
+Adding plants to a garden (validation, photo storage, the stored record)
+Reads, updates, watering and removal are DataManager methods
+"""
+import config
+
+def add_plant(data_manager, image_store, plant_data, image_bytes=None):
+    """
+    Validate and store a new plant; a photo is stored deduplicated with its thumbnail made in the background
+    plant_data: name, scientific_name, description, care_level, location, placement, sun_preference,
+                watering_interval_days, notes
+    Returns: the stored plant record
+    Raises ValueError with a user-facing message if the plant cannot be added
+    """
+    if not str(plant_data.get("name") or "").strip():
+        raise ValueError("Please enter a plant name")
+    # Early check so a full garden does not store the photo; add_plant() re-checks under the lock
+    if data_manager.get_garden_summary()['total'] >= config.MAX_PLANTS:
+        raise ValueError(f"Your garden is full ({config.MAX_PLANTS} plants). Remove a plant to add a new one.")
+
+    image_path = ""
+    image_hash = ""
+    if image_bytes:
+        stored_image = image_store.ingest(image_bytes)
+        image_path = stored_image["original_path"]
+        image_hash = stored_image["hash"]
+
+    return data_manager.add_plant({
+        **plant_data,
+        "last_watered": None,  # Will be set when first watered
+        "image_path": image_path,
+        "image_hash": image_hash
+    }, max_total=config.MAX_PLANTS)
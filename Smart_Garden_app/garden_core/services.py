@@ -0,0 +1,96 @@
+"""
+Garden Services
+Every API client and shared worker pool of one process, built once and shared by all sessions / jobs
+"""
+import threading
+from collections import OrderedDict
+import config
+from utils.weather_service import WeatherService
+from utils.plant_service import PlantService
+from utils.gemini_service import GeminiService
+from utils.huggingface_service import HuggingFaceService
+from utils.groq_service import GroqService
+from utils.image_store import ImageStore
+from utils.transcription_service import TranscriptionService
+from utils.vision_dispatcher import VisionDispatcher, is_valid_identification, is_valid_health_analysis
+from utils.data_manager import DataManager, migrate_legacy_data, rekey_legacy_namespaces
+from utils.shared_store import SharedStore
+from utils.observation_store import ObservationStore
+from utils.soil_model import SoilModel
+from garden_core.digest import DigestStore, location_key
+from garden_core.dashboard import soil_predictions, watering_due_times
+
+CHAT_SNAPSHOT_TURNS = 20  # Recent chat messages kept in the shared chat snapshot
+
+class GardenServices:
+    def __init__(self):
+        self.weather = WeatherService()
+        self.plant = PlantService()
+        self.gemini = GeminiService()            # For health analysis (vision)
+        self.huggingface = HuggingFaceService()  # For plant identification
+        self.groq = GroqService()                # For fast chat responses
+        self.images = ImageStore()               # Deduplicated photos + thumbnails
+        self.transcription = TranscriptionService()  # Voice questions, transcribed off the caller's thread
+        # Hedged vision requests: slow/cold primary gets raced by the other provider
+        self.identify = VisionDispatcher(
+            {"Hugging Face": self.huggingface.identify_plant, "Gemini": self.gemini.identify_plant},
+            is_valid_identification
+        )
+        self.health = VisionDispatcher(
+            {"Gemini": self.gemini.analyze_plant_health, "Hugging Face": self.huggingface.analyze_plant_health},
+            is_valid_health_analysis
+        )
+        # Read-only plant / chat / soil snapshots shared by every session of a user (sessions keep version stamps)
+        self.snapshots = SharedStore(config.SHARED_STORE_MAX_USERS * 3)
+        # Per-location weather digests shared by every user of a city (start_prefetcher() keeps them warm)
+        self.observations = ObservationStore()  # Observed weather per location (memory-mapped files)
+        self.digests = DigestStore(self.weather, self.plant, self.observations)
+        self.soil = SoilModel(self.observations)  # Soil-water state of each plant, advanced incrementally
+        rekey_legacy_namespaces()  # Namespaces of earlier releases had derivable ids (once; later runs find none)
+        migrate_legacy_data()  # Single-user files from before per-user namespaces (once; later runs find none)
+        # DataManagers of recently active users; least recently used ones are dropped past SHARED_STORE_MAX_USERS
+        self._data_managers = OrderedDict()
+        self._data_managers_lock = threading.Lock()
+
+    def data_manager(self, user_id):
+        """
+        One DataManager per recently active user namespace, shared by every caller
+        An evicted user just gets a new DataManager; writes stay safe because they take the namespace's file lock
+        """
+        with self._data_managers_lock:
+            data_manager = self._data_managers.get(user_id)
+            if data_manager is None:
+                data_manager = self._data_managers[user_id] = DataManager(user_id)
+            self._data_managers.move_to_end(user_id)
+            while len(self._data_managers) > config.SHARED_STORE_MAX_USERS:
+                self._data_managers.popitem(last=False)
+            return data_manager
+
+    def plants_snapshot(self, data_manager):
+        """
+        The user's plants as a shared, read-only snapshot (tuple of read-only mappings)
+        Returns: Snapshot with version (stamp of the plant database) and data
+        """
+        return self.snapshots.get("plants", data_manager.user_id, data_manager.plants_version(), data_manager.get_all_plants)
+
+    def chat_snapshot(self, data_manager):
+        """The user's last CHAT_SNAPSHOT_TURNS chat messages as a shared, read-only snapshot"""
+        return self.snapshots.get(
+            "chat", data_manager.user_id, data_manager.chat_version(),
+            lambda: data_manager.get_chat_history(CHAT_SNAPSHOT_TURNS)
+        )
+
+    def soil_snapshot(self, data_manager, digest):
+        """
+        Soil-water predictions of the user's whole garden at the digest's location and the due times they give,
+        as a shared snapshot: the model runs again only when the plants or the digest change
+        Returns: Snapshot whose data is (predictions by plant id, due_times for query_plants / get_garden_summary)
+        """
+        plants = self.plants_snapshot(data_manager)
+
+        def predict():
+            soil = soil_predictions(self.soil, data_manager, plants.data, digest)
+            return [soil, watering_due_times(soil, digest)]
+
+        version = (plants.version, location_key(digest["city"], digest["country_code"]), digest["version"])
+        return self.snapshots.get("soil", data_manager.user_id, version, predict)
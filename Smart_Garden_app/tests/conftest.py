@@ -0,0 +1,22 @@
+"""
+Unit test configuration
+Tests run with no API keys (every service takes its offline fallback) in an empty working directory
+(the app stores its data relative to the working directory)
+"""
+import os
+import sys
+import pytest
+
+TESTS_DIR = os.path.dirname(os.path.abspath(__file__))
+APP_DIR = os.path.dirname(TESTS_DIR)
+sys.path.insert(0, APP_DIR)
+
+# Must happen before config.py is imported (load_dotenv() does not override variables that are set)
+for name in ("OPENWEATHER_API_KEY", "PERENUAL_API_KEY", "HUGGINGFACE_API_KEY", "GROQ_API_KEY", "GEMINI_API_KEY"):
+    os.environ[name] = ""
+
+@pytest.fixture(autouse=True)
+def workdir(tmp_path, monkeypatch):
+    """Every test gets its own empty data directory"""
+    monkeypatch.chdir(tmp_path)
+    return tmp_path
@@ -0,0 +1,46 @@
+"""Batched weather alert messages: one LLM call, per-pair caching and fallbacks"""
+from utils.alert_messages import generate_alert_batch, parse_batch_alert_response, weather_bucket
+from utils.response_cache import TTLCache
+
+WEATHER = {"city": "Sialkot", "temperature": 36.4, "description": "clear sky"}
+
+def default(alert_type, plant_name, weather_data):
+    return f"default {alert_type} {plant_name}"
+
+class FakeLLM:
+    def __init__(self, reply=None):
+        self.prompts = []
+        self.reply = reply
+
+    def __call__(self, prompt, max_tokens):
+        self.prompts.append(prompt)
+        if self.reply is not None:
+            return self.reply
+        count = prompt.count('type="')
+        return "Sure! " + str([{"index": i, "message": f"message {i}"} for i in range(count)]).replace("'", '"')
+
+def test_weather_bucket_rounds_temperature():
+    assert weather_bucket(WEATHER) == ("sialkot", 35, "clear sky")
+    assert weather_bucket({"city": "Sialkot", "temperature": 38, "description": "Clear Sky"})[1] == 40
+
+def test_parse_tolerates_prose_and_bad_items():
+    text = 'Here you go: [{"index": 1, "message": " B "}, {"index": 7, "message": "x"}, "A-ish", {"message": ""}]'
+    assert parse_batch_alert_response(text, 3) == [None, "B", "A-ish"]
+    assert parse_batch_alert_response("not json", 2) == [None, None]
+
+def test_many_alerts_take_one_call_and_duplicates_share_a_message():
+    llm, cache = FakeLLM(), TTLCache(100, 60)
+    alerts = [("rain", "Rose"), ("heat", "Rose"), ("rain", "Rose"), ("storm", "Mint")]
+    messages = generate_alert_batch(alerts, WEATHER, cache, llm, default)
+    assert len(llm.prompts) == 1 and llm.prompts[0].count('type="') == 3
+    assert messages == ["message 0", "message 1", "message 0", "message 2"]
+    # Same weather bucket: served from the cache without a call
+    assert generate_alert_batch(alerts, {**WEATHER, "temperature": 34}, cache, llm, default) == messages
+    assert len(llm.prompts) == 1
+
+def test_fallbacks_for_no_llm_unknown_types_and_unparsable_replies():
+    cache = TTLCache(100, 60)
+    assert generate_alert_batch([("rain", "Rose")], WEATHER, cache, None, default) == ["default rain Rose"]
+    assert generate_alert_batch([("frost", "Rose")], WEATHER, cache, FakeLLM(), default) == ["default frost Rose"]
+    assert generate_alert_batch([("heat", "Rose")], WEATHER, cache, FakeLLM("no idea"), default) == ["default heat Rose"]
+    assert len(cache) == 0
@@ -0,0 +1,77 @@
+"""Garden API: plant CRUD, ETags, validation errors, token check and bulk import / export"""
+import pytest
+from starlette.testclient import TestClient
+import config
+from garden_api import create_app
+
+API = "/api/v1/users/alice"
+
+@pytest.fixture
+def client():
+    with TestClient(create_app()) as client:
+        yield client
+
+def test_plant_lifecycle(client):
+    created = client.post(f"{API}/plants", json={"name": "Basil", "placement": "Balcony", "id": 99})
+    assert created.status_code == 201
+    plant_id = created.json()["id"]
+    assert plant_id == 1 and created.json()["watering_interval_days"] == 3
+    assert client.patch(f"{API}/plants/{plant_id}", json={"notes": "by the door"}).json()["notes"] == "by the door"
+    assert client.post(f"{API}/plants/{plant_id}/water").json()["last_watered"]
+    status = client.get(f"{API}/plants/{plant_id}/status", params={"city": "Lahore"}).json()
+    assert status["plant_id"] == plant_id and status["water_status"] == "Well Watered"
+    assert client.delete(f"{API}/plants/{plant_id}").status_code == 204
+    assert client.get(f"{API}/plants/{plant_id}").status_code == 404
+
+def test_unchanged_list_answers_304(client):
+    client.post(f"{API}/plants", json={"name": "Mint"})
+    first = client.get(f"{API}/plants")
+    assert first.json()["total"] == 1
+    etag = first.headers["etag"]
+    assert client.get(f"{API}/plants", headers={"If-None-Match": f"W/{etag}"}).status_code == 304
+    client.post(f"{API}/plants", json={"name": "Sage"})
+    assert client.get(f"{API}/plants", headers={"If-None-Match": etag}).status_code == 200
+
+@pytest.mark.parametrize("body, message", [
+    ({"name": "Rose", "watering_interval_days": "often"}, "watering_interval_days must be an integer"),
+    ({"name": "Rose", "watering_interval_days": 0}, "watering_interval_days must be at least 1"),
+    ({"name": "Rose", "image_base64": "not base64!"}, "image_base64 is not valid base64"),
+])
+def test_invalid_plants_are_rejected(client, body, message):
+    response = client.post(f"{API}/plants", json=body)
+    assert response.status_code == 400 and response.json() == {"error": message}
+
+def test_out_of_range_numbers_are_rejected(client):
+    for interval in (b"1e400", b"Infinity"):
+        response = client.post(f"{API}/plants", content=b'{"name": "Rose", "watering_interval_days": ' + interval + b"}")
+        assert response.status_code == 400 and response.json() == {"error": "watering_interval_days must be an integer"}
+
+def test_bad_requests(client):
+    assert client.get("/api/v1/users/Not-Valid/plants").status_code == 404
+    assert client.get(f"{API}/plants", params={"sort": "Colour"}).status_code == 400
+    assert client.get(f"{API}/plants", params={"page_size": 1000}).status_code == 400
+    assert client.post(f"{API}/plants", content=b"[1, 2]").json() == {"error": "Request body must be a JSON object"}
+
+def test_api_token_is_required_when_set(client, monkeypatch):
+    monkeypatch.setattr(config, "API_TOKEN", "s3cret")
+    assert client.get("/api/v1/health").status_code == 401
+    assert client.get("/api/v1/health", headers={"Authorization": "Bearer s3cret"}).json() == {"status": "ok"}
+
+def test_import_then_export_round_trip(client):
+    upload = "name,placement,watering_interval_days\nRose,Balcony,2\nFern,Indoor Window,4\n,Balcony,3\n"
+    result = client.post(f"{API}/plants/import", params={"format": "csv"}, content=upload).json()
+    assert result["imported"] == 2 and result["errors"][0]["line"] == 4
+    exported = client.get(f"{API}/plants/export", params={"format": "csv"})
+    assert exported.headers["content-type"].startswith("text/csv")
+    assert "Rose" in exported.text and "Fern" in exported.text
+
+def test_garden_status_lists_the_page_and_summary(client):
+    for name in ("Rose", "Fern"):
+        client.post(f"{API}/plants", json={"name": name})
+    status = client.get(f"{API}/status", params={"page_size": 1}).json()
+    assert status["summary"]["total"] == 2 and status["summary"]["needs_water"] == 2
+    assert status["page_count"] == 2 and len(status["plants"]) == 1
+    client.post(f"{API}/plants/1/water")
+    listed = client.get(f"{API}/plants", params={"urgency": "Needs Water", "city": "Lahore"}).json()
+    assert [p["name"] for p in listed["plants"]] == ["Fern"]
+    assert client.get(f"{API}/status").json()["summary"]["needs_water"] == 1
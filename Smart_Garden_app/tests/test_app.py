@@ -0,0 +1,78 @@
+"""Streamlit view: pages render offline and the plant card fragments act on the user's garden"""
+import os
+from streamlit.testing.v1 import AppTest
+from utils.data_manager import LEGACY_USER_ID, DataManager, new_user_id
+from utils.soil_model import SoilModel
+
+APP_FILE = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "app.py")
+DASHBOARD = "📊 Garden Dashboard"
+
+def run_page(page, user_id=None):
+    app = AppTest.from_file(APP_FILE, default_timeout=120)
+    if user_id:
+        app.query_params["uid"] = user_id
+    app.session_state["page_selector"] = page
+    return app.run()
+
+def test_dashboard_renders_a_card_per_plant():
+    gardener = new_user_id()
+    data_manager = DataManager(gardener)
+    for name in ("Rose", "Basil", "Oak Tree"):
+        data_manager.add_plant({"name": name, "placement": "Balcony"})
+    app = run_page(DASHBOARD, gardener)
+    assert not app.exception
+    assert sorted(button.key for button in app.button if str(button.key).startswith("water_")) == ["water_1", "water_2", "water_3"]
+
+def test_water_button_logs_the_watering():
+    gardener = new_user_id()
+    DataManager(gardener).add_plant({"name": "Rose", "placement": "Balcony"})
+    app = run_page(DASHBOARD, gardener)
+    next(button for button in app.button if button.key == "water_1").click().run()
+    assert not app.exception
+    data_manager = DataManager(gardener)
+    assert data_manager.get_plant(1)["last_watered"]
+    assert data_manager.get_watering_stats(1)["total_events"] == 1
+
+def test_only_the_dashboard_runs_the_soil_model(monkeypatch):
+    runs = []
+    original = SoilModel.predict
+    monkeypatch.setattr(SoilModel, "predict", lambda self, *args: runs.append(1) or original(self, *args))
+    gardener = new_user_id()
+    for name in ("Rose", "Basil"):
+        DataManager(gardener).add_plant({"name": name, "placement": "Balcony", "last_watered": "2026-05-01T08:00:00"})
+    for page in ("🏠 Welcome", "👤 User Profile", "🤖 AI Botanist"):
+        assert not run_page(page, gardener).exception
+    assert runs == []
+    app = run_page(DASHBOARD, gardener)
+    assert not app.exception and len(runs) == 1
+    app.run()  # A rerun reuses the garden's predictions
+    assert len(runs) == 1
+
+def test_every_page_renders_for_a_new_visitor():
+    for page in ("🏠 Welcome", "👤 User Profile", "📍 Location & Nurseries", DASHBOARD, "🌱 Add a Plant", "🤖 AI Botanist"):
+        app = run_page(page)
+        assert not app.exception, page
+    # Looking around saves nothing, so no user namespace is created
+    assert not os.path.exists(os.path.join("data", "users"))
+
+def test_ids_the_app_did_not_issue_open_a_new_guest_garden():
+    DataManager("gardener").add_plant({"name": "Rose"})
+    for user_id in ("gardener", LEGACY_USER_ID):
+        app = run_page(DASHBOARD, user_id)
+        assert app.session_state["user_id"].startswith("guest-")
+        assert not any(str(button.key).startswith("water_") for button in app.button)
+
+def test_saving_another_users_email_does_not_open_their_garden():
+    owner = new_user_id()
+    DataManager(owner).save_user_profile({"name": "Ana", "email": "ana@example.com"})
+    DataManager(owner).add_plant({"name": "Rose"})
+    app = run_page("👤 User Profile")
+    app.text_input[0].input("Mallory")
+    app.text_input[1].input("ana@example.com")
+    app.button[0].click().run()
+    assert not app.exception
+    user_id = app.session_state["user_id"]
+    assert user_id.startswith("u-") and user_id != owner and app.query_params["uid"] == user_id
+    assert DataManager(owner).get_user_profile()["name"] == "Ana"
+    assert [p["name"] for p in DataManager(owner).get_all_plants()] == ["Rose"]
+    assert DataManager(user_id).get_user_profile()["name"] == "Mallory"
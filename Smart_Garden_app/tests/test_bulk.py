@@ -0,0 +1,82 @@
+"""Bulk import / export: row validation, streamed parsing, garden limit and round trips"""
+import io
+import json
+from datetime import datetime, timedelta, timezone
+import pytest
+import config
+from garden_core import detect_format, export_plants, import_plants
+from garden_core.bulk import validate_plant
+from utils.data_manager import DataManager
+
+def test_valid_row_is_cleaned_up():
+    plant = validate_plant({"name": " Rose ", "placement": "Balcony", "watering_interval_days": "2.0",
+                            "last_watered": "2026-05-01T08:00:00", "id": 7, "notes": ""})
+    assert plant == {"name": "Rose", "placement": "Balcony", "watering_interval_days": 2,
+                     "last_watered": "2026-05-01T08:00:00"}
+
+@pytest.mark.parametrize("record, message", [
+    ({"placement": "Balcony"}, "Plant name is missing"),
+    ({"name": "Rose", "watering_interval_days": "often"}, "is not a number"),
+    ({"name": "Rose", "watering_interval_days": "inf"}, "is not a number"),
+    ({"name": "Rose", "watering_interval_days": 1e400}, "is not a number"),
+    ({"name": "Rose", "watering_interval_days": "nan"}, "is not a number"),
+    ({"name": "Rose", "watering_interval_days": [2]}, "is not a number"),
+    ({"name": "Rose", "watering_interval_days": 0}, "must be 1-365 days"),
+    ({"name": "Rose", "last_watered": "yesterday"}, "is not an ISO date"),
+    ({"name": "Rose", "last_watered": "2999-01-01"}, "in the future"),
+])
+def test_invalid_rows_raise_a_user_facing_error(record, message):
+    with pytest.raises(ValueError, match=message):
+        validate_plant(record)
+
+def test_timezone_aware_dates_are_stored_as_local_time():
+    watered_at = datetime.now(timezone.utc) - timedelta(hours=3)
+    for text in (watered_at.isoformat(), watered_at.isoformat().replace("+00:00", "Z")):
+        stored = datetime.fromisoformat(validate_plant({"name": "Rose", "last_watered": text})["last_watered"])
+        assert stored.tzinfo is None
+        assert abs(stored - (datetime.now() - timedelta(hours=3))) < timedelta(minutes=1)
+    with pytest.raises(ValueError, match="in the future"):
+        validate_plant({"name": "Rose", "last_watered": (datetime.now(timezone.utc) + timedelta(hours=2)).isoformat()})
+
+def test_csv_import_reports_bad_rows_by_line():
+    data_manager = DataManager("alice")
+    upload = b"\xef\xbb\xbfName,Placement,Watering_Interval_Days,Last_Watered\n" \
+             b"Rose,Balcony,2,\nFern,Indoor Window,inf,\nMint,Balcony,3,2026-05-01T08:00:00Z\n"
+    result = import_plants(data_manager, io.BytesIO(upload), "csv")
+    assert result["imported"] == 2 and result["rejected"] == 1
+    assert result["errors"] == [(3, "Watering interval 'inf' is not a number")]
+    assert [p["name"] for p in data_manager.get_all_plants()] == ["Rose", "Mint"]
+
+def test_ndjson_import_strict_and_dry_run():
+    data_manager = DataManager("alice")
+    upload = b'{"name": "Rose"}\n\nnot json\n[1]\n{"name": "Fern", "watering_interval_days": 1e400}\n'
+    assert import_plants(data_manager, io.BytesIO(upload), "ndjson", strict=True)["would_import"] == 1
+    dry = import_plants(data_manager, io.BytesIO(upload), "ndjson", dry_run=True)
+    assert [line for line, _ in dry["errors"]] == [3, 4, 5] and dry["rejected"] == 3
+    assert data_manager.get_all_plants() == []
+
+def test_rows_over_the_garden_limit_are_skipped(monkeypatch):
+    monkeypatch.setattr(config, "MAX_PLANTS", 2)
+    data_manager = DataManager("alice")
+    data_manager.add_plant({"name": "Rose"})
+    upload = "\n".join(json.dumps({"name": f"Plant {n}"}) for n in range(3)).encode()
+    result = import_plants(data_manager, io.BytesIO(upload), "ndjson")
+    assert result["imported"] == 1 and result["skipped"] == 2
+
+def test_export_round_trips_through_import():
+    source = DataManager("alice")
+    source.add_plants([{"name": "Rose", "placement": "Balcony", "watering_interval_days": 2, "notes": "line\nbreak"},
+                       {"name": "Fern"}])
+    for fmt in ("csv", "ndjson"):
+        exported = b"".join(export_plants(source, fmt))
+        target = DataManager(f"bob-{fmt}")
+        assert import_plants(target, io.BytesIO(exported), fmt)["imported"] == 2
+        rose = target.get_all_plants()[0]
+        assert (rose["name"], rose["placement"], rose["watering_interval_days"], rose["notes"]) == ("Rose", "Balcony", 2, "line\nbreak")
+
+def test_format_detection():
+    assert detect_format("Garden.CSV") == "csv" and detect_format("garden.jsonl") == "ndjson"
+    with pytest.raises(ValueError):
+        detect_format("garden.xlsx")
+    with pytest.raises(ValueError, match="not UTF-8"):
+        import_plants(DataManager("alice"), io.BytesIO(b"name\n\xff\xfe\n"), "csv")
@@ -0,0 +1,120 @@
+"""AI Botanist: token-budgeted prompts and which answers the shared answer cache may serve"""
+from types import SimpleNamespace
+import pytest
+from garden_core.chat import ask_botanist
+from utils.chat_context import ConversationContext, count_tokens
+from utils.data_manager import DataManager
+from utils.groq_service import GroqService
+from utils.weather_service import WeatherService
+
+WEATHER = "Current weather in Sialkot, Pakistan: 31°C, clear sky"
+ROSE = {"id": 1, "name": "Rose", "placement": "Balcony", "sun_preference": "Full Sun",
+        "watering_interval_days": 2, "last_watered": "2026-05-01T08:00:00"}
+
+def turn(number):
+    return {"timestamp": f"2026-05-01T08:{number:02d}:00", "user_message": f"Question {number} about soil?",
+            "bot_response": f"Answer {number}. More detail follows here."}
+
+class FakeCompletions:
+    """Records the messages sent and answers with a numbered reply"""
+
+    def __init__(self):
+        self.sent = []
+
+    def create(self, messages, **kwargs):
+        self.sent.append(messages)
+        return SimpleNamespace(choices=[SimpleNamespace(message=SimpleNamespace(content=f"Reply {len(self.sent)}"))])
+
+@pytest.fixture
+def groq(monkeypatch):
+    service = GroqService()
+    completions = FakeCompletions()
+    service.client = SimpleNamespace(chat=SimpleNamespace(completions=completions))
+    monkeypatch.setattr(service, "_ensure_client", lambda: True)
+    return service, completions
+
+def test_prompt_stays_within_the_token_budget():
+    context = ConversationContext(max_prompt_tokens=300, max_recent_turns=2, max_summary_tokens=60)
+    history = [turn(number) for number in range(30)]
+    messages, usage = context.build_messages("System.", "How is my rose?", history, [ROSE])
+    assert usage["prompt_tokens"] <= 300
+    assert usage["recent_turns"] == 2 and 0 < usage["summarized_turns"] < 28
+    assert [m["role"] for m in messages] == ["system", "user", "assistant", "user", "assistant", "user"]
+    assert "Plants being discussed:\n- Rose: placement Balcony" in messages[0]["content"]
+    assert "Earlier in this conversation:" in messages[0]["content"]
+    assert sum(count_tokens(m["content"]) for m in messages) == usage["prompt_tokens"]
+
+def test_oversized_context_is_cut_to_its_share_of_the_budget():
+    context = ConversationContext(max_prompt_tokens=300, max_recent_turns=2, max_summary_tokens=60)
+    plant_context = "Plant Details: " + "very long care notes " * 200
+    history = [turn(number) for number in range(10)]
+    messages, usage = context.build_messages(f"System.\n{plant_context}", "How is my rose?", history, [ROSE])
+    assert usage["prompt_tokens"] <= 300
+    assert count_tokens(messages[0]["content"]) > 100 and messages[0]["content"].startswith("System.")
+    assert usage["recent_turns"] == 2
+
+def test_only_plants_being_discussed_get_details():
+    context = ConversationContext()
+    messages, _ = context.build_messages("System.", "Does basil like shade?", [], [ROSE])
+    assert "User's plants: Rose" in messages[0]["content"]
+    assert "Plants being discussed" not in messages[0]["content"]
+
+def test_generic_questions_are_shared_between_users(groq):
+    service, completions = groq
+    first = service.answer_question("How often should I water basil?", WEATHER)
+    second = service.answer_question("How often should I water basil?", WEATHER)
+    assert not first["from_cache"] and second["from_cache"] and second["response"] == "Reply 1"
+    assert len(completions.sent) == 1
+
+def test_answers_with_the_users_plants_are_never_shared(groq):
+    service, completions = groq
+    personal = service.answer_question("How often should I water my rose?", WEATHER, plants=[ROSE])
+    other_user = service.answer_question("How often should I water my rose?", WEATHER)
+    assert not other_user["from_cache"] and other_user["response"] != personal["response"]
+    # Not served to the same user either: the plant records may have changed since
+    assert not service.answer_question("How often should I water my rose?", WEATHER, plants=[ROSE])["from_cache"]
+    assert len(completions.sent) == 3
+
+def test_a_users_repeated_question_is_served_from_their_own_cache_scope(groq):
+    service, completions = groq
+    first = service.answer_question("How often should I water my rose?", WEATHER, history=[turn(1)], plants=[ROSE], cache_scope="alice")
+    again = service.answer_question("How often should I water my rose?", WEATHER, history=[turn(1), turn(2)], plants=[ROSE], cache_scope="alice")
+    assert not first["from_cache"] and again["from_cache"] and again["response"] == first["response"]
+    # Another user with the same records, or the same user after a change to the garden, is not served it
+    assert not service.answer_question("How often should I water my rose?", WEATHER, plants=[ROSE], cache_scope="bob")["from_cache"]
+    watered = {**ROSE, "last_watered": "2026-05-03T08:00:00"}
+    assert not service.answer_question("How often should I water my rose?", WEATHER, plants=[watered], cache_scope="alice")["from_cache"]
+    assert len(completions.sent) == 3
+
+def test_answers_that_saw_the_chat_history_are_not_cached(groq):
+    service, completions = groq
+    service.answer_question("Is rain water better for plants?", WEATHER, history=[turn(1)])
+    assert not service.answer_question("Is rain water better for plants?", WEATHER)["from_cache"]
+    assert not service.answer_question("Is rain water better for plants?", WEATHER, history=[turn(1)])["from_cache"]
+    assert len(completions.sent) == 3
+
+def test_fallback_replies_are_not_cached():
+    service = GroqService()  # No API key: every reply is the setup help text
+    assert not service.answer_question("How often should I water basil?", WEATHER)["from_cache"]
+    assert not service.answer_question("How often should I water basil?", WEATHER)["from_cache"]
+
+def test_ask_botanist_keeps_one_users_garden_out_of_another_users_answer(groq):
+    service, completions = groq
+    services = SimpleNamespace(weather=WeatherService(), groq=service)
+    alice, bob = DataManager("alice"), DataManager("bob")
+    alice.add_plant({"name": "Moonflower", "placement": "Balcony"})
+    ask_botanist(services, alice, "How often should I water my plants?")
+    answer = ask_botanist(services, bob, "How often should I water my plants?")
+    assert not answer["from_cache"]
+    assert "Moonflower" not in str(completions.sent[-1])
+    assert [m["user_message"] for m in bob.get_chat_history()] == ["How often should I water my plants?"]
+
+def test_ask_botanist_serves_a_gardener_their_repeated_question(groq):
+    service, completions = groq
+    services = SimpleNamespace(weather=WeatherService(), groq=service)
+    alice = DataManager("alice")
+    alice.add_plant({"name": "Moonflower", "placement": "Balcony"})
+    first = ask_botanist(services, alice, "How often should I water basil?")
+    again = ask_botanist(services, alice, "How often should I water basil?")  # Now with one earlier turn
+    assert not first["from_cache"] and again["from_cache"] and len(completions.sent) == 1
+    assert not ask_botanist(services, DataManager("bob"), "How often should I water basil?")["from_cache"]
@@ -0,0 +1,40 @@
+"""Settings: API keys resolved once from secrets.toml or the environment, re-read only when secrets change"""
+import os
+import pytest
+import config
+
+@pytest.fixture
+def fresh_settings(monkeypatch, tmp_path):
+    secrets_file = tmp_path / ".streamlit" / "secrets.toml"
+    monkeypatch.setattr(config, "SECRETS_FILES", [str(secrets_file)])
+    monkeypatch.setattr(config, "_settings", None)
+    monkeypatch.setattr(config, "_settings_stamp", None)
+    return secrets_file
+
+def write_secrets(path, text, mtime_ns):
+    path.parent.mkdir(exist_ok=True)
+    path.write_text(text)
+    os.utime(path, ns=(mtime_ns, mtime_ns))
+
+def test_environment_keys(fresh_settings, monkeypatch):
+    monkeypatch.setenv("GROQ_API_KEY", " env-groq ")
+    settings = config.get_settings()
+    assert settings.groq_api_key == "env-groq" and settings.openweather_api_key == ""
+    assert settings.source == "environment"
+    assert config.get_settings() is settings
+    assert "env-groq" not in repr(settings)
+
+def test_secrets_override_the_environment_and_changes_are_picked_up(fresh_settings, monkeypatch):
+    monkeypatch.setenv("GROQ_API_KEY", "env-groq")
+    write_secrets(fresh_settings, 'GROQ_API_KEY = "secret-groq"\n[api]\ngemini_key = "nested-gemini"\n', 1_000_000_000)
+    settings = config.get_settings()
+    assert (settings.groq_api_key, settings.gemini_api_key, settings.source) == ("secret-groq", "nested-gemini", "secrets")
+    write_secrets(fresh_settings, 'groq = "rotated"\n', 2_000_000_000)
+    assert config.get_groq_key() == "rotated"
+    assert config.get_gemini_key() == ""
+
+def test_country_codes():
+    assert config.get_country_code("United Kingdom") == "GB"
+    assert config.get_country_code("pk") == "PK"
+    assert config.get_country_code("") == config.DEFAULT_COUNTRY_CODE
+    assert config.get_country_code("Atlantis") == config.DEFAULT_COUNTRY_CODE
@@ -0,0 +1,69 @@
+"""Load test contention probes: lock-wait counters, percentiles and DataManager instrumentation"""
+import os
+import sys
+import threading
+import time
+import pytest
+from utils.data_manager import DataManager
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "benchmarks"))
+from contention import ContentionStats, InstrumentedLock, instrument_data_manager, read_rss_mb, summarize
+
+def test_summarize_reports_milliseconds():
+    assert summarize([]) == {"count": 0}
+    summary = summarize([0.001] * 99 + [0.5])
+    assert summary["count"] == 100 and summary["p50_ms"] == 1.0 and summary["max_ms"] == 500.0
+    assert summary["p50_ms"] <= summary["p95_ms"] <= summary["p99_ms"] <= summary["max_ms"]
+
+def test_uncontended_lock_records_no_wait():
+    stats = ContentionStats()
+    lock = InstrumentedLock(threading.Lock(), stats, "plants")
+    for _ in range(3):
+        with lock:
+            pass
+    assert stats.report()["locks"]["plants"] == {
+        "acquisitions": 3, "contended": 0, "wait_seconds": 0.0, "max_wait_seconds": 0.0, "contended_share": 0.0
+    }
+
+def test_contended_lock_records_the_wait():
+    stats = ContentionStats()
+    lock = InstrumentedLock(threading.Lock(), stats, "plants")
+    lock.acquire()
+    waiter = threading.Thread(target=lambda: (lock.acquire(), lock.release()))
+    waiter.start()
+    time.sleep(0.05)
+    lock.release()
+    waiter.join()
+    entry = stats.report()["locks"]["plants"]
+    assert entry["acquisitions"] == 2 and entry["contended"] == 1 and entry["contended_share"] == 0.5
+    assert entry["max_wait_seconds"] >= 0.04
+
+def test_non_blocking_acquire_of_a_held_lock_fails():
+    stats = ContentionStats()
+    inner = threading.Lock()
+    inner.acquire()
+    assert InstrumentedLock(inner, stats, "plants").acquire(blocking=False) is False
+    assert stats.report()["locks"] == {}
+
+@pytest.fixture
+def instrumented(monkeypatch):
+    """Instrument DataManager for one test (monkeypatch restores the original methods)"""
+    for name in ("__init__", "_write_json", "_load_plants", "_load_chat_history", "_load_user_profile"):
+        monkeypatch.setattr(DataManager, name, getattr(DataManager, name))
+    stats = ContentionStats()
+    instrument_data_manager(stats)
+    return stats
+
+def test_data_manager_locks_and_file_io_are_timed(instrumented):
+    data_manager = DataManager("alice")
+    data_manager.add_plant({"name": "Rose"})
+    data_manager.mark_watered(data_manager.get_all_plants()[0]["id"])
+    report = instrumented.report()
+    assert report["locks"]["DataManager"]["acquisitions"] >= 2
+    assert report["files"]["write plants_database.json"]["count"] >= 2
+    assert report["files"]["read plants"]["count"] >= 1
+
+def test_read_rss_of_the_current_process():
+    rss = read_rss_mb()
+    assert rss is None or rss > 0
+    assert read_rss_mb(pid="no-such-process") is None
@@ -0,0 +1,64 @@
+"""Dashboard: garden-wide alerts, temperature labels and the per-plant card status"""
+from datetime import datetime, timedelta
+import pytest
+from garden_core import active_alerts, build_digest, plant_status, resolve_location
+from garden_core.dashboard import outdoor_alert, temperature_status
+from utils.plant_service import PlantService
+from utils.weather_service import WeatherService
+
+def weather(temperature=25, rain=False, storm=False):
+    return {
+        "current": {"temperature": temperature},
+        "rain_alert": {"has_rain": rain, "next_rain": "in 3 hours" if rain else None},
+        "storm_alert": {"has_storm": storm, "next_storm": "tonight" if storm else None}
+    }
+
+@pytest.mark.parametrize("temperature, label", [(36, "Too Hot!"), (31, "Warm"), (20, "Comfortable"), (14, "Too Cold")])
+def test_temperature_labels(temperature, label):
+    assert temperature_status(temperature) == label
+
+def test_alerts_cover_rain_storm_and_heat():
+    assert active_alerts(weather()) == []
+    assert active_alerts(weather(temperature=38, rain=True, storm=True)) == [
+        ("rain", "your plants"), ("storm", "your outdoor plants"), ("heat", "your plants")]
+
+def test_outdoor_alert_priority():
+    assert outdoor_alert(weather(temperature=38, rain=True, storm=True)) == "storm"
+    assert outdoor_alert(weather(temperature=38, rain=True)) == "rain"
+    assert outdoor_alert(weather(temperature=38)) == "heat"
+    assert outdoor_alert(weather()) is None
+
+def test_missing_location_parts_fall_back_to_the_defaults():
+    assert resolve_location({"city": "Oslo", "country": "Norway", "country_code": "NO"}) == ("Oslo", "Norway", "NO")
+    city, country, country_code = resolve_location(None)
+    assert city and country and country_code
+
+@pytest.fixture
+def digest():
+    return build_digest(WeatherService(), PlantService(), "Sialkot", "PK")
+
+def test_card_status_joins_the_plant_with_the_digest(digest):
+    dry = {**digest["watering"], "recent_rain": False, "rain_expected": False}
+    digest = {**digest, "outdoor_alert": "rain", "watering": dry}
+    watered_long_ago = (datetime.now() - timedelta(days=10)).isoformat()
+    rose = {"name": "Rose", "placement": "Balcony", "watering_interval_days": 2, "last_watered": watered_long_ago}
+    status = plant_status(rose, digest, PlantService())
+    assert status["water_status"] == "Needs Water Today" and status["watering"]["needs_water"]
+    assert status["category"] == "flower" and status["weather_alert"] == "rain"
+    assert status["sun_hours"] == digest["sun"]["Balcony"]["sun_hours"]
+    assert 0 <= status["sun_share"] <= 1 and status["temperature"] == digest["temperature"]
+
+def test_expected_rain_holds_off_watering(digest):
+    wet = {**digest["watering"], "recent_rain": False, "rain_expected": True}
+    rose = {"name": "Rose", "placement": "Balcony", "watering_interval_days": 2,
+            "last_watered": (datetime.now() - timedelta(days=10)).isoformat()}
+    status = plant_status(rose, {**digest, "watering": wet}, PlantService())
+    assert status["water_status"] == "Well Watered" and "Rain expected" in status["watering"]["message"]
+
+def test_indoor_plants_get_no_weather_alert_and_unknown_placements_use_the_default_sun_model(digest):
+    digest = {**digest, "outdoor_alert": "storm"}
+    fern = {"name": "Fern", "placement": "Kitchen shelf", "watering_interval_days": 3,
+            "last_watered": datetime.now().isoformat()}
+    status = plant_status(fern, digest, PlantService())
+    assert status["water_status"] == "Well Watered" and status["weather_alert"] is None
+    assert status["sun_hours"] == digest["sun"]["Other"]["sun_hours"]
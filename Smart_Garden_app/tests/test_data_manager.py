@@ -0,0 +1,113 @@
+"""DataManager: per-user sharded namespaces, lazy creation, legacy migration and the garden index stamp"""
+import json
+import multiprocessing
+import os
+import pytest
+from utils.data_manager import (
+    fcntl, DataManager, LEGACY_USER_ID, get_user_data_dir, is_issued_user_id, is_legacy_user_id, is_valid_user_id,
+    migrate_legacy_data, move_user_data, new_guest_id, new_user_id, rekey_legacy_namespaces
+)
+
+def test_user_ids_are_safe_directory_names():
+    assert is_valid_user_id(new_guest_id()) and is_valid_user_id(new_user_id())
+    for bad in ("", None, "../etc", "a/b", "UPPER", "x" * 65):
+        assert not is_valid_user_id(bad)
+    with pytest.raises(ValueError):
+        get_user_data_dir("../etc")
+
+def test_only_issued_random_ids_open_a_garden():
+    assert new_user_id() != new_user_id() and new_guest_id() != new_guest_id()
+    assert is_issued_user_id(new_user_id()) and is_issued_user_id(new_guest_id())
+    for guessable in (LEGACY_USER_ID, "alice", "u-" + "0" * 24, "guest-1", None):
+        assert not is_issued_user_id(guessable)
+    assert is_legacy_user_id(LEGACY_USER_ID) and is_legacy_user_id("u-" + "a" * 24)
+    assert not is_legacy_user_id(new_user_id()) and not is_legacy_user_id("alice")
+
+def test_namespaces_are_sharded_and_isolated():
+    path = get_user_data_dir("alice")
+    shard = os.path.basename(os.path.dirname(path))
+    assert path.startswith(os.path.join("data", "users")) and len(shard) == 2
+    DataManager("alice").add_plant({"name": "Rose"})
+    assert DataManager("bob").get_all_plants() == []
+    assert [p["name"] for p in DataManager("alice").get_all_plants()] == ["Rose"]
+
+def test_namespace_is_created_on_first_write_only():
+    data_manager = DataManager(new_guest_id())
+    assert data_manager.get_all_plants() == []
+    assert data_manager.get_chat_history() == []
+    assert data_manager.get_user_profile() == {}
+    assert data_manager.get_garden_summary()["total"] == 0
+    assert not os.path.exists(data_manager.data_dir)
+    data_manager.add_chat_message("Hi", "Hello")
+    assert sorted(os.listdir(data_manager.data_dir)) == [".lock", "chat_history.json"]
+
+def test_move_user_data_carries_a_guest_garden_over():
+    guest = new_guest_id()
+    DataManager(guest).add_plant({"name": "Basil"})
+    assert move_user_data(guest, "registered")
+    assert DataManager(guest).get_all_plants() == []
+    assert [p["name"] for p in DataManager("registered").get_all_plants()] == ["Basil"]
+    # Never overwrites an existing namespace
+    DataManager(guest).add_plant({"name": "Mint"})
+    assert not move_user_data(guest, "registered")
+
+def test_index_notices_a_rewrite_within_the_same_mtime_tick():
+    reader = DataManager("alice")
+    reader.add_plant({"name": "Rose"})
+    stamp = os.stat(reader.plants_file).st_mtime_ns
+    assert reader.get_garden_summary()["total"] == 1
+    # Another process's DataManager saves; the clock did not advance
+    DataManager("alice").add_plant({"name": "Tulip"})
+    os.utime(reader.plants_file, ns=(stamp, stamp))
+    assert reader.get_garden_summary()["total"] == 2
+
+def add_plants_in_another_process(user_id, count):
+    data_manager = DataManager(user_id)
+    for number in range(count):
+        data_manager.add_plant({"name": f"Plant {os.getpid()}-{number}"}, max_total=50)
+
+@pytest.mark.skipif(fcntl is None, reason="File locks need fcntl")
+def test_writes_from_several_processes_are_not_lost():
+    context = multiprocessing.get_context("fork")
+    workers = [context.Process(target=add_plants_in_another_process, args=("alice", 20)) for _ in range(3)]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+    plants = DataManager("alice").get_all_plants()
+    # 60 attempts against a limit of 50: none lost, none over the limit, ids unique
+    assert len(plants) == 50 and len({p["id"] for p in plants}) == 50
+
+def write_legacy(plants, chat, profile):
+    for path, data in (("plants_database.json", plants), ("chat_history.json", chat), ("data/user_profile.json", profile)):
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(data, f)
+
+def test_legacy_data_moves_to_a_new_private_namespace_once():
+    write_legacy([{"id": 1, "name": "Rose"}], [{"user_message": "Hi", "bot_response": "Hello"}], {"email": "ana@example.com"})
+    user_id = migrate_legacy_data()
+    assert is_issued_user_id(user_id) and user_id.startswith("u-")
+    assert [p["name"] for p in DataManager(user_id).get_all_plants()] == ["Rose"]
+    assert DataManager(user_id).get_user_profile()["email"] == "ana@example.com"
+    assert not os.path.exists("plants_database.json") and not os.path.exists("chat_history.json")
+    assert migrate_legacy_data() is None
+
+def test_legacy_data_without_email_is_not_given_to_the_local_user():
+    write_legacy([], [{"user_message": "Hi", "bot_response": "Hello"}], {})
+    user_id = migrate_legacy_data()
+    assert user_id != LEGACY_USER_ID and len(DataManager(user_id).get_chat_history()) == 1
+    assert DataManager(LEGACY_USER_ID).get_chat_history() == []
+
+def test_derivable_namespaces_of_earlier_releases_get_random_ids():
+    email_id = "u-" + "a" * 24
+    DataManager(LEGACY_USER_ID).add_plant({"name": "Mint"})
+    DataManager(email_id).add_plant({"name": "Rose"})
+    DataManager("alice").add_plant({"name": "Basil"})
+    moved = rekey_legacy_namespaces()
+    assert set(moved) == {LEGACY_USER_ID, email_id} and all(is_issued_user_id(new) for new in moved.values())
+    assert [p["name"] for p in DataManager(moved[LEGACY_USER_ID]).get_all_plants()] == ["Mint"]
+    assert [p["name"] for p in DataManager(moved[email_id]).get_all_plants()] == ["Rose"]
+    assert DataManager(LEGACY_USER_ID).get_all_plants() == [] and DataManager(email_id).get_all_plants() == []
+    assert [p["name"] for p in DataManager("alice").get_all_plants()] == ["Basil"]
+    assert rekey_legacy_namespaces() == {}
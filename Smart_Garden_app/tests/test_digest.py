@@ -0,0 +1,74 @@
+"""Location digests: one build per location and hour, shared by all callers and kept warm by the prefetcher"""
+import threading
+import time
+from datetime import timedelta
+import config
+from garden_core import DIGEST_SCHEMA_VERSION, DigestStore, build_digest
+from garden_core.digest import location_key
+from utils.plant_service import PlantService
+from utils.weather_service import WeatherService
+
+class CountingWeather(WeatherService):
+    """Offline weather that counts forecast fetches (one per digest build) and can be slowed down"""
+
+    def __init__(self, delay=0):
+        super().__init__()
+        self.delay = delay
+        self.fetches = 0
+
+    def get_forecast(self, city=None, country_code="PK", days=3):
+        self.fetches += 1
+        time.sleep(self.delay)
+        return super().get_forecast(city, country_code, days)
+
+def test_digest_layout():
+    digest = build_digest(WeatherService(), PlantService(), "Sialkot", "PK")
+    assert digest["schema"] == DIGEST_SCHEMA_VERSION and digest["version"].startswith(f"{DIGEST_SCHEMA_VERSION}.")
+    assert set(digest["sun"]) == {"Open Roof", "Balcony", "Indoor Window", "Other"}
+    assert digest["temp_status"] and "rain_expected" in digest["watering"]
+    assert digest["hour"] == digest["built_at"].strftime("%Y-%m-%dT%H:00")
+
+def test_locations_differing_in_case_share_one_digest():
+    weather = CountingWeather()
+    store = DigestStore(weather, PlantService(), max_age_seconds=600)
+    first = store.get("Sialkot", "pk")
+    assert store.get(" sialkot", "PK") is first
+    assert store.get("Lahore", "PK") is not first
+    assert weather.fetches == 2 and store.builds == 2
+    assert location_key(" Sialkot ", "pk") == ("sialkot", "PK")
+
+def test_concurrent_misses_build_once():
+    weather = CountingWeather(delay=0.1)
+    store = DigestStore(weather, PlantService(), max_age_seconds=600)
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(store.get("Sialkot", "PK"))) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert weather.fetches == 1 and all(digest is results[0] for digest in results)
+    assert store._build_locks == {}  # Build locks live only while a build is in flight
+
+def test_stale_digest_is_rebuilt():
+    store = DigestStore(CountingWeather(), PlantService(), max_age_seconds=600)
+    first = store.get("Sialkot", "PK")
+    first["built_at"] -= timedelta(seconds=601)
+    assert store.get("Sialkot", "PK") is not first and store.builds == 2
+
+def test_prefetch_rebuilds_only_digests_about_to_expire(monkeypatch):
+    monkeypatch.setattr(config, "DIGEST_PREFETCH_INTERVAL_SECONDS", 60)
+    store = DigestStore(CountingWeather(), PlantService(), max_age_seconds=600)
+    sialkot = store.get("Sialkot", "PK")
+    store.get("Lahore", "PK")
+    assert store.prefetch() == 0
+    sialkot["built_at"] -= timedelta(seconds=570)  # 30 s left: would expire before the next run
+    assert store.prefetch() == 1 and store.builds == 3
+    assert store.get("Sialkot", "PK") is not sialkot
+
+def test_recent_locations_are_bounded():
+    store = DigestStore(CountingWeather(), PlantService(), max_age_seconds=600, max_locations=2)
+    for city in ("Sialkot", "Lahore", "Karachi"):
+        store.get(city, "PK")
+    assert sorted(store._recent) == [("karachi", "PK"), ("lahore", "PK")]
+    assert sorted(key[:2] for key in store._digests) == [("karachi", "PK"), ("lahore", "PK")]
+    assert store._build_locks == {}
@@ -0,0 +1,68 @@
+"""ForecastTimeline: 3-hour slots spread to hours, window sums and rain / storm alerts"""
+from datetime import datetime, timedelta
+import pytest
+from utils.forecast_timeline import ForecastTimeline, hour_floor, is_raining
+from utils.weather_service import WeatherService
+
+NOW = datetime(2026, 5, 1, 8, 20)
+
+def slot(hours, temperature, precipitation=0, condition="Clear", description="clear sky"):
+    return {"datetime": hour_floor(NOW) + timedelta(hours=hours), "temperature": temperature,
+            "precipitation": precipitation, "condition": condition, "description": description}
+
+@pytest.fixture
+def timeline():
+    forecast = [
+        slot(10, 24, 1.5, "Thunderstorm", "thunderstorm"),  # Slots may come in any order
+        slot(1, 30),
+        slot(4, 36, 6, "Rain", "heavy rain"),
+        slot(7, 30),
+        {"temperature": 50},  # No datetime: ignored
+    ]
+    return ForecastTimeline.from_forecast(forecast, now=NOW)
+
+def test_slots_are_spread_over_their_hours(timeline):
+    assert len(timeline) == 10 and timeline.start == datetime(2026, 5, 1, 8, 0)
+    assert timeline.precipitation.tolist() == [0, 2, 2, 2, 0, 0, 0, 0.5, 0.5, 0.5]
+    assert timeline.rain.tolist() == [False, True, True, True, False, False, False, True, True, True]
+    assert timeline.conditions[1] == "Rain" and timeline.descriptions[9] == "thunderstorm"
+    assert timeline.temperature[0] == 30 and timeline.temperature[2] == pytest.approx(33)
+
+def test_window_sums(timeline):
+    assert timeline.precipitation_between(0, 4) == pytest.approx(6)
+    assert timeline.precipitation_between(-5, 100) == pytest.approx(7.5)
+    assert timeline.precipitation_between(4, 2) == 0.0
+    assert timeline.rain_hours(0, 10) == 6 and timeline.storm_hours(0, 8) == 1
+    assert timeline.heat_degree_hours(0, 10) == pytest.approx(18)
+    assert timeline.events("rain", 3) == [1, 2] and timeline.events("storm", 24) == [7, 8, 9]
+
+def test_hours_between_distant_slots_stay_dry():
+    forecast = [slot(1, 20), slot(10, 20, 3, "Rain", "light rain")]
+    timeline = ForecastTimeline.from_forecast(forecast, now=NOW)
+    assert timeline.rain.tolist() == [False] * 7 + [True] * 3
+    assert timeline.precipitation_between(0, 10) == pytest.approx(3)
+
+def test_empty_forecast():
+    timeline = ForecastTimeline.from_forecast([], now=NOW)
+    assert len(timeline) == 0 and timeline.precipitation_between(0, 24) == 0.0
+    assert timeline.events("rain", 24) == [] and timeline.hourly() == []
+
+def test_timeline_is_read_only_and_serializable(timeline):
+    with pytest.raises(ValueError):
+        timeline.precipitation[0] = 9
+    hourly = timeline.hourly()
+    assert hourly[1] == {"datetime": datetime(2026, 5, 1, 9, 0), "temperature": 31.0, "precipitation": 2.0,
+                         "rain": True, "storm": False}
+
+def test_rain_and_storm_alerts_read_the_timeline(timeline):
+    weather = WeatherService()
+    rain = weather.check_rain_alert(hours_ahead=24, timeline=timeline)
+    assert rain["has_rain"] and len(rain["alerts"]) == 6 and rain["precipitation_mm"] == 7.5
+    assert rain["next_rain"]["intensity"] == "Heavy" and rain["alerts"][-1]["intensity"] == "Light"
+    storm = weather.check_storm_alert(hours_ahead=8, timeline=timeline)
+    assert storm["has_storm"] and storm["next_storm"]["time"] == datetime(2026, 5, 1, 15, 0)
+    assert not weather.check_storm_alert(hours_ahead=7, timeline=timeline)["has_storm"]
+
+def test_rain_detection_from_weather_records():
+    assert is_raining({"condition": "Drizzle"}) and is_raining({"precipitation": 0.2})
+    assert not is_raining({"condition": "Clouds", "description": "overcast clouds", "precipitation": 0})
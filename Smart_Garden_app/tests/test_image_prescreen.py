@@ -0,0 +1,38 @@
+"""Photo pre-screen: quality checks and the provisional foliage health score"""
+import io
+import numpy as np
+from PIL import Image, ImageFilter
+from utils.image_prescreen import prescreen_image
+
+def leaves(color, size=256, seed=0):
+    """Textured foliage: a colour with strong per-pixel brightness noise (sharp edges everywhere)"""
+    rng = np.random.default_rng(seed)
+    shade = rng.uniform(0.55, 1.0, (size, size, 1))
+    return Image.fromarray((np.array(color, dtype=np.float64) * shade).astype(np.uint8), "RGB")
+
+def test_sharp_green_foliage_is_usable_and_healthy():
+    result = prescreen_image(leaves((60, 170, 60)))
+    assert result["usable"], result["reasons"]
+    assert result["plant_share"] > 0.9 and result["health_score"] >= 80
+    assert result["health_label"] == "Good to Excellent"
+    assert sum(result["hue_histogram"]) > 0
+
+def test_yellowing_foliage_scores_lower():
+    healthy = prescreen_image(leaves((60, 170, 60)))["health_score"]
+    yellowing = prescreen_image(leaves((220, 200, 40)))
+    assert yellowing["yellow_share"] > 0.5 and yellowing["health_score"] < healthy
+
+def test_blurry_dark_and_empty_photos_are_rejected():
+    blurry = prescreen_image(leaves((60, 170, 60)).filter(ImageFilter.GaussianBlur(8)))
+    assert not blurry["usable"] and any("blurry" in reason for reason in blurry["reasons"])
+    dark = prescreen_image(leaves((15, 30, 15)))
+    assert any("too dark" in reason for reason in dark["reasons"])
+    wall = prescreen_image(leaves((128, 128, 128)))
+    assert any("Not enough leaves" in reason for reason in wall["reasons"]) and wall["health_score"] is None
+
+def test_accepts_bytes_and_files():
+    buffered = io.BytesIO()
+    leaves((60, 170, 60), size=1024).save(buffered, format="JPEG")
+    from_bytes = prescreen_image(buffered.getvalue())
+    from_file = prescreen_image(buffered)
+    assert from_bytes["plant_share"] == from_file["plant_share"] > 0.9
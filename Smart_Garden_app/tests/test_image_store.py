@@ -0,0 +1,43 @@
+"""ImageStore: content-addressed originals, deduplication and background thumbnails"""
+import io
+import os
+from PIL import Image
+from utils.image_store import ImageStore
+
+def image_bytes(color, size=(800, 600), format="PNG"):
+    buffered = io.BytesIO()
+    Image.new("RGB", size, color).save(buffered, format=format)
+    return buffered.getvalue()
+
+def test_identical_uploads_are_stored_once():
+    store = ImageStore(root="images", thumbnail_size=64)
+    first = store.ingest(image_bytes("green"))
+    second = store.ingest(io.BytesIO(image_bytes("green")))
+    assert not first["duplicate"] and second["duplicate"]
+    assert first["hash"] == second["hash"] and first["original_path"] == second["original_path"]
+    assert first["original_path"].endswith(f"{first['hash'][:2]}{os.sep}{first['hash']}.png")
+    assert store.ingest(image_bytes("red"))["hash"] != first["hash"]
+
+def test_thumbnail_is_made_in_the_background():
+    store = ImageStore(root="images", thumbnail_size=64)
+    stored = store.ingest(image_bytes("green"))
+    path = store.get_thumbnail(stored["hash"], wait=True)
+    assert path == stored["thumbnail_path"]
+    with Image.open(path) as thumbnail:
+        assert thumbnail.format == "JPEG" and max(thumbnail.size) == 64
+    assert store.lookup(stored["hash"])["thumbnail_ready"]
+
+def test_unusual_formats_are_kept_as_jpeg():
+    stored = ImageStore(root="images").ingest(image_bytes("blue", format="BMP"))
+    assert stored["original_path"].endswith(".jpg")
+
+def test_missing_thumbnail_is_regenerated():
+    store = ImageStore(root="images", thumbnail_size=64)
+    stored = store.ingest(image_bytes("green"))
+    os.remove(store.get_thumbnail(stored["hash"], wait=True))
+    assert store.get_thumbnail(stored["hash"]) is None  # Queued again
+    store.get_thumbnail(stored["hash"], wait=True)
+    assert os.path.exists(stored["thumbnail_path"])
+
+def test_unknown_hash():
+    assert ImageStore(root="images").lookup("0" * 64) is None
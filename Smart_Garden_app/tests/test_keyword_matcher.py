@@ -0,0 +1,28 @@
+"""KeywordMatcher: Aho-Corasick scan over several keyword tables in one pass"""
+from utils.keyword_matcher import KeywordMatcher, keyword_matcher
+
+def test_overlapping_keywords_are_all_found():
+    matcher = KeywordMatcher({"words": {"he": ["he"], "she": ["she"], "his": ["his"], "hers": ["hers"]}})
+    assert matcher.scan("ushers") == {"words": ["he", "she", "hers"]}
+    assert matcher.scan("ahishers")["words"] == ["he", "she", "his", "hers"]
+
+def test_labels_come_back_in_priority_order_per_table():
+    matcher = KeywordMatcher({
+        "status": {"poor": ["wilting", "brown"], "good": ["green"]},
+        "issue": {"browning": ["brown"]}
+    })
+    found = matcher.scan("Green leaves, some BROWN tips")
+    assert found == {"status": ["poor", "good"], "issue": ["browning"]}
+    assert matcher.classify("green and brown", "status") == "poor"
+    assert matcher.classify("spotless", "status", default="unknown") == "unknown"
+
+def test_substring_semantics_and_empty_keywords():
+    matcher = KeywordMatcher({"category": {"tree": ["oak", ""]}})
+    assert matcher.classify("Cloak Fern", "category") == "tree"
+    assert matcher.scan("") == {}
+
+def test_shipped_tables():
+    assert keyword_matcher.classify("Red Rose Bush", "plant_category", default="plant") == "flower"
+    assert keyword_matcher.classify("Japanese Maple", "plant_category", default="plant") == "tree"
+    assert keyword_matcher.classify("Basil", "plant_category", default="plant") == "plant"
+    assert keyword_matcher.classify("a snake plant on a shelf", "plant_names") == "Snake Plant"
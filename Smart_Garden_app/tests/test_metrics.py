@@ -0,0 +1,59 @@
+"""Metrics: registry exposition, call tracking and the atomic textfile writer"""
+import pytest
+from utils.metrics import LATENCY_BUCKETS, MetricsRegistry, metrics, record_fallback, track_call, write_metrics_file
+
+def test_counters_and_histograms_render_in_prometheus_text_format():
+    registry = MetricsRegistry()
+    registry.counter("calls_total", "Calls")
+    registry.histogram("latency_seconds", "Latency", (0.1, 1.0))
+    registry.inc("calls_total", service="groq", status="200")
+    registry.inc("calls_total", 2, service="groq", status="200")
+    registry.observe("latency_seconds", 0.5, service="groq")
+    registry.observe("latency_seconds", 3, service="groq")
+    text = registry.render()
+    assert '# TYPE calls_total counter\ncalls_total{service="groq",status="200"} 3' in text
+    assert 'latency_seconds_bucket{service="groq",le="0.1"} 0' in text
+    assert 'latency_seconds_bucket{service="groq",le="1"} 1' in text
+    assert 'latency_seconds_bucket{service="groq",le="+Inf"} 2' in text
+    assert 'latency_seconds_sum{service="groq"} 3.5' in text
+    assert registry.get("latency_seconds", service="groq") == (3.5, 2)
+    assert registry.get("calls_total", service="plantnet") is None
+
+def test_label_values_are_escaped():
+    registry = MetricsRegistry()
+    registry.counter("errors_total", "Errors")
+    registry.inc("errors_total", reason='bad "quote"\nline')
+    assert 'errors_total{reason="bad \\"quote\\"\\nline"} 1' in registry.render()
+
+def test_tracked_calls_record_status_latency_and_sizes():
+    with track_call("test_ok", "fetch") as call:
+        call.status = 200
+        call.response_bytes = 2048
+        call.attempts = 3
+    assert metrics.get("garden_api_requests_total", service="test_ok", operation="fetch", status="200") == 1
+    assert metrics.get("garden_api_retries_total", service="test_ok", operation="fetch") == 2
+    assert metrics.get("garden_api_response_bytes", service="test_ok", operation="fetch") == (2048, 1)
+    assert metrics.get("garden_api_request_duration_seconds", service="test_ok", operation="fetch", outcome="success")[1] == 1
+
+def test_exceptions_are_recorded_as_failures_and_reraised():
+    class ReadTimeout(Exception):
+        pass
+
+    with pytest.raises(ReadTimeout):
+        with track_call("test_fail", "fetch"):
+            raise ReadTimeout()
+    with pytest.raises(KeyError):
+        with track_call("test_fail", "fetch"):
+            raise KeyError("x")
+    assert metrics.get("garden_api_requests_total", service="test_fail", operation="fetch", status="timeout") == 1
+    assert metrics.get("garden_api_requests_total", service="test_fail", operation="fetch", status="error") == 1
+    assert metrics.get("garden_api_request_duration_seconds", service="test_fail", operation="fetch", outcome="failure")[1] == 2
+
+def test_metrics_file_is_written_whole(tmp_path):
+    record_fallback("test_file", "forecast", "no_api_key")
+    path = tmp_path / "garden.prom"
+    write_metrics_file(str(path))
+    text = path.read_text(encoding="utf-8")
+    assert 'garden_api_fallbacks_total{operation="forecast",reason="no_api_key",service="test_file"} 1' in text
+    assert f'le="{LATENCY_BUCKETS[-1]:g}"' in text
+    assert [p.name for p in tmp_path.iterdir()] == ["garden.prom"]
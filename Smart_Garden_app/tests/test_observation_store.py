@@ -0,0 +1,80 @@
+"""Observation store: ring-buffered samples, hourly downsampling, observed rain / ET0 and mock weather"""
+from datetime import datetime, timedelta
+import numpy as np
+import pytest
+from garden_core import build_digest
+from utils.observation_store import (
+    HOURLY_SLOTS, RAW_SLOTS, LocationObservations, ObservationStore, hargreaves_et0
+)
+from utils.plant_service import PlantService
+from utils.weather_service import WeatherService
+
+START = datetime(2026, 5, 1)
+HOURS = 72
+LATITUDE = 32.5
+
+def sample(moment, rain_mm=0):
+    hour = int((moment - START).total_seconds() // 3600)
+    return {"timestamp": moment, "temperature": 30 if hour % 24 >= 12 else 20, "humidity": 50,
+            "precipitation": rain_mm, "condition": "Rain" if rain_mm else "Clear", "lat": LATITUDE,
+            "source": "openweather"}
+
+@pytest.fixture(scope="module")
+def observations(tmp_path_factory):
+    """Three days of 5-minute samples (more than the raw ring holds), with rain in hours 30 and 31"""
+    observations = LocationObservations(str(tmp_path_factory.mktemp("obs") / "sialkot.obs"))
+    for step in range(HOURS * 12 + 1):
+        moment = START + timedelta(minutes=5 * step)
+        observations.add(sample(moment, rain_mm=2 if 30 <= step // 12 <= 31 else 0))
+    return observations
+
+NOW = START + timedelta(hours=HOURS)
+
+def test_raw_ring_wraps_and_completed_hours_are_downsampled(observations):
+    header = observations._header[0]
+    assert int(header["raw_count"]) == HOURS * 12 + 1 > RAW_SLOTS
+    assert int(header["hourly_count"]) == HOURS
+    oldest_raw = observations._raw["time"].min()
+    assert oldest_raw == int((NOW - timedelta(minutes=5 * (RAW_SLOTS - 1))).timestamp())
+    series = observations.hourly_series(NOW)
+    assert len(series["hours"]) == HOURLY_SLOTS and series["observed"][-(HOURS + 1):].all()
+    assert not series["observed"][:-(HOURS + 1)].any()
+
+def test_observed_rain_windows(observations):
+    assert observations.observed_hours(HOURS + 1, NOW) == HOURS + 1
+    assert observations.precipitation_within(HOURS + 1, NOW) == pytest.approx(4)
+    assert observations.precipitation_within(24, NOW) == 0
+    assert observations.rained_within(48, NOW) and not observations.rained_within(24, NOW)
+    rows = observations.hourly(HOURS + 1, NOW)
+    assert rows[30]["datetime"] == START + timedelta(hours=30) and rows[30]["rain"] and rows[30]["precipitation"] == 2
+
+def test_daily_et0_uses_observed_temperature_range(observations):
+    expected = hargreaves_et0(20, 30, 25, LATITUDE, np.array([121, 122, 123])).mean()
+    assert observations.daily_et0(3, NOW) == pytest.approx(expected)
+    assert observations.latitude == LATITUDE
+
+def test_repeats_and_mock_weather_are_not_stored(tmp_path):
+    observations = LocationObservations(str(tmp_path / "lahore.obs"))
+    assert observations.add(sample(START))
+    assert not observations.add(sample(START + timedelta(minutes=1)))  # Same API response
+    assert not observations.add(WeatherService()._get_mock_weather())
+    assert int(observations._header[0]["raw_count"]) == 1
+    assert observations.daily_et0(3, NOW) is None  # Too few observed hours
+    observations.close()
+    assert int(LocationObservations(str(tmp_path / "lahore.obs"))._header[0]["raw_count"]) == 1
+
+def test_digest_built_from_mock_weather_records_nothing(tmp_path):
+    store = ObservationStore(directory=str(tmp_path / "observations"))
+    digest = build_digest(WeatherService(), PlantService(), "Sialkot", "PK", store.location("Sialkot", "PK"))
+    assert digest["weather"]["current"]["source"] == "mock"
+    assert store.location("sialkot ", "pk").observed_hours(HOURLY_SLOTS) == 0
+    assert digest["watering"]["et0_mm_per_day"] is None
+
+def test_store_keeps_a_bounded_set_of_open_files(tmp_path):
+    store = ObservationStore(directory=str(tmp_path), max_open=2)
+    sialkot = store.location("Sialkot", "PK")
+    assert store.location("SIALKOT", "pk") is sialkot
+    store.location("Lahore", "PK")
+    store.location("Karachi", "PK")
+    assert store.location("Sialkot", "PK") is not sialkot
+    assert len(list(tmp_path.glob("*.obs"))) == 3
@@ -0,0 +1,65 @@
+"""Adding plants (garden size limit) and the dashboard grid's server-side sort, filter and pages"""
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+import pytest
+import config
+from garden_core.plants import add_plant
+from utils.data_manager import DataManager
+from utils.image_store import ImageStore
+
+def test_plant_needs_a_name():
+    with pytest.raises(ValueError, match="plant name"):
+        add_plant(DataManager("alice"), ImageStore(), {"name": "  "})
+
+def test_concurrent_adds_never_exceed_the_limit(monkeypatch):
+    monkeypatch.setattr(config, "MAX_PLANTS", 5)
+    data_manager, images = DataManager("alice"), ImageStore()
+
+    def add(number):
+        try:
+            return add_plant(data_manager, images, {"name": f"Fern {number}"})
+        except ValueError:
+            return None
+
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        added = [plant for plant in pool.map(add, range(20)) if plant]
+    assert len(added) == 5 == len(data_manager.get_all_plants())
+    assert sorted(plant["id"] for plant in added) == [1, 2, 3, 4, 5]
+
+def test_add_plant_checks_the_limit_under_the_lock():
+    data_manager = DataManager("alice")
+    data_manager.add_plant({"name": "Rose"}, max_total=1)
+    with pytest.raises(ValueError, match="garden is full"):
+        data_manager.add_plant({"name": "Mint"}, max_total=1)
+    assert len(data_manager.get_all_plants()) == 1
+
+def garden():
+    now = datetime.now()
+    data_manager = DataManager("alice")
+    data_manager.add_plants([
+        {"name": "Rose", "placement": "Balcony", "watering_interval_days": 2, "last_watered": (now - timedelta(days=5)).isoformat()},
+        {"name": "Oak Tree", "placement": "Open Roof", "watering_interval_days": 7, "last_watered": now.isoformat()},
+        {"name": "Basil", "placement": "Balcony", "watering_interval_days": 1, "last_watered": (now - timedelta(hours=12)).isoformat()},
+        {"name": "Aloe Vera", "placement": "Indoor Window", "watering_interval_days": 10, "last_watered": None}
+    ])
+    return data_manager
+
+def names(result):
+    return [plant["name"] for plant in result["plants"]]
+
+def test_sort_filter_and_paginate():
+    data_manager = garden()
+    assert names(data_manager.query_plants("Most urgent")) == ["Aloe Vera", "Rose", "Basil", "Oak Tree"]
+    assert names(data_manager.query_plants("Name")) == ["Aloe Vera", "Basil", "Oak Tree", "Rose"]
+    assert names(data_manager.query_plants("Name", placement="Balcony")) == ["Basil", "Rose"]
+    assert names(data_manager.query_plants("Name", category="tree")) == ["Oak Tree"]
+    assert names(data_manager.query_plants("Name", urgency="Needs Water")) == ["Aloe Vera", "Rose"]
+    assert names(data_manager.query_plants("Name", urgency="Water Soon")) == ["Basil"]
+    page = data_manager.query_plants("Name", page=5, page_size=3)
+    assert (page["page"], page["page_count"], page["total"], names(page)) == (1, 2, 4, ["Rose"])
+
+def test_garden_summary():
+    summary = garden().get_garden_summary()
+    assert (summary["total"], summary["needs_water"], summary["healthy"]) == (4, 2, 2)
+    assert summary["by_placement"] == {"Balcony": 2, "Open Roof": 1, "Indoor Window": 1}
+    assert summary["by_category"] == {"flower": 1, "tree": 1, "plant": 2}
@@ -0,0 +1,45 @@
+"""ResponseCache: exact and TF-IDF tiers, context keying, eviction and TTL"""
+import time
+from utils.response_cache import ResponseCache, TTLCache, normalize_question, question_terms
+
+WEATHER = "Current weather in Sialkot, Pakistan: 31°C, clear sky"
+
+def test_question_normalization_and_terms():
+    assert normalize_question("  Why are my Rose's leaves YELLOW?? ") == "why are my rose s leaves yellow"
+    assert set(question_terms("Why are the leaves turning yellow?")) == {"leaf", "turn", "yellow"}
+
+def test_exact_hit_ignores_case_and_punctuation():
+    cache = ResponseCache(max_entries=10, ttl_seconds=60)
+    cache.put("How often should I water basil?", WEATHER, "Every 2 days.")
+    hit = cache.get("how often should i water BASIL", WEATHER)
+    assert hit == {"response": "Every 2 days.", "tier": "exact", "similarity": 1.0}
+
+def test_answers_are_keyed_on_the_context():
+    cache = ResponseCache(max_entries=10, ttl_seconds=60)
+    cache.put("How often should I water basil?", WEATHER, "Every 2 days.")
+    assert cache.get("How often should I water basil?", "Current weather in Oslo, Norway: 4°C, snow") is None
+    assert cache.get("How often should I water basil?", "") is None
+
+def test_similar_question_is_a_semantic_hit():
+    cache = ResponseCache(max_entries=10, ttl_seconds=60, similarity_threshold=0.6)
+    cache.put("Why are my rose leaves turning yellow?", WEATHER, "Usually overwatering.")
+    cache.put("How much sun does lavender need?", WEATHER, "Full sun.")
+    hit = cache.get("Why do the leaves of my rose turn yellow", WEATHER)
+    assert hit["tier"] == "semantic" and hit["response"] == "Usually overwatering."
+    assert cache.get("Can I grow tomatoes indoors?", WEATHER) is None
+
+def test_eviction_drops_both_tiers():
+    cache = ResponseCache(max_entries=2, ttl_seconds=60, similarity_threshold=0.5)
+    cache.put("rose leaves yellow", WEATHER, "A")
+    cache.put("basil flowers early", WEATHER, "B")
+    cache.put("mint spreads everywhere", WEATHER, "C")
+    assert cache.get("rose leaves yellow", WEATHER) is None
+    assert cache.get("yellow rose leaves", WEATHER) is None
+    assert cache.get("basil flowers early", WEATHER)["response"] == "B"
+
+def test_ttl_cache_expires_entries():
+    cache = TTLCache(max_entries=10, ttl_seconds=0.01)
+    cache.set("key", "value")
+    assert cache.get("key") == "value"
+    time.sleep(0.02)
+    assert cache.get("key") is None and cache.items() == []
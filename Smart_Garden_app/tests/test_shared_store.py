@@ -0,0 +1,86 @@
+"""Shared snapshots, the per-user DataManager cache and the session memory report"""
+import pytest
+import config
+from garden_core import GardenServices
+from utils.data_manager import DataManager
+from utils.memory_report import deep_sizeof, session_memory_report
+from utils.shared_store import SharedStore, file_version
+
+def test_snapshot_is_reused_until_the_version_changes():
+    store = SharedStore(max_entries=10)
+    loads = []
+
+    def loader():
+        loads.append(1)
+        return [{"id": 1, "name": "Rose"}]
+
+    first = store.get("plants", "alice", (1, 2, 3), loader)
+    assert store.get("plants", "alice", (1, 2, 3), loader) is first
+    assert store.get("plants", "alice", (1, 2, 4), loader) is not first
+    assert store.get("plants", "alice", None, loader) is not None  # Missing file: never trusted
+    assert len(loads) == 3 and store.hits == 1
+    with pytest.raises(TypeError):
+        first.data[0]["name"] = "Tulip"
+
+def test_least_recently_used_snapshots_are_dropped():
+    store = SharedStore(max_entries=2)
+    for user_id in ("alice", "bob"):
+        store.get("plants", user_id, 1, list)
+    store.get("plants", "alice", 1, list)
+    store.get("plants", "carol", 1, list)
+    assert [key for key, _ in store.snapshots()] == [("plants", "alice"), ("plants", "carol")]
+
+def test_file_version_changes_with_every_save():
+    assert file_version("missing.json") is None
+    data_manager = DataManager("alice")
+    data_manager.add_plant({"name": "Rose"})
+    before = file_version(data_manager.plants_file)
+    data_manager.update_plant(1, {"notes": "x"})
+    assert file_version(data_manager.plants_file) != before
+
+@pytest.fixture
+def services():
+    return GardenServices()
+
+def test_data_managers_are_shared_and_bounded(services, monkeypatch):
+    monkeypatch.setattr(config, "SHARED_STORE_MAX_USERS", 2)
+    alice = services.data_manager("alice")
+    assert services.data_manager("alice") is alice
+    services.data_manager("bob")
+    services.data_manager("alice")
+    services.data_manager("carol")  # Evicts bob, the least recently used
+    assert list(services._data_managers) == ["alice", "carol"]
+    assert services.data_manager("alice") is alice and services.data_manager("bob") is not None
+
+def test_evicted_and_current_managers_see_each_others_writes(services, monkeypatch):
+    monkeypatch.setattr(config, "SHARED_STORE_MAX_USERS", 1)
+    old = services.data_manager("alice")
+    services.data_manager("bob")
+    new = services.data_manager("alice")
+    old.add_plant({"name": "Rose"})
+    new.add_plant({"name": "Fern"})
+    assert [p["name"] for p in old.query_plants("Name")["plants"]] == ["Fern", "Rose"]
+
+def test_garden_index_holds_positions_not_plant_records():
+    data_manager = DataManager("alice")
+    data_manager.add_plants([{"name": "Rose"}, {"name": "Aloe"}])
+    assert data_manager.query_plants("Name")["plants"][0]["name"] == "Aloe"
+    rows = data_manager._get_index()["rows"]
+    assert [row["position"] for row in rows] == [0, 1] and "plants" not in data_manager._get_index()
+    # A page always comes from the current file, also after another process's write
+    DataManager("alice").update_plant(2, {"notes": "fresh"})
+    assert data_manager.query_plants("Name")["plants"][0]["notes"] == "fresh"
+
+def test_session_report_counts_shared_snapshots_once(services):
+    services.data_manager("alice").add_plant({"name": "Rose", "notes": "n" * 5000})
+    snapshot = services.plants_snapshot(services.data_manager("alice"))
+    sessions = [
+        {"id": "a", "state": {"user_id": "alice", "plants": snapshot.data}, "upload_bytes": 0},
+        {"id": "b", "state": {"user_id": "alice", "plants": snapshot.data, "notes": "x" * 10000}, "upload_bytes": 500}
+    ]
+    report = session_memory_report(sessions, services.snapshots)
+    assert [row["id"] for row in report["sessions"]] == ["b", "a"]
+    # The snapshot (and its 5 kB of notes) is shared, not part of either session
+    assert report["sessions"][1]["state_bytes"] < 5000 < deep_sizeof(sessions[0]["state"])
+    assert report["shared_bytes"] > 5000 and report["sessions"][0]["upload_bytes"] == 500
+    assert report["shared_entries"] == 1
@@ -0,0 +1,112 @@
+"""Soil model: soil-water balance per plant and the due times that drive the dashboard's sort, filter and counts"""
+from datetime import datetime, timedelta
+import pytest
+from garden_core import GardenServices, plant_status, soil_predictions, watering_due_times
+from utils.data_manager import DataManager
+from utils.forecast_timeline import ForecastTimeline, hour_floor
+from utils.plant_service import PlantService
+from utils.soil_model import SoilModel
+
+def digest(rain_mm=0.0, temperature=30, now=None, version="1"):
+    """A location digest with a two-day forecast swinging 12 °C around temperature (rain_mm in every 3-hour slot)"""
+    now = now or datetime.now()
+    slots = [{"datetime": hour_floor(now) + timedelta(hours=3 * step), "temperature": temperature + (6 if step % 4 < 2 else -6),
+              "precipitation": rain_mm, "condition": "Rain" if rain_mm else "Clear"} for step in range(1, 17)]
+    return {
+        "city": "Sialkot", "country_code": "PK", "version": version,
+        "weather": {"current": {"temperature": temperature, "lat": 32.5}, "forecast": [],
+                    "timeline": ForecastTimeline.from_forecast(slots, now=now)},
+        "watering": {"temperature": temperature, "recent_rain": False, "recent_rain_mm": 0,
+                     "rain_expected": rain_mm > 0, "heat_degree_hours": 0, "et0_mm_per_day": None},
+        "sun": {"Other": {"sun_hours": 4}}, "temperature": temperature, "temp_status": "Comfortable", "outdoor_alert": None
+    }
+
+def watered(days_ago, now=None, **fields):
+    moment = (now or datetime.now()) - timedelta(days=days_ago)
+    return {"name": "Rose", "placement": "Indoor Window", "watering_interval_days": 2,
+            "last_watered": moment.isoformat(), **fields}
+
+def test_unknown_waterings_have_no_prediction():
+    never, broken = {"id": 1, "name": "Fern"}, {"id": 2, "name": "Fern", "last_watered": "last week"}
+    assert SoilModel().predict("alice", [never, broken], digest()) == [None, None]
+
+def test_depletion_grows_from_the_last_watering():
+    fresh, dry = SoilModel().predict("alice", [{"id": 1, **watered(0)}, {"id": 2, **watered(10)}], digest())
+    assert fresh["moisture"] == 1.0 and fresh["next_water_at"] > datetime.now()
+    assert dry["moisture"] == 0 and dry["depletion_mm"] >= dry["threshold_mm"]
+    assert dry["next_water_at"] <= datetime.now()
+
+def test_longer_intervals_dry_later():
+    short, long = SoilModel().predict(
+        "alice", [{"id": 1, **watered(1)}, {"id": 2, **watered(1)}], digest(), learned_intervals=[None, 6])
+    assert long["next_water_at"] > short["next_water_at"] and long["threshold_mm"] == pytest.approx(3 * short["threshold_mm"])
+
+def test_only_open_placements_catch_forecast_rain():
+    plants = [{"id": 1, **watered(1, placement="Open Roof")}, {"id": 2, **watered(1, placement="Indoor Window")}]
+    roof, indoor = SoilModel().predict("alice", plants, digest(rain_mm=3))
+    assert roof["rain_capture"] == 1.0 and indoor["rain_capture"] == 0.0
+    assert roof["next_water_at"] > indoor["next_water_at"]
+
+def test_incremental_state_matches_a_fresh_replay():
+    start = datetime.now() - timedelta(hours=6)
+    plant = {"id": 1, **watered(1, now=start, placement="Balcony")}
+    model = SoilModel()
+    model.predict("alice", [plant], digest(now=start, version="a"), now=start)
+    later = datetime.now()
+    incremental = model.predict("alice", [plant], digest(now=later, version="b"), now=later)[0]
+    fresh = SoilModel().predict("alice", [plant], digest(now=later, version="b"), now=later)[0]
+    assert incremental["depletion_mm"] == pytest.approx(fresh["depletion_mm"], abs=0.05)
+
+def test_a_new_watering_restarts_the_balance():
+    model = SoilModel()
+    plant = {"id": 1, **watered(10)}
+    assert model.predict("alice", [plant], digest())[0]["moisture"] == 0
+    assert model.predict("alice", [{**plant, **watered(0)}], digest())[0]["moisture"] == 1.0
+
+def test_due_times_follow_the_soil_and_match_the_cards():
+    data_manager = DataManager("alice")
+    data_manager.add_plants([
+        {"name": "Never Watered"},
+        {**watered(3), "name": "Dry Fern"},
+        {**watered(10, placement="Open Roof"), "name": "Roof Mint"},  # Dry, but the rain on its way will water it
+        {**watered(0, watering_interval_days=7), "name": "Fresh Basil"},
+    ])
+    rainy = digest(rain_mm=3)
+    plants = data_manager.get_all_plants()
+    soil = soil_predictions(SoilModel(), data_manager, plants, rainy)
+    due_times = watering_due_times(soil, rainy)
+    assert due_times[1] == float("-inf") and datetime.fromtimestamp(due_times[2]) <= datetime.now()
+    assert datetime.now() < datetime.fromtimestamp(due_times[3]) <= datetime.now() + timedelta(hours=24)
+
+    def names(due_times, **filters):
+        return [p["name"] for p in data_manager.query_plants(due_times=due_times, **filters)["plants"]]
+
+    assert names(due_times, sort_by="Most urgent") == ["Never Watered", "Dry Fern", "Roof Mint", "Fresh Basil"]
+    assert names(due_times, sort_by="Name", urgency="Needs Water") == ["Dry Fern", "Never Watered"]
+    assert names(due_times, sort_by="Name", urgency="Water Soon") == ["Roof Mint"]
+    assert data_manager.get_garden_summary(due_times)["needs_water"] == 2
+    # The interval-based index alone knows nothing about the rain
+    assert "Roof Mint" in names(None, sort_by="Name", urgency="Needs Water")
+    assert data_manager.get_garden_summary()["needs_water"] == 3
+
+    # Every card tells the same story as the filter it is listed under
+    needing_water = names(due_times, sort_by="Name", urgency="Needs Water")
+    for plant in plants:
+        card = plant_status(plant, rainy, PlantService(), soil=soil[plant["id"]])
+        assert card["watering"]["needs_water"] == (plant["name"] in needing_water)
+
+def test_garden_predictions_are_shared_until_the_plants_or_the_digest_change(monkeypatch):
+    services = GardenServices()
+    runs = []
+    original = SoilModel.predict
+    monkeypatch.setattr(SoilModel, "predict", lambda self, *args: runs.append(1) or original(self, *args))
+    data_manager = services.data_manager("alice")
+    data_manager.add_plant(watered(3))
+    dry = digest()
+    soil, due_times = services.soil_snapshot(data_manager, dry).data
+    assert services.soil_snapshot(data_manager, dry).data == (soil, due_times) and len(runs) == 1
+    assert dict(due_times) == watering_due_times(dict(soil), dry)
+    data_manager.mark_watered(1)
+    services.soil_snapshot(data_manager, dry)
+    services.soil_snapshot(data_manager, digest(version="2"))
+    assert len(runs) == 3
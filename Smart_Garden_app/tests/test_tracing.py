@@ -0,0 +1,102 @@
+"""Tracing: render sections, traced calls across threads, waterfalls and profile captures"""
+import contextvars
+import threading
+import pytest
+import config
+from utils import tracing
+from utils.tracing import exporter, section_summary, start_render, trace_methods, traced, waterfall_rows
+
+@pytest.fixture(autouse=True)
+def tracing_on(monkeypatch):
+    monkeypatch.setattr(config, "TRACING_ENABLED", True)
+    monkeypatch.setattr(config, "PROFILE_SAMPLE_RATE", 0)
+    exporter.clear()
+    yield
+    tracing.end_render()
+
+@traced("soil.load")
+def load_soil():
+    return "loam"
+
+@trace_methods("garden")
+class Garden:
+    def water(self):
+        return load_soil()
+
+    def _private(self):
+        return "untraced"
+
+def test_sections_and_traced_calls_form_a_tree():
+    render = start_render()
+    render.set_key("Dashboard")
+    render.mark("sidebar")
+    load_soil()
+    render.mark("cards")
+    render.mark("card 1", depth=2)
+    Garden().water()
+    render.end()
+
+    [trace] = exporter.traces("Dashboard")
+    rows = waterfall_rows(trace)
+    assert [(row["name"], row["depth"]) for row in rows] == [
+        ("render", 0), ("sidebar", 1), ("soil.load", 2), ("cards", 1), ("card 1", 2), ("garden.water", 3), ("soil.load", 4)]
+    assert rows[0]["attributes"] == {"page": "Dashboard"}
+    assert all(row["offset_ms"] >= 0 and row["status"] == "ok" for row in rows)
+    summary = {entry["name"]: entry for entry in section_summary([trace])}
+    assert summary["soil.load"]["calls"] == 2 and "render" not in summary
+    assert Garden()._private() == "untraced"
+
+def test_worker_threads_attach_to_the_span_that_started_them():
+    render = start_render("threads")
+    render.mark("identify")
+    context = contextvars.copy_context()
+    worker = threading.Thread(target=context.run, args=(load_soil,), name="vision-worker")
+    worker.start()
+    worker.join()
+    render.end()
+    rows = waterfall_rows(exporter.traces("threads")[0])
+    assert rows[-1]["name"] == "soil.load" and rows[-1]["depth"] == 2 and rows[-1]["thread"] == "vision-worker"
+
+def test_errors_and_interrupted_renders_are_marked():
+    @traced("flaky")
+    def flaky():
+        raise ValueError("boom")
+
+    first = start_render("page")
+    first.mark("cards")
+    with pytest.raises(ValueError):
+        flaky()
+    start_render("page").end()  # st.rerun() cut the first run short
+    older, newer = exporter.traces("page")[1], exporter.traces("page")[0]
+    assert older.root.status == "interrupted" and newer.root.status == "ok"
+    assert {span.name: span.status for span in older.snapshot()}["flaky"] == "ValueError"
+
+def test_calls_outside_a_render_are_only_traced_when_standalone():
+    assert load_soil() == "loam" and exporter.keys() == []
+
+    @traced("water_fragment", standalone=True)
+    def fragment():
+        return load_soil()
+
+    fragment()
+    [trace] = exporter.traces("fragment: water_fragment")
+    assert [row["name"] for row in waterfall_rows(trace)] == ["render", "soil.load"]
+
+def test_disabled_tracing_records_nothing(monkeypatch):
+    monkeypatch.setattr(config, "TRACING_ENABLED", False)
+    render = start_render("off")
+    render.mark("cards")
+    load_soil()
+    render.end()
+    assert exporter.keys() == []
+
+def test_sampled_renders_keep_a_profile(monkeypatch):
+    monkeypatch.setattr(config, "PROFILE_SAMPLE_RATE", 1.0)
+    render = start_render("profiled")
+    if render.profile is None:
+        pytest.skip("Another profiler is active in this process")
+    sum(range(1000))
+    render.end()
+    [capture] = exporter.profiles
+    assert capture["key"] == "profiled" and capture["stats"]
+    assert "function calls" in tracing.profile_report(capture) and tracing.profile_bytes(capture)
@@ -0,0 +1,86 @@
+"""Voice questions: WAV decoding / resampling and the bounded transcription worker pool"""
+import io
+import threading
+import time
+import wave
+import numpy as np
+from utils.transcription_service import TranscriptionEngine, TranscriptionService, prepare_audio
+
+def wav_bytes(samples, rate, channels=1, width=2):
+    buffered = io.BytesIO()
+    with wave.open(buffered, "wb") as wav:
+        wav.setnchannels(channels)
+        wav.setsampwidth(width)
+        wav.setframerate(rate)
+        wav.writeframes(samples.tobytes())
+    return buffered.getvalue()
+
+def tone(seconds, rate, frequency=440, amplitude=10000):
+    t = np.arange(int(seconds * rate)) / rate
+    return (amplitude * np.sin(2 * np.pi * frequency * t)).astype("<i2")
+
+def test_stereo_recording_is_downmixed_and_resampled():
+    left = tone(2, 44100)
+    stereo = np.stack([left, left], axis=1).reshape(-1)
+    audio = prepare_audio(wav_bytes(stereo, 44100, channels=2), target_rate=16000)
+    assert audio["sample_rate"] == 16000 and audio["duration_seconds"] == 2.0
+    assert audio["samples"].dtype == np.int16 and len(audio["samples"]) == 32000
+    assert 8000 < np.abs(audio["samples"]).max() <= 10000
+
+def test_long_recordings_are_cut_and_8_bit_is_widened():
+    audio = prepare_audio(wav_bytes(tone(3, 16000), 16000), max_seconds=1)
+    assert audio["truncated"] and audio["duration_seconds"] == 1.0
+    eight_bit = (np.full(8000, 128 + 64)).astype(np.uint8)
+    assert prepare_audio(wav_bytes(eight_bit, 8000, width=1), target_rate=8000)["samples"][0] == 64 * 256
+
+class FakeEngine(TranscriptionEngine):
+    name = "fake"
+    label = "Fake"
+
+    def __init__(self, text="water the basil", release=None):
+        self.text = text
+        self.release = release
+        self.calls = 0
+
+    def is_available(self):
+        return True
+
+    def transcribe(self, audio):
+        self.calls += 1
+        if self.release is not None:
+            self.release.wait(5)
+        return self.text
+
+def wait_for(service, job_id):
+    for _ in range(500):
+        job = service.get_job(job_id)
+        if job["status"] in ("done", "failed"):
+            return job
+        time.sleep(0.01)
+    raise AssertionError("transcription did not finish")
+
+def test_same_recording_is_transcribed_once():
+    engine = FakeEngine()
+    service = TranscriptionService([engine], max_workers=1, max_pending=2)
+    recording = wav_bytes(tone(1, 16000), 16000)
+    job = service.submit(recording)
+    assert job["engine"] == "fake" and job["status"] in ("queued", "running", "done")
+    done = wait_for(service, job["id"])
+    assert done["text"] == "water the basil" and done["duration_seconds"] == 1.0
+    assert service.submit(recording)["status"] == "done" and engine.calls == 1
+
+def test_jobs_past_the_pending_limit_are_refused():
+    release = threading.Event()
+    service = TranscriptionService([FakeEngine(release=release)], max_workers=1, max_pending=1)
+    first = service.submit(wav_bytes(tone(1, 16000), 16000))
+    refused = service.submit(wav_bytes(tone(1, 16000, frequency=880), 16000))
+    release.set()
+    assert refused["status"] == "failed" and "Too many" in refused["error"]
+    assert service.get_job(refused["id"]) is None
+    assert wait_for(service, first["id"])["status"] == "done"
+
+def test_silence_and_broken_audio_fail_cleanly():
+    service = TranscriptionService([FakeEngine(text=None)], max_workers=1)
+    assert wait_for(service, service.submit(wav_bytes(tone(1, 16000), 16000))["id"])["error"] == "Could not understand audio."
+    broken = wait_for(service, service.submit(b"not a wav file")["id"])
+    assert broken["status"] == "failed" and broken["error"].startswith("Error processing audio")
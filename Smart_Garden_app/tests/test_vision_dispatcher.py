@@ -0,0 +1,63 @@
+"""VisionDispatcher: provider order, hedging a slow or failing primary, and the fallback result"""
+import threading
+import time
+import pytest
+from utils.vision_dispatcher import LatencyTracker, VisionDispatcher, is_valid_identification
+
+def provider(name, delay=0.0, valid=True, release=None):
+    def identify(image_bytes, *args):
+        if release is not None:
+            release.wait(5)
+        time.sleep(delay)
+        if isinstance(valid, Exception):
+            raise valid
+        return {"plant_name": f"Rose from {name}" if valid else "Unknown Plant", "confidence": "high", "args": args}
+    return identify
+
+def test_fast_primary_is_not_hedged():
+    dispatcher = VisionDispatcher({"A": provider("A"), "B": provider("B")}, is_valid_identification, hedge_after_seconds=1)
+    result = dispatcher.dispatch(b"image", "extra")
+    assert (result["provider"], result["hedged"], result["args"]) == ("A", False, ("extra",))
+    assert dispatcher.trackers["B"].snapshot()["samples"] == 0
+
+def test_slow_primary_is_raced_by_the_secondary():
+    release = threading.Event()
+    dispatcher = VisionDispatcher(
+        {"A": provider("A", release=release), "B": provider("B")}, is_valid_identification, hedge_after_seconds=0.05
+    )
+    try:
+        result = dispatcher.dispatch(b"image")
+    finally:
+        release.set()
+    assert result["provider"] == "B" and result["hedged"] and result["plant_name"] == "Rose from B"
+
+def test_failing_primary_falls_through_without_waiting():
+    dispatcher = VisionDispatcher(
+        {"A": provider("A", valid=RuntimeError("down")), "B": provider("B")}, is_valid_identification, hedge_after_seconds=5
+    )
+    started = time.perf_counter()
+    result = dispatcher.dispatch(b"image")
+    assert result["provider"] == "B" and time.perf_counter() - started < 1
+
+def test_no_valid_answer_returns_the_primarys_result():
+    dispatcher = VisionDispatcher(
+        {"A": provider("A", valid=False), "B": provider("B", valid=False)}, is_valid_identification, hedge_after_seconds=0.05
+    )
+    result = dispatcher.dispatch(b"image")
+    assert result["provider"] == "A" and result["plant_name"] == "Unknown Plant" and result["hedged"]
+
+def test_unhealthy_or_slower_providers_move_back():
+    dispatcher = VisionDispatcher({"A": provider("A"), "B": provider("B")}, is_valid_identification)
+    assert dispatcher.provider_order() == ["A", "B"]
+    for _ in range(3):
+        dispatcher.trackers["A"].record(0.1, False)
+        dispatcher.trackers["B"].record(0.5, True)
+    assert dispatcher.provider_order() == ["B", "A"]
+
+def test_latency_percentiles():
+    tracker = LatencyTracker()
+    for seconds in (0.1, 0.2, 0.3, 0.4, 1.0):
+        tracker.record(seconds, True)
+    tracker.record(9.0, False)  # Failures do not count as latency samples
+    assert tracker.percentile(50) == 0.3 and tracker.percentile(95) == 1.0
+    assert tracker.failure_rate() == pytest.approx(1 / 6)
@@ -0,0 +1,78 @@
+"""WateringLog: append-only binary events, range queries, learned intervals and compaction"""
+import os
+import struct
+import pytest
+from datetime import datetime, timedelta
+from utils.watering_log import HEADER_SIZE, RECORD_FORMAT, RECORD_SIZE, WateringLog
+
+START = datetime(2026, 5, 1, 8, 0)
+
+def test_events_are_kept_sorted_per_plant():
+    log = WateringLog("log.bin")
+    for days in (4, 0, 2):
+        log.append(1, START + timedelta(days=days))
+    log.append(2, START)
+    assert log.get_events(1) == [START, START + timedelta(days=2), START + timedelta(days=4)]
+    assert log.get_events(1, START + timedelta(days=1), START + timedelta(days=3)) == [START + timedelta(days=2)]
+    assert log.count_events(1, start=START + timedelta(days=2)) == 2
+    assert log.last_events(1, 2) == [START + timedelta(days=2), START + timedelta(days=4)]
+    assert os.path.getsize("log.bin") == HEADER_SIZE + 4 * RECORD_SIZE
+
+def test_median_interval_needs_enough_history_and_ignores_double_clicks():
+    log = WateringLog("log.bin")
+    log.append(1, START)
+    log.append(1, START + timedelta(days=2))
+    log.append(1, START + timedelta(days=2, minutes=5))  # Double click: not an interval
+    assert log.median_interval_days(1) is None
+    log.append(1, START + timedelta(days=5))
+    log.append(1, START + timedelta(days=8))
+    assert log.get_intervals(1) == pytest.approx([2, 3 - 5 / 1440, 3])
+    assert log.median_interval_days(1) == pytest.approx(3 - 5 / 1440)
+
+def test_other_instances_see_appended_events():
+    writer, reader = WateringLog("log.bin"), WateringLog("log.bin")
+    writer.append(1, START)
+    assert reader.get_events(1) == [START]
+    writer.append(1, START + timedelta(days=1))
+    assert reader.count_events(1) == 2
+
+def test_deleting_a_plant_compacts_the_file():
+    log = WateringLog("log.bin")
+    log.append(1, START)
+    log.append(2, START)
+    log.append(1, START + timedelta(days=1))
+    other = WateringLog("log.bin")
+    assert other.count_events(1) == 2
+    log.delete_plant(1)
+    assert os.path.getsize("log.bin") == HEADER_SIZE + RECORD_SIZE
+    assert other.get_events(1) == [] and other.get_events(2) == [START]
+
+def test_partial_trailing_record_is_ignored():
+    log = WateringLog("log.bin")
+    log.append(1, START)
+    with open("log.bin", "ab") as f:
+        f.write(b"\x00" * (RECORD_SIZE // 2))
+    assert WateringLog("log.bin").get_events(1) == [START]
+
+def test_compaction_is_noticed_after_appends_regrow_the_file():
+    log = WateringLog("log.bin")
+    for days in range(3):
+        log.append(1, START + timedelta(days=days))
+    log.append(2, START)
+    other = WateringLog("log.bin")
+    assert other.count_events(1) == 3
+    # Compact down to one record, then append past the size the other reader had loaded
+    log.delete_plant(1)
+    for days in range(4):
+        log.append(3, START + timedelta(days=days))
+    assert os.path.getsize("log.bin") > HEADER_SIZE + 4 * RECORD_SIZE
+    assert other.get_events(1) == [] and other.get_events(2) == [START] and other.count_events(3) == 4
+
+def test_logs_without_a_header_are_still_read_and_appended_to():
+    with open("log.bin", "wb") as f:
+        f.write(struct.pack(RECORD_FORMAT, 1, START.timestamp()))
+    log = WateringLog("log.bin")
+    log.append(1, START + timedelta(days=1))
+    assert WateringLog("log.bin").get_events(1) == [START, START + timedelta(days=1)]
+    log.delete_plant(2)  # Nothing to drop: left as it is
+    assert os.path.getsize("log.bin") == 2 * RECORD_SIZE
@@ -0,0 +1,114 @@
+"""
+Alert Messages Module
+Shared helpers for generating many weather alert messages in a single LLM call
+Builds one structured prompt for all (alert_type, plant) pairs and parses the JSON list back
+"""
+import json
+import re
+
+# Alert types the LLM prompt knows how to phrase
+SUPPORTED_ALERT_TYPES = {
+    "rain": "Rain is expected soon. Tell the user to move the outdoor plant to shelter. Warm and conversational.",
+    "storm": "Severe weather (thunderstorm/hail) is expected. Tell the user to immediately move the outdoor plant indoors. Direct but not alarming.",
+    "heat": "Very hot weather and intense sun. Remind the user to check if the plant needs extra water or shade. Helpful and caring."
+}
+
+def weather_bucket(weather_data):
+    """
+    Coarse weather key so near-identical conditions share cached messages
+    Returns: (city, temperature rounded to 5°C, description)
+    """
+    temperature = weather_data.get('temperature')
+    temperature_bucket = int(round(float(temperature) / 5) * 5) if temperature is not None else None
+    return (
+        str(weather_data.get('city', '')).lower(),
+        temperature_bucket,
+        str(weather_data.get('description', '')).lower()
+    )
+
+def build_batch_alert_prompt(alerts, weather_data):
+    """
+    Build one prompt asking for a message per (alert_type, plant_name) pair
+    Returns: prompt text
+    """
+    lines = []
+    for index, (alert_type, plant_name) in enumerate(alerts):
+        lines.append(f'{index}. type="{alert_type}", plant="{plant_name}" - {SUPPORTED_ALERT_TYPES[alert_type]}')
+
+    return f"""Generate friendly, helpful alert messages for a garden app user.
+
+Location: {weather_data.get('city', 'your area')}
+Weather: {weather_data.get('description', 'changing conditions')}, {weather_data.get('temperature', 'unknown')}°C
+
+Write one short message (2-3 sentences) for each numbered item below, addressed to the user about that plant:
+{chr(10).join(lines)}
+
+Respond with ONLY a JSON array of {len(alerts)} objects in the same order, like:
+[{{"index": 0, "message": "..."}}, {{"index": 1, "message": "..."}}]"""
+
+def parse_batch_alert_response(text, count):
+    """
+    Parse the JSON list of messages from the LLM response
+    Returns: list of length `count` with a message or None for each item
+    """
+    messages = [None] * count
+    if not text:
+        return messages
+    match = re.search(r"\[.*\]", text, re.DOTALL)
+    if not match:
+        return messages
+    try:
+        items = json.loads(match.group(0))
+    except (ValueError, TypeError):
+        return messages
+    if not isinstance(items, list):
+        return messages
+
+    for position, item in enumerate(items):
+        if isinstance(item, dict):
+            index = item.get("index", position)
+            message = item.get("message")
+        else:
+            index, message = position, item
+        if isinstance(index, int) and 0 <= index < count and isinstance(message, str) and message.strip():
+            messages[index] = message.strip()
+    return messages
+
+def generate_alert_batch(alerts, weather_data, cache, complete, get_default):
+    """
+    Produce messages for many (alert_type, plant_name) pairs with at most one LLM call
+    cache: TTLCache keyed by (alert_type, plant_name, weather bucket)
+    complete: callable(prompt, max_tokens) -> response text, or None when no LLM is available
+    get_default: callable(alert_type, plant_name, weather_data) -> fallback message
+    Returns: list of messages in the same order as `alerts`
+    """
+    bucket = weather_bucket(weather_data)
+    results = [None] * len(alerts)
+
+    # Serve cached messages; collect the distinct pairs that still need the LLM
+    pending = {}
+    for index, (alert_type, plant_name) in enumerate(alerts):
+        cached = cache.get((alert_type, plant_name, bucket))
+        if cached is not None:
+            results[index] = cached
+        elif alert_type in SUPPORTED_ALERT_TYPES:
+            pending.setdefault((alert_type, plant_name), []).append(index)
+
+    if pending and complete is not None:
+        pairs = list(pending)
+        try:
+            response_text = complete(build_batch_alert_prompt(pairs, weather_data), min(4000, 100 * len(pairs) + 100))
+        except Exception as e:
+            print(f"Batch alert generation error: {e}")
+            response_text = None
+        for pair, message in zip(pairs, parse_batch_alert_response(response_text, len(pairs))):
+            if message:
+                cache.set((pair[0], pair[1], bucket), message)
+                for index in pending[pair]:
+                    results[index] = message
+
+    # Anything not generated (parse failure, no LLM, unknown type) gets the default text
+    for index, (alert_type, plant_name) in enumerate(alerts):
+        if results[index] is None:
+            results[index] = get_default(alert_type, plant_name, weather_data)
+    return results
@@ -0,0 +1,157 @@
+"""
+Chat Context Module
+Builds AI Botanist prompts with multi-turn memory under a strict token budget
+Recent turns are sent verbatim, older turns as a running summary, plants only when relevant
+"""
+import math
+import re
+import config
+
+_TOKEN_PATTERN = re.compile(r"\w+|[^\w\s]")
+
+def count_tokens(text):
+    """
+    Estimate the token count of a text locally (no tokenizer download)
+    Words count as one token per ~4 characters, punctuation as one token each
+    """
+    if not text:
+        return 0
+    return sum(max(1, math.ceil(len(piece) / 4)) for piece in _TOKEN_PATTERN.findall(str(text)))
+
+def truncate_to_tokens(text, max_tokens):
+    """Cut a text down to at most max_tokens (keeps whole words)"""
+    if count_tokens(text) <= max_tokens:
+        return text
+    kept, used = [], 0
+    for word in str(text).split():
+        cost = count_tokens(word)
+        if used + cost > max_tokens - 1:
+            break
+        kept.append(word)
+        used += cost
+    return " ".join(kept) + "…"
+
+def _first_sentence(text):
+    """First sentence of a text, without markdown emphasis"""
+    text = str(text).replace("**", "").replace("\n", " ").strip()
+    match = re.search(r"[.!?](\s|$)", text)
+    return text[:match.end()].strip() if match else text
+
+class ConversationContext:
+    def __init__(self, max_prompt_tokens=None, max_recent_turns=None, max_summary_tokens=None):
+        self.max_prompt_tokens = max_prompt_tokens or config.CHAT_CONTEXT_MAX_TOKENS
+        self.max_recent_turns = max_recent_turns or config.CHAT_RECENT_TURNS
+        self.max_summary_tokens = max_summary_tokens or config.CHAT_SUMMARY_MAX_TOKENS
+        # Running summary: one line per turn, computed once per turn and reused
+        self._summary_lines = {}
+
+    def _summarize_turn(self, turn):
+        """One short line per past turn (memoized by timestamp + question)"""
+        key = (turn.get("timestamp"), turn.get("user_message"))
+        line = self._summary_lines.get(key)
+        if line is None:
+            question = truncate_to_tokens(turn.get("user_message", ""), 20)
+            answer = truncate_to_tokens(_first_sentence(turn.get("bot_response", "")), 30)
+            line = f"- User asked: {question} → Botanist: {answer}"
+            if len(self._summary_lines) > 1000:
+                self._summary_lines.clear()
+            self._summary_lines[key] = line
+        return line
+
+    def _relevant_plants(self, plants, user_message, recent_turns):
+        """
+        Pick the plant records the conversation is about
+        Returns: (detailed records text, names-only text)
+        """
+        if not plants:
+            return "", ""
+        recent_text = " ".join([user_message] + [t.get("user_message", "") for t in recent_turns[-2:]]).lower()
+        detailed = []
+        for plant in plants:
+            name = str(plant.get("name", "")).strip()
+            if name and name.lower() in recent_text:
+                detailed.append(
+                    f"- {name}: placement {plant.get('placement', 'Unknown')}, "
+                    f"sun {plant.get('sun_preference', 'Unknown')}, "
+                    f"water every {plant.get('watering_interval_days', 3)} days, "
+                    f"last watered {plant.get('last_watered') or 'not recorded'}"
+                )
+        names = ", ".join(str(p.get("name", "")) for p in plants)
+        return "\n".join(detailed), f"User's plants: {names}"
+
+    def build_messages(self, system_prompt, user_message, history=None, plants=None):
+        """
+        Build the chat messages for one request within the token budget
+        history: past turns as stored by DataManager (oldest first)
+        plants: the user's plant records
+        Returns: (messages list, dict with token usage per section)
+        """
+        history = list(history or [])
+        budget = self.max_prompt_tokens
+        # Instructions + caller context and the question get a third each, so memory always has room
+        system_prompt = truncate_to_tokens(system_prompt, budget // 3)
+        user_message = truncate_to_tokens(user_message, budget // 3)
+        used = count_tokens(system_prompt) + count_tokens(user_message)
+
+        recent_turns = history[-self.max_recent_turns:] if self.max_recent_turns else []
+        older_turns = history[:len(history) - len(recent_turns)]
+
+        # Plant records: full details for plants being discussed, names for the rest
+        plant_details, plant_names = self._relevant_plants(plants, user_message, recent_turns)
+        plant_block = ""
+        candidates = [plant_names]
+        if plant_details:
+            candidates.insert(0, f"{plant_names}\nPlants being discussed:\n{plant_details}")
+        for candidate in candidates:
+            if used + count_tokens(candidate) <= budget:
+                plant_block = candidate
+                break
+        used += count_tokens(plant_block)
+
+        # Recent turns verbatim, newest first until the budget is reached
+        turn_messages = []
+        kept_turns = 0
+        for turn in reversed(recent_turns):
+            pair = [
+                {"role": "user", "content": turn.get("user_message", "")},
+                {"role": "assistant", "content": turn.get("bot_response", "")}
+            ]
+            cost = sum(count_tokens(m["content"]) for m in pair)
+            if used + cost > budget:
+                # Older recent turns that do not fit go to the summary instead
+                older_turns = history[:len(history) - kept_turns]
+                break
+            turn_messages = pair + turn_messages
+            used += cost
+            kept_turns += 1
+
+        # Running summary of older turns, newest lines kept first
+        summary_header = "Earlier in this conversation:"
+        summary_lines = []
+        summary_budget = min(self.max_summary_tokens, budget - used - count_tokens(summary_header))
+        summary_used = 0
+        for turn in reversed(older_turns):
+            line = self._summarize_turn(turn)
+            cost = count_tokens(line)
+            if summary_used + cost > summary_budget:
+                break
+            summary_lines.insert(0, line)
+            summary_used += cost
+
+        system_content = system_prompt
+        if plant_block:
+            system_content += f"\n\n{plant_block}"
+        if summary_lines:
+            system_content += f"\n\n{summary_header}\n" + "\n".join(summary_lines)
+
+        messages = [{"role": "system", "content": system_content}]
+        messages.extend(turn_messages)
+        messages.append({"role": "user", "content": user_message})
+
+        return messages, {
+            "prompt_tokens": sum(count_tokens(m["content"]) for m in messages),
+            "budget": budget,
+            "recent_turns": kept_turns,
+            "summarized_turns": len(summary_lines),
+            "plant_tokens": count_tokens(plant_block)
+        }
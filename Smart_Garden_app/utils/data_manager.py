@@ -2,36 +2,218 @@
 Data Manager Module
 Handles storage and retrieval of plant data and chat history
 Uses JSON files for simplicity (can be upgraded to SQLite later)
+Each user gets an isolated namespace: data/users/<shard>/<user_id>/
 """
+import bisect
+import hashlib
 import json
 import os
-from datetime import datetime
-from config import PLANTS_DB_FILE, CHAT_HISTORY_FILE
+import re
+import secrets
+import threading
+import uuid
+from collections import Counter
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+from config import PLANTS_DB_FILE, CHAT_HISTORY_FILE, WATERING_LOG_FILE, USER_DATA_DIR, USER_SHARD_WIDTH, PLANT_PAGE_SIZE
+from utils.watering_log import WateringLog
+from utils.keyword_matcher import keyword_matcher
+from utils.shared_store import file_version
+from utils.tracing import trace_methods
+
+# Optional: cross-process file locks (Streamlit and API worker processes write the same namespaces)
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
 
 # User profile file
 USER_PROFILE_FILE = "data/user_profile.json"
+USER_PROFILE_NAME = "user_profile.json"
+LEGACY_USER_ID = "local"  # Owner of pre-namespace data in earlier releases (rekeyed to a random id at startup)
+LOCK_FILE_NAME = ".lock"  # Per-namespace file taken with flock around every write
+
+# Dashboard grid options (server-side sort / filter)
+PLANT_SORT_OPTIONS = ["Most urgent", "Name", "Recently added", "Placement"]
+PLANT_URGENCY_LEVELS = ["Needs Water", "Water Soon", "Well Watered"]
+
+_USER_ID_PATTERN = re.compile(r'^[a-z0-9][a-z0-9_-]{0,63}$')
+_ISSUED_USER_ID_PATTERN = re.compile(r'^(u-[0-9a-f]{32}|guest-[0-9a-f]{16})$')
+_EMAIL_USER_ID_PATTERN = re.compile(r'^u-[0-9a-f]{24}$')  # Earlier releases keyed namespaces by a hash of the email
+
+def new_user_id():
+    """
+    Issue a random id for a registered user's namespace
+    The id is the key to the garden (it is kept in the URL), so it must not be derivable from anything
+    """
+    return f"u-{secrets.token_hex(16)}"
+
+def new_guest_id():
+    """Create a user id for a visitor who has not filled in the profile yet"""
+    return f"guest-{uuid.uuid4().hex[:16]}"
+
+def is_valid_user_id(user_id):
+    """Check that a user id is safe to use as a directory name"""
+    return bool(user_id) and bool(_USER_ID_PATTERN.match(str(user_id)))
+
+def is_issued_user_id(user_id):
+    """Check that a user id is one new_user_id / new_guest_id handed out (the only ids a URL may open)"""
+    return bool(user_id) and bool(_ISSUED_USER_ID_PATTERN.match(str(user_id)))
+
+def is_legacy_user_id(user_id):
+    """Check for an id of earlier releases that anyone can derive (LEGACY_USER_ID or an email hash)"""
+    return user_id == LEGACY_USER_ID or bool(_EMAIL_USER_ID_PATTERN.match(str(user_id or "")))
+
+def get_user_data_dir(user_id):
+    """
+    Get the storage directory for a user
+    Users are spread over hash-prefix shard directories so no single
+    directory grows with the number of users
+    """
+    if not is_valid_user_id(user_id):
+        raise ValueError(f"Invalid user id: {user_id!r}")
+    shard = hashlib.sha1(user_id.encode('utf-8')).hexdigest()[:USER_SHARD_WIDTH]
+    return os.path.join(USER_DATA_DIR, shard, user_id)
+
+def move_user_data(from_user_id, to_user_id):
+    """
+    Move a user's namespace to a new id (e.g. guest -> registered user)
+    Only moves when the target namespace does not exist yet
+    Returns: True if data was moved
+    """
+    if from_user_id == to_user_id:
+        return False
+    source = get_user_data_dir(from_user_id)
+    target = get_user_data_dir(to_user_id)
+    if not os.path.isdir(source) or os.path.exists(target):
+        return False
+    try:
+        os.makedirs(os.path.dirname(target), exist_ok=True)
+        os.replace(source, target)
+        return True
+    except Exception as e:
+        print(f"Error moving user data: {e}")
+        return False
+
+def rekey_legacy_namespaces():
+    """
+    Move the namespaces of earlier releases (LEGACY_USER_ID and email-hash ids) to random ids, once
+    Anyone could derive those ids, so their gardens must not stay reachable under them
+    The new ids are printed for the operator to hand to their owners
+    Returns: dict old user id -> new user id
+    """
+    if not os.path.isdir(USER_DATA_DIR):
+        return {}
+    legacy_ids = []
+    for shard in os.scandir(USER_DATA_DIR):
+        if shard.is_dir():
+            legacy_ids.extend(entry.name for entry in os.scandir(shard.path) if entry.is_dir() and is_legacy_user_id(entry.name))
+    moved = {}
+    for user_id in legacy_ids:
+        new_id = new_user_id()
+        if move_user_data(user_id, new_id):
+            moved[user_id] = new_id
+            print(f"Moved user {user_id} to a private namespace: open the app with ?uid={new_id}")
+    return moved
+
+def migrate_legacy_data():
+    """
+    Move the shared files of the single-user layout (plants, chat, profile, watering log in the working
+    directory) into a new private namespace, once: moved files are gone, so later runs find nothing
+    The new id is printed for the operator (the email in the profile is just a profile field)
+    Returns: the user id the data was moved to, or None if there was nothing to move
+    """
+    legacy = DataManager()
+    if not legacy.get_all_plants() and not legacy.get_chat_history(limit=None):
+        return None
+    user_id = new_user_id()
+    target = DataManager(user_id)
+    moves = [
+        (legacy.plants_file, target.plants_file),
+        (legacy.chat_file, target.chat_file),
+        (legacy.user_file, target.user_file),
+        (legacy.watering_log.log_file, target.watering_log.log_file)
+    ]
+    moved = 0
+    for source, destination in moves:
+        if not os.path.exists(source):
+            continue
+        try:
+            os.makedirs(target.data_dir, exist_ok=True)
+            os.replace(source, destination)
+            moved += 1
+        except Exception as e:
+            print(f"Error migrating {source}: {e}")
+    if not moved:
+        return None
+    print(f"Moved {moved} legacy data file(s) to a private namespace: open the app with ?uid={user_id}")
+    return user_id
 
+@trace_methods("data")
 class DataManager:
-    def __init__(self):
-        self.plants_file = PLANTS_DB_FILE
-        self.chat_file = CHAT_HISTORY_FILE
-        self.user_file = USER_PROFILE_FILE
-        self._ensure_files_exist()
-    
-    def _ensure_files_exist(self):
-        """Create JSON files if they don't exist"""
-        if not os.path.exists(self.plants_file):
-            self._save_plants([])
-        if not os.path.exists(self.chat_file):
-            self._save_chat_history([])
-        if not os.path.exists(self.user_file):
-            self._save_user_profile({})
+    def __init__(self, user_id=None):
+        """
+        user_id: namespace to read and write (None uses the legacy shared files)
+        """
+        self.user_id = user_id
+        if user_id:
+            self.data_dir = get_user_data_dir(user_id)
+            self.plants_file = os.path.join(self.data_dir, PLANTS_DB_FILE)
+            self.chat_file = os.path.join(self.data_dir, CHAT_HISTORY_FILE)
+            self.user_file = os.path.join(self.data_dir, USER_PROFILE_NAME)
+        else:
+            self.data_dir = ""
+            self.plants_file = PLANTS_DB_FILE
+            self.chat_file = CHAT_HISTORY_FILE
+            self.user_file = USER_PROFILE_FILE
+        self.watering_log = WateringLog(os.path.join(self.data_dir, WATERING_LOG_FILE))
+        self.lock_file = os.path.join(self.data_dir or os.path.dirname(USER_PROFILE_FILE), LOCK_FILE_NAME)
+        # Serializes read-modify-write cycles within this user's namespace only
+        self._lock = threading.RLock()
+        self._lock_depth = 0
+        self._lock_handle = None
+        # Garden index: compact per-plant rows for sort/filter + aggregates, rebuilt on every save
+        self._index = None
+        self._index_version = None
+        # Nothing is created on disk here: the namespace directory appears with the first write,
+        # so visitors who never save anything leave no files behind (missing files read as empty)
+    
+    @contextmanager
+    def _locked(self):
+        """
+        Hold the namespace's write lock: the thread lock, plus an exclusive flock on the namespace's
+        lock file so writes from other processes (API workers, the Streamlit app) wait their turn
+        Re-entrant within a thread (mark_watered -> update_plant)
+        """
+        with self._lock:
+            if self._lock_depth == 0 and fcntl is not None:
+                os.makedirs(os.path.dirname(self.lock_file), exist_ok=True)
+                self._lock_handle = open(self.lock_file, 'a')
+                fcntl.flock(self._lock_handle.fileno(), fcntl.LOCK_EX)
+            self._lock_depth += 1
+            try:
+                yield
+            finally:
+                self._lock_depth -= 1
+                if self._lock_depth == 0 and self._lock_handle is not None:
+                    self._lock_handle.close()  # Closing the file releases the flock
+                    self._lock_handle = None
+    
+    def _write_json(self, path, data):
+        """Write JSON atomically (temp file + rename) so readers never see a partial file"""
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(data, f, indent=2, default=str)
+        os.replace(tmp_path, path)
     
     def _save_plants(self, plants):
         """Save plants list to JSON file"""
         try:
-            with open(self.plants_file, 'w', encoding='utf-8') as f:
-                json.dump(plants, f, indent=2, default=str)
+            self._write_json(self.plants_file, plants)
+            self._build_index(plants)
         except Exception as e:
             print(f"Error saving plants: {e}")
     
@@ -40,22 +222,55 @@ class DataManager:
         try:
             with open(self.plants_file, 'r', encoding='utf-8') as f:
                 return json.load(f)
+        except FileNotFoundError:
+            return []
         except Exception as e:
             print(f"Error loading plants: {e}")
             return []
     
-    def add_plant(self, plant_data):
+    def add_plant(self, plant_data, max_total=None):
         """
         Add a new plant to the database
         plant_data should include: name, location, placement, sun_preference, etc.
+        max_total: garden size limit, checked under the lock (concurrent adds cannot both pass it)
+        Raises ValueError (nothing is written) if the garden is full
         """
-        plants = self._load_plants()
-        
-        # Generate unique ID
-        new_id = max([p.get('id', 0) for p in plants] + [0]) + 1
-        
-        plant = {
-            "id": new_id,
+        with self._locked():
+            plants = self._load_plants()
+            if max_total is not None and len(plants) >= max_total:
+                raise ValueError(f"Your garden is full ({max_total} plants). Remove a plant to add a new one.")
+            
+            # Generate unique ID
+            new_id = max([p.get('id', 0) for p in plants] + [0]) + 1
+            
+            plant = self._new_plant(new_id, plant_data)
+            plants.append(plant)
+            self._save_plants(plants)
+            return plant
+    
+    def add_plants(self, plants_data, max_total=None):
+        """
+        Add many plants with one database write (bulk import)
+        max_total: garden size limit, checked under the lock
+        Returns: the stored plant records, with consecutive new ids
+        Raises ValueError (nothing is written) if the plants do not fit
+        """
+        with self._locked():
+            plants = self._load_plants()
+            if max_total is not None and len(plants) + len(plants_data) > max_total:
+                raise ValueError(f"Only {max(0, max_total - len(plants))} more plants fit in your garden ({max_total} max)")
+            next_id = max([p.get('id', 0) for p in plants] + [0]) + 1
+            added = [self._new_plant(next_id + i, plant_data) for i, plant_data in enumerate(plants_data)]
+            if added:
+                plants.extend(added)
+                self._save_plants(plants)
+            return added
+    
+    @staticmethod
+    def _new_plant(plant_id, plant_data):
+        """Stored plant record with defaults for missing fields"""
+        return {
+            "id": plant_id,
             "name": plant_data.get("name", "Unknown Plant"),
             "scientific_name": plant_data.get("scientific_name", ""),
             "description": plant_data.get("description", ""),
@@ -66,18 +281,23 @@ class DataManager:
             "watering_interval_days": plant_data.get("watering_interval_days", 3),
             "last_watered": plant_data.get("last_watered", None),
             "image_path": plant_data.get("image_path", ""),
+            "image_hash": plant_data.get("image_hash", ""),  # Key into the ImageStore
             "added_date": datetime.now().isoformat(),
             "notes": plant_data.get("notes", "")
         }
-        
-        plants.append(plant)
-        self._save_plants(plants)
-        return plant
     
     def get_all_plants(self):
         """Get all plants from database"""
         return self._load_plants()
     
+    def plants_version(self):
+        """Version stamp of the plant database (changes on every save, also by other processes)"""
+        return file_version(self.plants_file)
+    
+    def chat_version(self):
+        """Version stamp of the chat history"""
+        return file_version(self.chat_file)
+    
     def get_plant(self, plant_id):
         """Get a specific plant by ID"""
         plants = self._load_plants()
@@ -88,32 +308,181 @@ class DataManager:
     
     def update_plant(self, plant_id, updates):
         """Update plant information"""
-        plants = self._load_plants()
-        for i, plant in enumerate(plants):
-            if plant.get('id') == plant_id:
-                plants[i].update(updates)
-                self._save_plants(plants)
-                return plants[i]
-        return None
+        with self._locked():
+            plants = self._load_plants()
+            for i, plant in enumerate(plants):
+                if plant.get('id') == plant_id:
+                    plants[i].update(updates)
+                    self._save_plants(plants)
+                    return plants[i]
+            return None
     
     def delete_plant(self, plant_id):
         """Delete a plant from database"""
-        plants = self._load_plants()
-        plants = [p for p in plants if p.get('id') != plant_id]
-        self._save_plants(plants)
-        return True
+        with self._locked():
+            plants = self._load_plants()
+            plants = [p for p in plants if p.get('id') != plant_id]
+            self._save_plants(plants)
+            # Plant ids can be reused, so the history must go with the plant
+            self.watering_log.delete_plant(plant_id)
+            return True
     
     def mark_watered(self, plant_id):
-        """Mark plant as watered (update last_watered timestamp)"""
-        return self.update_plant(plant_id, {
-            "last_watered": datetime.now().isoformat()
-        })
+        """Mark plant as watered (log the event and update last_watered timestamp)"""
+        with self._locked():
+            if self.get_plant(plant_id) is None:
+                return None
+            watered_at = self.watering_log.append(plant_id)
+            return self.update_plant(plant_id, {
+                "last_watered": watered_at.isoformat()
+            })
+    
+    def get_watering_history(self, plant_id, start=None, end=None):
+        """Get watering events of a plant between two datetimes (oldest first)"""
+        return self.watering_log.get_events(plant_id, start, end)
+    
+    def get_watering_stats(self, plant_id):
+        """Get watering history summary (median interval, last events, events per week)"""
+        return self.watering_log.get_stats(plant_id)
+    
+    def get_learned_interval(self, plant_id):
+        """Get the plant's actual watering interval in days, or None if history is too short"""
+        return self.watering_log.median_interval_days(plant_id)
+    
+    def _build_index(self, plants, version=None):
+        """
+        Build the garden index from the full plant list (done once per write, not per render)
+        Each row: id, position in the plant list, name, placement, category, watering due time, added date
+        The index keeps no plant records; a page is resolved from the plant list by position
+        version: file_version() the plant list was read at (default: the file as it is now)
+        """
+        rows = []
+        for position, plant in enumerate(plants):
+            interval = self.watering_log.median_interval_days(plant.get('id')) or plant.get('watering_interval_days', 3)
+            due_at = None  # Never watered (or unreadable date) counts as due now
+            if plant.get('last_watered'):
+                try:
+                    due_at = datetime.fromisoformat(str(plant['last_watered'])) + timedelta(days=float(interval))
+                except (ValueError, TypeError):
+                    due_at = None
+            rows.append({
+                "id": plant.get('id'),
+                "position": position,
+                "name": str(plant.get('name', '')).lower(),
+                "placement": plant.get('placement', ''),
+                "category": keyword_matcher.classify(plant.get('name', ''), 'plant_category', 'plant'),
+                "due_at": due_at.timestamp() if due_at else float('-inf'),
+                "added": str(plant.get('added_date', ''))
+            })
+        self._index = {
+            "rows": rows,
+            "due_times": sorted(row["due_at"] for row in rows),
+            "by_placement": Counter(row["placement"] for row in rows),
+            "by_category": Counter(row["category"] for row in rows)
+        }
+        # (mtime_ns, inode, size): an atomic rewrite within one mtime tick still changes the stamp
+        self._index_version = file_version(self.plants_file) if version is None else version
+    
+    def _load_indexed(self):
+        """
+        The plant list and a garden index that matches it (rebuilt only if the file was changed by another process)
+        Returns: (plants, index)
+        """
+        with self._lock:
+            while True:
+                version = file_version(self.plants_file)
+                plants = self._load_plants()
+                # Same stamp after the read: no rewrite slipped in between (every save is a new inode)
+                if file_version(self.plants_file) == version:
+                    break
+            if self._index is None or version != self._index_version:
+                self._build_index(plants, version)
+            return plants, self._index
+    
+    def _get_index(self):
+        """Current garden index (the plant list is read only if the file was changed by another process)"""
+        with self._lock:
+            if self._index is None or file_version(self.plants_file) != self._index_version:
+                return self._load_indexed()[1]
+            return self._index
+    
+    @staticmethod
+    def _due_at(row, due_times):
+        """Watering due time of an index row (epoch seconds), from due_times when given"""
+        if due_times is None:
+            return row["due_at"]
+        return due_times.get(row["id"], row["due_at"])
+    
+    @staticmethod
+    def _urgency(due_at, now):
+        """Urgency level of a plant from its watering due time"""
+        if due_at <= now:
+            return "Needs Water"
+        if due_at <= now + 86400:
+            return "Water Soon"
+        return "Well Watered"
+    
+    def query_plants(self, sort_by="Most urgent", placement=None, category=None, urgency=None,
+                     page=0, page_size=PLANT_PAGE_SIZE, due_times=None):
+        """
+        Sort and filter the garden and return one page of plants
+        placement / category / urgency: None or "All" for no filter
+        due_times: plant id -> epoch seconds the plant needs water (e.g. garden_core.watering_due_times);
+                   replaces the interval-based due times for the urgency filter and "Most urgent" sort
+        Returns: dict with plants (this page only), total matches, page and page count
+        """
+        plants, index = self._load_indexed()
+        now = datetime.now().timestamp()
+        rows = [
+            row for row in index["rows"]
+            if placement in (None, "All", row["placement"])
+            and category in (None, "All", row["category"])
+            and urgency in (None, "All", self._urgency(self._due_at(row, due_times), now))
+        ]
+        
+        if sort_by == "Name":
+            rows.sort(key=lambda row: row["name"])
+        elif sort_by == "Recently added":
+            rows.sort(key=lambda row: row["added"], reverse=True)
+        elif sort_by == "Placement":
+            rows.sort(key=lambda row: (row["placement"], row["name"]))
+        else:
+            rows.sort(key=lambda row: (self._due_at(row, due_times), row["name"]))
+        
+        page_count = max(1, -(-len(rows) // page_size))
+        page = min(max(0, page), page_count - 1)
+        visible = rows[page * page_size:(page + 1) * page_size]
+        return {
+            "plants": [plants[row["position"]] for row in visible],
+            "total": len(rows),
+            "page": page,
+            "page_count": page_count
+        }
+    
+    def get_garden_summary(self, due_times=None):
+        """
+        Garden aggregates for the sidebar, read from the maintained index
+        due_times: as for query_plants (counted per plant instead of the index's sorted due times)
+        Returns: dict with total, needs_water, healthy and counts per placement / category
+        """
+        index = self._get_index()
+        now = datetime.now().timestamp()
+        if due_times is None:
+            needs_water = bisect.bisect_right(index["due_times"], now)
+        else:
+            needs_water = sum(1 for row in index["rows"] if self._due_at(row, due_times) <= now)
+        return {
+            "total": len(index["rows"]),
+            "needs_water": needs_water,
+            "healthy": len(index["rows"]) - needs_water,
+            "by_placement": dict(index["by_placement"]),
+            "by_category": dict(index["by_category"])
+        }
     
     def _save_chat_history(self, history):
         """Save chat history to JSON file"""
         try:
-            with open(self.chat_file, 'w', encoding='utf-8') as f:
-                json.dump(history, f, indent=2, default=str)
+            self._write_json(self.chat_file, history)
         except Exception as e:
             print(f"Error saving chat history: {e}")
     
@@ -122,14 +491,14 @@ class DataManager:
         try:
             with open(self.chat_file, 'r', encoding='utf-8') as f:
                 return json.load(f)
+        except FileNotFoundError:
+            return []
         except Exception as e:
             print(f"Error loading chat history: {e}")
             return []
     
     def add_chat_message(self, user_message, bot_response, plant_context=""):
         """Add a chat message to history"""
-        history = self._load_chat_history()
-        
         chat_entry = {
             "timestamp": datetime.now().isoformat(),
             "user_message": user_message,
@@ -137,12 +506,14 @@ class DataManager:
             "plant_context": plant_context
         }
         
-        history.append(chat_entry)
-        # Keep only last 100 messages
-        if len(history) > 100:
-            history = history[-100:]
-        
-        self._save_chat_history(history)
+        with self._locked():
+            history = self._load_chat_history()
+            history.append(chat_entry)
+            # Keep only last 100 messages
+            if len(history) > 100:
+                history = history[-100:]
+            
+            self._save_chat_history(history)
         return chat_entry
     
     def get_chat_history(self, limit=50):
@@ -154,9 +525,7 @@ class DataManager:
     def _save_user_profile(self, profile):
         """Save user profile to JSON file"""
         try:
-            os.makedirs(os.path.dirname(self.user_file), exist_ok=True)
-            with open(self.user_file, 'w', encoding='utf-8') as f:
-                json.dump(profile, f, indent=2, default=str)
+            self._write_json(self.user_file, profile)
         except Exception as e:
             print(f"Error saving user profile: {e}")
     
@@ -182,7 +551,10 @@ class DataManager:
             "created_at": profile_data.get("created_at", datetime.now().isoformat()),
             "updated_at": datetime.now().isoformat()
         }
-        self._save_user_profile(profile)
+        if self.user_id:
+            profile["user_id"] = self.user_id
+        with self._locked():
+            self._save_user_profile(profile)
         return profile
     
     def get_user_profile(self):
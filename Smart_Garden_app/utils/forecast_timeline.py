@@ -0,0 +1,137 @@
+"""
+Forecast Timeline Module
+The 3-hour forecast interpolated to hourly resolution, with prefix sums so precipitation, rain / storm hours
+and heat degree-hours of any future window are O(1) lookups
+Past windows are observations, not forecasts: see observation_store
+"""
+from datetime import datetime, timedelta
+import numpy as np
+
+SLOT_HOURS = 3  # OpenWeatherMap forecast step; a slot's precipitation fell in the 3 hours up to its time
+HEAVY_RAIN_MM_PER_HOUR = 5 / SLOT_HOURS  # Same threshold as the former "more than 5 mm in a 3-hour slot"
+HEAT_BASE_CELSIUS = 30  # Degree-hours above this temperature measure heat stress
+RAIN_WORDS = ("rain", "drizzle", "shower", "thunderstorm")
+STORM_WORDS = ("thunderstorm", "storm", "hail", "extreme")
+
+def hour_floor(moment):
+    """Start of the hour a datetime falls in"""
+    return moment.replace(minute=0, second=0, microsecond=0)
+
+def is_raining(weather):
+    """Whether a current-weather (or forecast) record reports rain"""
+    text = f"{weather.get('condition', '')} {weather.get('description', '')}".lower()
+    return (weather.get("precipitation") or 0) > 0 or any(word in text for word in RAIN_WORDS)
+
+def _prefix(values):
+    """Prefix sums with a leading 0: the sum of values[a:b] is prefix[b] - prefix[a]"""
+    prefix = np.concatenate(([0.0], np.cumsum(values, dtype=np.float64)))
+    prefix.flags.writeable = False
+    return prefix
+
+def _frozen(values):
+    values.flags.writeable = False
+    return values
+
+class ForecastTimeline:
+    """
+    Hourly forecast starting at the current hour (hour 0); hour h covers [start + h, start + h + 1)
+    Read only, so one timeline is shared by every user of a location
+    """
+
+    def __init__(self, start, temperature, precipitation, rain, storm, conditions, descriptions):
+        self.start = start
+        self.temperature = _frozen(temperature)      # °C, linear between forecast slots
+        self.precipitation = _frozen(precipitation)  # mm in the hour (the slot's total spread over its hours)
+        self.rain = _frozen(rain)
+        self.storm = _frozen(storm)
+        self.conditions = conditions      # Forecast condition of each hour's slot
+        self.descriptions = descriptions  # Forecast description of each hour's slot
+        self._precipitation_sum = _prefix(precipitation)
+        self._heat_sum = _prefix(np.maximum(temperature - HEAT_BASE_CELSIUS, 0))
+        self._rain_sum = _prefix(rain)
+        self._storm_sum = _prefix(storm)
+        self._rain_hours = _frozen(np.flatnonzero(rain))
+        self._storm_hours = _frozen(np.flatnonzero(storm))
+
+    @classmethod
+    def from_forecast(cls, forecast, now=None):
+        """
+        Build the timeline from get_forecast() slots (any order; slots without a datetime are ignored)
+        Hours past the last slot are not part of the timeline
+        """
+        start = hour_floor(now or datetime.now())
+        slots = sorted((item for item in forecast or [] if item.get("datetime")), key=lambda item: item["datetime"])
+        slot_hours = np.array([(item["datetime"] - start).total_seconds() / 3600 for item in slots])
+        length = max(0, int(np.floor(slot_hours[-1]))) if slots else 0
+        hours = np.arange(length, dtype=np.float64)
+
+        # Each hour belongs to the first slot ending at or after the hour's end
+        slot_index = np.searchsorted(slot_hours, hours + 1, side="left")
+        covered = hours + 1 > slot_hours[slot_index] - SLOT_HOURS if length else np.zeros(0, dtype=bool)
+        slot_precipitation = np.array([item.get("precipitation") or 0 for item in slots], dtype=np.float64)
+        slot_rain = np.array([is_raining(item) for item in slots], dtype=bool)
+        slot_storm = np.array([
+            any(word in f"{item.get('condition', '')} {item.get('description', '')}".lower() for word in STORM_WORDS)
+            for item in slots
+        ], dtype=bool)
+
+        temperature = (
+            np.interp(hours + 0.5, slot_hours, [item.get("temperature", 25) for item in slots]) if length else np.zeros(0)
+        )
+        return cls(
+            start,
+            temperature,
+            np.where(covered, slot_precipitation[slot_index] / SLOT_HOURS, 0.0) if length else np.zeros(0),
+            covered & slot_rain[slot_index] if length else np.zeros(0, dtype=bool),
+            covered & slot_storm[slot_index] if length else np.zeros(0, dtype=bool),
+            tuple(slots[index].get("condition", "") for index in slot_index),
+            tuple(slots[index].get("description", "") for index in slot_index)
+        )
+
+    def __len__(self):
+        return len(self.temperature)
+
+    def _window(self, start_hour, end_hour):
+        return max(0, min(start_hour, len(self))), max(0, min(end_hour, len(self)))
+
+    def precipitation_between(self, start_hour, end_hour):
+        """Forecast precipitation (mm) in hours [start_hour, end_hour)"""
+        start, end = self._window(start_hour, end_hour)
+        return float(self._precipitation_sum[end] - self._precipitation_sum[start]) if end > start else 0.0
+
+    def heat_degree_hours(self, start_hour, end_hour):
+        """Degree-hours above HEAT_BASE_CELSIUS in hours [start_hour, end_hour)"""
+        start, end = self._window(start_hour, end_hour)
+        return float(self._heat_sum[end] - self._heat_sum[start]) if end > start else 0.0
+
+    def rain_hours(self, start_hour, end_hour):
+        """Number of rainy hours in [start_hour, end_hour)"""
+        start, end = self._window(start_hour, end_hour)
+        return int(self._rain_sum[end] - self._rain_sum[start]) if end > start else 0
+
+    def storm_hours(self, start_hour, end_hour):
+        """Number of stormy hours in [start_hour, end_hour)"""
+        start, end = self._window(start_hour, end_hour)
+        return int(self._storm_sum[end] - self._storm_sum[start]) if end > start else 0
+
+    def events(self, kind, hours_ahead):
+        """Hour offsets with rain (kind "rain") or a storm (kind "storm") in the next hours_ahead hours"""
+        hours = self._rain_hours if kind == "rain" else self._storm_hours
+        return hours[:np.searchsorted(hours, hours_ahead, side="left")].tolist()
+
+    def hour_time(self, hour):
+        """Start time of an hour offset"""
+        return self.start + timedelta(hours=int(hour))
+
+    def hourly(self):
+        """The timeline as a list of dicts (datetime, temperature, precipitation, rain, storm) for charts / JSON"""
+        return [
+            {
+                "datetime": self.hour_time(hour),
+                "temperature": round(float(self.temperature[hour]), 1),
+                "precipitation": round(float(self.precipitation[hour]), 2),
+                "rain": bool(self.rain[hour]),
+                "storm": bool(self.storm[hour])
+            }
+            for hour in range(len(self))
+        ]
@@ -5,17 +5,27 @@ Handles all Google Gemini API interactions for plant identification and chat
 import google.generativeai as genai
 import config
 from PIL import Image
+from utils.response_cache import TTLCache
+from utils.alert_messages import generate_alert_batch
+from utils.metrics import track_call, record_fallback
+from utils.tracing import trace_methods
 import io
 from datetime import datetime
 
+@trace_methods("gemini")
 class GeminiService:
     def __init__(self):
-        # Access API key dynamically from config module (supports secrets.toml)
-        self.api_key = config.get_gemini_key()
+        self.alert_cache = TTLCache(config.ALERT_CACHE_MAX_ENTRIES, config.ALERT_CACHE_TTL_SECONDS, name="gemini_alerts")
+        # API key from the resolved settings (secrets.toml or .env, resolved once per process)
+        self.api_key = config.get_settings().gemini_api_key
         if self.api_key:
             try:
                 # Configure API - ensure it's from AI Studio (not Vertex AI)
-                genai.configure(api_key=self.api_key)
+                if config.GEMINI_API_ENDPOINT:
+                    genai.configure(api_key=self.api_key, transport="rest",
+                                    client_options={"api_endpoint": config.GEMINI_API_ENDPOINT})
+                else:
+                    genai.configure(api_key=self.api_key)
                 
                 # Verify API key format (AI Studio keys start with AIza)
                 if not self.api_key.startswith('AIza'):
@@ -89,6 +99,7 @@ class GeminiService:
         Returns: dict with plant name and confidence
         """
         if not self.model:
+            record_fallback("gemini", "identify_plant", "no_api_key")
             return self._get_mock_identification()
         
         try:
@@ -125,11 +136,14 @@ Care Level: [Easy/Moderate/Difficult]
 DO NOT say "Rose" unless you see actual rose flowers with thorns."""
             
             try:
-                response = self.model.generate_content([prompt, image])
-                result_text = response.text
+                with track_call("gemini", "identify_plant") as call:
+                    response = self.model.generate_content([prompt, image])
+                    result_text = response.text
+                    call.response_bytes = len(result_text.encode('utf-8'))
                 print(f"🔍 Gemini Response: {result_text[:200]}...")  # Debug output
             except Exception as e:
                 print(f"❌ Gemini API Error: {e}")
+                record_fallback("gemini", "identify_plant", "exception")
                 return self._get_mock_identification()
             
             # Parse the response - improved parsing
@@ -184,6 +198,7 @@ DO NOT say "Rose" unless you see actual rose flowers with thorns."""
             }
         except Exception as e:
             print(f"Plant identification error: {e}")
+            record_fallback("gemini", "identify_plant", "exception")
             return self._get_mock_identification()
     
     def analyze_plant_health(self, image, user_question=""):
@@ -192,6 +207,7 @@ DO NOT say "Rose" unless you see actual rose flowers with thorns."""
         Returns: AI-generated diagnosis and recommendations
         """
         if not self.model:
+            record_fallback("gemini", "analyze_plant_health", "no_api_key")
             return {
                 "analysis": "⚠️ Gemini API is not configured. Please check your API key in the .env file.",
                 "timestamp": str(datetime.now()),
@@ -230,8 +246,10 @@ Please examine the image and provide:
 Be specific, helpful, and actionable. If the plant looks healthy, mention what's going well and how to maintain it."""
             
             print(f"🔍 Analyzing plant health with Gemini...")
-            response = self.model.generate_content([prompt, image])
-            analysis_text = response.text
+            with track_call("gemini", "analyze_plant_health") as call:
+                response = self.model.generate_content([prompt, image])
+                analysis_text = response.text
+                call.response_bytes = len(analysis_text.encode('utf-8'))
             
             print(f"✅ Health analysis complete: {len(analysis_text)} characters")
             
@@ -243,6 +261,7 @@ Be specific, helpful, and actionable. If the plant looks healthy, mention what's
         except Exception as e:
             error_msg = str(e)
             print(f"❌ Health analysis error: {error_msg}")
+            record_fallback("gemini", "analyze_plant_health", "exception")
             
             # Provide helpful error message
             if "API" in error_msg or "key" in error_msg.lower():
@@ -264,6 +283,7 @@ Be specific, helpful, and actionable. If the plant looks healthy, mention what's
         Returns: polished alert message
         """
         if not self.chat_model:
+            record_fallback("gemini", "alert_message", "no_api_key")
             return self._get_default_alert(alert_type, plant_name, weather_data)
         
         try:
@@ -300,18 +320,44 @@ Be helpful and caring."""
             else:
                 return self._get_default_alert(alert_type, plant_name, weather_data)
             
-            response = self.chat_model.generate_content(prompt)
-            return response.text.strip()
+            with track_call("gemini", "alert_message") as call:
+                call.request_bytes = len(prompt.encode('utf-8'))
+                response = self.chat_model.generate_content(prompt)
+                message = response.text.strip()
+                call.response_bytes = len(message.encode('utf-8'))
+            return message
         except Exception as e:
             print(f"Alert generation error: {e}")
+            record_fallback("gemini", "alert_message", "exception")
             return self._get_default_alert(alert_type, plant_name, weather_data)
     
+    def generate_alert_messages(self, alerts, weather_data):
+        """
+        Generate alert messages for many plants with a single Gemini call
+        alerts: list of (alert_type, plant_name) pairs
+        Returns: list of messages in the same order (defaults for anything not generated)
+        """
+        complete = self._complete_alert_batch if self.chat_model else None
+        return generate_alert_batch(alerts, weather_data, self.alert_cache, complete, self._get_default_alert)
+    
+    def _complete_alert_batch(self, prompt, max_tokens):
+        """Run the batched alert prompt through Gemini"""
+        with track_call("gemini", "alert_batch") as call:
+            call.request_bytes = len(prompt.encode('utf-8'))
+            response = self.chat_model.generate_content(
+                prompt,
+                generation_config={"max_output_tokens": max_tokens, "temperature": 0.7}
+            )
+            call.response_bytes = len(response.text.encode('utf-8'))
+        return response.text
+    
     def chat_about_plant(self, user_message, plant_context=""):
         """
         Chat with AI botanist about plant care
         Returns: AI response
         """
         if not self.chat_model:
+            record_fallback("gemini", "chat", "no_api_key")
             return "I'm here to help with your plant care questions! (Note: Gemini API key not configured)"
         
         try:
@@ -323,10 +369,15 @@ Provide helpful, accurate advice. If you're unsure, say so. Always prioritize pl
             
             full_prompt = f"{system_prompt}\n\nUser: {user_message}\n\nBotanist:"
             
-            response = self.chat_model.generate_content(full_prompt)
-            return response.text.strip()
+            with track_call("gemini", "chat") as call:
+                call.request_bytes = len(full_prompt.encode('utf-8'))
+                response = self.chat_model.generate_content(full_prompt)
+                answer = response.text.strip()
+                call.response_bytes = len(answer.encode('utf-8'))
+            return answer
         except Exception as e:
             print(f"Chat error: {e}")
+            record_fallback("gemini", "chat", "exception")
             return f"I encountered an error: {e}. Please try again or check your API configuration."
     
     def _get_mock_identification(self):
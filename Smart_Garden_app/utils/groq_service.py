@@ -3,23 +3,39 @@ Groq AI Service Module
 Handles all Groq API interactions for fast chat responses
 Uses Llama 3 models for ultra-fast responses
 """
-from groq import Groq
+import json
+from groq import Groq, DefaultHttpxClient
 import config
+from utils.response_cache import ResponseCache, TTLCache
+from utils.alert_messages import generate_alert_batch
+from utils.chat_context import ConversationContext
+from utils.metrics import track_call, count_attempt, record_fallback, record_cache
+from utils.tracing import trace_methods
 
+@trace_methods("groq")
 class GroqService:
     def __init__(self):
         self.client = None
         self.model = None
+        self.response_cache = ResponseCache()
+        self.conversation_context = ConversationContext()
+        self.alert_cache = TTLCache(config.ALERT_CACHE_MAX_ENTRIES, config.ALERT_CACHE_TTL_SECONDS, name="groq_alerts")
         self._initialize_client()
     
     def _initialize_client(self):
         """Initialize or re-initialize the Groq client with current API key"""
-        # Access API key dynamically from config module (supports secrets.toml)
-        self.api_key = config.get_groq_key()
+        # API key from the resolved settings (secrets.toml or .env, resolved once per process)
+        self.settings = config.get_settings()
+        self.api_key = self.settings.groq_api_key
         
         if self.api_key:
             try:
-                self.client = Groq(api_key=self.api_key)
+                # The request hook lets the metrics count the SDK's internal retries
+                self.client = Groq(
+                    api_key=self.api_key,
+                    base_url=config.GROQ_BASE_URL,
+                    http_client=DefaultHttpxClient(event_hooks={"request": [count_attempt]})
+                )
                 self.model = "llama-3.3-70b-versatile"  # Latest Groq model - fast and smart
                 print(f"✅ Groq client initialized successfully")
             except Exception as e:
@@ -27,56 +43,98 @@ class GroqService:
                 self.client = None
                 self.model = None
         else:
-            print("⚠️ Groq API key not found. Checking environment...")
-            # Debug: Print what we're checking
-            import os
-            env_key = os.getenv("GROQ_API_KEY")
-            if env_key:
-                print(f"⚠️ Found GROQ_API_KEY in environment but it's empty or invalid")
-            else:
-                print(f"⚠️ GROQ_API_KEY not found in environment variables")
+            print("⚠️ Groq API key not found in secrets or environment")
             self.client = None
             self.model = None
     
     def _ensure_client(self):
-        """Ensure client is initialized, try to re-initialize if needed"""
-        if not self.client:
-            # Try to re-initialize in case secrets were loaded after service creation
+        """Ensure client is initialized; rebuild it only if the resolved settings changed"""
+        if config.get_settings() is not self.settings:
             self._initialize_client()
         return self.client is not None
     
-    def chat_about_plant(self, user_message, plant_context=""):
+    def chat_about_plant(self, user_message, plant_context="", history=None, plants=None):
         """
         Chat with AI botanist using Groq (ultra-fast)
+        history: earlier turns (from DataManager.get_chat_history) for multi-turn memory
+        plants: the user's plant records; only the ones being discussed are sent
         Returns: AI response
         """
+        response, _ = self._chat(self._messages(user_message, plant_context, history, plants))
+        return response
+    
+    def answer_question(self, user_message, plant_context="", history=None, plants=None, cache_scope=None):
+        """
+        Chat with AI botanist, serving repeated questions from the local answer cache
+        Prompts that carry nothing of the user's own (no plant records, no earlier turns) share one cache entry
+        across users; personal prompts are cached only under cache_scope (the user's id) and the user's plant
+        records, so they are served back to that user alone and expire with any change to the garden
+        Without a cache_scope, personal prompts always go to Groq and are not stored
+        Returns: dict with response, from_cache, cache_tier ("exact"/"semantic") and similarity
+        """
+        system_prompt = self._system_prompt(plant_context)
+        messages = self._messages(user_message, plant_context, history, plants)
+        cache_context = self._cache_context(messages, system_prompt, plant_context, plants, cache_scope)
+        cached = self.response_cache.get(user_message, cache_context) if cache_context is not None else None
+        if cache_context is not None:
+            record_cache("chat_answers", cached["tier"] if cached else "miss")
+        if cached:
+            return {
+                "response": cached["response"],
+                "from_cache": True,
+                "cache_tier": cached["tier"],
+                "similarity": cached["similarity"]
+            }
+        
+        response, ok = self._chat(messages)
+        if ok and cache_context is not None:
+            self.response_cache.put(user_message, cache_context, response)
+        return {
+            "response": response,
+            "from_cache": False,
+            "cache_tier": None,
+            "similarity": None
+        }
+    
+    @staticmethod
+    def _cache_context(messages, system_prompt, plant_context, plants, cache_scope):
+        """
+        Context an answer is cached under
+        Returns: plant_context for a prompt with no personal data, the user-scoped context for a personal one,
+                 or None if the answer must not be cached
+        """
+        if len(messages) == 2 and messages[0]["content"] == system_prompt:
+            return plant_context
+        if not cache_scope:
+            return None
+        return f"user {cache_scope}\n{plant_context}\n{json.dumps(plants or [], sort_keys=True, default=str)}"
+    
+    @staticmethod
+    def _system_prompt(plant_context):
+        """Botanist instructions plus the shared weather / plant context"""
+        return f"""You are an expert botanist and plant care advisor. You help users with their gardening questions in a friendly, knowledgeable way.
+
+Plant context: {plant_context if plant_context else "General plant care"}
+
+Provide helpful, accurate advice. If you're unsure, say so. Always prioritize plant health and safety. Keep responses concise but informative."""
+    
+    def _messages(self, user_message, plant_context="", history=None, plants=None):
+        """Chat messages for one question: recent turns + summary of older ones + relevant plants, capped by the token budget"""
+        messages, _ = self.conversation_context.build_messages(
+            self._system_prompt(plant_context), user_message, history, plants
+        )
+        return messages
+    
+    def _chat(self, messages):
+        """
+        Run one Groq chat completion
+        Returns: (response text, True if it is a real answer worth caching)
+        """
         # Try to ensure client is initialized (in case secrets were loaded after service creation)
         if not self._ensure_client():
+            record_fallback("groq", "chat", "no_api_key")
             # Provide helpful debugging info
-            import os
-            import streamlit as st
-            debug_info = []
-            
-            # Check environment
-            env_key = os.getenv("GROQ_API_KEY")
-            if env_key:
-                debug_info.append(f"Found key in environment (length: {len(env_key)})")
-            else:
-                debug_info.append("Key not in environment")
-            
-            # Check secrets
-            try:
-                if hasattr(st, 'secrets') and st.secrets:
-                    if "GROQ_API_KEY" in st.secrets:
-                        debug_info.append("Found GROQ_API_KEY in st.secrets")
-                    elif "api" in st.secrets and "groq_key" in st.secrets.get("api", {}):
-                        debug_info.append("Found groq_key in st.secrets['api']")
-                    else:
-                        debug_info.append("GROQ_API_KEY not found in st.secrets")
-                else:
-                    debug_info.append("st.secrets not available")
-            except:
-                debug_info.append("Could not check st.secrets")
+            debug_info = [f"Keys loaded from: {self.settings.source}", "GROQ_API_KEY not set"]
             
             error_msg = "🌱 I'm here to help with your plant care questions! However, the Groq API key is not configured.\n\n"
             error_msg += "**To fix this:**\n"
@@ -85,48 +143,38 @@ class GroqService:
             error_msg += "3. Click Save and wait for redeploy\n\n"
             error_msg += f"**Debug info:** {', '.join(debug_info)}"
             
-            return error_msg
+            return error_msg, False
         
         try:
-            system_prompt = f"""You are an expert botanist and plant care advisor. You help users with their gardening questions in a friendly, knowledgeable way.
-
-Plant context: {plant_context if plant_context else "General plant care"}
-
-Provide helpful, accurate advice. If you're unsure, say so. Always prioritize plant health and safety. Keep responses concise but informative."""
+            with track_call("groq", "chat") as call:
+                call.request_bytes = len(json.dumps(messages))
+                chat_completion = self.client.chat.completions.create(
+                    messages=messages,
+                    model=self.model,
+                    temperature=0.7,
+                    max_tokens=500
+                )
+                response = chat_completion.choices[0].message.content.strip()
+                call.response_bytes = len(response.encode('utf-8'))
             
-            chat_completion = self.client.chat.completions.create(
-                messages=[
-                    {
-                        "role": "system",
-                        "content": system_prompt
-                    },
-                    {
-                        "role": "user",
-                        "content": user_message,
-                    }
-                ],
-                model=self.model,
-                temperature=0.7,
-                max_tokens=500
-            )
-            
-            response = chat_completion.choices[0].message.content.strip()
             if not response:
-                return "I received an empty response. Please try asking your question again."
-            return response
+                record_fallback("groq", "chat", "empty_response")
+                return "I received an empty response. Please try asking your question again.", False
+            return response, True
         except Exception as e:
             error_msg = str(e)
             print(f"Groq chat error: {error_msg}")
+            record_fallback("groq", "chat", "exception")
             
             # User-friendly error messages
             if "api_key" in error_msg.lower() or "authentication" in error_msg.lower():
-                return "🔑 **API Key Error**: Please check your Groq API key in Streamlit Cloud secrets (Settings → Secrets). Make sure GROQ_API_KEY is set correctly."
+                return "🔑 **API Key Error**: Please check your Groq API key in Streamlit Cloud secrets (Settings → Secrets). Make sure GROQ_API_KEY is set correctly.", False
             elif "rate limit" in error_msg.lower() or "quota" in error_msg.lower():
-                return "⏱️ **Rate Limit**: Too many requests. Please wait a moment and try again."
+                return "⏱️ **Rate Limit**: Too many requests. Please wait a moment and try again.", False
             elif "model" in error_msg.lower():
-                return "🤖 **Model Error**: The AI model is temporarily unavailable. Please try again in a moment."
+                return "🤖 **Model Error**: The AI model is temporarily unavailable. Please try again in a moment.", False
             else:
-                return f"⚠️ **Error**: {error_msg}\n\nPlease try again or check your API configuration in Streamlit Cloud secrets."
+                return f"⚠️ **Error**: {error_msg}\n\nPlease try again or check your API configuration in Streamlit Cloud secrets.", False
     
     def generate_alert_message(self, alert_type, plant_name, weather_data):
         """
@@ -134,6 +182,7 @@ Provide helpful, accurate advice. If you're unsure, say so. Always prioritize pl
         Returns: polished alert message
         """
         if not self.client:
+            record_fallback("groq", "alert_message", "no_api_key")
             return self._get_default_alert(alert_type, plant_name, weather_data)
         
         try:
@@ -170,11 +219,50 @@ Be helpful and caring."""
             else:
                 return self._get_default_alert(alert_type, plant_name, weather_data)
             
+            with track_call("groq", "alert_message") as call:
+                call.request_bytes = len(prompt.encode('utf-8'))
+                chat_completion = self.client.chat.completions.create(
+                    messages=[
+                        {
+                            "role": "system",
+                            "content": "You are a helpful garden assistant. Generate friendly, concise alert messages."
+                        },
+                        {
+                            "role": "user",
+                            "content": prompt
+                        }
+                    ],
+                    model=self.model,
+                    temperature=0.7,
+                    max_tokens=200
+                )
+                message = chat_completion.choices[0].message.content.strip()
+                call.response_bytes = len(message.encode('utf-8'))
+            
+            return message
+        except Exception as e:
+            print(f"Alert generation error: {e}")
+            record_fallback("groq", "alert_message", "exception")
+            return self._get_default_alert(alert_type, plant_name, weather_data)
+    
+    def generate_alert_messages(self, alerts, weather_data):
+        """
+        Generate alert messages for many plants with a single Groq call
+        alerts: list of (alert_type, plant_name) pairs
+        Returns: list of messages in the same order (defaults for anything not generated)
+        """
+        complete = self._complete_alert_batch if self.client else None
+        return generate_alert_batch(alerts, weather_data, self.alert_cache, complete, self._get_default_alert)
+    
+    def _complete_alert_batch(self, prompt, max_tokens):
+        """Run the batched alert prompt through Groq"""
+        with track_call("groq", "alert_batch") as call:
+            call.request_bytes = len(prompt.encode('utf-8'))
             chat_completion = self.client.chat.completions.create(
                 messages=[
                     {
                         "role": "system",
-                        "content": "You are a helpful garden assistant. Generate friendly, concise alert messages."
+                        "content": "You are a helpful garden assistant. Generate friendly, concise alert messages. Reply with JSON only."
                     },
                     {
                         "role": "user",
@@ -183,13 +271,11 @@ Be helpful and caring."""
                 ],
                 model=self.model,
                 temperature=0.7,
-                max_tokens=200
+                max_tokens=max_tokens
             )
-            
-            return chat_completion.choices[0].message.content.strip()
-        except Exception as e:
-            print(f"Alert generation error: {e}")
-            return self._get_default_alert(alert_type, plant_name, weather_data)
+            content = chat_completion.choices[0].message.content
+            call.response_bytes = len((content or "").encode('utf-8'))
+        return content
     
     def _get_default_alert(self, alert_type, plant_name, weather_data):
         """Default alert messages when Groq is not available"""
@@ -9,11 +9,15 @@ from PIL import Image
 import io
 import base64
 from datetime import datetime
+from utils.keyword_matcher import keyword_matcher
+from utils.metrics import http_request, record_fallback, record_retry
+from utils.tracing import trace_methods
 
+@trace_methods("huggingface")
 class HuggingFaceService:
     def __init__(self):
-        # Access API key dynamically from config module (supports secrets.toml)
-        self.api_key = config.get_huggingface_key()
+        # API key from the resolved settings (secrets.toml or .env, resolved once per process)
+        self.api_key = config.get_settings().huggingface_api_key
         # Use BLIP2 for better vision-language understanding
         # Falls back to BLIP if BLIP2 is not available
         # Use Visual Question Answering model for better plant identification
@@ -48,7 +52,7 @@ class HuggingFaceService:
     def _query_huggingface(self, image_base64, model_name, prompt=None):
         """Query Hugging Face Inference API - Using new router endpoint"""
         # Use new router endpoint (old api-inference.huggingface.co is deprecated)
-        API_URL = f"https://router.huggingface.co/models/{model_name}"
+        API_URL = f"{config.HUGGINGFACE_BASE_URL}/{model_name}"
         headers = {"Authorization": f"Bearer {self.api_key}"}
         
         # For BLIP models, we send the image
@@ -59,7 +63,7 @@ class HuggingFaceService:
             # Decode base64 to bytes
             image_bytes = base64.b64decode(image_base64)
             
-            response = requests.post(API_URL, headers=headers, data=image_bytes, timeout=30)
+            response = http_request("huggingface", "caption", "POST", API_URL, headers=headers, data=image_bytes, timeout=30)
             
             if response.status_code == 200:
                 result = response.json()
@@ -81,6 +85,7 @@ class HuggingFaceService:
         Returns: dict with plant name and confidence
         """
         if not self.api_key:
+            record_fallback("huggingface", "identify_plant", "no_api_key")
             return self._get_mock_identification()
         
         try:
@@ -138,11 +143,12 @@ class HuggingFaceService:
             
         except Exception as e:
             print(f"❌ Plant identification error: {e}")
+            record_fallback("huggingface", "identify_plant", "exception")
             return self._get_mock_identification()
     
     def _query_vqa(self, image_bytes, question):
         """Query Hugging Face VQA model with image and question"""
-        API_URL = f"https://router.huggingface.co/models/{self.identification_model}"
+        API_URL = f"{config.HUGGINGFACE_BASE_URL}/{self.identification_model}"
         headers = {"Authorization": f"Bearer {self.api_key}"}
         
         try:
@@ -160,7 +166,8 @@ class HuggingFaceService:
                 }
             }
             
-            response = requests.post(
+            response = http_request(
+                "huggingface", "vqa", "POST",
                 API_URL, 
                 headers=headers, 
                 json=payload,
@@ -173,7 +180,9 @@ class HuggingFaceService:
                 return {"error": "Model is loading, please try again in a moment"}
             else:
                 # Try alternative format (raw bytes)
-                response = requests.post(
+                record_retry("huggingface", "vqa")
+                response = http_request(
+                    "huggingface", "vqa", "POST",
                     API_URL,
                     headers=headers,
                     data=image_bytes,
@@ -189,31 +198,10 @@ class HuggingFaceService:
     
     def _extract_plant_name(self, caption):
         """Extract plant name from caption"""
-        caption_lower = caption.lower()
-        
-        # Common plant keywords
-        plant_keywords = {
-            'tomato': 'Tomato Plant',
-            'rose': 'Rose',
-            'snake plant': 'Snake Plant',
-            'aloe': 'Aloe Vera',
-            'pothos': 'Pothos',
-            'philodendron': 'Philodendron',
-            'basil': 'Basil',
-            'mint': 'Mint',
-            'lavender': 'Lavender',
-            'sunflower': 'Sunflower',
-            'cactus': 'Cactus',
-            'fern': 'Fern',
-            'ivy': 'Ivy',
-            'jade': 'Jade Plant',
-            'spider plant': 'Spider Plant'
-        }
-        
-        # Check for plant keywords
-        for keyword, plant_name in plant_keywords.items():
-            if keyword in caption_lower:
-                return plant_name
+        # Check for plant keywords (first entry in the plant_names table wins)
+        plant_name = keyword_matcher.classify(caption, 'plant_names')
+        if plant_name:
+            return plant_name
         
         # If no match, try to extract from first few words
         words = caption.split()[:5]
@@ -235,6 +223,7 @@ class HuggingFaceService:
         Returns: AI-generated diagnosis and recommendations
         """
         if not self.api_key:
+            record_fallback("huggingface", "analyze_plant_health", "no_api_key")
             return {
                 "analysis": "⚠️ Hugging Face API is not configured. Please check your API key in the .env file.",
                 "timestamp": str(datetime.now()),
@@ -252,6 +241,7 @@ class HuggingFaceService:
             if "error" in result:
                 error_msg = result['error']
                 print(f"❌ Hugging Face API Error: {error_msg}")
+                record_fallback("huggingface", "analyze_plant_health", "api_error")
                 return {
                     "analysis": f"⚠️ **API Error**: {error_msg}\n\nPlease check your Hugging Face API key in the `.env` file and ensure it's valid.",
                     "timestamp": str(datetime.now()),
@@ -281,6 +271,7 @@ class HuggingFaceService:
         except Exception as e:
             error_msg = str(e)
             print(f"❌ Health analysis error: {error_msg}")
+            record_fallback("huggingface", "analyze_plant_health", "exception")
             return {
                 "analysis": f"⚠️ **Error**: {error_msg}\n\nPlease try again or check your API configuration.",
                 "timestamp": str(datetime.now()),
@@ -295,13 +286,15 @@ class HuggingFaceService:
         if user_question:
             analysis_parts.append(f"**Your Question**: {user_question}\n")
         
-        # Analyze caption for health indicators
-        caption_lower = caption.lower()
+        # Analyze caption for health indicators (one pass over all keyword tables)
+        matches = keyword_matcher.scan(caption)
+        status = matches.get('health_status', [None])[0]
+        issues = matches.get('health_issues', [])
         
         # Health status
-        if any(word in caption_lower for word in ['healthy', 'green', 'vibrant', 'thriving', 'good']):
+        if status == 'good':
             health_status = "**Health Status**: Good to Excellent"
-        elif any(word in caption_lower for word in ['yellow', 'wilting', 'drooping', 'brown', 'dying']):
+        elif status == 'poor':
             health_status = "**Health Status**: Fair to Poor - Needs Attention"
         else:
             health_status = "**Health Status**: Requires Assessment"
@@ -311,7 +304,7 @@ class HuggingFaceService:
         analysis_parts.append(caption)
         
         # Add recommendations based on common issues
-        if 'yellow' in caption_lower:
+        if 'yellowing' in issues:
             analysis_parts.append("\n**Possible Causes**:")
             analysis_parts.append("- Overwatering or underwatering")
             analysis_parts.append("- Nutrient deficiency")
@@ -322,7 +315,7 @@ class HuggingFaceService:
             analysis_parts.append("3. Provide balanced fertilizer")
             analysis_parts.append("4. Move to brighter location if needed")
         
-        if 'brown' in caption_lower or 'dry' in caption_lower:
+        if 'browning' in issues:
             analysis_parts.append("\n**Possible Causes**:")
             analysis_parts.append("- Underwatering")
             analysis_parts.append("- Low humidity")
@@ -332,7 +325,7 @@ class HuggingFaceService:
             analysis_parts.append("2. Mist leaves to increase humidity")
             analysis_parts.append("3. Provide shade during hottest hours")
         
-        if 'healthy' in caption_lower or 'green' in caption_lower:
+        if 'healthy' in issues:
             analysis_parts.append("\n**Maintenance Tips**:")
             analysis_parts.append("1. Continue current care routine")
             analysis_parts.append("2. Monitor for any changes")
@@ -0,0 +1,119 @@
+"""
+Image Pre-screen Module
+Fast local (NumPy, CPU only) checks on a plant photo before any remote vision call
+Rejects unusable photos (blurry, too dark/bright, no plant) and gives a provisional health score
+"""
+import io
+import numpy as np
+from PIL import Image, ImageOps
+
+# Work on a small copy - enough for colour statistics and blur detection
+ANALYSIS_SIZE = 256
+
+# Quality thresholds
+MIN_SHARPNESS = 60.0        # Variance of the Laplacian on 0-255 grey values
+MIN_BRIGHTNESS = 40.0       # Mean luminance
+MAX_BRIGHTNESS = 225.0
+MAX_CLIPPED_SHARE = 0.35    # Share of pixels that are pure black or pure white
+MIN_PLANT_SHARE = 0.05      # Share of pixels that look like foliage
+
+# Hue ranges on PIL's 0-255 hue scale
+GREEN_HUE = (43, 120)       # ~60°-170°
+YELLOW_HUE = (25, 43)       # ~35°-60°
+BROWN_HUE = (5, 25)         # ~7°-35° (with low value / saturation)
+
+def _load_rgb(image):
+    """Accept bytes, file-like or PIL Image and return a small RGB copy"""
+    if isinstance(image, bytes):
+        image = Image.open(io.BytesIO(image))
+    elif not isinstance(image, Image.Image):
+        if hasattr(image, 'seek'):
+            image.seek(0)
+        image = Image.open(image)
+    # Let the JPEG decoder downscale while decoding - much faster for camera photos
+    image.draft('RGB', (ANALYSIS_SIZE * 2, ANALYSIS_SIZE * 2))
+    image = ImageOps.exif_transpose(image)
+    image = image.convert('RGB')
+    image.thumbnail((ANALYSIS_SIZE, ANALYSIS_SIZE))
+    return image
+
+def _laplacian_variance(grey):
+    """Sharpness estimate: variance of the 4-neighbour Laplacian"""
+    laplacian = (
+        -4 * grey[1:-1, 1:-1]
+        + grey[:-2, 1:-1] + grey[2:, 1:-1]
+        + grey[1:-1, :-2] + grey[1:-1, 2:]
+    )
+    return float(laplacian.var())
+
+def prescreen_image(image):
+    """
+    Analyze a plant photo locally in a few milliseconds
+    Returns: dict with usable flag, rejection reasons, quality metrics,
+             foliage colour shares, hue histogram and a provisional health score (0-100)
+    """
+    small = _load_rgb(image)
+    rgb = np.asarray(small, dtype=np.float32)
+    hsv = np.asarray(small.convert('HSV'), dtype=np.float32)
+    hue, saturation, value = hsv[..., 0], hsv[..., 1], hsv[..., 2]
+
+    # Exposure and sharpness
+    grey = rgb @ np.array([0.299, 0.587, 0.114], dtype=np.float32)
+    brightness = float(grey.mean())
+    clipped_share = float(((grey <= 5) | (grey >= 250)).mean())
+    sharpness = _laplacian_variance(grey)
+
+    # Foliage classification (ignore washed-out and very dark pixels)
+    coloured = (saturation > 40) & (value > 40)
+    green = coloured & (hue >= GREEN_HUE[0]) & (hue < GREEN_HUE[1])
+    yellow = coloured & (hue >= YELLOW_HUE[0]) & (hue < YELLOW_HUE[1]) & (value > 110)
+    brown = (saturation > 40) & (value > 25) & (value < 150) & (hue >= BROWN_HUE[0]) & (hue < BROWN_HUE[1])
+    leaf_pixels = int(green.sum() + yellow.sum() + brown.sum())
+    total_pixels = grey.size
+
+    plant_share = leaf_pixels / total_pixels
+    yellow_share = float(yellow.sum() / leaf_pixels) if leaf_pixels else 0.0
+    brown_share = float(brown.sum() / leaf_pixels) if leaf_pixels else 0.0
+
+    reasons = []
+    if sharpness < MIN_SHARPNESS:
+        reasons.append("Photo is blurry - hold the camera steady and focus on the leaves.")
+    if brightness < MIN_BRIGHTNESS:
+        reasons.append("Photo is too dark - take it in better light.")
+    elif brightness > MAX_BRIGHTNESS:
+        reasons.append("Photo is overexposed - avoid direct sun or flash on the plant.")
+    if clipped_share > MAX_CLIPPED_SHARE:
+        reasons.append("Large parts of the photo are pure black or white.")
+    if plant_share < MIN_PLANT_SHARE:
+        reasons.append("Not enough leaves visible - move closer to the plant.")
+
+    # Provisional score: healthy foliage is mostly green; yellow and brown cost points
+    health_score = None
+    if leaf_pixels:
+        health_score = int(round(max(0.0, min(100.0, 100 - 120 * yellow_share - 160 * brown_share))))
+
+    hue_histogram, _ = np.histogram(hue[coloured], bins=12, range=(0, 256))
+
+    return {
+        "usable": not reasons,
+        "reasons": reasons,
+        "sharpness": round(sharpness, 1),
+        "brightness": round(brightness, 1),
+        "clipped_share": round(clipped_share, 3),
+        "plant_share": round(plant_share, 3),
+        "yellow_share": round(yellow_share, 3),
+        "brown_share": round(brown_share, 3),
+        "hue_histogram": hue_histogram.tolist(),
+        "health_score": health_score,
+        "health_label": _health_label(health_score)
+    }
+
+def _health_label(score):
+    """Turn the provisional score into the same wording the analysis reports use"""
+    if score is None:
+        return "Requires Assessment"
+    if score >= 80:
+        return "Good to Excellent"
+    if score >= 55:
+        return "Fair - Some Discoloration"
+    return "Poor - Needs Attention"
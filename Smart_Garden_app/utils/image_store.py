@@ -0,0 +1,151 @@
+"""
+Image Store Module
+Content-addressed storage for plant photos
+Identical uploads are stored once; thumbnails are generated once at ingest on a worker thread
+"""
+import hashlib
+import io
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from PIL import Image, ImageOps
+import config
+from utils.tracing import trace_methods
+
+# Formats we keep as-is; anything else is re-encoded to JPEG
+ORIGINAL_EXTENSIONS = {"JPEG": "jpg", "PNG": "png", "WEBP": "webp"}
+
+@trace_methods("images")
+class ImageStore:
+    def __init__(self, root=None, thumbnail_size=None, max_workers=2):
+        self.root = root or config.PLANT_IMAGES_DIR
+        self.thumbnail_size = thumbnail_size or config.THUMBNAIL_SIZE
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="thumbnailer")
+        self._pending = {}  # digest -> Future of the thumbnail job
+        self._lock = threading.Lock()
+
+    def _shard_dir(self, kind, digest):
+        """Two-level layout keeps directories small: <root>/<kind>/<ab>/<digest>"""
+        return os.path.join(self.root, kind, digest[:2])
+
+    def _original_path(self, digest, extension):
+        return os.path.join(self._shard_dir("originals", digest), f"{digest}.{extension}")
+
+    def _thumbnail_path(self, digest):
+        return os.path.join(self._shard_dir("thumbs", digest), f"{digest}_{self.thumbnail_size}.jpg")
+
+    def _write_atomic(self, path, data):
+        """Write bytes via temp file + rename so readers never see a partial image"""
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp_path, 'wb') as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+
+    def ingest(self, image_data):
+        """
+        Store an uploaded photo (bytes, file-like or PIL Image)
+        Returns: dict with content hash, original path, thumbnail path and duplicate flag
+        """
+        if isinstance(image_data, Image.Image):
+            buffered = io.BytesIO()
+            image_data.convert('RGB').save(buffered, format="JPEG", quality=90)
+            image_data = buffered.getvalue()
+        elif not isinstance(image_data, bytes):
+            if hasattr(image_data, 'getvalue'):
+                image_data = image_data.getvalue()
+            else:
+                image_data.seek(0)
+                image_data = image_data.read()
+
+        digest = hashlib.sha256(image_data).hexdigest()
+        original_path = self.get_original(digest)
+        duplicate = original_path is not None
+
+        if not duplicate:
+            image = Image.open(io.BytesIO(image_data))
+            extension = ORIGINAL_EXTENSIONS.get(image.format)
+            if extension is None:
+                # Unusual format - keep a JPEG copy instead
+                buffered = io.BytesIO()
+                image.convert('RGB').save(buffered, format="JPEG", quality=90)
+                image_data, extension = buffered.getvalue(), "jpg"
+            original_path = self._original_path(digest, extension)
+            self._write_atomic(original_path, image_data)
+
+        self._schedule_thumbnail(digest, original_path)
+        return {
+            "hash": digest,
+            "original_path": original_path,
+            "thumbnail_path": self._thumbnail_path(digest),
+            "duplicate": duplicate
+        }
+
+    def _schedule_thumbnail(self, digest, original_path):
+        """Queue thumbnail generation unless it exists or is already queued"""
+        if os.path.exists(self._thumbnail_path(digest)):
+            return
+        with self._lock:
+            if digest in self._pending:
+                return
+            future = self._executor.submit(self._make_thumbnail, digest, original_path)
+            self._pending[digest] = future
+        future.add_done_callback(lambda _: self._pending.pop(digest, None))
+
+    def _make_thumbnail(self, digest, original_path):
+        """Render a fixed-size JPEG thumbnail (runs on the worker thread)"""
+        try:
+            with Image.open(original_path) as image:
+                image = ImageOps.exif_transpose(image)
+                if image.mode != 'RGB':
+                    image = image.convert('RGB')
+                image.thumbnail((self.thumbnail_size, self.thumbnail_size))
+                buffered = io.BytesIO()
+                image.save(buffered, format="JPEG", quality=80, optimize=True)
+            thumbnail_path = self._thumbnail_path(digest)
+            self._write_atomic(thumbnail_path, buffered.getvalue())
+            return thumbnail_path
+        except Exception as e:
+            print(f"Thumbnail error for {digest[:12]}: {e}")
+            return None
+
+    def get_original(self, digest):
+        """Get the path of the full-size photo, or None if unknown"""
+        for extension in ORIGINAL_EXTENSIONS.values():
+            path = self._original_path(digest, extension)
+            if os.path.exists(path):
+                return path
+        return None
+
+    def get_thumbnail(self, digest, wait=False):
+        """
+        Get the thumbnail path for a photo
+        wait: block until a queued thumbnail is ready
+        Returns: thumbnail path, or None while it is still being generated
+        """
+        thumbnail_path = self._thumbnail_path(digest)
+        if os.path.exists(thumbnail_path):
+            return thumbnail_path
+        future = self._pending.get(digest)
+        if future is not None:
+            return future.result() if wait else None
+        # Thumbnail missing (e.g. older photo) - generate it in the background
+        original_path = self.get_original(digest)
+        if original_path:
+            self._schedule_thumbnail(digest, original_path)
+        return None
+
+    def lookup(self, digest):
+        """
+        Get everything known about a stored photo
+        Returns: dict with original/thumbnail paths, or None if the hash is unknown
+        """
+        original_path = self.get_original(digest)
+        if original_path is None:
+            return None
+        return {
+            "hash": digest,
+            "original_path": original_path,
+            "thumbnail_path": self.get_thumbnail(digest),
+            "thumbnail_ready": os.path.exists(self._thumbnail_path(digest))
+        }
@@ -0,0 +1,92 @@
+"""
+Keyword Matcher Module
+Aho-Corasick multi-pattern matcher shared by caption analysis and plant categorisation
+Classifies a text against every keyword table in a single linear pass (substring semantics)
+"""
+import json
+from collections import deque
+import config
+
+class KeywordMatcher:
+    def __init__(self, tables):
+        """
+        tables: dict of table name -> {label: [keywords]}
+        Label order inside a table is its priority order (first label wins in classify)
+        """
+        self.tables = {name: list(labels) for name, labels in tables.items()}
+        # Trie stored as parallel lists: goto transitions, failure links, outputs per state
+        self._goto = [{}]
+        self._fail = [0]
+        self._output = [[]]  # state -> [(table, label rank)]
+
+        for table, labels in tables.items():
+            for rank, (label, keywords) in enumerate(labels.items()):
+                for keyword in keywords:
+                    self._add(str(keyword).lower(), (table, rank))
+        self._build_failure_links()
+
+    @classmethod
+    def from_file(cls, path=None):
+        """Build a matcher from a JSON file of keyword tables"""
+        with open(path or config.KEYWORD_TABLES_FILE, 'r', encoding='utf-8') as f:
+            return cls(json.load(f))
+
+    def _add(self, keyword, target):
+        if not keyword:
+            return
+        state = 0
+        for char in keyword:
+            next_state = self._goto[state].get(char)
+            if next_state is None:
+                next_state = len(self._goto)
+                self._goto.append({})
+                self._fail.append(0)
+                self._output.append([])
+                self._goto[state][char] = next_state
+            state = next_state
+        if target not in self._output[state]:
+            self._output[state].append(target)
+
+    def _build_failure_links(self):
+        """Breadth-first pass: each state falls back to its longest proper suffix in the trie"""
+        queue = deque(self._goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for char, next_state in self._goto[state].items():
+                queue.append(next_state)
+                fallback = self._fail[state]
+                while fallback and char not in self._goto[fallback]:
+                    fallback = self._fail[fallback]
+                self._fail[next_state] = self._goto[fallback].get(char, 0)
+                # Inherit matches that end at the suffix state
+                self._output[next_state].extend(
+                    target for target in self._output[self._fail[next_state]] if target not in self._output[next_state]
+                )
+
+    def scan(self, text):
+        """
+        Find every table label whose keywords occur in the text
+        Returns: dict of table name -> labels found, in priority order
+        """
+        found = {}
+        state = 0
+        goto, fail, output = self._goto, self._fail, self._output
+        for char in str(text).lower():
+            while state and char not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(char, 0)
+            for table, rank in output[state]:
+                found.setdefault(table, set()).add(rank)
+
+        return {
+            table: [self.tables[table][rank] for rank in sorted(ranks)]
+            for table, ranks in found.items()
+        }
+
+    def classify(self, text, table, default=None):
+        """Highest-priority label of one table found in the text (or default)"""
+        labels = self.scan(text).get(table)
+        return labels[0] if labels else default
+
+# Built once at import and shared by all services
+keyword_matcher = KeywordMatcher.from_file()
@@ -0,0 +1,90 @@
+"""
+Memory Report Module
+Approximate memory held by each session's state, the uploads it still references and the shared store
+Used by the hidden profiler page to size containers (bytes per session x expected sessions + shared data)
+"""
+import sys
+from types import MappingProxyType
+
+def deep_sizeof(obj, seen=None, exclude=frozenset()):
+    """
+    Approximate deep size of an object in bytes (containers, mappings and object attributes followed)
+    seen: ids already counted (shared between calls to count shared objects once)
+    exclude: ids of objects owned elsewhere (e.g. shared store snapshots) that are not counted
+    """
+    seen = set() if seen is None else seen
+    stack = [obj]
+    total = 0
+    while stack:
+        item = stack.pop()
+        item_id = id(item)
+        if item_id in seen or item_id in exclude:
+            continue
+        seen.add(item_id)
+        try:
+            total += sys.getsizeof(item)
+        except TypeError:
+            continue
+        if isinstance(item, (str, bytes, bytearray, int, float, bool, type(None))):
+            continue
+        if isinstance(item, (dict, MappingProxyType)):
+            for key, value in item.items():
+                stack.append(key)
+                stack.append(value)
+        elif isinstance(item, (list, tuple, set, frozenset)):
+            stack.extend(item)
+        elif isinstance(item, memoryview):
+            continue
+        else:
+            attributes = getattr(item, "__dict__", None)
+            if attributes is not None:
+                stack.append(attributes)
+            for slot in getattr(type(item), "__slots__", ()):
+                if hasattr(item, slot):
+                    stack.append(getattr(item, slot))
+    return total
+
+def process_rss_mb():
+    """Resident memory of this process in MB (Linux /proc), or None where unavailable"""
+    try:
+        with open("/proc/self/status", "r", encoding="ascii") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return round(int(line.split()[1]) / 1024, 1)
+    except OSError:
+        pass
+    return None
+
+def session_memory_report(sessions, shared_store):
+    """
+    sessions: list of dicts with id, state (key -> value) and upload_bytes (files the session still holds)
+    shared_store: the process's SharedStore (its snapshots are counted once, not per session)
+    Returns: dict with sessions (rows sorted by total bytes, with the largest keys), shared_bytes,
+             shared_entries, mean_session_bytes and rss_mb
+    """
+    shared_seen = set()
+    shared_bytes = sum(deep_sizeof(snapshot, shared_seen) for _, snapshot in shared_store.snapshots())
+    exclude = frozenset(shared_seen)
+
+    rows = []
+    for session in sessions:
+        keys = {}
+        for key, value in session["state"].items():
+            keys[str(key)] = deep_sizeof(value, exclude=exclude)
+        state_bytes = sum(keys.values())
+        rows.append({
+            "id": session["id"],
+            "user_id": session["state"].get("user_id", ""),
+            "state_bytes": state_bytes,
+            "upload_bytes": session.get("upload_bytes", 0),
+            "total_bytes": state_bytes + session.get("upload_bytes", 0),
+            "keys": sorted(keys.items(), key=lambda item: item[1], reverse=True)[:5]
+        })
+    rows.sort(key=lambda row: row["total_bytes"], reverse=True)
+    return {
+        "sessions": rows,
+        "shared_bytes": shared_bytes,
+        "shared_entries": len(shared_store.snapshots()),
+        "mean_session_bytes": sum(row["total_bytes"] for row in rows) / len(rows) if rows else 0,
+        "rss_mb": process_rss_mb()
+    }
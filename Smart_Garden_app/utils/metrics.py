@@ -0,0 +1,237 @@
+"""
+Metrics Module
+Latency and outcome instrumentation for every external API call
+Counters and histograms live in one process-wide registry and are exposed in the
+Prometheus text format (local HTTP endpoint and/or a file for the node_exporter textfile collector)
+"""
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import requests
+from requests.adapters import HTTPAdapter
+import config
+
+LATENCY_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+SIZE_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304)
+
+def _format_labels(labels):
+    if not labels:
+        return ""
+    escaped = (str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"') for _, value in labels)
+    return "{" + ",".join(f'{name}="{value}"' for (name, _), value in zip(labels, escaped)) + "}"
+
+def _format_value(value):
+    return str(int(value)) if float(value).is_integer() else repr(float(value))
+
+class MetricsRegistry:
+    """Thread-safe counters and histograms keyed by metric name + label set"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._families = {}  # name -> (type, help text, buckets)
+        self._values = {}  # name -> {labels tuple -> counter value or [bucket counts, sum, count]}
+
+    def counter(self, name, help_text):
+        self._families[name] = ("counter", help_text, None)
+        self._values[name] = {}
+
+    def histogram(self, name, help_text, buckets):
+        self._families[name] = ("histogram", help_text, tuple(buckets))
+        self._values[name] = {}
+
+    def inc(self, name, value=1, **labels):
+        key = tuple(sorted(labels.items()))
+        with self._lock:
+            series = self._values[name]
+            series[key] = series.get(key, 0) + value
+
+    def observe(self, name, value, **labels):
+        key = tuple(sorted(labels.items()))
+        buckets = self._families[name][2]
+        with self._lock:
+            series = self._values[name]
+            state = series.get(key)
+            if state is None:
+                state = series[key] = [[0] * len(buckets), 0.0, 0]
+            for index, bound in enumerate(buckets):
+                if value <= bound:
+                    state[0][index] += 1
+            state[1] += value
+            state[2] += 1
+
+    def get(self, name, **labels):
+        """Current counter value, or (sum, count) for a histogram; None if never recorded"""
+        key = tuple(sorted(labels.items()))
+        with self._lock:
+            state = self._values[name].get(key)
+            if state is None or self._families[name][0] == "counter":
+                return state
+            return state[1], state[2]
+
+    def render(self):
+        """
+        Prometheus text exposition format (version 0.0.4)
+        Returns: text
+        """
+        lines = []
+        with self._lock:
+            for name, (kind, help_text, buckets) in self._families.items():
+                lines.append(f"# HELP {name} {help_text}")
+                lines.append(f"# TYPE {name} {kind}")
+                for key, state in sorted(self._values[name].items()):
+                    if kind == "counter":
+                        lines.append(f"{name}{_format_labels(key)} {_format_value(state)}")
+                        continue
+                    counts, total, count = state
+                    for bound, bucket_count in zip(buckets, counts):
+                        lines.append(f"{name}_bucket{_format_labels(key + (('le', _format_value(bound)),))} {bucket_count}")
+                    lines.append(f"{name}_bucket{_format_labels(key + (('le', '+Inf'),))} {count}")
+                    lines.append(f"{name}_sum{_format_labels(key)} {_format_value(total)}")
+                    lines.append(f"{name}_count{_format_labels(key)} {count}")
+        return "\n".join(lines) + "\n"
+
+metrics = MetricsRegistry()
+metrics.histogram("garden_api_request_duration_seconds", "External API call latency", LATENCY_BUCKETS)
+metrics.counter("garden_api_requests_total", "External API calls by HTTP status (or ok/error/timeout for SDK calls)")
+metrics.counter("garden_api_fallbacks_total", "Calls answered with mock / default data instead of the API")
+metrics.counter("garden_api_retries_total", "Extra attempts made after a failed call")
+metrics.histogram("garden_api_request_bytes", "Request payload size", SIZE_BUCKETS)
+metrics.histogram("garden_api_response_bytes", "Response payload size", SIZE_BUCKETS)
+metrics.counter("garden_cache_lookups_total", "Cache lookups by result (hit/miss, or the answer cache tier)")
+
+# One pooled session for all plain-HTTP APIs (keeps TLS connections alive between calls)
+_session = requests.Session()
+_session.mount("http://", HTTPAdapter(pool_connections=8, pool_maxsize=config.HTTP_POOL_SIZE))
+_session.mount("https://", HTTPAdapter(pool_connections=8, pool_maxsize=config.HTTP_POOL_SIZE))
+
+class ApiCall:
+    """Outcome details filled in by the caller inside track_call"""
+    def __init__(self):
+        self.status = "ok"
+        self.request_bytes = None
+        self.response_bytes = None
+        self.attempts = 0  # HTTP attempts seen by count_attempt (SDK clients retry internally)
+
+# The call being tracked on this thread, so HTTP client hooks can attribute attempts to it
+_current = threading.local()
+
+def count_attempt(*_):
+    """httpx request hook: count one attempt of the call tracked on this thread"""
+    call = getattr(_current, "call", None)
+    if call is not None:
+        call.attempts += 1
+
+@contextmanager
+def track_call(service, operation):
+    """
+    Time one outbound call and record its outcome
+    Exceptions are recorded as "timeout" / "error" and re-raised
+    Yields: ApiCall whose status / payload sizes the caller may set
+    """
+    call = ApiCall()
+    outer_call = getattr(_current, "call", None)
+    _current.call = call
+    started = time.perf_counter()
+    try:
+        yield call
+    except Exception as e:
+        call.status = "timeout" if isinstance(e, requests.exceptions.Timeout) or "timeout" in type(e).__name__.lower() else "error"
+        raise
+    finally:
+        _current.call = outer_call
+        status = str(call.status)
+        success = status == "ok" or status.startswith("2")
+        metrics.observe("garden_api_request_duration_seconds", time.perf_counter() - started,
+                        service=service, operation=operation, outcome="success" if success else "failure")
+        metrics.inc("garden_api_requests_total", service=service, operation=operation, status=status)
+        if call.attempts > 1:
+            metrics.inc("garden_api_retries_total", call.attempts - 1, service=service, operation=operation)
+        if call.request_bytes is not None:
+            metrics.observe("garden_api_request_bytes", call.request_bytes, service=service, operation=operation)
+        if call.response_bytes is not None:
+            metrics.observe("garden_api_response_bytes", call.response_bytes, service=service, operation=operation)
+
+def http_request(service, operation, method, url, **kwargs):
+    """
+    requests.request() through the shared pooled session, instrumented
+    Returns: requests.Response (exceptions propagate like requests)
+    """
+    with track_call(service, operation) as call:
+        if kwargs.get("data") is not None:
+            call.request_bytes = len(kwargs["data"])
+        elif kwargs.get("json") is not None:
+            call.request_bytes = len(json.dumps(kwargs["json"]))
+        response = _session.request(method, url, **kwargs)
+        call.status = response.status_code
+        call.response_bytes = len(response.content)
+    return response
+
+def record_fallback(service, operation, reason):
+    """Count a call served from mock / default data (reason: no_api_key, http_status, api_error, exception, ...)"""
+    metrics.inc("garden_api_fallbacks_total", service=service, operation=operation, reason=reason)
+
+def record_retry(service, operation):
+    metrics.inc("garden_api_retries_total", service=service, operation=operation)
+
+def record_cache(cache, result):
+    """Count a cache lookup (result: "hit", "miss" or a tier name)"""
+    metrics.inc("garden_cache_lookups_total", cache=cache, result=result)
+
+def write_metrics_file(path):
+    """Write the exposition atomically (textfile collectors must never see a partial file)"""
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        f.write(metrics.render())
+    os.replace(tmp_path, path)
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path.split("?")[0] != "/metrics":
+            self.send_error(404)
+            return
+        body = metrics.render().encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass  # Scrapes every few seconds would flood the app log
+
+_exporter_lock = threading.Lock()
+_exporter_started = False
+
+def start_metrics_exporter():
+    """
+    Start the configured exporters once per process:
+    METRICS_PORT -> http://127.0.0.1:<port>/metrics, METRICS_FILE -> file rewritten every METRICS_FILE_INTERVAL_SECONDS
+    """
+    global _exporter_started
+    with _exporter_lock:
+        if _exporter_started:
+            return
+        _exporter_started = True
+
+    if config.METRICS_PORT:
+        try:
+            server = ThreadingHTTPServer((config.METRICS_HOST, config.METRICS_PORT), _MetricsHandler)
+            server.daemon_threads = True
+            threading.Thread(target=server.serve_forever, name="metrics-http", daemon=True).start()
+            print(f"📈 Metrics served on http://{config.METRICS_HOST}:{config.METRICS_PORT}/metrics")
+        except OSError as e:
+            print(f"❌ Metrics endpoint error: {e}")
+
+    if config.METRICS_FILE:
+        def write_forever():
+            while True:
+                try:
+                    write_metrics_file(config.METRICS_FILE)
+                except OSError as e:
+                    print(f"❌ Metrics file error: {e}")
+                time.sleep(config.METRICS_FILE_INTERVAL_SECONDS)
+
+        threading.Thread(target=write_forever, name="metrics-file", daemon=True).start()
@@ -0,0 +1,283 @@
+"""
+Observation Store Module
+Rolling record of the observed weather of each location (successive get_current_weather samples)
+One memory-mapped file per location: fixed-width samples of the last 48 hours, hourly means for older data
+Feeds observed rain and evapotranspiration to the watering engine and the Dashboard's 7-day chart
+"""
+import math
+import mmap
+import os
+import re
+import threading
+import zlib
+from collections import OrderedDict
+from datetime import datetime, timedelta
+import numpy as np
+import config
+from utils.forecast_timeline import is_raining
+
+# Optional: cross-process file locks (the app and API processes may sample the same location)
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+
+MAGIC = b"SGOB"
+FORMAT_VERSION = 1
+RAW_HOURS = 48  # Full-resolution samples are kept this long; older data only as hourly means
+RAW_SLOTS = RAW_HOURS * 12  # Room for one sample every 5 minutes
+HOURLY_SLOTS = 14 * 24
+MIN_SAMPLE_SECONDS = 240  # Samples closer than this to the previous one are dropped (same API response)
+MIN_DAY_HOURS = 12  # Observed hours a day needs to count for daily temperature range / ET0
+
+HEADER_DTYPE = np.dtype([
+    ("magic", "S4"), ("version", "<u4"), ("raw_slots", "<u4"), ("hourly_slots", "<u4"),
+    ("raw_count", "<u8"),     # Samples ever written (next raw slot = raw_count % raw_slots)
+    ("hourly_count", "<u8"),
+    ("latitude", "<f8"),      # From the samples' coordinates (NaN until known)
+    ("reserved", "<u8", (4,))
+])
+# One record = 32 bytes; raw samples have samples == 1, hourly records the number of samples averaged
+RECORD_DTYPE = np.dtype([
+    ("time", "<i8"),          # Unix seconds (hourly records: start of the hour)
+    ("temperature", "<f4"), ("humidity", "<f4"), ("cloud_cover", "<f4"), ("wind_speed", "<f4"),
+    ("precipitation", "<f4"),  # mm in the hour before the sample
+    ("rain", "u1"), ("samples", "u1"), ("reserved", "u1", (2,))
+])
+SERIES_FIELDS = ("temperature", "humidity", "cloud_cover", "wind_speed", "precipitation")
+
+def hargreaves_et0(tmin, tmax, tmean, latitude, day_of_year):
+    """
+    Reference evapotranspiration (mm/day), Hargreaves-Samani with FAO-56 extraterrestrial radiation
+    Every argument may be a numpy array (vectorized over days / locations)
+    """
+    phi = np.radians(latitude)
+    angle = 2 * np.pi * np.asarray(day_of_year) / 365
+    inverse_distance = 1 + 0.033 * np.cos(angle)
+    declination = 0.409 * np.sin(angle - 1.39)
+    sunset_angle = np.arccos(np.clip(-np.tan(phi) * np.tan(declination), -1, 1))
+    radiation = (24 * 60 / np.pi) * 0.0820 * inverse_distance * (
+        sunset_angle * np.sin(phi) * np.sin(declination) + np.cos(phi) * np.cos(declination) * np.sin(sunset_angle)
+    )  # MJ/m2/day
+    temperature_range = np.sqrt(np.maximum(np.asarray(tmax) - np.asarray(tmin), 0))
+    return np.maximum(0.0023 * 0.408 * radiation * (np.asarray(tmean) + 17.8) * temperature_range, 0)
+
+def _prefix(values):
+    return np.concatenate(([0.0], np.cumsum(values, dtype=np.float64)))
+
+class LocationObservations:
+    """Observation file of one location; methods are thread-safe and file writes are locked across processes"""
+
+    def __init__(self, path):
+        self.path = path
+        size = HEADER_DTYPE.itemsize + (RAW_SLOTS + HOURLY_SLOTS) * RECORD_DTYPE.itemsize
+        self._lock = threading.Lock()
+        self._file = open(path, "a+b")
+        self._file_lock(True)
+        try:
+            fresh = os.fstat(self._file.fileno()).st_size != size
+            if fresh:
+                self._file.truncate(0)
+                self._file.truncate(size)
+            self._mmap = mmap.mmap(self._file.fileno(), size)
+            self._header = np.frombuffer(self._mmap, HEADER_DTYPE, 1, 0)
+            self._raw = np.frombuffer(self._mmap, RECORD_DTYPE, RAW_SLOTS, HEADER_DTYPE.itemsize)
+            self._hourly = np.frombuffer(self._mmap, RECORD_DTYPE, HOURLY_SLOTS, HEADER_DTYPE.itemsize + self._raw.nbytes)
+            header = self._header[0]
+            if fresh or header["magic"] != MAGIC or header["version"] != FORMAT_VERSION:
+                self._mmap[:] = bytes(size)
+                header["magic"], header["version"] = MAGIC, FORMAT_VERSION
+                header["raw_slots"], header["hourly_slots"] = RAW_SLOTS, HOURLY_SLOTS
+                header["latitude"] = math.nan
+        finally:
+            self._file_lock(False)
+        self._series = None  # (raw_count, end hour) -> hourly arrays and prefix sums, rebuilt after writes
+
+    def _file_lock(self, acquire):
+        if fcntl is not None:
+            fcntl.flock(self._file.fileno(), fcntl.LOCK_EX if acquire else fcntl.LOCK_UN)
+
+    def close(self):
+        with self._lock:
+            if self._mmap is None:
+                return
+            self._header = self._raw = self._hourly = self._series = None  # Views must go before the map
+            self._mmap.close()
+            self._file.close()
+            self._mmap = None
+
+    @property
+    def latitude(self):
+        latitude = float(self._header[0]["latitude"])
+        return None if math.isnan(latitude) else latitude
+
+    def add(self, weather):
+        """
+        Record a get_current_weather() sample; a completed hour is downsampled into the hourly records
+        Mock fallback weather (source "mock") is not an observation and is never stored
+        Returns: True if stored (False for mock weather or a repeat of the last sample)
+        """
+        if weather.get("source") == "mock":
+            return False
+        moment = weather.get("timestamp") or datetime.now()
+        timestamp = int(moment.timestamp())
+        with self._lock:
+            self._file_lock(True)
+            try:
+                header = self._header[0]
+                count = int(header["raw_count"])
+                if count:
+                    last = int(self._raw[(count - 1) % RAW_SLOTS]["time"])
+                    if timestamp - last < MIN_SAMPLE_SECONDS:
+                        return False
+                    if timestamp // 3600 > last // 3600:
+                        self._downsample(last // 3600, count)
+                record = self._raw[count % RAW_SLOTS]
+                record["time"] = timestamp
+                for field in SERIES_FIELDS:
+                    record[field] = weather.get(field) or 0
+                record["rain"] = is_raining(weather)
+                record["samples"] = 1
+                if weather.get("lat") is not None:
+                    header["latitude"] = weather["lat"]
+                header["raw_count"] = count + 1
+                self._series = None
+                return True
+            finally:
+                self._file_lock(False)
+
+    def _downsample(self, hour, count):
+        """Append the hourly mean of the raw samples of one hour (caller holds both locks)"""
+        samples = self._raw[np.arange(max(0, count - RAW_SLOTS), count) % RAW_SLOTS]
+        samples = samples[samples["time"] // 3600 == hour]
+        if not len(samples):
+            return
+        header = self._header[0]
+        record = self._hourly[int(header["hourly_count"]) % HOURLY_SLOTS]
+        record["time"] = hour * 3600
+        for field in ("temperature", "humidity", "cloud_cover", "wind_speed"):
+            record[field] = samples[field].mean()
+        record["precipitation"] = samples["precipitation"].max()  # Each sample already covers the last hour
+        record["rain"] = samples["rain"].any()
+        record["samples"] = min(len(samples), 255)
+        header["hourly_count"] += 1
+
+    def hourly_series(self, now=None):
+        """
+        Hourly arrays for the HOURLY_SLOTS hours ending with the current one (oldest first):
+        completed hours from the hourly records, the current hour from its raw samples so far
+        Returns: dict with hours (hour numbers since the epoch), observed, SERIES_FIELDS and rain (shared; read only)
+        """
+        end_hour = int((now or datetime.now()).timestamp()) // 3600
+        with self._lock:
+            count = int(self._header[0]["raw_count"])
+            if self._series is not None and self._series["key"] == (count, end_hour):
+                return self._series
+            hours = np.arange(end_hour - HOURLY_SLOTS + 1, end_hour + 1)
+            hourly = self._hourly[:min(int(self._header[0]["hourly_count"]), HOURLY_SLOTS)]
+            raw = self._raw[:min(count, RAW_SLOTS)]
+            raw = raw[raw["time"] // 3600 == end_hour]
+
+            series = {"key": (count, end_hour), "hours": hours, "observed": np.zeros(len(hours), dtype=bool)}
+            for field in SERIES_FIELDS:
+                series[field] = np.zeros(len(hours))
+            series["rain"] = np.zeros(len(hours), dtype=bool)
+            index = hourly["time"] // 3600 - hours[0]
+            valid = (index >= 0) & (index < len(hours))
+            series["observed"][index[valid]] = True
+            for field in SERIES_FIELDS + ("rain",):
+                series[field][index[valid]] = hourly[field][valid]
+            if len(raw):
+                series["observed"][-1] = True
+                for field in ("temperature", "humidity", "cloud_cover", "wind_speed"):
+                    series[field][-1] = raw[field].mean()
+                series["precipitation"][-1] = raw["precipitation"].max()
+                series["rain"][-1] = raw["rain"].any()
+            series["observed_sum"] = _prefix(series["observed"])
+            series["precipitation_sum"] = _prefix(series["precipitation"])
+            series["rain_sum"] = _prefix(series["rain"])
+            self._series = series
+            return series
+
+    def _last(self, prefix, hours):
+        hours = max(0, min(int(hours), HOURLY_SLOTS))
+        return float(prefix[-1] - prefix[HOURLY_SLOTS - hours])
+
+    def observed_hours(self, hours, now=None):
+        """How many of the last `hours` hours (the current one included) have an observation"""
+        return int(self._last(self.hourly_series(now)["observed_sum"], hours))
+
+    def precipitation_within(self, hours, now=None):
+        """Observed precipitation (mm) in the last `hours` hours"""
+        return self._last(self.hourly_series(now)["precipitation_sum"], hours)
+
+    def rained_within(self, hours, now=None):
+        """Whether rain was observed in the last `hours` hours"""
+        return self._last(self.hourly_series(now)["rain_sum"], hours) > 0
+
+    def hourly(self, hours=7 * 24, now=None):
+        """Observed hours of the last `hours` hours as dicts (datetime + SERIES_FIELDS + rain), oldest first"""
+        series = self.hourly_series(now)
+        rows = []
+        for position in np.flatnonzero(series["observed"][-hours:]) + HOURLY_SLOTS - min(hours, HOURLY_SLOTS):
+            row = {"datetime": datetime.fromtimestamp(int(series["hours"][position]) * 3600)}
+            for field in SERIES_FIELDS:
+                row[field] = round(float(series[field][position]), 2)
+            row["rain"] = bool(series["rain"][position])
+            rows.append(row)
+        return rows
+
+    def daily_et0(self, days=3, now=None):
+        """
+        Reference evapotranspiration of the last `days` full (local) days from observed temperatures
+        Days with fewer than MIN_DAY_HOURS observed hours are skipped
+        Returns: mean mm/day over the days that qualified, or None (no latitude yet / too few observations)
+        """
+        latitude = self.latitude
+        if latitude is None:
+            return None
+        now = now or datetime.now()
+        series = self.hourly_series(now)
+        start_of_today = now.replace(hour=0, minute=0, second=0, microsecond=0)
+        values = []
+        for offset in range(days, 0, -1):
+            day = start_of_today - timedelta(days=offset)
+            first = int(day.timestamp()) // 3600 - int(series["hours"][0])
+            window = slice(max(0, first), max(0, first + 24))
+            observed = series["observed"][window]
+            if observed.sum() < MIN_DAY_HOURS:
+                continue
+            temperatures = series["temperature"][window][observed]
+            values.append((temperatures.min(), temperatures.max(), temperatures.mean(), day.timetuple().tm_yday))
+        if not values:
+            return None
+        tmin, tmax, tmean, day_of_year = np.array(values).T
+        return float(hargreaves_et0(tmin, tmax, tmean, latitude, day_of_year).mean())
+
+class ObservationStore:
+    """Observation files of all locations under one directory; at most max_open files stay mapped"""
+
+    def __init__(self, directory=None, max_open=64):
+        self.directory = directory or config.OBSERVATION_DATA_DIR
+        self.max_open = max_open
+        self._open = OrderedDict()  # location key -> LocationObservations
+        self._lock = threading.Lock()
+
+    def _path(self, key):
+        city, country_code = key
+        slug = re.sub(r"[^a-z0-9]+", "-", city).strip("-")[:40] or "city"
+        return os.path.join(self.directory, f"{country_code.lower()}-{slug}-{zlib.crc32(repr(key).encode('utf-8')):08x}.obs")
+
+    def location(self, city, country_code):
+        """The observations of a location (its file is created on first use)"""
+        key = (str(city).strip().casefold(), str(country_code).strip().upper())
+        with self._lock:
+            observations = self._open.get(key)
+            if observations is None:
+                os.makedirs(self.directory, exist_ok=True)
+                observations = self._open[key] = LocationObservations(self._path(key))
+                while len(self._open) > self.max_open:
+                    # Not closed here: a digest build may still hold it; the map goes with the last reference
+                    self._open.popitem(last=False)
+            self._open.move_to_end(key)
+            return observations
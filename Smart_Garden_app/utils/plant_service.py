@@ -2,15 +2,37 @@
 Plant Service Module
 Handles plant data retrieval from Perenual API and plant care logic
 """
-import requests
 import json
 import config
+from utils.metrics import http_request, record_fallback
+from utils.tracing import trace_methods
+from utils.forecast_timeline import ForecastTimeline, is_raining
 from datetime import datetime, timedelta
 
+RECENT_RAIN_HOURS = 24  # Observed rain this recent skips watering
+RAIN_EXPECTED_HOURS = 12  # Forecast rain this soon postpones watering
+HEAT_DEGREE_HOURS = 30  # Forecast degree-hours above 30 °C in the next day that count as a heat spell (e.g. 6 h at 35 °C)
+ET0_DAYS = 3  # Observed days averaged for the evapotranspiration estimate
+HIGH_ET0_MM = 6  # Observed mm/day of evapotranspiration that dries soil like a heat wave
+LOW_ET0_MM = 2  # ... and that slows drying like cold weather
+
+def describe_time(moment, now=None):
+    """Short wording of an upcoming time, e.g. "today at 14:00", "tomorrow at 09:00", "on Tue at 18:00" """
+    now = now or datetime.now()
+    days = (moment.date() - now.date()).days
+    if days == 0:
+        return f"today at {moment:%H:%M}"
+    if days == 1:
+        return f"tomorrow at {moment:%H:%M}"
+    if days < 7:
+        return f"on {moment:%a} at {moment:%H:%M}"
+    return f"on {moment:%b %d}"
+
+@trace_methods("plant")
 class PlantService:
     def __init__(self):
-        # Access API key dynamically from config module (supports secrets.toml)
-        self.api_key = config.get_perenual_key()
+        # API key from the resolved settings (secrets.toml or .env, resolved once per process)
+        self.api_key = config.get_settings().perenual_api_key
         self.base_url = config.PERENUAL_BASE_URL
         
     def search_plant(self, query):
@@ -19,6 +41,7 @@ class PlantService:
         Returns: list of matching plants
         """
         if not self.api_key:
+            record_fallback("perenual", "search_plant", "no_api_key")
             return self._get_mock_plant_data(query)
             
         try:
@@ -28,15 +51,17 @@ class PlantService:
                 "q": query,
                 "page": 1
             }
-            response = requests.get(url, params=params, timeout=10)
+            response = http_request("perenual", "search_plant", "GET", url, params=params, timeout=10)
             
             if response.status_code == 200:
                 data = response.json()
                 return data.get("data", [])
             else:
+                record_fallback("perenual", "search_plant", "http_status")
                 return self._get_mock_plant_data(query)
         except Exception as e:
             print(f"Plant API Error: {e}")
+            record_fallback("perenual", "search_plant", "exception")
             return self._get_mock_plant_data(query)
     
     def get_plant_details(self, plant_id):
@@ -45,25 +70,65 @@ class PlantService:
         Returns: dict with plant care details
         """
         if not self.api_key:
+            record_fallback("perenual", "plant_details", "no_api_key")
             return self._get_mock_plant_details()
             
         try:
             url = f"{self.base_url}/species/details/{plant_id}"
             params = {"key": self.api_key}
-            response = requests.get(url, params=params, timeout=10)
+            response = http_request("perenual", "plant_details", "GET", url, params=params, timeout=10)
             
             if response.status_code == 200:
                 return response.json()
             else:
+                record_fallback("perenual", "plant_details", "http_status")
                 return self._get_mock_plant_details()
         except Exception as e:
             print(f"Plant Details API Error: {e}")
+            record_fallback("perenual", "plant_details", "exception")
             return self._get_mock_plant_details()
     
-    def calculate_watering_schedule(self, plant_name, base_interval_days, last_watered, weather_data, forecast_data):
+    def weather_watering_factors(self, weather_data, forecast_data, observations=None):
+        """
+        The weather side of the watering schedule, the same for every plant at a location
+        forecast_data: get_forecast() slots or the location's ForecastTimeline (all of it lies in the future)
+        observations: the location's LocationObservations; without them, only rain right now counts as recent rain
+        Returns: dict with temperature, recent_rain, recent_rain_mm, rain_expected, heat_degree_hours (next 24 hours)
+                 and et0_mm_per_day (observed evapotranspiration of the last days, None if unknown)
+        """
+        timeline = forecast_data if isinstance(forecast_data, ForecastTimeline) else ForecastTimeline.from_forecast(forecast_data)
+        
+        # Rain in the last 24 hours is an observation, not a forecast
+        et0_mm_per_day = None
+        if observations is not None:
+            recent_rain = observations.rained_within(RECENT_RAIN_HOURS)
+            recent_rain_mm = observations.precipitation_within(RECENT_RAIN_HOURS)
+            et0_mm_per_day = observations.daily_et0(ET0_DAYS)
+        else:
+            recent_rain = is_raining(weather_data)
+            recent_rain_mm = weather_data.get("precipitation") or 0
+        
+        # Check if rain is expected soon
+        rain_expected = timeline.precipitation_between(0, RAIN_EXPECTED_HOURS) > 0
+        
+        return {
+            "temperature": weather_data.get("temperature", 25),
+            "recent_rain": recent_rain,
+            "recent_rain_mm": round(recent_rain_mm, 1),
+            "rain_expected": rain_expected,
+            "heat_degree_hours": round(timeline.heat_degree_hours(0, 24), 1),
+            "et0_mm_per_day": None if et0_mm_per_day is None else round(et0_mm_per_day, 2)
+        }
+    
+    def calculate_watering_schedule(self, plant_name, base_interval_days, last_watered, weather_data, forecast_data, learned_interval_days=None, factors=None, soil=None):
         """
         Smart water reminder calculation based on weather
-        Returns: dict with watering status and recommendations
+        learned_interval_days: median interval from the plant's watering history (optional)
+        factors: weather_watering_factors() of the plant's location if already computed (weather_data /
+                 forecast_data are not read then)
+        soil: the plant's SoilModel prediction; the status then follows its next-water time instead of the
+              day-based interval (rain is already part of the soil balance)
+        Returns: dict with watering status and recommendations (plus next_water_at and moisture with soil)
         """
         if not last_watered:
             return {
@@ -78,37 +143,47 @@ class PlantService:
             last_watered = datetime.fromisoformat(last_watered)
         days_since = (datetime.now() - last_watered).days
         
-        # Check if it rained recently (last 24 hours)
-        recent_rain = False
-        if forecast_data:
-            for item in forecast_data[:8]:  # Check last 24 hours (8 x 3-hour intervals)
-                if item.get("precipitation", 0) > 0:
-                    recent_rain = True
-                    break
+        if factors is None:
+            factors = self.weather_watering_factors(weather_data, forecast_data)
+        recent_rain = factors["recent_rain"]
+        rain_expected = factors["rain_expected"]
         
-        # Adjust interval based on temperature
-        current_temp = weather_data.get("temperature", 25)
+        # Prefer the interval the user actually waters at over the static setting
+        interval_source = "static"
+        if learned_interval_days:
+            base_interval_days = min(30, max(1, round(learned_interval_days)))
+            interval_source = "learned"
+        
+        # Adjust interval based on temperature and how fast the soil dried lately (observed evapotranspiration)
+        current_temp = factors["temperature"]
         adjusted_interval = base_interval_days
         
-        if current_temp > 35:
+        et0 = factors.get("et0_mm_per_day")
+        if current_temp > 35 or factors.get("heat_degree_hours", 0) >= HEAT_DEGREE_HOURS or (et0 is not None and et0 >= HIGH_ET0_MM):
             adjusted_interval = max(1, base_interval_days - 1)  # Water more frequently in heat
-        elif current_temp < 15:
+        elif current_temp < 15 or (et0 is not None and et0 <= LOW_ET0_MM):
             adjusted_interval = base_interval_days + 1  # Water less frequently in cold
         
-        # Check if rain is expected soon
-        rain_expected = False
-        if forecast_data:
-            for item in forecast_data[:4]:  # Next 12 hours
-                if item.get("precipitation", 0) > 0:
-                    rain_expected = True
-                    break
-        
         # Determine watering status
         needs_water = False
         urgency = "low"
         message = ""
         
-        if recent_rain:
+        if soil is not None:
+            hours_until = (soil["next_water_at"] - datetime.now()).total_seconds() / 3600
+            if hours_until > 0:
+                message = f"✅ Happy! Next watering {describe_time(soil['next_water_at'])}."
+            elif rain_expected and soil["rain_capture"] > 0:
+                message = "🌧️ The soil is dry, but rain is expected soon. Hold off on watering."
+            else:
+                needs_water = True
+                if hours_until <= -24:
+                    urgency = "high"
+                    message = f"💧 Needs water! The soil dried out {-hours_until / 24:.0f} day(s) ago."
+                else:
+                    urgency = "medium"
+                    message = "💧 Time to water! The soil has dried out."
+        elif recent_rain:
             needs_water = False
             message = "✅ Recent rain detected. No need to water yet."
             urgency = "low"
@@ -134,10 +209,13 @@ class PlantService:
             "needs_water": needs_water,
             "days_since_watered": days_since,
             "adjusted_interval": adjusted_interval,
+            "interval_source": interval_source,
             "message": message,
             "urgency": urgency,
             "recent_rain": recent_rain,
-            "rain_expected": rain_expected
+            "rain_expected": rain_expected,
+            "next_water_at": soil["next_water_at"] if soil else None,
+            "moisture": soil["moisture"] if soil else None
         }
     
     def get_plant_care_tips(self, plant_name, plant_type="general"):
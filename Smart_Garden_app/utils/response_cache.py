@@ -0,0 +1,174 @@
+"""
+Response Cache Module
+Two-tier cache for AI Botanist answers
+Tier 1: exact match on the normalized question + context fingerprint
+Tier 2: local TF-IDF nearest neighbour (CPU only, no network) above a similarity threshold
+"""
+import hashlib
+import math
+import re
+import threading
+import time
+from collections import Counter, OrderedDict
+import config
+from utils.metrics import record_cache
+
+_WORD_PATTERN = re.compile(r"[a-z0-9]+")
+
+# Words that carry no meaning for matching plant questions
+STOPWORDS = {
+    "a", "an", "the", "is", "are", "am", "was", "were", "be", "been", "do", "does", "did",
+    "i", "me", "my", "mine", "you", "your", "it", "its", "this", "that", "these", "those",
+    "to", "of", "in", "on", "at", "for", "with", "and", "or", "so", "can", "could", "should",
+    "would", "will", "please", "what", "how", "why", "when", "which", "some", "any", "there"
+}
+
+def normalize_question(text):
+    """Lowercase, drop punctuation and collapse whitespace"""
+    return " ".join(_WORD_PATTERN.findall(str(text).lower()))
+
+def context_fingerprint(context):
+    """Short stable hash of the context the answer depends on"""
+    return hashlib.sha1(normalize_question(context).encode('utf-8')).hexdigest()[:16]
+
+def _stem(word):
+    """Very small suffix stripper so 'leaves'/'leaf' and 'turning'/'turn' line up"""
+    for suffix, replacement in (("ves", "f"), ("ies", "y"), ("oes", "o"), ("ing", ""), ("ed", ""), ("s", "")):
+        if word.endswith(suffix) and len(word) - len(suffix) >= 3:
+            return word[:-len(suffix)] + replacement
+    return word
+
+def question_terms(text):
+    """Content terms of a question: stemmed words without stopwords"""
+    return Counter(_stem(w) for w in _WORD_PATTERN.findall(str(text).lower()) if w not in STOPWORDS)
+
+class TTLCache:
+    """Small thread-safe LRU cache whose entries also expire after a TTL"""
+
+    def __init__(self, max_entries=500, ttl_seconds=3600, name=None):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.name = name  # Hit / miss counts are exported under this cache label when set
+        self._data = OrderedDict()  # key -> (expires_at, value)
+        self._lock = threading.Lock()
+
+    def get(self, key, default=None):
+        with self._lock:
+            item = self._data.get(key)
+            if item is not None and item[0] < time.monotonic():
+                del self._data[key]
+                item = None
+            if item is not None:
+                self._data.move_to_end(key)
+        if self.name:
+            record_cache(self.name, "miss" if item is None else "hit")
+        return default if item is None else item[1]
+
+    def set(self, key, value):
+        """Store a value; returns the (key, value) evicted to make room, if any"""
+        evicted = None
+        with self._lock:
+            self._data[key] = (time.monotonic() + self.ttl_seconds, value)
+            self._data.move_to_end(key)
+            if len(self._data) > self.max_entries:
+                old_key, (_, old_value) = self._data.popitem(last=False)
+                evicted = (old_key, old_value)
+        return evicted
+
+    def pop(self, key, default=None):
+        with self._lock:
+            item = self._data.pop(key, None)
+            return default if item is None else item[1]
+
+    def items(self):
+        """Snapshot of live (key, value) pairs, least recently used first"""
+        now = time.monotonic()
+        with self._lock:
+            return [(k, v) for k, (expires_at, v) in self._data.items() if expires_at >= now]
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self):
+        return len(self._data)
+
+class ResponseCache:
+    def __init__(self, max_entries=None, ttl_seconds=None, similarity_threshold=None):
+        max_entries = max_entries or config.RESPONSE_CACHE_MAX_ENTRIES
+        ttl_seconds = ttl_seconds or config.RESPONSE_CACHE_TTL_SECONDS
+        self.similarity_threshold = similarity_threshold or config.SEMANTIC_CACHE_THRESHOLD
+        # Tier 1: (normalized question, fingerprint) -> response
+        self._exact = TTLCache(max_entries, ttl_seconds)
+        # Tier 2: same keys -> term vector, searched by cosine similarity
+        self._semantic = TTLCache(max_entries, ttl_seconds)
+        self._document_frequency = Counter()
+        self._lock = threading.Lock()
+        self.stats = {"exact_hits": 0, "semantic_hits": 0, "misses": 0}
+
+    def _idf(self, term):
+        """Smoothed inverse document frequency over the cached questions"""
+        documents = max(1, len(self._semantic))
+        return math.log((1 + documents) / (1 + self._document_frequency.get(term, 0))) + 1
+
+    def _weights(self, terms):
+        """TF-IDF weights of a term counter, L2-normalized"""
+        weights = {term: count * self._idf(term) for term, count in terms.items()}
+        norm = math.sqrt(sum(w * w for w in weights.values())) or 1.0
+        return {term: w / norm for term, w in weights.items()}
+
+    def get(self, question, context=""):
+        """
+        Look up a cached answer
+        Returns: dict with response, tier ("exact"/"semantic") and similarity, or None on a miss
+        """
+        fingerprint = context_fingerprint(context)
+        key = (normalize_question(question), fingerprint)
+
+        response = self._exact.get(key)
+        if response is not None:
+            self.stats["exact_hits"] += 1
+            return {"response": response, "tier": "exact", "similarity": 1.0}
+
+        terms = question_terms(question)
+        if terms:
+            with self._lock:
+                query = self._weights(terms)
+                best_key, best_score = None, 0.0
+                for candidate_key, candidate_terms in self._semantic.items():
+                    if candidate_key[1] != fingerprint:
+                        continue
+                    candidate = self._weights(candidate_terms)
+                    score = sum(w * candidate.get(term, 0.0) for term, w in query.items())
+                    if score > best_score:
+                        best_key, best_score = candidate_key, score
+            if best_key is not None and best_score >= self.similarity_threshold:
+                response = self._exact.get(best_key)
+                if response is not None:
+                    self.stats["semantic_hits"] += 1
+                    return {"response": response, "tier": "semantic", "similarity": round(best_score, 3)}
+
+        self.stats["misses"] += 1
+        return None
+
+    def put(self, question, context, response):
+        """Cache an answer under both tiers"""
+        key = (normalize_question(question), context_fingerprint(context))
+        terms = question_terms(question)
+        self._exact.set(key, response)
+        with self._lock:
+            previous = self._semantic.pop(key)
+            if previous is not None:
+                self._document_frequency.subtract(previous.keys())
+            evicted = self._semantic.set(key, terms)
+            self._document_frequency.update(terms.keys())
+            if evicted is not None:
+                self._document_frequency.subtract(evicted[1].keys())
+                self._exact.pop(evicted[0])
+            self._document_frequency += Counter()  # drop zero counts
+
+    def clear(self):
+        self._exact.clear()
+        with self._lock:
+            self._semantic.clear()
+            self._document_frequency.clear()
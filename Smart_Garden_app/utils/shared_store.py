@@ -0,0 +1,69 @@
+"""
+Shared Store Module
+Process-wide, read-only snapshots of each user's garden data (plants, recent chat)
+Every session of a user reads the same snapshot; a session keeps only the version stamp it rendered
+"""
+import os
+import threading
+from collections import OrderedDict
+from types import MappingProxyType
+
+def file_version(path):
+    """
+    Version stamp of a data file: changes with every atomic rewrite (new inode), even within one mtime tick
+    Returns: (mtime_ns, inode, size), or None if the file does not exist
+    """
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    return (stat.st_mtime_ns, stat.st_ino, stat.st_size)
+
+def freeze(records):
+    """Read-only view of a list of dict records: a tuple of mapping proxies (records are copied once)"""
+    return tuple(MappingProxyType(dict(record)) for record in records)
+
+class Snapshot:
+    """One version of one user's data"""
+    __slots__ = ("version", "data")
+
+    def __init__(self, version, data):
+        self.version = version
+        self.data = data
+
+class SharedStore:
+    """Versioned snapshots keyed by (kind, user_id); least recently used users are dropped past max_entries"""
+
+    def __init__(self, max_entries=1000):
+        self.max_entries = max_entries
+        self._data = OrderedDict()  # (kind, user_id) -> Snapshot
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.loads = 0
+
+    def get(self, kind, user_id, version, loader):
+        """
+        Snapshot of (kind, user_id) at version; loader() reads the data when the stored snapshot is older
+        Read the version before loading, so a write that races the load only causes one extra reload
+        """
+        key = (kind, user_id)
+        with self._lock:
+            snapshot = self._data.get(key)
+            if snapshot is not None and snapshot.version == version and version is not None:
+                self._data.move_to_end(key)
+                self.hits += 1
+                return snapshot
+
+        snapshot = Snapshot(version, freeze(loader()))
+        with self._lock:
+            self.loads += 1
+            self._data[key] = snapshot
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_entries:
+                self._data.popitem(last=False)
+        return snapshot
+
+    def snapshots(self):
+        """List of ((kind, user_id), Snapshot), least recently used first"""
+        with self._lock:
+            return list(self._data.items())
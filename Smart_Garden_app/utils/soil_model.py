@@ -0,0 +1,233 @@
+"""
+Soil Model Module
+Hourly soil-water balance per plant: depletion grows with Hargreaves ET0 scaled by placement and sun,
+and shrinks with the rain the placement catches; a plant needs water when depletion reaches its threshold
+Weather inputs are built once per location digest; plants are advanced together (numpy), from their last state
+"""
+import threading
+from collections import OrderedDict
+from datetime import datetime
+import numpy as np
+import config
+from utils.observation_store import hargreaves_et0, MIN_DAY_HOURS
+
+REFERENCE_ET0_MM = 4.0  # ET0 (mm/day) at which a plant dries in exactly its watering interval
+PAST_HOURS = 14 * 24  # Hours of observed weather the balance can replay after a watering
+# Share of ET0 a plant loses, by placement (matches the sun model's placement multipliers) and sun exposure
+PLACEMENT_FACTORS = {"Open Roof": 1.0, "Balcony": 0.7, "Indoor Window": 0.4}
+OTHER_PLACEMENT_FACTOR = 0.5
+SUN_PREFERENCE_FACTORS = {"Full Sun": 1.15, "Morning Sun": 1.0, "Afternoon Shade": 0.85}
+RAIN_CAPTURE = {"Open Roof": 1.0, "Balcony": 0.3}  # Share of rainfall reaching the pot; 0 elsewhere
+MAX_INTERVAL_DAYS = 30
+
+# Share of a day's ET0 lost in each hour of the day (sun-driven: none at night, peak at noon)
+_DAY_SHAPE = np.maximum(np.sin(np.pi * (np.arange(24) + 0.5 - 6) / 12), 0)
+HOURLY_ET0_SHARE = _DAY_SHAPE / _DAY_SHAPE.sum()
+
+def _epoch_hour(moment):
+    return moment.timestamp() / 3600
+
+class SoilDrivers:
+    """
+    Hourly ET0 and rain (mm) of one location, from PAST_HOURS ago to the end of the forecast
+    Past hours come from the observation store, later ones from the forecast timeline
+    """
+
+    def __init__(self, start_hour, now_index, et0, rain, version):
+        self.start_hour = start_hour  # Hour number (since the epoch) of index 0
+        self.now_index = now_index    # Index of the current hour
+        self.et0 = et0
+        self.rain = rain
+        self.version = version        # Digest version the drivers were built from
+        forecast = et0[now_index:]
+        self.mean_hourly_et0 = float(forecast.mean()) if len(forecast) else REFERENCE_ET0_MM / 24
+
+    @classmethod
+    def from_digest(cls, digest, observations=None, now=None):
+        now = now or datetime.now()
+        now_hour = int(now.timestamp()) // 3600
+        timeline = digest['weather']['timeline']
+        current = digest['weather']['current']
+        start_hour = now_hour - PAST_HOURS + 1
+        length = PAST_HOURS + max(0, len(timeline) - 1)
+
+        temperature = np.full(length, np.nan)
+        rain = np.zeros(length)
+        # Forecast from the current hour on (observations override the current hour below)
+        temperature[PAST_HOURS - 1:PAST_HOURS - 1 + len(timeline)] = timeline.temperature
+        rain[PAST_HOURS - 1:PAST_HOURS - 1 + len(timeline)] = timeline.precipitation
+        latitude = current.get('lat')
+        if observations is not None:
+            series = observations.hourly_series(now)
+            observed = series["observed"][-PAST_HOURS:]
+            temperature[:PAST_HOURS][observed] = series["temperature"][-PAST_HOURS:][observed]
+            rain[:PAST_HOURS][observed] = series["precipitation"][-PAST_HOURS:][observed]
+            latitude = observations.latitude if latitude is None else latitude
+        if latitude is None:
+            latitude = config.DEFAULT_LATITUDE
+
+        # Unobserved hours take the nearest known temperatures (rain unknown counts as dry)
+        is_known = ~np.isnan(temperature)
+        known = np.flatnonzero(is_known)
+        if len(known):
+            temperature = np.interp(np.arange(length), known, temperature[known])
+        else:
+            temperature[:] = current.get('temperature', 25)
+
+        # Daily Hargreaves ET0 from each local day's temperatures, spread over the day's hours
+        hours = np.arange(start_hour, start_hour + length)
+        utc_offset = int(now.astimezone().utcoffset().total_seconds()) // 3600
+        local_hours = hours + utc_offset
+        days = local_hours // 24
+        day_starts = np.flatnonzero(np.diff(days, prepend=days[0] - 1))
+        tmin = np.minimum.reduceat(temperature, day_starts)
+        tmax = np.maximum.reduceat(temperature, day_starts)
+        tmean = np.add.reduceat(temperature, day_starts) / np.diff(np.append(day_starts, length))
+        day_of_year = np.array([
+            datetime.fromtimestamp(int(hours[start]) * 3600).timetuple().tm_yday for start in day_starts
+        ])
+        daily_et0 = hargreaves_et0(tmin, tmax, tmean, latitude, day_of_year)
+        # A day's range needs enough known hours; other days take the mean of the known ones
+        good = np.add.reduceat(is_known.astype(int), day_starts) >= MIN_DAY_HOURS
+        daily_et0[~good] = daily_et0[good].mean() if good.any() else REFERENCE_ET0_MM
+        et0 = daily_et0[np.searchsorted(day_starts, np.arange(length), side="right") - 1] * HOURLY_ET0_SHARE[local_hours % 24]
+        return cls(start_hour, PAST_HOURS - 1, et0, rain, digest['version'])
+
+def plant_parameters(plants, learned_intervals=None):
+    """
+    Vectorized per-plant constants
+    Returns: (crop factor, rain capture, threshold mm) arrays
+    """
+    learned_intervals = learned_intervals or [None] * len(plants)
+    crop_factor = np.array([
+        PLACEMENT_FACTORS.get(plant.get('placement'), OTHER_PLACEMENT_FACTOR)
+        * SUN_PREFERENCE_FACTORS.get(plant.get('sun_preference'), 1.0)
+        for plant in plants
+    ])
+    rain_capture = np.array([RAIN_CAPTURE.get(plant.get('placement'), 0.0) for plant in plants])
+    interval = np.array([
+        min(MAX_INTERVAL_DAYS, max(1, float(learned or plant.get('watering_interval_days') or 3)))
+        for plant, learned in zip(plants, learned_intervals)
+    ])
+    # Calibrated so that at REFERENCE_ET0_MM the plant dries in exactly its interval
+    return crop_factor, rain_capture, interval * REFERENCE_ET0_MM * crop_factor
+
+class SoilModel:
+    """
+    Soil-water state of every plant seen, advanced hour by hour from where it was left
+    A new watering restarts a plant at zero depletion; at most max_users gardens are kept
+    """
+
+    def __init__(self, observation_store=None, max_users=None):
+        self.observation_store = observation_store
+        self.max_users = max_users or config.SHARED_STORE_MAX_USERS
+        self._drivers = OrderedDict()  # (city, country_code) -> SoilDrivers of the latest digest
+        # user_id -> {plant_id: (last_watered, hour number the state is at, depletion, dry since hour number or NaN)}
+        self._states = OrderedDict()
+        self._lock = threading.Lock()
+
+    def drivers(self, digest):
+        """Weather inputs of a digest's location (built once per digest version)"""
+        key = (str(digest['city']).strip().casefold(), str(digest['country_code']).strip().upper())
+        with self._lock:
+            drivers = self._drivers.get(key)
+        if drivers is None or drivers.version != digest['version']:
+            observations = self.observation_store.location(*key) if self.observation_store else None
+            drivers = SoilDrivers.from_digest(digest, observations)
+            with self._lock:
+                self._drivers[key] = drivers
+                self._drivers.move_to_end(key)
+                while len(self._drivers) > config.DIGEST_MAX_LOCATIONS:
+                    self._drivers.popitem(last=False)
+        return drivers
+
+    def predict(self, user_id, plants, digest, learned_intervals=None, now=None):
+        """
+        Soil-water state of plants (all at one location) and the hour each crosses its dryness threshold
+        Returns: list of dicts (in plant order) with depletion_mm, threshold_mm, moisture (0..1),
+                 next_water_at (datetime; in the past when already dry), rain_capture; None for never-watered plants
+        """
+        now = now or datetime.now()
+        drivers = self.drivers(digest)
+        crop_factor, rain_capture, threshold = plant_parameters(plants, learned_intervals)
+        count = len(plants)
+        watered = [plant.get('last_watered') for plant in plants]
+        now_index = int(now.timestamp()) // 3600 - drivers.start_hour
+        now_index = min(max(now_index, 0), len(drivers.et0) - 1)
+
+        with self._lock:
+            states = self._states.setdefault(user_id, {})
+            self._states.move_to_end(user_id)
+            while len(self._states) > self.max_users:
+                self._states.popitem(last=False)
+            saved = [states.get(plant.get('id')) for plant in plants]
+
+        # Start from the saved state, or from the last watering (zero depletion)
+        start = np.full(count, now_index)
+        depletion = np.zeros(count)
+        dry_since = np.full(count, np.nan)
+        valid = np.ones(count, dtype=bool)
+        for index, (last_watered, state) in enumerate(zip(watered, saved)):
+            if not last_watered:
+                valid[index] = False
+            elif state is not None and state[0] == last_watered:
+                start[index] = state[1] - drivers.start_hour
+                depletion[index], dry_since[index] = state[2], state[3]
+            else:
+                try:
+                    watered_hour = _epoch_hour(datetime.fromisoformat(str(last_watered))) - drivers.start_hour
+                except ValueError:
+                    valid[index] = False
+                    continue
+                if watered_hour < 0:
+                    # Watered before the replay window: the hours before it dried at the reference rate
+                    depletion[index] = -watered_hour * crop_factor[index] * REFERENCE_ET0_MM / 24
+                    watered_hour = 0
+                start[index] = int(np.ceil(watered_hour))
+        start = np.clip(start, 0, now_index)
+
+        # Replay completed hours up to now (all plants at once; a plant joins at its start hour)
+        for hour in range(int(start.min()) if count else now_index, now_index):
+            active = valid & (start <= hour)
+            depletion = np.where(
+                active,
+                np.maximum(depletion + crop_factor * drivers.et0[hour] - rain_capture * drivers.rain[hour], 0),
+                depletion
+            )
+            crossed = active & np.isnan(dry_since) & (depletion >= threshold)
+            dry_since[crossed] = drivers.start_hour + hour + 1
+            dry_since[active & (depletion < threshold)] = np.nan
+
+        with self._lock:
+            for index, plant in enumerate(plants):
+                if valid[index]:
+                    states[plant.get('id')] = (watered[index], drivers.start_hour + now_index, depletion[index], dry_since[index])
+
+        # Project forward through the forecast, then at the forecast's mean rate
+        projected = depletion.copy()
+        crossing = np.full(count, np.nan)
+        for hour in range(now_index, len(drivers.et0)):
+            before = projected
+            projected = np.maximum(projected + crop_factor * drivers.et0[hour] - rain_capture * drivers.rain[hour], 0)
+            new = np.isnan(crossing) & (before < threshold) & (projected >= threshold)
+            step = np.where(projected > before, projected - before, 1)
+            crossing[new] = (drivers.start_hour + hour + (threshold - before) / step)[new]
+        beyond = np.isnan(crossing) & (projected < threshold)
+        rate = np.maximum(crop_factor * drivers.mean_hourly_et0, 1e-6)
+        crossing[beyond] = drivers.start_hour + len(drivers.et0) + ((threshold - projected) / rate)[beyond]
+        already_dry = depletion >= threshold
+        crossing[already_dry] = np.where(np.isnan(dry_since), _epoch_hour(now), dry_since)[already_dry]
+
+        results = []
+        for index in range(count):
+            if not valid[index]:
+                results.append(None)
+                continue
+            results.append({
+                "depletion_mm": round(float(depletion[index]), 2),
+                "threshold_mm": round(float(threshold[index]), 2),
+                "moisture": round(float(np.clip(1 - depletion[index] / threshold[index], 0, 1)), 3),
+                "next_water_at": datetime.fromtimestamp(max(float(crossing[index]), _epoch_hour(now) - 24 * MAX_INTERVAL_DAYS) * 3600),
+                "rain_capture": float(rain_capture[index])
+            })
+        return results
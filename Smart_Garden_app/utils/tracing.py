@@ -0,0 +1,331 @@
+"""
+Tracing Module
+Lightweight spans around page sections and service methods, kept in memory per page
+Each full script run is one trace; the hidden admin page draws the last N as waterfalls
+Spans are mirrored to OpenTelemetry when it is installed; sampled cProfile captures via PROFILE_SAMPLE_RATE
+"""
+import contextvars
+import cProfile
+import functools
+import inspect
+import io
+import marshal
+import pstats
+import random
+import threading
+import time
+from collections import OrderedDict, deque
+import config
+
+# Optional dependency: with opentelemetry-api (+ an SDK) installed, every span is also exported there
+try:
+    from opentelemetry import trace as otel_trace
+    OTEL_AVAILABLE = True
+except ImportError:
+    otel_trace = None
+    OTEL_AVAILABLE = False
+
+_otel_tracer = otel_trace.get_tracer("smart_garden") if OTEL_AVAILABLE else None
+
+# Innermost open span of the running code (copied into worker threads with contextvars.copy_context)
+_current_span = contextvars.ContextVar("current_span", default=None)
+# Open render of this script thread (closed by the next run if st.rerun / st.stop / an error cut it short)
+_local = threading.local()
+
+class Span:
+    """One timed operation; times are epoch nanoseconds like OpenTelemetry"""
+    __slots__ = ("name", "trace", "span_id", "parent_id", "start_ns", "end_ns", "attributes", "status", "thread", "_otel")
+
+    def __init__(self, name, trace, parent=None, attributes=None):
+        self.name = name
+        self.trace = trace
+        self.span_id = f"{random.getrandbits(64):016x}"
+        self.parent_id = parent.span_id if parent else None
+        self.start_ns = time.time_ns()
+        self.end_ns = None
+        self.attributes = dict(attributes or {})
+        self.status = "ok"
+        self.thread = threading.current_thread().name
+        self._otel = None
+        if _otel_tracer is not None:
+            context = otel_trace.set_span_in_context(parent._otel) if parent is not None and parent._otel is not None else None
+            self._otel = _otel_tracer.start_span(name, context=context, start_time=self.start_ns, attributes=self.attributes)
+
+    def set_attribute(self, key, value):
+        self.attributes[key] = value
+
+    def end(self, end_ns=None, status=None):
+        if self.end_ns is not None:
+            return
+        self.end_ns = end_ns or time.time_ns()
+        if status:
+            self.status = status
+        self.trace.add(self)
+        if self._otel is not None:
+            self._otel.set_attributes(self.attributes)
+            if self.status != "ok":
+                self._otel.set_status(otel_trace.Status(otel_trace.StatusCode.ERROR, self.status))
+            self._otel.end(end_time=self.end_ns)
+
+    @property
+    def duration_ms(self):
+        return ((self.end_ns or time.time_ns()) - self.start_ns) / 1e6
+
+class Trace:
+    """Finished spans of one render (spans from hedged worker threads may still arrive after the root ends)"""
+    def __init__(self, key):
+        self.key = key
+        self.trace_id = f"{random.getrandbits(128):032x}"
+        self.started_at = time.time()
+        self.spans = []
+        self.root = None
+        self._lock = threading.Lock()
+
+    def add(self, span):
+        with self._lock:
+            self.spans.append(span)
+
+    def snapshot(self):
+        """Spans ordered by start time"""
+        with self._lock:
+            return sorted(self.spans, key=lambda span: span.start_ns)
+
+class InMemoryExporter:
+    """Last N traces per key (page name) and the sampled cProfile captures"""
+    def __init__(self, max_traces_per_key=None, max_profiles=None):
+        self.max_traces_per_key = max_traces_per_key or config.TRACE_HISTORY_PER_PAGE
+        self._traces = OrderedDict()  # key -> deque of Trace, oldest first
+        self.profiles = deque(maxlen=max_profiles or config.PROFILE_HISTORY)
+        self._lock = threading.Lock()
+
+    def export(self, trace):
+        with self._lock:
+            if trace.key not in self._traces:
+                self._traces[trace.key] = deque(maxlen=self.max_traces_per_key)
+            self._traces[trace.key].append(trace)
+
+    def export_profile(self, trace, profile):
+        """Snapshot a disabled profiler (on its own thread: create_stats() would disable the caller's profiler)"""
+        profile.create_stats()
+        self.profiles.append({
+            "key": trace.key,
+            "trace_id": trace.trace_id,
+            "started_at": trace.started_at,
+            "duration_ms": trace.root.duration_ms,
+            "stats": profile.stats  # Raw pstats dict: {(file, line, function): (cc, nc, tt, ct, callers)}
+        })
+
+    def keys(self):
+        with self._lock:
+            return list(self._traces)
+
+    def traces(self, key):
+        """Traces recorded for a key, newest first"""
+        with self._lock:
+            return list(reversed(self._traces.get(key, ())))
+
+    def clear(self):
+        with self._lock:
+            self._traces.clear()
+            self.profiles.clear()
+
+exporter = InMemoryExporter()
+
+class _Render:
+    """Root span of one script run plus the stack of open section spans"""
+    def __init__(self, key):
+        self.trace = Trace(key)
+        self.root = self.trace.root = Span("render", self.trace)
+        self.sections = []
+        self.profile = None
+        self.closed = False
+        self.last_activity_ns = self.root.start_ns
+        _current_span.set(self.root)
+
+    def set_key(self, key):
+        """Group this render under another key (e.g. once the page is known)"""
+        self.trace.key = key
+        self.root.set_attribute("page", key)
+
+    def mark(self, name, depth=1):
+        """
+        End the open section at this depth (and any below it) and start a new one
+        depth=1 sections sit under the render, depth=2 under the current depth-1 section, ...
+        """
+        if self.closed:
+            return
+        self._close_sections(depth)
+        parent = self.sections[-1] if self.sections else self.root
+        section = Span(name, self.trace, parent)
+        self.sections.append(section)
+        _current_span.set(section)
+
+    def _close_sections(self, depth, end_ns=None):
+        while len(self.sections) >= depth:
+            self.sections.pop().end(end_ns)
+        self.last_activity_ns = end_ns or time.time_ns()
+        _current_span.set(self.sections[-1] if self.sections else self.root)
+
+    def end(self, status="ok", end_ns=None):
+        if self.closed:
+            return
+        self.closed = True
+        self._close_sections(1, end_ns)
+        if self.profile is not None:
+            self.profile.disable()
+        self.root.end(end_ns, status)
+        _current_span.set(None)
+        if getattr(_local, "render", None) is self:
+            _local.render = None
+        exporter.export(self.trace)
+        if self.profile is not None:
+            exporter.export_profile(self.trace, self.profile)
+            self.profile = None
+
+class _NoRender:
+    """Stand-in when tracing is disabled"""
+    closed = True
+
+    def set_key(self, key):
+        pass
+
+    def mark(self, name, depth=1):
+        pass
+
+    def end(self, status="ok", end_ns=None):
+        pass
+
+def start_render(key="script"):
+    """
+    Start the trace of one full script run (call at the top of app.py)
+    A previous run on this thread that never reached end_render is closed as "interrupted"
+    Returns: render handle with mark(section, depth) / set_key(page) / end()
+    """
+    if not config.TRACING_ENABLED:
+        return _NoRender()
+    previous = getattr(_local, "render", None)
+    if previous is not None and not previous.closed:
+        previous.end("interrupted", previous.last_activity_ns)
+    render = _local.render = _Render(key)
+    if config.PROFILE_SAMPLE_RATE and random.random() < config.PROFILE_SAMPLE_RATE:
+        profile = cProfile.Profile()
+        try:
+            profile.enable()
+            render.profile = profile
+        except ValueError:
+            pass  # Another profiler is active (Python 3.12+ allows one per process); skip this sample
+    return render
+
+def end_render():
+    """Finish this thread's render trace and hand it to the exporter"""
+    render = getattr(_local, "render", None)
+    if render is not None:
+        render.end()
+
+def traced(name=None, standalone=False):
+    """
+    Decorator: record each call as a span under the active span
+    Without an active span the call is not recorded, unless standalone=True
+    (used for fragments, whose reruns run without the rest of the script)
+    """
+    def decorate(func):
+        span_name = name or func.__qualname__
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            parent = _current_span.get()
+            if parent is None:
+                if not (standalone and config.TRACING_ENABLED):
+                    return func(*args, **kwargs)
+                render = start_render(f"fragment: {span_name}")
+                status = "ok"
+                try:
+                    return func(*args, **kwargs)
+                except BaseException as e:  # Also st.rerun() / st.stop(), which are BaseExceptions
+                    status = type(e).__name__
+                    raise
+                finally:
+                    render.end(status)
+
+            span = Span(span_name, parent.trace, parent)
+            token = _current_span.set(span)
+            try:
+                return func(*args, **kwargs)
+            except BaseException as e:
+                span.status = type(e).__name__
+                raise
+            finally:
+                _current_span.reset(token)
+                span.end()
+        return wrapper
+    return decorate
+
+def trace_methods(prefix):
+    """Class decorator: trace every public method as "<prefix>.<method>" """
+    def decorate(cls):
+        for attr, value in list(vars(cls).items()):
+            if not attr.startswith("_") and inspect.isfunction(value):
+                setattr(cls, attr, traced(f"{prefix}.{attr}")(value))
+        return cls
+    return decorate
+
+def waterfall_rows(trace):
+    """
+    Spans of a trace laid out for a waterfall chart
+    Returns: list of dicts (name, depth, offset_ms, duration_ms, status, thread, attributes), root first
+    """
+    spans = trace.snapshot()
+    if trace.root is None or trace.root.end_ns is None:
+        return []
+    depths = {trace.root.span_id: 0}
+    rows = []
+    for span in sorted(spans, key=lambda span: (span.start_ns, span is not trace.root)):
+        depth = depths.get(span.parent_id, -1) + 1
+        depths[span.span_id] = depth
+        rows.append({
+            "name": span.name,
+            "depth": depth,
+            "offset_ms": (span.start_ns - trace.root.start_ns) / 1e6,
+            "duration_ms": span.duration_ms,
+            "status": span.status,
+            "thread": span.thread,
+            "attributes": span.attributes
+        })
+    return rows
+
+def section_summary(traces):
+    """
+    Time per span name across traces (where a page spends its render time)
+    Returns: list of dicts (name, calls, total_ms, mean_ms, max_ms), slowest total first
+    """
+    totals = {}
+    for trace in traces:
+        for span in trace.snapshot():
+            if span is trace.root:
+                continue
+            entry = totals.setdefault(span.name, {"name": span.name, "calls": 0, "total_ms": 0.0, "max_ms": 0.0})
+            entry["calls"] += 1
+            entry["total_ms"] += span.duration_ms
+            entry["max_ms"] = max(entry["max_ms"], span.duration_ms)
+    for entry in totals.values():
+        entry["mean_ms"] = entry["total_ms"] / entry["calls"]
+    return sorted(totals.values(), key=lambda entry: entry["total_ms"], reverse=True)
+
+class _StatsSource:
+    """Feeds a raw stats dict to pstats.Stats (which loads from anything with create_stats())"""
+    def __init__(self, stats):
+        self.stats = dict(stats)
+
+    def create_stats(self):
+        pass
+
+def profile_report(capture, limit=30, sort_by="cumulative"):
+    """Top functions of a cProfile capture as pstats text"""
+    stream = io.StringIO()
+    stats = pstats.Stats(_StatsSource(capture["stats"]), stream=stream)
+    stats.sort_stats(sort_by).print_stats(limit)
+    return stream.getvalue()
+
+def profile_bytes(capture):
+    """A capture in the .prof format (open with snakeviz, pstats, ...)"""
+    return marshal.dumps(capture["stats"])
@@ -0,0 +1,222 @@
+"""
+Transcription Service Module
+Voice question transcription off the Streamlit script thread
+Audio is downmixed/resampled once with NumPy, then transcribed by a pluggable engine
+(Google Web Speech, or local CPU-only CMU Sphinx) in a bounded worker pool; the UI polls a job handle
+"""
+import hashlib
+import io
+import threading
+import time
+import wave
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
+import config
+from utils.response_cache import TTLCache
+
+# Optional dependency: SpeechRecognition provides both engines
+try:
+    import speech_recognition as sr
+    SPEECH_RECOGNITION_AVAILABLE = True
+except ImportError:
+    sr = None
+    SPEECH_RECOGNITION_AVAILABLE = False
+
+def prepare_audio(audio_bytes, target_rate=None, max_seconds=None):
+    """
+    Decode a WAV recording into 16-bit mono PCM at the target sample rate (done once per recording)
+    Returns: dict with samples (int16 array), sample_rate, duration_seconds and truncated flag
+    """
+    target_rate = target_rate or config.TRANSCRIPTION_SAMPLE_RATE
+    max_seconds = max_seconds or config.TRANSCRIPTION_MAX_SECONDS
+
+    with wave.open(io.BytesIO(audio_bytes), 'rb') as wav:
+        channels = wav.getnchannels()
+        sample_width = wav.getsampwidth()
+        rate = wav.getframerate()
+        # Never decode more than we will transcribe
+        frames = min(wav.getnframes(), int(rate * max_seconds))
+        truncated = wav.getnframes() > frames
+        raw = wav.readframes(frames)
+
+    # Integer PCM of any width -> float32 in the int16 range
+    if sample_width == 1:
+        samples = (np.frombuffer(raw, dtype=np.uint8).astype(np.float32) - 128) * 256
+    elif sample_width == 2:
+        samples = np.frombuffer(raw, dtype='<i2').astype(np.float32)
+    elif sample_width == 3:
+        bytes_ = np.frombuffer(raw, dtype=np.uint8).reshape(-1, 3).astype(np.int32)
+        samples = ((bytes_[:, 0] << 8 | bytes_[:, 1] << 16 | bytes_[:, 2] << 24) >> 16).astype(np.float32)
+    elif sample_width == 4:
+        samples = (np.frombuffer(raw, dtype='<i4') >> 16).astype(np.float32)
+    else:
+        raise ValueError(f"Unsupported sample width: {sample_width} bytes")
+
+    # Downmix: average the interleaved channels
+    if channels > 1:
+        samples = samples[:len(samples) - len(samples) % channels].reshape(-1, channels).mean(axis=1)
+
+    # Resample: box low-pass (prefix sums) against aliasing, then linear interpolation
+    if rate != target_rate and len(samples):
+        window = int(np.ceil(rate / target_rate))
+        if window > 1:
+            prefix = np.concatenate(([0.0], np.cumsum(samples, dtype=np.float64)))
+            smoothed = (prefix[window:] - prefix[:-window]) / window
+            samples = np.concatenate((smoothed, samples[len(smoothed):])).astype(np.float32)
+        count = int(round(len(samples) * target_rate / rate))
+        positions = np.arange(count) * (rate / target_rate)
+        samples = np.interp(positions, np.arange(len(samples)), samples).astype(np.float32)
+        rate = target_rate
+
+    pcm = np.clip(np.round(samples), -32768, 32767).astype(np.int16)
+    return {
+        "samples": pcm,
+        "sample_rate": rate,
+        "duration_seconds": round(len(pcm) / rate, 2) if rate else 0.0,
+        "truncated": truncated
+    }
+
+class TranscriptionEngine:
+    """Base class for a speech-to-text engine"""
+    name = ""
+    label = ""
+    local = False  # True if the engine runs fully on this machine
+
+    def is_available(self):
+        return SPEECH_RECOGNITION_AVAILABLE
+
+    def transcribe(self, audio):
+        """
+        Transcribe prepared audio (see prepare_audio)
+        Returns: text, or None if nothing intelligible was said
+        """
+        raise NotImplementedError
+
+    def _audio_data(self, audio):
+        return sr.AudioData(audio["samples"].tobytes(), audio["sample_rate"], 2)
+
+class GoogleSpeechEngine(TranscriptionEngine):
+    name = "google"
+    label = "Google Web Speech (online)"
+
+    def transcribe(self, audio):
+        try:
+            return sr.Recognizer().recognize_google(self._audio_data(audio))
+        except sr.UnknownValueError:
+            return None
+
+class SphinxEngine(TranscriptionEngine):
+    name = "sphinx"
+    label = "CMU Sphinx (offline, CPU)"
+    local = True
+
+    def is_available(self):
+        if not SPEECH_RECOGNITION_AVAILABLE:
+            return False
+        try:
+            import pocketsphinx  # noqa: F401
+            return True
+        except ImportError:
+            return False
+
+    def transcribe(self, audio):
+        try:
+            return sr.Recognizer().recognize_sphinx(self._audio_data(audio))
+        except sr.UnknownValueError:
+            return None
+
+class TranscriptionService:
+    def __init__(self, engines=None, max_workers=None, max_pending=None):
+        """
+        engines: TranscriptionEngine instances in preference order (default: configured engine first)
+        max_workers: worker threads; max_pending: queued + running jobs before new ones are refused
+        """
+        if engines is None:
+            engines = [GoogleSpeechEngine(), SphinxEngine()]
+            engines.sort(key=lambda engine: engine.name != config.TRANSCRIPTION_ENGINE)
+        self.engines = {engine.name: engine for engine in engines}
+        self.max_pending = max_pending or config.TRANSCRIPTION_MAX_PENDING
+        self._executor = ThreadPoolExecutor(
+            max_workers=max_workers or config.TRANSCRIPTION_WORKERS,
+            thread_name_prefix="transcription"
+        )
+        # Finished jobs are kept for a while so reruns can read the result
+        self._jobs = TTLCache(max_entries=200, ttl_seconds=3600)
+        self._pending = 0
+        self._lock = threading.Lock()
+
+    def available_engines(self):
+        """Engines that can run here, in preference order: list of (name, label)"""
+        return [(engine.name, engine.label) for engine in self.engines.values() if engine.is_available()]
+
+    def submit(self, audio_bytes, engine=None):
+        """
+        Queue a recording for transcription (the same recording + engine returns the existing job)
+        Returns: job snapshot dict (see get_job)
+        """
+        available = [name for name, _ in self.available_engines()]
+        engine_name = engine if engine in available else (available[0] if available else None)
+        job_id = hashlib.sha1(audio_bytes).hexdigest()[:16] + f"-{engine_name}"
+
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is not None:
+                return dict(job)
+            job = {
+                "id": job_id,
+                "engine": engine_name,
+                "status": "queued",
+                "text": None,
+                "error": None,
+                "duration_seconds": None,
+                "truncated": False,
+                "submitted_at": time.time(),
+                "elapsed_seconds": None
+            }
+            if engine_name is None:
+                job.update(status="failed", error="No speech recognition engine is installed.")
+            elif self._pending >= self.max_pending:
+                # Refused jobs are not stored, so the same recording can be retried later
+                job.update(status="failed", error="Too many voice questions are being transcribed. Please try again in a moment.")
+                return dict(job)
+            else:
+                self._pending += 1
+            self._jobs.set(job_id, job)
+
+        if engine_name is not None:
+            self._executor.submit(self._run, job, audio_bytes)
+        return dict(job)
+
+    def _run(self, job, audio_bytes):
+        """Worker: prepare the audio once, then run the engine"""
+        started = time.perf_counter()
+        job["status"] = "running"
+        try:
+            audio = prepare_audio(audio_bytes)
+            job["duration_seconds"] = audio["duration_seconds"]
+            job["truncated"] = audio["truncated"]
+            text = self.engines[job["engine"]].transcribe(audio)
+            if text:
+                job.update(status="done", text=text)
+            else:
+                job.update(status="failed", error="Could not understand audio.")
+        except Exception as e:
+            if sr is not None and isinstance(e, sr.RequestError):
+                error = f"Could not reach the speech service: {e}"
+            else:
+                error = f"Error processing audio: {e}"
+            print(f"❌ Transcription error: {e}")
+            job.update(status="failed", error=error)
+        finally:
+            job["elapsed_seconds"] = round(time.perf_counter() - started, 2)
+            with self._lock:
+                self._pending -= 1
+
+    def get_job(self, job_id):
+        """
+        Current state of a job
+        Returns: dict with id, engine, status ("queued"/"running"/"done"/"failed"), text, error,
+                 duration_seconds, truncated and elapsed_seconds; None if the job is unknown
+        """
+        job = self._jobs.get(job_id)
+        return dict(job) if job is not None else None
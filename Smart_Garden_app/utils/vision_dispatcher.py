@@ -0,0 +1,160 @@
+"""
+Vision Dispatcher Module
+Hedged requests across vision providers (Hugging Face, Gemini)
+Sends to the fastest healthy provider first and, after a latency threshold, races a second one
+"""
+import contextvars
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+import config
+from utils.tracing import traced
+
+def is_valid_identification(result):
+    """An identification is usable if it names a plant and is not a mock/low-confidence fallback"""
+    if not isinstance(result, dict):
+        return False
+    plant_name = str(result.get("plant_name", "")).strip()
+    return (
+        plant_name not in ("", "Unknown Plant")
+        and result.get("source") != "Mock"
+        and str(result.get("confidence", "")).lower() != "low"
+    )
+
+def is_valid_health_analysis(result):
+    """A health analysis is usable if it has text and no error"""
+    return isinstance(result, dict) and not result.get("error") and bool(result.get("analysis"))
+
+class LatencyTracker:
+    """Rolling latency samples and outcomes for one provider"""
+
+    def __init__(self, window=50):
+        self.latencies = deque(maxlen=window)
+        self.outcomes = deque(maxlen=window)  # True = valid answer
+        self._lock = threading.Lock()
+
+    def record(self, seconds, valid):
+        with self._lock:
+            self.outcomes.append(valid)
+            if valid:
+                self.latencies.append(seconds)
+
+    def percentile(self, p):
+        """Latency percentile in seconds (None until there are samples)"""
+        with self._lock:
+            samples = sorted(self.latencies)
+        if not samples:
+            return None
+        rank = min(len(samples) - 1, max(0, int(round(p / 100 * (len(samples) - 1)))))
+        return samples[rank]
+
+    def failure_rate(self):
+        with self._lock:
+            if not self.outcomes:
+                return 0.0
+            return 1 - sum(self.outcomes) / len(self.outcomes)
+
+    def snapshot(self):
+        return {
+            "p50": self.percentile(50),
+            "p95": self.percentile(95),
+            "samples": len(self.latencies),
+            "failure_rate": round(self.failure_rate(), 2)
+        }
+
+class VisionDispatcher:
+    def __init__(self, providers, is_valid, hedge_after_seconds=None, max_workers=4):
+        """
+        providers: dict of name -> callable(image_bytes, *args) in preferred order
+        is_valid: callable(result) -> True if the answer can be shown to the user
+        hedge_after_seconds: wait this long for the primary before racing the secondary
+        """
+        self.providers = dict(providers)
+        self.is_valid = is_valid
+        self.hedge_after_seconds = hedge_after_seconds or config.VISION_HEDGE_AFTER_SECONDS
+        self.trackers = {name: LatencyTracker() for name in self.providers}
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="vision")
+
+    def provider_order(self):
+        """
+        Providers ordered for the next request
+        Healthy providers first, then lowest p50; unmeasured providers keep their configured order
+        """
+        configured = list(self.providers)
+
+        def sort_key(name):
+            tracker = self.trackers[name]
+            p50 = tracker.percentile(50)
+            return (tracker.failure_rate() > 0.5, p50 is None, p50 or 0.0, configured.index(name))
+
+        return sorted(configured, key=sort_key)
+
+    def hedge_delay(self, provider):
+        """Wait roughly the primary's p95 (bounded by the configured threshold) before hedging"""
+        p95 = self.trackers[provider].percentile(95)
+        if p95 is None:
+            return self.hedge_after_seconds
+        return max(config.VISION_MIN_HEDGE_SECONDS, min(self.hedge_after_seconds, p95))
+
+    def _start(self, name, image_bytes, args):
+        """Submit one provider call and record its latency when it finishes"""
+        started = time.perf_counter()
+
+        def run():
+            try:
+                result = self.providers[name](image_bytes, *args)
+            except Exception as e:
+                print(f"❌ Vision provider {name} error: {e}")
+                result = None
+            self.trackers[name].record(time.perf_counter() - started, self.is_valid(result))
+            return result
+
+        # Run in a copy of the caller's context so provider spans join the page render trace
+        return self._executor.submit(contextvars.copy_context().run, run)
+
+    @traced("vision.dispatch")
+    def dispatch(self, image_bytes, *args):
+        """
+        Run the request (extra args are passed to every provider), hedging to the secondary provider if the primary is slow or fails
+        Returns: the first valid result (with "provider" and "hedged" keys added),
+                 or the primary's (invalid) result if no provider gave a valid answer
+        """
+        order = self.provider_order()
+        primary = order[0]
+        futures = {self._start(primary, image_bytes, args): primary}
+        fallback_result, fallback_provider = None, primary
+        hedged = False
+
+        # Give the primary a head start
+        done, _ = wait(futures, timeout=self.hedge_delay(primary))
+        remaining = order[1:]
+
+        while True:
+            for future in done:
+                name = futures.pop(future)
+                result = future.result()
+                if self.is_valid(result):
+                    # Winner found - the loser is cancelled if it has not started, otherwise ignored
+                    for loser in futures:
+                        loser.cancel()
+                    return {**result, "provider": name, "hedged": hedged}
+                if name == primary or fallback_result is None:
+                    fallback_result, fallback_provider = result, name
+
+            # Primary is slow or failed: race the next provider
+            if remaining and (not futures or not done):
+                secondary = remaining.pop(0)
+                futures[self._start(secondary, image_bytes, args)] = secondary
+                hedged = True
+
+            if not futures:
+                break
+            done, _ = wait(futures, return_when=FIRST_COMPLETED)
+
+        result = fallback_result if isinstance(fallback_result, dict) else {}
+        return {**result, "provider": fallback_provider, "hedged": hedged}
+
+    def latency_report(self):
+        """Per-provider p50/p95 latency, sample count and failure rate"""
+        return {name: tracker.snapshot() for name, tracker in self.trackers.items()}
@@ -0,0 +1,192 @@
+"""
+Watering Log Module
+Append-only history of watering events per plant
+Stores fixed-size binary records (plant id + timestamp) so the file stays compact
+A header carries a random generation that changes on every compaction, so readers in other
+processes notice a rewrite even when appends have grown the file past the size they had loaded
+"""
+import os
+import struct
+import threading
+import statistics
+from array import array
+from bisect import bisect_left, bisect_right
+from datetime import datetime, timedelta
+
+# One record = plant_id (uint32) + unix timestamp (float64) = 12 bytes
+RECORD_FORMAT = "<Id"
+RECORD_SIZE = struct.calcsize(RECORD_FORMAT)
+
+# Header = magic + generation (uint64), the same size as a record so records stay aligned
+# Logs written before the header existed start directly with records (generation None)
+HEADER_FORMAT = "<4sQ"
+HEADER_SIZE = struct.calcsize(HEADER_FORMAT)
+HEADER_MAGIC = b"WLOG"
+
+# Two waterings closer than this are treated as one (double clicks, corrections)
+MIN_INTERVAL_HOURS = 1
+
+class WateringLog:
+    def __init__(self, log_file):
+        self.log_file = log_file
+        self._lock = threading.Lock()
+        # plant_id -> array of sorted unix timestamps
+        self._index = {}
+        self._loaded_bytes = 0
+        self._generation = None
+
+    @staticmethod
+    def _new_header():
+        """Returns: (generation, header bytes) for a freshly written file"""
+        generation = int.from_bytes(os.urandom(8), "little")
+        return generation, struct.pack(HEADER_FORMAT, HEADER_MAGIC, generation)
+
+    def _refresh_index(self):
+        """Read records appended since the last load (caller holds the lock)"""
+        try:
+            if not os.path.exists(self.log_file):
+                return
+            with open(self.log_file, 'rb') as f:
+                head = f.read(HEADER_SIZE)
+                generation = None
+                if len(head) == HEADER_SIZE:
+                    magic, header_generation = struct.unpack(HEADER_FORMAT, head)
+                    if magic == HEADER_MAGIC:
+                        generation = header_generation
+                size = os.fstat(f.fileno()).st_size
+                if generation != self._generation or size < self._loaded_bytes:
+                    # File was compacted (or is new) - rebuild from scratch
+                    self._index = {}
+                    self._generation = generation
+                    self._loaded_bytes = HEADER_SIZE if generation is not None else 0
+                if size == self._loaded_bytes:
+                    return
+                f.seek(self._loaded_bytes)
+                data = f.read(size - self._loaded_bytes)
+            usable = len(data) - len(data) % RECORD_SIZE
+            for plant_id, timestamp in struct.iter_unpack(RECORD_FORMAT, data[:usable]):
+                self._insert(plant_id, timestamp)
+            self._loaded_bytes += usable
+        except Exception as e:
+            print(f"Error loading watering log: {e}")
+
+    def _insert(self, plant_id, timestamp):
+        """Insert a timestamp keeping the per-plant array sorted"""
+        events = self._index.setdefault(plant_id, array('d'))
+        if not events or timestamp >= events[-1]:
+            events.append(timestamp)
+        else:
+            events.insert(bisect_right(events, timestamp), timestamp)
+
+    def append(self, plant_id, when=None):
+        """
+        Record a watering event
+        Returns: datetime of the recorded event
+        """
+        when = when or datetime.now()
+        record = struct.pack(RECORD_FORMAT, int(plant_id), when.timestamp())
+        with self._lock:
+            self._refresh_index()
+            try:
+                directory = os.path.dirname(self.log_file)
+                if directory:
+                    os.makedirs(directory, exist_ok=True)
+                with open(self.log_file, 'ab') as f:
+                    if f.tell() == 0:
+                        self._generation, header = self._new_header()
+                        self._index = {}
+                        f.write(header)
+                        self._loaded_bytes = HEADER_SIZE
+                    f.write(record)
+                self._insert(int(plant_id), when.timestamp())
+                self._loaded_bytes += RECORD_SIZE
+            except Exception as e:
+                print(f"Error writing watering log: {e}")
+        return when
+
+    def delete_plant(self, plant_id):
+        """Drop all events of a plant (plant ids can be reused after deletion)"""
+        with self._lock:
+            self._refresh_index()
+            if plant_id not in self._index:
+                return
+            del self._index[plant_id]
+            try:
+                tmp_path = f"{self.log_file}.tmp"
+                generation, header = self._new_header()
+                with open(tmp_path, 'wb') as f:
+                    f.write(header)
+                    for other_id, events in self._index.items():
+                        for timestamp in events:
+                            f.write(struct.pack(RECORD_FORMAT, other_id, timestamp))
+                os.replace(tmp_path, self.log_file)
+                self._generation = generation
+                self._loaded_bytes = os.path.getsize(self.log_file)
+            except Exception as e:
+                print(f"Error compacting watering log: {e}")
+
+    def _events(self, plant_id):
+        """Get the sorted timestamp array of a plant"""
+        with self._lock:
+            self._refresh_index()
+            return self._index.get(plant_id, array('d'))
+
+    def get_events(self, plant_id, start=None, end=None):
+        """
+        Get watering events of a plant within [start, end]
+        Returns: list of datetimes, oldest first
+        """
+        events = self._events(plant_id)
+        lo = bisect_left(events, start.timestamp()) if start else 0
+        hi = bisect_right(events, end.timestamp()) if end else len(events)
+        return [datetime.fromtimestamp(t) for t in events[lo:hi]]
+
+    def last_events(self, plant_id, n=5):
+        """Get the last N watering events, oldest first"""
+        events = self._events(plant_id)
+        return [datetime.fromtimestamp(t) for t in events[-n:]] if n else []
+
+    def count_events(self, plant_id, start=None, end=None):
+        """Count watering events within [start, end] without materializing them"""
+        events = self._events(plant_id)
+        lo = bisect_left(events, start.timestamp()) if start else 0
+        hi = bisect_right(events, end.timestamp()) if end else len(events)
+        return max(0, hi - lo)
+
+    def get_intervals(self, plant_id, max_intervals=10):
+        """Get the most recent gaps between waterings in days"""
+        events = self._events(plant_id)[-(max_intervals + 1):]
+        intervals = []
+        for previous, current in zip(events, events[1:]):
+            gap_hours = (current - previous) / 3600
+            if gap_hours >= MIN_INTERVAL_HOURS:
+                intervals.append(gap_hours / 24)
+        return intervals
+
+    def median_interval_days(self, plant_id, min_intervals=3):
+        """
+        Median gap between recent waterings
+        Returns: float days, or None if there is not enough history
+        """
+        intervals = self.get_intervals(plant_id)
+        if len(intervals) < min_intervals:
+            return None
+        return statistics.median(intervals)
+
+    def events_per_week(self, plant_id, weeks=4):
+        """Average number of waterings per week over the last N weeks"""
+        start = datetime.now() - timedelta(weeks=weeks)
+        return self.count_events(plant_id, start=start) / weeks
+
+    def get_stats(self, plant_id, last_n=5):
+        """
+        Summary of a plant's watering history
+        Returns: dict with total events, median interval, recent events and weekly rate
+        """
+        median_interval = self.median_interval_days(plant_id)
+        return {
+            "total_events": self.count_events(plant_id),
+            "median_interval_days": round(median_interval, 1) if median_interval is not None else None,
+            "last_events": self.last_events(plant_id, last_n),
+            "events_per_week": round(self.events_per_week(plant_id), 1)
+        }
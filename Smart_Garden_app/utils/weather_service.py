@@ -3,15 +3,18 @@ Weather Service Module
 Handles all weather-related API calls and data processing
 Uses OpenWeatherMap API (free tier)
 """
-import requests
 import json
 from datetime import datetime, timedelta
 import config
+from utils.metrics import http_request, record_fallback
+from utils.tracing import trace_methods
+from utils.forecast_timeline import ForecastTimeline, HEAVY_RAIN_MM_PER_HOUR
 
+@trace_methods("weather")
 class WeatherService:
     def __init__(self):
-        # Access API key dynamically from config module (supports secrets.toml)
-        self.api_key = config.get_openweather_key()
+        # API key from the resolved settings (secrets.toml or .env, resolved once per process)
+        self.api_key = config.get_settings().openweather_api_key
         self.base_url = config.OPENWEATHER_BASE_URL
         
     def get_current_weather(self, city=None, country_code="PK"):
@@ -22,6 +25,7 @@ class WeatherService:
         Returns: dict with temperature, condition, humidity, cloud cover, etc.
         """
         if not self.api_key:
+            record_fallback("openweather", "current_weather", "no_api_key")
             return self._get_mock_weather()
             
         try:
@@ -31,7 +35,7 @@ class WeatherService:
                 "appid": self.api_key,
                 "units": "metric"
             }
-            response = requests.get(url, params=params, timeout=10)
+            response = http_request("openweather", "current_weather", "GET", url, params=params, timeout=10)
             
             if response.status_code == 200:
                 data = response.json()
@@ -43,17 +47,23 @@ class WeatherService:
                     "humidity": data["main"]["humidity"],
                     "cloud_cover": data.get("clouds", {}).get("all", 0),
                     "wind_speed": data.get("wind", {}).get("speed", 0),
+                    "precipitation": data.get("rain", {}).get("1h", 0),  # mm in the last hour
                     "icon": data["weather"][0]["icon"],
                     "city": data["name"],
                     "country": data["sys"]["country"],
+                    "lat": data.get("coord", {}).get("lat"),
+                    "lon": data.get("coord", {}).get("lon"),
                     "sunrise": datetime.fromtimestamp(data["sys"]["sunrise"]),
                     "sunset": datetime.fromtimestamp(data["sys"]["sunset"]),
-                    "timestamp": datetime.now()
+                    "timestamp": datetime.now(),
+                    "source": "openweather"
                 }
             else:
+                record_fallback("openweather", "current_weather", "http_status")
                 return self._get_mock_weather()
         except Exception as e:
             print(f"Weather API Error: {e}")
+            record_fallback("openweather", "current_weather", "exception")
             return self._get_mock_weather()
     
     def get_forecast(self, city=None, country_code="PK", days=3):
@@ -64,6 +74,7 @@ class WeatherService:
         Returns: list of forecast data
         """
         if not self.api_key:
+            record_fallback("openweather", "forecast", "no_api_key")
             return self._get_mock_forecast()
             
         try:
@@ -73,7 +84,7 @@ class WeatherService:
                 "appid": self.api_key,
                 "units": "metric"
             }
-            response = requests.get(url, params=params, timeout=10)
+            response = http_request("openweather", "forecast", "GET", url, params=params, timeout=10)
             
             if response.status_code == 200:
                 data = response.json()
@@ -90,65 +101,71 @@ class WeatherService:
                     })
                 return forecasts
             else:
+                record_fallback("openweather", "forecast", "http_status")
                 return self._get_mock_forecast()
         except Exception as e:
             print(f"Forecast API Error: {e}")
+            record_fallback("openweather", "forecast", "exception")
             return self._get_mock_forecast()
     
-    def check_rain_alert(self, city=None, country_code="PK", hours_ahead=24):
-        if city is None:
-            city = config.DEFAULT_CITY
+    def get_forecast_timeline(self, city=None, country_code="PK", days=2):
         """
-        Check if rain is expected in the next N hours
+        Forecast interpolated to hourly resolution
+        Returns: ForecastTimeline starting at the current hour
+        """
+        return ForecastTimeline.from_forecast(self.get_forecast(city, country_code, days=days))
+    
+    def _hourly_events(self, timeline, kind, hours_ahead):
+        """(hour offset, time, hours from now) of each hour with rain / a storm in the next hours_ahead hours"""
+        now = datetime.now()
+        for hour in timeline.events(kind, hours_ahead):
+            time = timeline.hour_time(hour)
+            yield hour, time, max(0.0, round((time - now).total_seconds() / 3600, 1))
+    
+    def check_rain_alert(self, city=None, country_code="PK", hours_ahead=24, timeline=None):
+        """
+        Check if rain is expected in the next N hours (hourly resolution)
+        timeline: the location's ForecastTimeline if already built (saves a forecast request)
         Returns: dict with rain alert info
         """
-        forecast = self.get_forecast(city, country_code, days=2)
-        current_time = datetime.now()
+        if timeline is None:
+            timeline = self.get_forecast_timeline(city, country_code, days=2)
         
-        rain_alerts = []
-        for item in forecast:
-            time_diff = (item["datetime"] - current_time).total_seconds() / 3600
-            if 0 <= time_diff <= hours_ahead:
-                if item["precipitation"] > 0 or "rain" in item["description"].lower():
-                    rain_alerts.append({
-                        "time": item["datetime"],
-                        "hours_from_now": round(time_diff, 1),
-                        "intensity": "Heavy" if item["precipitation"] > 5 else "Light",
-                        "description": item["description"]
-                    })
+        rain_alerts = [
+            {
+                "time": time,
+                "hours_from_now": hours_from_now,
+                "intensity": "Heavy" if timeline.precipitation[hour] > HEAVY_RAIN_MM_PER_HOUR else "Light",
+                "description": timeline.descriptions[hour]
+            }
+            for hour, time, hours_from_now in self._hourly_events(timeline, "rain", hours_ahead)
+        ]
         
         return {
             "has_rain": len(rain_alerts) > 0,
             "alerts": rain_alerts,
-            "next_rain": rain_alerts[0] if rain_alerts else None
+            "next_rain": rain_alerts[0] if rain_alerts else None,
+            "precipitation_mm": round(timeline.precipitation_between(0, hours_ahead), 1)
         }
     
-    def check_storm_alert(self, city=None, country_code="PK", hours_ahead=24):
-        if city is None:
-            city = config.DEFAULT_CITY
+    def check_storm_alert(self, city=None, country_code="PK", hours_ahead=24, timeline=None):
         """
-        Check for severe weather (thunderstorm, hail, etc.)
+        Check for severe weather (thunderstorm, hail, etc.) in the next N hours (hourly resolution)
+        timeline: the location's ForecastTimeline if already built (saves a forecast request)
         Returns: dict with storm alert info
         """
-        forecast = self.get_forecast(city, country_code, days=2)
-        current_time = datetime.now()
+        if timeline is None:
+            timeline = self.get_forecast_timeline(city, country_code, days=2)
         
-        storm_keywords = ["thunderstorm", "storm", "hail", "extreme"]
-        storm_alerts = []
-        
-        for item in forecast:
-            time_diff = (item["datetime"] - current_time).total_seconds() / 3600
-            if 0 <= time_diff <= hours_ahead:
-                condition_lower = item["condition"].lower()
-                desc_lower = item["description"].lower()
-                
-                if any(keyword in condition_lower or keyword in desc_lower for keyword in storm_keywords):
-                    storm_alerts.append({
-                        "time": item["datetime"],
-                        "hours_from_now": round(time_diff, 1),
-                        "condition": item["condition"],
-                        "description": item["description"]
-                    })
+        storm_alerts = [
+            {
+                "time": time,
+                "hours_from_now": hours_from_now,
+                "condition": timeline.conditions[hour],
+                "description": timeline.descriptions[hour]
+            }
+            for hour, time, hours_from_now in self._hourly_events(timeline, "storm", hours_ahead)
+        ]
         
         return {
             "has_storm": len(storm_alerts) > 0,
@@ -312,12 +329,14 @@ class WeatherService:
             "humidity": 60,
             "cloud_cover": 10,
             "wind_speed": 5,
+            "precipitation": 0,
             "icon": "01d",
             "city": config.DEFAULT_CITY,
             "country": "PK",
             "sunrise": datetime.now().replace(hour=6, minute=0),
             "sunset": datetime.now().replace(hour=18, minute=0),
-            "timestamp": datetime.now()
+            "timestamp": datetime.now(),
+            "source": "mock"  # Not an observation: never recorded in the observation store
         }
     
     def _get_mock_forecast(self):